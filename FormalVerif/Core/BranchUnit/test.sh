@@ -1,6 +1,7 @@
 gitroot="`git rev-parse --show-toplevel`"
 ./clean.sh
-sv2v --define=FORMAL $gitroot/Logic/Core/BranchUnit.sv > BranchUnit.v
+$gitroot/Tools/build_cache sv2v --define=FORMAL -o BranchUnit.v $gitroot/Logic/Core/BranchUnit.sv \
+    $gitroot/Logic/Lib/Adder.sv
 
 sby BranchUnit.sby # symbiyosys
 if ! [ $? -eq 0 ]
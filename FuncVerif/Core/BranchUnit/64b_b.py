@@ -3,7 +3,7 @@ import cocotb
 from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge
 from cocotb.triggers import Timer
-import utils
+from powerverif import utils, isa
 import common
 DEBUG = False  # Main switch to turn on/off debugging prints
 
@@ -40,8 +40,8 @@ async def test_bf_64b_b(dut):
 
     # The Identify unit returns a Branch I-form instruction with AA=1 and LK=1
     LI = 0xCAFE
-    dut.i_instr.value = int(utils.branch_i_form_to_string(
-        PO=18, LI=LI, AA=1, LK=1)[:32], 2)
+    dut.i_instr.value = isa.branch_i_form(
+        PO=18, LI=LI, AA=1, LK=1)
     expected_branch_target_addr = utils.exts(LI << 2, length=26, new_length=64)
     if DEBUG:
         print("Sending JUMP to address: "+str(expected_branch_target_addr))
@@ -74,8 +74,8 @@ async def test_bf_64b_b(dut):
     # The Identify unit returns a Branch I-form instruction with AA=0 and LK=0
     # And a negative LI
     LI = 0x800FEE
-    dut.i_instr.value = int(utils.branch_i_form_to_string(
-        PO=18, LI=LI, AA=0, LK=0)[:32], 2)
+    dut.i_instr.value = isa.branch_i_form(
+        PO=18, LI=LI, AA=0, LK=0)
     # See ISA section 2.4
     exts_li = utils.exts(LI << 2, length=26, new_length=64)
     expected_branch_target_addr = utils.adds_64b(
@@ -3,7 +3,7 @@ import cocotb
 from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge
 from cocotb.triggers import Timer
-import utils
+from powerverif import utils, isa
 import common
 DEBUG = False  # Main switch to turn on/off debugging prints
 
@@ -18,7 +18,7 @@ async def test_bf_64b_bc(dut):
     CTR = 0  # Registers are expected to be reset
     assert dut.o_next_instr_addr.value.integer == NIA, "First address should be 0"
 
-    for iteration in range(100):
+    for iteration in range(utils.iterations(100)):
         # Icache load the data at NIA (Next Instruction Address)
         await RisingEdge(dut.i_clk)
         if DEBUG:
@@ -141,8 +141,8 @@ async def test_bf_64b_bc(dut):
             print(f"Expected NIA: 0x{NIA:>x} = 0b{NIA:>064b}")
             print(f"Expected LR: 0x{LR:>x} = 0b{LR:>064b}")
             print(f"Expected CTR: 0x{CTR:>x} = 0b{CTR:>064b}")
-        dut.i_instr.value = int(utils.branch_b_form_to_string(
-            16, BO, BI, BD, AA, LK)[:32], 2)
+        dut.i_instr.value = isa.branch_b_form(
+            16, BO, BI, BD, AA, LK)
         dut.i_stall.value = 0b0  # No stall
         dut.i_en.value = 0b1  # This is a branch
         dut.i_i_form.value = 0b0
@@ -3,8 +3,9 @@ import cocotb
 from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge
 from cocotb.triggers import Timer
-import utils
+from powerverif import utils, isa
 import common
+from powerverif.branch import expected_CTR, expected_LR
 DEBUG = False  # Main switch to turn on/off debugging prints
 
 
@@ -23,7 +24,7 @@ async def test_bf_64b_bctar(dut):
     TAR = 0
     assert dut.o_next_instr_addr.value.integer == NIA, "First address after reset sequence should be 0"
 
-    for iteration in range(100):
+    for iteration in range(utils.iterations(100)):
         # Icache load the data at NIA (Next Instruction Address)
         await RisingEdge(dut.i_clk)
         if DEBUG:
@@ -76,8 +77,8 @@ async def test_bf_64b_bctar(dut):
             print(f"Expected LR: 0x{LR:>x} = 0b{LR:>064b}")
             print(f"Expected CTR: 0x{CTR:>x} = 0b{CTR:>064b}")
 
-        dut.i_instr.value = int(utils.branch_xl_form_to_string(
-            PO=19, BO=BO, BI=BI, BH=BH, XO=560, LK=LK)[:32], 2)
+        dut.i_instr.value = isa.branch_xl_form(
+            PO=19, BO=BO, BI=BI, BH=BH, XO=560, LK=LK)
         dut.i_stall.value = 0b0  # No stall
         dut.i_en.value = 0b1  # This is a branch
         dut.i_i_form.value = 0b0
@@ -95,31 +96,3 @@ async def test_bf_64b_bctar(dut):
 
 def expected_branch_target_address(TAR: int) -> int:
     return TAR & 0xfffffffffffffffc
-
-
-def expected_LR(LR, CIA, LK):
-    if LK == 1:
-        return CIA+4  # Effective address of the instruction following the Branch Instruction
-    return LR
-
-
-def expected_CTR(CTR, tBO) -> int:
-    # Returns new CTR value
-    if tBO == 0:
-        return utils.sub_64b(CTR, 1)
-    elif tBO == 1:
-        return utils.sub_64b(CTR, 1)
-    elif tBO == 2:
-        return CTR
-    elif tBO == 3:
-        return utils.sub_64b(CTR, 1)
-    elif tBO == 4:
-        return utils.sub_64b(CTR, 1)
-    elif tBO == 5:
-        return CTR
-    elif tBO == 6:
-        return utils.sub_64b(CTR, 1)
-    elif tBO == 7:
-        return utils.sub_64b(CTR, 1)
-    else:
-        return CTR
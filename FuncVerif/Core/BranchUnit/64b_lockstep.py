@@ -0,0 +1,52 @@
+import cocotb
+from cocotb.triggers import RisingEdge
+from cocotb.triggers import Timer
+from powerverif import utils, isa, stimulus
+from powerverif.trace import Trace, LockstepChecker
+import common
+# Lockstep mode: random branches are streamed in, the DUT's outputs are sampled
+# into a binary trace and compared with the ISS trace by a background thread
+# (no assertion inside the simulation loop).
+# The stimulus is generated by powerverif.stimulus or replayed from the file
+# given by the STIMULUS environment variable.
+
+# One record per cycle: CIA, LR and CTR (before the branch) and the NIA
+FIELDS = [("cia", 64), ("lr", 64), ("ctr", 64), ("nia", 64)]
+CYCLES = utils.iterations(10000)
+CHECK_PERIOD = 1024  # Cycles between two background comparisons
+
+
+@cocotb.test()
+async def test_bf_64b_lockstep(dut):
+    """ Random branches (all forms) checked against the ISS trace / 64bit mode """
+    await common.init_sequence(dut, mode=64)
+    stim = stimulus.load("BranchUnit", CYCLES)
+    expected = Trace(FIELDS)
+    expected.extend((r.cia, r.lr, r.ctr, r.nia) for r in stim)
+    actual = Trace(FIELDS)
+    checker = LockstepChecker(actual, expected)
+
+    for cycle, (instr, CR, TAR, *_) in enumerate(stim):
+        await RisingEdge(dut.i_clk)
+        await Timer(200, units="ps")
+        mnemonic = isa.identify(instr).mnemonic
+        dut.i_instr.value = instr
+        dut.i_stall.value = 0b0  # No stall
+        dut.i_en.value = 0b1  # This is a branch
+        dut.i_i_form.value = mnemonic == "b"
+        dut.i_b_form.value = mnemonic == "bc"
+        dut.i_cond_LR.value = mnemonic == "bclr"
+        dut.i_cond_CTR.value = mnemonic == "bcctr"
+        dut.i_cond_TAR.value = mnemonic == "bctar"
+        dut.i_condition_register.value = CR
+        dut.i_target_address_register.value = TAR
+        await Timer(100, units="ps")  # Give time for the combinatinal logic
+        actual.append(dut.cia.value.integer, dut.o_link_register.value.integer,
+                      dut.o_count_register.value.integer, dut.o_next_instr_addr.value.integer)
+        if cycle % CHECK_PERIOD == CHECK_PERIOD - 1:
+            checker.check()
+
+    mismatch = checker.close()
+    if mismatch is not None:
+        actual.save("lockstep_dut.trace")
+    assert mismatch is None, str(mismatch)
@@ -2,10 +2,13 @@ import cocotb
 from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge
 from cocotb.triggers import Timer
-import utils
+import powerverif
+# Golden model shared by all the Branch Unit testbenches
+from powerverif.branch import str_tBO, str_BH, should_branch, generate_BO
 
 
 async def init_sequence(dut, mode):
+    dut._log.info(f"powerverif imported in {powerverif.IMPORT_TIME*1e3:.2f} ms")
     clock = Clock(dut.i_clk, 1, units="ns")  # 1ns clock period
     cocotb.fork(clock.start())
     dut.i_rst.value = 0b1
@@ -33,94 +36,3 @@ async def init_sequence(dut, mode):
     dut.i_rst.value = 0b0
     await Timer(200, units="ps")  # reset counters
     await Timer(200, units="ps")  # reset counters
-
-
-def str_tBO(tBO: int) -> str:
-    if tBO == 0:
-        return "Decrement CTR; Branch if CTR!=0 and CR[BI]=0"
-    elif tBO == 1:
-        return "Decrement CTR; Branch if CTR=0 and CR[BI]=0"
-    elif tBO == 2:
-        return "Branch if CR[BI]=0"
-    elif tBO == 3:
-        return "Decrement CTR; Branch if CTR!=0 and CR[BI]=1"
-    elif tBO == 4:
-        return "Decrement CTR; Branch if CTR=0 and CR[BI]=1"
-    elif tBO == 5:
-        return "Branch if CR[BI]!=0"
-    elif tBO == 6:
-        return "Decrement CTR; Branch if CTR!=0"
-    elif tBO == 7:
-        return "Decrement CTR; Branch if CTR=0"
-    else:
-        return "Always Branch"
-
-
-def str_BH(BH: int, t: str) -> str:
-    """
-    t can be "bclr" "bcctr" "bctar"
-    """
-    if BH == 0b00 and t == "bclr":
-        return "The instruction is a subroutine return"
-    elif BH == 0b00 and (t == "bcctr" or t == "bctar"):
-        return "Target address is likely to be the same as the last time the branch was taken"
-    elif BH == 0b01 and t == "bclr":
-        return "Target address is likely to be the same as the last time the branch was taken"
-    elif BH == 0b01 and (t == "bcctr" or t == "bctar"):
-        return "Reserved"
-    elif BH == 0b11:
-        return "Target address is not predictable"
-    else:
-        return "Error"
-
-
-def should_branch(tBO, CR, BI, CTR) -> bool:
-    if tBO == 0:
-        return utils.select_bit(
-            reg=CR, size=32, bit=BI) == 0 and CTR != 0  # CTR[0:63]
-    elif tBO == 1:
-        return utils.select_bit(
-            reg=CR, size=32, bit=BI) == 0 and CTR == 0
-    elif tBO == 2:
-        return utils.select_bit(reg=CR, size=32, bit=BI) == 0
-    elif tBO == 3:
-        return utils.select_bit(
-            reg=CR, size=32, bit=BI) == 1 and CTR != 0
-    elif tBO == 4:
-        return utils.select_bit(
-            reg=CR, size=32, bit=BI) == 1 and CTR == 0
-    elif tBO == 5:
-        return utils.select_bit(reg=CR, size=32, bit=BI) == 1
-    elif tBO == 6:
-        return CTR != 0
-    elif tBO == 7:
-        return CTR == 0
-    else:
-        return True
-
-
-def generate_BO(tBO, A, T) -> int:
-    if tBO == 0:
-        # Decrement CTR then branch if CTR[M:63] != 0 and CR[BI] == 0
-        return utils.random_bin("0000?")
-    elif tBO == 1:
-        # Decrement the CTR then branch if CTR[M:63] == 0 and CR[BI] == 0
-        return utils.random_bin("0001?")
-    elif tBO == 2:
-        return 0b00100 | A << 1 | T  # Branch if CR[BI] == 0
-    elif tBO == 3:
-        # Decrement the CTR, then branch if CTR[M:63] != 0 and CR[BI] == 1
-        return utils.random_bin("0100?")
-    elif tBO == 4:
-        # Decrement the CTR, then branch if CTR[M:63] == 0 and CR[BI] == 1
-        return utils.random_bin("0101?")
-    elif tBO == 5:
-        return 0b01100 | A << 1 | T  # Branch if CR[BI] == 1
-    elif tBO == 6:
-        # Decrement the CTR, then branch if CTR[M:63] != 0
-        return 0b10000 | A << 3 | T
-    elif tBO == 7:
-        # Decrement the CTR, then branch if CTR[M:63] == 0
-        return 0b10010 | A << 3 | T
-    else:
-        return utils.random_bin("1?1??")  # Branch always
@@ -1,3 +1,6 @@
+gitroot="`git rev-parse --show-toplevel`"
+export PYTHONPATH="$gitroot/FuncVerif/Core/PythonUtils:$PYTHONPATH" # powerverif package
+
 echo ">>> Running Python unit tests (Not Logic design)"
 python test_condreg.py &> >(tee doctest.log) # Redirect both stdout and stderr
 echo ">>> Checking doctest's log..."
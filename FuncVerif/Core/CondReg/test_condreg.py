@@ -1,9 +1,12 @@
-import random
 import cocotb
 from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge
 from cocotb.triggers import Timer
-import utils
+import powerverif
+from powerverif import utils, isa, stimulus
+# Golden model of the Condition Register
+from powerverif.condreg import is_crand, is_crnand, is_cror, is_crxor, \
+    is_crnor, is_creqv, is_crandc, is_crorc, is_mcrf
 DEBUG = False  # Main switch to turn on/off debugging prints
 
 
@@ -11,6 +14,7 @@ DEBUG = False  # Main switch to turn on/off debugging prints
 async def test_condReg(dut):
     """ Test conditional register instructions """
     # Initialization sequence
+    dut._log.info(f"powerverif imported in {powerverif.IMPORT_TIME*1e3:.2f} ms")
     clock = Clock(dut.i_clk, 1, units="ns")  # 1ns clock period
     cocotb.fork(clock.start())
     dut.i_rst.value = 0b1
@@ -27,20 +31,21 @@ async def test_condReg(dut):
     dut.i_mcrf.value = 0b0
     CR = 0b00000000000000000000000000000000
 
+    # The stimulus and the expected CR values are computed before the simulation
+    # (or replayed from the file given by the STIMULUS environment variable)
+    stim = stimulus.load("CondReg", utils.iterations(1000))
+    expected = [CR] + [r.cr for r in stim]
+
     #output logic [0:31] o_cr // Condition Register (CR)
-    #await Timer(200, units="ps")  # reset counters
-    for i in range(1000):
+    for (instr, _), CR in zip(stim, expected):
         await RisingEdge(dut.i_clk)
         await Timer(200, units="ps")
         if DEBUG: print(f"DUT's CR:   0b{dut.o_cr.value.integer:>032b}")
+        if DEBUG: print(f"expected CR 0b{CR:>032b}")
         assert dut.o_cr.value.integer == CR
 
         dut.i_rst.value = 0b0
-        bt = random.randint(0, 2**5-1)
-        ba = random.randint(0, 2**5-1)
-        bb = random.randint(0, 2**5-1)
-        xo = random_xo()
-        instr = int(utils.condreg_xl_form_to_string(PO=19, BT=bt, BA=ba, BB=bb, XO=xo)[:32], 2)
+        xo = isa.FORM["XL_CR"].decode_dict(instr)["XO"]
         dut.i_instr.value = instr
         dut.i_en.value = 0b1
         dut.i_crand.value = is_crand(xo)
@@ -52,108 +57,6 @@ async def test_condReg(dut):
         dut.i_crandc.value = is_crandc(xo)
         dut.i_crorc.value = is_crorc(xo)
         dut.i_mcrf.value = is_mcrf(xo)
-        bf = utils.select_bits(reg=instr, size=32, from_=6, to=8)
-        bfa = utils.select_bits(reg=instr, size=32, from_=11, to=13)
-        if DEBUG: print(f"CR is       0b{CR:>032b}")
-        CR = expected_CR(oldcr=CR, xo=xo, bt=bt, ba=ba, bb=bb, bf=bf, bfa=bfa)
-        if DEBUG: print(f"expected CR 0b{CR:>032b}")
-
-def replace_bit(size: int, ref:int, offset:int, value: int) -> int:
-    """
-    >>> replace_bit(size=4, ref=0b0010, offset=2, value=0)
-    0
-    >>> replace_bit(size=4, ref=0, offset=0, value=1)
-    8
-    """
-    fmt = "{:0"+str(size)+"b}"
-    s = fmt.format(ref)
-    return int(s[:offset] + str(int(value)) + s[offset+1:], 2)
-
-def get_bit(size: int, var: int, offset: int) -> int:
-    """
-    >>> get_bit(4, 0b0001, 3)
-    1
-    >>> get_bit(4, 0b111, 0)
-    0
-    >>> get_bit(4, 0b1000, 0)
-    1
-    """
-    fmt = "{:0"+str(size)+"b}"
-    s = fmt.format(var)
-    return int(s[offset])
-
-def expected_CR(oldcr: int, xo: int, bt: int, ba: int, bb: int, bf: int, bfa: int) -> int:
-    if xo == 257: # crand
-        if DEBUG: print(f"CRAND: CR[{bt}] <- CR[{ba}] & CR[{bb}]")
-        val = get_bit(32, oldcr, ba) & get_bit(32, oldcr, bb)
-        return replace_bit(size=32, ref=oldcr, offset=bt, value=val)
-    elif xo == 225: # crnand
-        if DEBUG: print(f"CRNAND: CR[{bt}] <- ~( CR[{ba}] & CR[{bb}] )")
-        val = get_bit(32, oldcr, ba) & get_bit(32, oldcr, bb)
-        val = not val
-        return replace_bit(size=32, ref=oldcr, offset=bt, value=val)
-    elif xo == 449: # cror
-        if DEBUG: print(f"CROR: CR[{bt}] <- CR[{ba}] | CR[{bb}]")
-        val = get_bit(32, oldcr, ba) | get_bit(32, oldcr, bb)
-        return replace_bit(size=32, ref=oldcr, offset=bt, value=val)
-    elif xo == 193: # crxor
-        if DEBUG: print(f"CRXOR: CR[{bt}] <- CR[{ba}] ^ CR[{bb}]")
-        val = get_bit(32, oldcr, ba) ^ get_bit(32, oldcr, bb)
-        return replace_bit(size=32, ref=oldcr, offset=bt, value=val)
-    elif xo == 33: # crnor
-        if DEBUG: print(f"CRNOR: CR[{bt}] <- ~( CR[{ba}] | CR[{bb}] )")
-        val = get_bit(32, oldcr, ba) | get_bit(32, oldcr, bb)
-        val = not val
-        return replace_bit(size=32, ref=oldcr, offset=bt, value=val)
-    elif xo == 289: # creqv
-        if DEBUG: print(f"CREQV: CR[{bt}] <- ~( CR[{ba}] ^ CR[{bb}] )")
-        val = get_bit(32, oldcr, ba) ^ get_bit(32, oldcr, bb)
-        val = not val
-        return replace_bit(size=32, ref=oldcr, offset=bt, value=val)
-    elif xo == 129: # crandc
-        if DEBUG: print(f"CRANDC: CR[{bt}] <- CR[{ba}] & ~CR[{bb}]")
-        val = get_bit(32, oldcr, ba) & (not get_bit(32, oldcr, bb))
-        return replace_bit(size=32, ref=oldcr, offset=bt, value=val)
-    elif xo == 417: # crorc
-        if DEBUG: print(f"CRORC: CR[{bt}] <- CR[{ba}] | ~CR[{bb}]")
-        val = get_bit(32, oldcr, ba) | (not get_bit(32, oldcr, bb))
-        return replace_bit(size=32, ref=oldcr, offset=bt, value=val)
-    elif xo == 0: # mcrf
-        if DEBUG: print(f"MCRF: CR[{4*bf} to {4*bf+3}] <- CR[{4*bfa} to {4*bfa+3}]")
-        val = get_bit(32, oldcr, 4*bfa)
-        oldcr = replace_bit(size=32, ref=oldcr, offset=4*bf, value=val)
-        val = get_bit(32, oldcr, 4*bfa+1)
-        oldcr = replace_bit(size=32, ref=oldcr, offset=4*bf+1, value=val)
-        val = get_bit(32, oldcr, 4*bfa+2)
-        oldcr = replace_bit(size=32, ref=oldcr, offset=4*bf+2, value=val)
-        val = get_bit(32, oldcr, 4*bfa+3)
-        oldcr = replace_bit(size=32, ref=oldcr, offset=4*bf+3, value=val)
-        return oldcr
-    else: assert false, "xo is wrong"
-
-def random_xo() -> int:
-    valid_ops = [33, 289, 129, 417, 257, 225, 449, 193, 0]
-    r = random.randint(0, len(valid_ops)-1)
-    return valid_ops[r]
-
-def is_crand(xo: int) -> bool:
-    return xo == 257
-def is_crnand(xo: int) -> bool:
-    return xo == 225
-def is_cror(xo: int) -> bool:
-    return xo == 449
-def is_crxor(xo: int) -> bool:
-    return xo == 193
-def is_crnor(xo: int) -> bool:
-    return xo == 33
-def is_creqv(xo: int) -> bool:
-    return xo == 289
-def is_crandc(xo: int) -> bool:
-    return xo == 129
-def is_crorc(xo: int) -> bool:
-    return xo == 417
-def is_mcrf(xo: int) -> bool:
-    return xo == 0
 
 if __name__ == '__main__':
     import doctest
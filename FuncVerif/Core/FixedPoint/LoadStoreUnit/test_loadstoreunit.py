@@ -3,39 +3,17 @@ import cocotb
 from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge
 from cocotb.triggers import Timer
-import utils
+from powerverif import utils, isa, stimulus
+from powerverif import coverage, covdb, directed
 DEBUG = True  # Main switch to turn on/off debugging prints
 
 class Tester:
-    Coverage = coverage_section (
-      # Branch Instructions coverage events
-      CoverPoint("dut.o_bru_en", xf = lambda dut : dut.o_bru_en.value.integer, bins = [0, 1]),
-      CoverPoint("top.o_bru_i_form", xf = lambda dut : dut.o_bru_i_form.value.integer, bins = [0, 1]),
-      CoverPoint("top.o_bru_b_form", xf = lambda dut : dut.o_bru_b_form.value.integer, bins = [0, 1]),
-      CoverPoint("top.o_bru_cond_LR", xf = lambda dut : dut.o_bru_cond_LR.value.integer, bins = [0, 1]),
-      CoverPoint("top.o_bru_cond_CTR", xf = lambda dut : dut.o_bru_cond_CTR.value.integer, bins = [0, 1]),
-      CoverPoint("top.o_bru_cond_TAR", xf = lambda dut : dut.o_bru_cond_TAR.value.integer, bins = [0, 1]),
-
-      # Condition Registers conditional events
-      CoverPoint("dut.o_condreg_en", xf = lambda dut : dut.o_condreg_en.value.integer, bins = list(range(0,2)) ),
-      CoverPoint("dut.o_condreg_crand", xf = lambda dut : dut.o_condreg_crand.value.integer, bins = list(range(0,2)) ),
-      CoverPoint("dut.o_condreg_crnand", xf = lambda dut : dut.o_condreg_crnand.value.integer, bins = list(range(0,2)) ),
-      CoverPoint("dut.o_condreg_cror", xf = lambda dut : dut.o_condreg_cror.value.integer, bins = list(range(0,2)) ),
-      CoverPoint("dut.o_condreg_crxor", xf = lambda dut : dut.o_condreg_crxor.value.integer, bins = list(range(0,2)) ),
-      CoverPoint("dut.o_condreg_crnor", xf = lambda dut : dut.o_condreg_crnor.value.integer, bins = list(range(0,2)) ),
-      CoverPoint("dut.o_condreg_creqv", xf = lambda dut : dut.o_condreg_creqv.value.integer, bins = list(range(0,2)) ),
-      CoverPoint("dut.o_condreg_crandc", xf = lambda dut : dut.o_condreg_crandc.value.integer, bins = list(range(0,2)) ),
-      CoverPoint("dut.o_condreg_crorc", xf = lambda dut : dut.o_condreg_crorc.value.integer, bins = list(range(0,2)) ),
-      CoverPoint("dut.o_condreg_mcrf", xf = lambda dut : dut.o_condreg_mcrf.value.integer, bins = list(range(0,2)) ),
-
-      CoverCross("dut.cross", items = ["dut.o_condreg_en", "dut.o_bru_en"])
-    )
+    Coverage = coverage.loadstoreunit_collector()  # COVERAGE_BACKGROUND=1: bins updated by a thread
 
     @cocotb.coroutine
-    @Coverage
     async def coverage_sample(dut):
-        """ Doing nothing, just update the coverage """
-        pass
+        """ Packed snapshot of the covered signals, see powerverif.coverage.Collector """
+        Tester.Coverage.sample(dut)
 
     @cocotb.coroutine
     async def _reset_sequence(dut):
@@ -93,7 +71,7 @@ class Tester:
         bt = random.randint(0, 2**5-1)
         ba = random.randint(0, 2**5-1)
         bb = random.randint(0, 2**5-1)
-        instr = int(utils.condreg_xl_form_to_string(PO=19, BT=bt, BA=ba, BB=bb, XO=xo)[:32], 2)
+        instr = isa.condreg_xl_form(PO=19, BT=bt, BA=ba, BB=bb, XO=xo)
         dut.i_instr.value = instr
         dut.i_en.value = 0b1
         dut.i_crand.value = is_crand(xo)
@@ -123,7 +101,7 @@ class Tester:
 
         #output logic [0:31] o_cr // Condition Register (CR)
         #await Timer(200, units="ps")  # reset counters
-        for i in range(1000):
+        for i in range(utils.iterations(1000)):
             await RisingEdge(dut.i_clk)
             await Timer(200, units="ps")
 
@@ -137,6 +115,38 @@ class Tester:
 
             self._update_expected()
 
-    if __name__ == '__main__':
-        import doctest
-        doctest.testmod()
+        Tester.Coverage.close()
+        covdb.save("LoadStoreUnit", "test_loadstoreunit")  # See powerverif.covdb to merge the runs
+
+
+@cocotb.test()
+async def test_loadstoreunit_replay(dut):
+    """ lbz/plbz generated by powerverif.stimulus (or replayed from STIMULUS) """
+    clock = Clock(dut.i_clk, 1, units="ns")  # 1ns clock period
+    cocotb.fork(clock.start())
+    await Tester._reset_sequence(dut)
+    await RisingEdge(dut.i_clk)
+    dut.i_rst.value = 0b0
+    dut.i_en.value = 0b1
+
+    checked = []
+    for record in stimulus.load("LoadStoreUnit", utils.iterations(1000)):
+        prefix, suffix, is_op34, cia, err_invalid_load_instr = record
+        dut.i_instr_prefix.value = prefix
+        dut.i_instr_suffix.value = suffix
+        dut.i_is_op34.value = is_op34
+        dut.i_cia.value = cia
+        await Timer(100, units="ps")  # Give time for the combinatinal logic
+        # PLBZ: if R is equal to 1 and RA is not equal to 0, the instruction form if invalid
+        assert dut.err_invalid_load_instr.value == err_invalid_load_instr, \
+            f"prefix 0x{prefix:08x} suffix 0x{suffix:08x}"
+        checked.append(record)
+        await RisingEdge(dut.i_clk)
+
+    # Bins of powerverif.directed, see python3 -m powerverif.directed --coverage-db
+    directed.save("LoadStoreUnit", "test_loadstoreunit_replay", checked)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
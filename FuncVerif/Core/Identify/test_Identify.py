@@ -6,12 +6,15 @@ from cocotb.triggers import FallingEdge
 from cocotb.triggers import Timer
 from cocotb_coverage.coverage import *
 import cocotb.simulator as simulator
-import utils
+import powerverif
+from powerverif import utils, isa, identify, stimulus
+from powerverif import coverage, covdb
 
 DEBUG = True  # Main switch to turn on/off debugging prints
 
 
 async def init_sequence(dut):
+    dut._log.info(f"powerverif imported in {powerverif.IMPORT_TIME*1e3:.2f} ms")
     clock = Clock(dut.i_clk, 1, units="ns")  # 1ns clock period
     cocotb.fork(clock.start())
     if DEBUG:
@@ -19,7 +22,7 @@ async def init_sequence(dut):
     dut.i_rst.value = 0b1
     dut.i_en.value = 0b0
     dut.i_instr.value = 0x00000000
-    dut.i_arb_full_mask = 0b0
+    dut.i_arb_full_mask.value = 0b0
     await Timer(200, units="ps")  # reset counters
     dut.i_rst.value = 0b0
     await Timer(200, units="ps")  # reset counters
@@ -28,51 +31,24 @@ async def init_sequence(dut):
         print("[v] Reset sequence done")
     await Timer(200, units="ps")  # reset counters
 
-ID_Coverage = coverage_section (
-  CoverPoint("dut.i_arb_full_mask", xf = lambda dut : dut.i_arb_full_mask.value.integer, bins = [0, 1]),
-  CoverPoint("dut.o_stall_fetch_arb", xf = lambda dut : dut.o_stall_fetch_arb.value.integer, bins = [0, 1]),
-  CoverPoint("dut.o_unknown_instr", xf = lambda dut : dut.o_unknown_instr.value.integer, bins = [0, 1]),
-  CoverPoint("dut.o_condreg_identified", xf = lambda dut : dut.o_condreg_identified.value.integer, bins = list(range(0,2)) ),
-  CoverPoint("dut.o_branch_identified", xf = lambda dut : dut.o_branch_identified.value.integer, bins = [0, 1]),
-  CoverCross("dut.cross", items = ["dut.o_condreg_identified", "dut.o_branch_identified", "dut.o_unknown_instr"]),
-
-  # Branch Instructions coverage events
-  CoverPoint("top.o_branch_i_form", xf = lambda dut : dut.o_branch_i_form.value.integer, bins = [0, 1]),
-  CoverPoint("top.o_branch_b_form", xf = lambda dut : dut.o_branch_b_form.value.integer, bins = [0, 1]),
-  CoverPoint("top.o_branch_cond_LR", xf = lambda dut : dut.o_branch_cond_LR.value.integer, bins = [0, 1]),
-  CoverPoint("top.o_branch_cond_CTR", xf = lambda dut : dut.o_branch_cond_CTR.value.integer, bins = [0, 1]),
-  CoverPoint("top.o_branch_cond_TAR", xf = lambda dut : dut.o_branch_cond_TAR.value.integer, bins = [0, 1]),
-
-  # Condition Registers conditional events
-  CoverPoint("dut.o_condreg_crand", xf = lambda dut : dut.o_condreg_crand.value.integer, bins = list(range(0,2)) ),
-  CoverPoint("dut.o_condreg_crnand", xf = lambda dut : dut.o_condreg_crnand.value.integer, bins = list(range(0,2)) ),
-  CoverPoint("dut.o_condreg_cror", xf = lambda dut : dut.o_condreg_cror.value.integer, bins = list(range(0,2)) ),
-  CoverPoint("dut.o_condreg_crxor", xf = lambda dut : dut.o_condreg_crxor.value.integer, bins = list(range(0,2)) ),
-  CoverPoint("dut.o_condreg_crnor", xf = lambda dut : dut.o_condreg_crnor.value.integer, bins = list(range(0,2)) ),
-  CoverPoint("dut.o_condreg_creqv", xf = lambda dut : dut.o_condreg_creqv.value.integer, bins = list(range(0,2)) ),
-  CoverPoint("dut.o_condreg_crandc", xf = lambda dut : dut.o_condreg_crandc.value.integer, bins = list(range(0,2)) ),
-  CoverPoint("dut.o_condreg_crorc", xf = lambda dut : dut.o_condreg_crorc.value.integer, bins = list(range(0,2)) ),
-  CoverPoint("dut.o_condreg_mcrf", xf = lambda dut : dut.o_condreg_mcrf.value.integer, bins = list(range(0,2)) )
-)
-@cocotb.coroutine
-@ID_Coverage
+ID_Coverage = coverage.identify_collector()  # COVERAGE_BACKGROUND=1: bins updated by a thread
 async def coverage_sample(dut):
-    """ Doing nothing, just update the coverage """
-    pass
+    """ Packed snapshot of the covered signals, see powerverif.coverage.Collector """
+    ID_Coverage.sample(dut)
 
 
 @cocotb.test()
 async def test_identify_prefixed(dut):
     await init_sequence(dut)
 
-    dut.i_instr = 0x04000000 # Send a prefix
+    dut.i_instr.value = 0x04000000 # Send a prefix
     await RisingEdge(dut.i_clk)
     assert dut.is_prefixed.value == 1, "This is a prefixed instruction"
     assert dut.o_branch_identified.value == 0
     assert dut.o_condreg_identified.value == 0
     assert dut.o_unknown_instr.value == 0
 
-    dut.i_instr = 0x00000001 # Send a suffix
+    dut.i_instr.value = 0x00000001 # Send a suffix
     await RisingEdge(dut.i_clk)
     assert dut.is_prefixed.value == 0, "This is not a prefixed instruction"
     assert dut.o_branch_identified.value == 0
@@ -81,7 +57,7 @@ async def test_identify_prefixed(dut):
     assert dut.o_instr_prefix.value.integer == 0x04000000
     assert dut.o_instr_suffix.value.integer == 0x00000001
 
-    dut.i_instr = 0x00000002
+    dut.i_instr.value = 0x00000002
     await RisingEdge(dut.i_clk) # Send a word instruction (suffix only)
     assert dut.is_prefixed.value == 0, "This is not a prefixed instruction"
     assert dut.o_branch_identified.value == 0
@@ -98,8 +74,8 @@ async def test_identify_branch(dut):
     await coverage_sample(dut)
 
     # Power ISA Section 2.4
-    dut.i_instr = int(utils.branch_i_form_to_string(
-        PO=18, LI=0xcafe, AA=1, LK=1), 2)
+    dut.i_instr.value = isa.branch_i_form(
+        PO=18, LI=0xcafe, AA=1, LK=1)
     await RisingEdge(dut.i_clk)
     assert dut.o_instr_suffix.value.binstr == '01001000000000110010101111111011'
     assert dut.o_branch_identified.value == 1
@@ -112,8 +88,8 @@ async def test_identify_branch(dut):
     assert dut.o_unknown_instr.value == 0
     await coverage_sample(dut)
 
-    dut.i_instr = int(utils.branch_b_form_to_string(
-        PO=16, BO=18, BI=27, BD=0xafe, AA=1, LK=0), 2)
+    dut.i_instr.value = isa.branch_b_form(
+        PO=16, BO=18, BI=27, BD=0xafe, AA=1, LK=0)
     await RisingEdge(dut.i_clk)
     assert dut.o_unknown_instr.value == 0
     assert dut.o_branch_identified.value == 1
@@ -126,8 +102,8 @@ async def test_identify_branch(dut):
     assert dut.o_condreg_identified.value == 0
     await coverage_sample(dut)
 
-    dut.i_instr = int(utils.branch_xl_form_to_string(
-        PO=19, BO=7, BI=4, BH=0b10, XO=16, LK=1), 2)
+    dut.i_instr.value = isa.branch_xl_form(
+        PO=19, BO=7, BI=4, BH=0b10, XO=16, LK=1)
     await RisingEdge(dut.i_clk)
     assert dut.o_unknown_instr.value == 0
     assert dut.o_branch_identified.value == 1
@@ -140,8 +116,8 @@ async def test_identify_branch(dut):
     assert dut.o_condreg_identified.value == 0
     await coverage_sample(dut)
 
-    dut.i_instr = int(utils.branch_xl_form_to_string(
-        PO=19, BO=7, BI=4, BH=0b10, XO=528, LK=1), 2)
+    dut.i_instr.value = isa.branch_xl_form(
+        PO=19, BO=7, BI=4, BH=0b10, XO=528, LK=1)
     await RisingEdge(dut.i_clk)
     assert dut.o_unknown_instr.value == 0
     assert dut.o_branch_identified.value == 1
@@ -154,8 +130,8 @@ async def test_identify_branch(dut):
     assert dut.o_condreg_identified.value == 0
     await coverage_sample(dut)
 
-    dut.i_instr = int(utils.branch_xl_form_to_string(
-        PO=19, BO=7, BI=4, BH=0b10, XO=560, LK=1), 2)
+    dut.i_instr.value = isa.branch_xl_form(
+        PO=19, BO=7, BI=4, BH=0b10, XO=560, LK=1)
     await RisingEdge(dut.i_clk)
     assert dut.o_unknown_instr.value == 0
     assert dut.o_branch_identified.value == 1
@@ -170,8 +146,8 @@ async def test_identify_branch(dut):
 
     # Power ISA section 2.5.1
     # CRAND Instruction: Condition register AND XL-form
-    dut.i_instr = int(utils.condreg_xl_form_to_string(PO=19, BT=7, BA=3, BB=6,
-        XO=257), 2)
+    dut.i_instr.value = isa.condreg_xl_form(PO=19, BT=7, BA=3, BB=6,
+        XO=257)
     await RisingEdge(dut.i_clk)
     assert dut.o_unknown_instr.value == 0
     assert dut.o_branch_identified.value == 0
@@ -188,8 +164,8 @@ async def test_identify_branch(dut):
     await coverage_sample(dut)
 
     # CRNAND
-    dut.i_instr = int(utils.condreg_xl_form_to_string(PO=19, BT=7, BA=3, BB=6,
-        XO=225), 2)
+    dut.i_instr.value = isa.condreg_xl_form(PO=19, BT=7, BA=3, BB=6,
+        XO=225)
     await RisingEdge(dut.i_clk)
     assert dut.o_unknown_instr.value == 0
     assert dut.o_branch_identified.value == 0
@@ -206,8 +182,8 @@ async def test_identify_branch(dut):
     await coverage_sample(dut)
 
     # CROR
-    dut.i_instr = int(utils.condreg_xl_form_to_string(PO=19, BT=7, BA=3, BB=6,
-        XO=449), 2)
+    dut.i_instr.value = isa.condreg_xl_form(PO=19, BT=7, BA=3, BB=6,
+        XO=449)
     await RisingEdge(dut.i_clk)
     assert dut.o_unknown_instr.value == 0
     assert dut.o_branch_identified.value == 0
@@ -224,8 +200,8 @@ async def test_identify_branch(dut):
     await coverage_sample(dut)
 
     # CRXOR
-    dut.i_instr = int(utils.condreg_xl_form_to_string(PO=19, BT=7, BA=3, BB=6,
-        XO=193), 2)
+    dut.i_instr.value = isa.condreg_xl_form(PO=19, BT=7, BA=3, BB=6,
+        XO=193)
     await RisingEdge(dut.i_clk)
     assert dut.o_unknown_instr.value == 0
     assert dut.o_branch_identified.value == 0
@@ -242,8 +218,8 @@ async def test_identify_branch(dut):
     await coverage_sample(dut)
 
     # CRNOR
-    dut.i_instr = int(utils.condreg_xl_form_to_string(PO=19, BT=7, BA=3, BB=6,
-        XO=33), 2)
+    dut.i_instr.value = isa.condreg_xl_form(PO=19, BT=7, BA=3, BB=6,
+        XO=33)
     await RisingEdge(dut.i_clk)
     assert dut.o_unknown_instr.value == 0
     assert dut.o_branch_identified.value == 0
@@ -260,8 +236,8 @@ async def test_identify_branch(dut):
     await coverage_sample(dut)
 
     # CREQV
-    dut.i_instr = int(utils.condreg_xl_form_to_string(PO=19, BT=7, BA=3, BB=6,
-        XO=289), 2)
+    dut.i_instr.value = isa.condreg_xl_form(PO=19, BT=7, BA=3, BB=6,
+        XO=289)
     await RisingEdge(dut.i_clk)
     assert dut.o_unknown_instr.value == 0
     assert dut.o_branch_identified.value == 0
@@ -278,8 +254,8 @@ async def test_identify_branch(dut):
     await coverage_sample(dut)
 
     # CRANDC
-    dut.i_instr = int(utils.condreg_xl_form_to_string(PO=19, BT=7, BA=3, BB=6,
-        XO=129), 2)
+    dut.i_instr.value = isa.condreg_xl_form(PO=19, BT=7, BA=3, BB=6,
+        XO=129)
     await RisingEdge(dut.i_clk)
     assert dut.o_unknown_instr.value == 0
     assert dut.o_branch_identified.value == 0
@@ -296,8 +272,8 @@ async def test_identify_branch(dut):
     await coverage_sample(dut)
 
     # CRORC
-    dut.i_instr = int(utils.condreg_xl_form_to_string(PO=19, BT=7, BA=3, BB=6,
-        XO=417), 2)
+    dut.i_instr.value = isa.condreg_xl_form(PO=19, BT=7, BA=3, BB=6,
+        XO=417)
     await RisingEdge(dut.i_clk)
     assert dut.o_unknown_instr.value == 0
     assert dut.o_branch_identified.value == 0
@@ -314,8 +290,8 @@ async def test_identify_branch(dut):
     await coverage_sample(dut)
 
     # MCRF
-    dut.i_instr = int(utils.condreg_xl_form_to_string(PO=19, BT=7, BA=3, BB=6,
-        XO=0), 2)
+    dut.i_instr.value = isa.condreg_xl_form(PO=19, BT=7, BA=3, BB=6,
+        XO=0)
     await RisingEdge(dut.i_clk)
     assert dut.o_unknown_instr.value == 0
     assert dut.o_branch_identified.value == 0
@@ -331,4 +307,26 @@ async def test_identify_branch(dut):
     assert dut.o_condreg_mcrf.value == 1
     await coverage_sample(dut)
 
+    ID_Coverage.flush()
     coverage_db.report_coverage(log.info, bins=True)
+    covdb.save("Identify", "test_identify_branch")  # See powerverif.covdb to merge the runs
+
+
+@cocotb.test()
+async def test_identify_random(dut):
+    """ Random instructions generated by powerverif.stimulus (or replayed from STIMULUS) """
+    await init_sequence(dut)
+    outputs = [getattr(dut, name) for name in identify.OUTPUTS]
+
+    for instr, expected in stimulus.load("Identify", utils.iterations(10000)):
+        dut.i_instr.value = instr
+        await Timer(100, units="ps")  # Give time for the combinatinal logic
+        actual = sum(signal.value.integer << i for i, signal in enumerate(outputs))
+        assert actual == expected, (f"0x{instr:08x}: {identify.decode_outputs(actual)}, "
+                                    f"expected {identify.decode_outputs(expected)}")
+        await coverage_sample(dut)
+        await RisingEdge(dut.i_clk)
+
+    ID_Coverage.close()
+    coverage_db.report_coverage(dut._log.info, bins=True)
+    covdb.save("Identify", "test_identify_random")
@@ -1 +0,0 @@
-../PythonUtils/utils.py
\ No newline at end of file
@@ -0,0 +1,91 @@
+# Micro-benchmark: integer bitfield helpers (powerverif/bitfield.py) against the previous
+# string based implementation (formerly in utils.py)
+#
+# Usage: python3 bench_bitfield.py [number of calls per function]
+import sys
+import random
+import timeit
+from powerverif import bitfield
+
+
+# Previous (string based) implementation, kept here as the reference
+def str_select_bit(reg: int, size: int, bit: int) -> int:
+    fmt = "{:0"+str(size)+"b}"
+    s = fmt.format(reg)
+    return int(s[bit])
+
+
+def str_select_bits(reg: int, size: int, from_: int, to: int) -> int:
+    fmt = "{:0"+str(size)+"b}"
+    s = fmt.format(reg)
+    return int(s[from_:to+1], 2)
+
+
+def str_random_bin(string: str) -> int:
+    out = ""
+    for c in string:
+        if c == '?':
+            out = out + str(random.randint(0, 1))
+        elif c == '0' or c == '1':
+            out = out+c
+        else:
+            raise TypeError("{} is not a 0 or 1".format(c))
+    return int(out, 2)
+
+
+def str_int_to_bin(n, a):
+    form = "{0:0"+str(n)+"b}"
+    if a >= 2**n:
+        raise TypeError("{} do not fit on {} bits".format(a, n))
+    return form.format(a)
+
+
+def str_exts(num: int, length: int, new_length: int) -> int:
+    string = str_int_to_bin(length, num)
+    sign = string[0]
+    while len(string) < new_length:
+        string = sign + string
+    return int(string, 2)
+
+
+def str_BE(num: int, length: int) -> int:
+    form = "{:0"+str(length)+"b}"
+    bin_ = form.format(num)
+    return int(bin_[::-1], 2)
+
+
+CR = 0xcafebabe
+INSTR = 0x4ce33202
+BT = bitfield.Field(6, 10)
+
+# (name, previous implementation, new implementation)
+CASES = [
+    ("select_bit", lambda: str_select_bit(CR, 32, 17),
+        lambda: bitfield.select_bit(CR, 32, 17)),
+    ("select_bits", lambda: str_select_bits(INSTR, 32, 6, 10),
+        lambda: bitfield.select_bits(INSTR, 32, 6, 10)),
+    ("Field.get", lambda: str_select_bits(INSTR, 32, 6, 10),
+        lambda: BT.get(INSTR)),
+    ("exts", lambda: str_exts(0x800FEE << 2, 26, 64),
+        lambda: bitfield.exts(0x800FEE << 2, 26, 64)),
+    ("int_to_bin", lambda: str_int_to_bin(24, 0xcafe),
+        lambda: bitfield.int_to_bin(24, 0xcafe)),
+    ("BE", lambda: str_BE(0xcafebabedeadbeef, 64),
+        lambda: bitfield.BE(0xcafebabedeadbeef, 64)),
+    ("random_bin", lambda: str_random_bin("1?1??"),
+        lambda: bitfield.random_bin("1?1??")),
+]
+
+
+def main(number: int):
+    print(f"{'function':<12} {'string (ns)':>12} {'integer (ns)':>13} {'speedup':>8}")
+    for name, old, new in CASES:
+        if name != "random_bin":
+            assert old() == new(), f"{name}: implementations do not match"
+        t_old = min(timeit.repeat(old, number=number, repeat=3)) / number * 1e9
+        t_new = min(timeit.repeat(new, number=number, repeat=3)) / number * 1e9
+        print(f"{name:<12} {t_old:>12.1f} {t_new:>13.1f} {t_old/t_new:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,20 @@
+# Shared verification package for implPower
+# Encoders, bitfield helpers, golden models and coverage definitions used by
+# every cocotb testbench in FuncVerif/
+#
+# Submodules depending on optional packages (cocotb_coverage...) are not
+# imported here to keep the cold start of the testbenches short.
+# powerverif.IMPORT_TIME is the time (in seconds) it took to import the package,
+# see also: python3 -X importtime -c "import powerverif"
+import time
+_import_start = time.perf_counter()
+
+from . import bitfield
+from . import isa
+from . import utils
+from . import branch
+from . import condreg
+
+__version__ = "0.1.0"
+
+IMPORT_TIME = time.perf_counter() - _import_start
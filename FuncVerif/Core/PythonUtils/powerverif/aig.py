@@ -0,0 +1,477 @@
+import os
+import time
+import argparse
+import numpy
+from . import isa, identify, stimulus
+# Bit-parallel simulation of And-Inverter Graphs (needs numpy)
+#
+# Tools/synth_aig writes the AIGER netlist of a unit (AIGER_FILE=... see
+# Tools/yosys_aig.tcl) and the symbol map of its ports and flip-flops. Every
+# node of the graph holds a numpy.uint64 array: bit j of word w is the value
+# of the node for the stimulus vector (lane) 64*w+j, so one AND of the
+# netlist evaluates 64 vectors per machine word. The netlist is compiled into
+# one straight-line Python function (like the encoders of powerverif.isa).
+#
+# The gate-level regression replays the records of powerverif.stimulus on the
+# netlist and compares the outputs with the ones of the golden models, every
+# lane runs its own stream of records (its own seed) from the reset:
+# python3 -m powerverif.aig build/aig/CondReg.aag CondReg -n 1000000
+
+U64 = numpy.uint64
+
+
+class AIG:
+    """
+    And-Inverter Graph, literals are 2*variable (+1 if inverted), the
+    variable 0 is the constant false. Ports and flip-flops are named by
+    (name, bit): bit 0 is the LSB of the value (the last bit of a [0:N] port)
+    >>> g = AIG()
+    >>> a, b = g.add_input("a", 0), g.add_input("b", 0)
+    >>> g.add_output(g.add_and(a ^ 1, b ^ 1) ^ 1, "a_or_b", 0)
+    >>> g.inputs, g.ands, g.outputs
+    ([2, 4], [(6, 3, 5)], [7])
+    """
+
+    def __init__(self):
+        self.max_var = 0
+        self.inputs = []  # Literals
+        self.latches = []  # (literal, next state literal, initial value)
+        self.outputs = []  # Literals
+        self.ands = []  # (literal, operand literal, operand literal)
+        self.input_names = []  # (name, bit) of every input, latch and output
+        self.latch_names = []
+        self.output_names = []
+
+    def _new(self) -> int:
+        self.max_var += 1
+        return 2 * self.max_var
+
+    def add_input(self, name: str, bit: int = 0) -> int:
+        lit = self._new()
+        self.inputs.append(lit)
+        self.input_names.append((name, bit))
+        return lit
+
+    def add_latch(self, name: str, bit: int = 0, init: int = 0) -> int:
+        """ Flip-flop, its next state is given with set_next() """
+        lit = self._new()
+        self.latches.append((lit, 0, init))
+        self.latch_names.append((name, bit))
+        return lit
+
+    def set_next(self, latch: int, next_state: int):
+        i = [lit for lit, _, _ in self.latches].index(latch)
+        self.latches[i] = (latch, next_state, self.latches[i][2])
+
+    def add_and(self, a: int, b: int) -> int:
+        lit = self._new()
+        self.ands.append((lit, a, b))
+        return lit
+
+    def add_output(self, lit: int, name: str, bit: int = 0):
+        self.outputs.append(lit)
+        self.output_names.append((name, bit))
+
+    @classmethod
+    def read(cls, path: str) -> "AIG":
+        """
+        Reads an ASCII (aag) or binary (aig) AIGER file, the names come from
+        the yosys map file next to it (write_aiger -map) or its symbol table
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+        aig = cls()
+        header, _, body = data.partition(b"\n")
+        kind, *counts = header.split()
+        M, I, L, O, A = (int(c) for c in counts[:5])
+        if any(int(c) for c in counts[5:]):
+            raise ValueError(f"{path}: bad state, constraint, justice and fairness properties "
+                             "are not supported")
+        aig.max_var = M
+        lines = body.split(b"\n")
+        if kind == b"aag":
+            aig.inputs = [int(lines[i]) for i in range(I)]
+        elif kind == b"aig":
+            aig.inputs = [2 * (i + 1) for i in range(I)]
+        else:
+            raise ValueError(f"{path} is not an AIGER file")
+        n = I if kind == b"aag" else 0
+        for i in range(L):
+            values = [int(v) for v in lines[n + i].split()]
+            if kind == b"aig":
+                values.insert(0, 2 * (I + i + 1))
+            # No initial value or the latch itself: uninitialized, 0 like after a reset
+            init = values[2] if len(values) > 2 and values[2] in (0, 1) else 0
+            aig.latches.append((values[0], values[1], init))
+        n += L
+        aig.outputs = [int(lines[n + i]) for i in range(O)]
+        n += O
+        if kind == b"aag":
+            for i in range(A):
+                aig.ands.append(tuple(int(v) for v in lines[n + i].split()))
+            symbols = lines[n + A:]
+        else:
+            offset = len(header) + 1 + sum(len(line) + 1 for line in lines[:n])
+            offset = aig._read_binary_ands(data, offset, I + L, A)
+            symbols = data[offset:].split(b"\n")
+        aig._read_names(symbols, os.path.splitext(path)[0] + ".map")
+        return aig
+
+    def _read_binary_ands(self, data: bytes, offset: int, first: int, count: int) -> int:
+        def delta():
+            nonlocal offset
+            value = shift = 0
+            while True:
+                byte = data[offset]
+                offset += 1
+                value |= (byte & 0x7f) << shift
+                shift += 7
+                if not byte & 0x80:
+                    return value
+        for i in range(count):
+            lhs = 2 * (first + i + 1)
+            rhs0 = lhs - delta()
+            rhs1 = rhs0 - delta()
+            self.ands.append((lhs, rhs0, rhs1))
+        return offset
+
+    def _read_names(self, symbols, map_path: str):
+        names = {"input": {}, "latch": {}, "output": {}}
+        if os.path.exists(map_path):
+            # yosys: "input|output|latch <index> <bit> <name>", with write_aiger -no-startoffset
+            # (see Tools/yosys_aig.tcl) <bit> is the offset from the LSB, also for [0:N] ports
+            with open(map_path) as f:
+                for line in f:
+                    words = line.split()
+                    if len(words) == 4 and words[0] in names:
+                        names[words[0]][int(words[1])] = (words[3], int(words[2]))
+        else:
+            kinds = {"i": "input", "l": "latch", "o": "output"}
+            for line in symbols:
+                line = line.decode(errors="replace")
+                if line.startswith("c"):
+                    break
+                if line[:1] in kinds and line[1:2].isdigit():
+                    index, name = line[1:].split(" ", 1)
+                    bit = 0
+                    if name.endswith("]") and "[" in name:
+                        name, bit = name[:-1].split("[")
+                    names[kinds[line[0]]][int(index)] = (name, int(bit))
+        # Bits start at 0 whatever the offset of the wire
+        for kind, by_index in names.items():
+            first = {}
+            for name, bit in by_index.values():
+                first[name] = min(bit, first.get(name, bit))
+            for index, (name, bit) in by_index.items():
+                by_index[index] = (name, bit - first[name])
+        self.input_names = [names["input"].get(i, (f"i{i}", 0)) for i in range(len(self.inputs))]
+        self.latch_names = [names["latch"].get(i, (f"l{i}", 0)) for i in range(len(self.latches))]
+        self.output_names = [names["output"].get(i, (f"o{i}", 0))
+                             for i in range(len(self.outputs))]
+
+    def write(self, path: str):
+        """ Writes an ASCII AIGER file with its symbol table """
+        lines = [f"aag {self.max_var} {len(self.inputs)} {len(self.latches)} "
+                 f"{len(self.outputs)} {len(self.ands)}"]
+        lines += [str(lit) for lit in self.inputs]
+        lines += [f"{lit} {next_state} {init}" for lit, next_state, init in self.latches]
+        lines += [str(lit) for lit in self.outputs]
+        lines += [f"{lit} {a} {b}" for lit, a, b in self.ands]
+        for kind, names in (("i", self.input_names), ("l", self.latch_names),
+                            ("o", self.output_names)):
+            lines += [f"{kind}{i} {name}[{bit}]" for i, (name, bit) in enumerate(names)]
+        with open(path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def ordered_ands(self) -> list:
+        """ AND gates sorted so the operands of a gate come before it """
+        gates = {lit >> 1: (lit, a, b) for lit, a, b in self.ands}
+        if all(a >> 1 < lit >> 1 and b >> 1 < lit >> 1 for lit, a, b in self.ands) and \
+                [lit for lit, a, b in self.ands] == sorted(lit for lit, a, b in self.ands):
+            return list(self.ands)
+        ordered, done = [], set()
+        for var in gates:
+            stack = [(var, False)]
+            while stack:
+                v, expanded = stack.pop()
+                if v in done or v not in gates:
+                    continue
+                if expanded:
+                    done.add(v)
+                    ordered.append(gates[v])
+                    continue
+                stack.append((v, True))
+                stack.extend((operand >> 1, False) for operand in gates[v][1:]
+                             if operand >> 1 not in done)
+        return ordered
+
+
+def _ports(names) -> dict:
+    """ name -> [(bit, index)] """
+    ports = {}
+    for i, (name, bit) in enumerate(names):
+        ports.setdefault(name, []).append((bit, i))
+    return ports
+
+
+def pack(values, words: int, bit: int):
+    """
+    Bit (bit) of every lane value -> uint64 words (lane j is bit j % 64 of word j // 64)
+    >>> pack([1, 0, 1], 1, 0)
+    array([5], dtype=uint64)
+    """
+    lanes = numpy.zeros(words * 64, dtype=numpy.uint8)
+    values = numpy.asarray(values, dtype=U64)
+    lanes[:len(values)] = (values >> U64(bit)) & U64(1)
+    return numpy.packbits(lanes, bitorder="little").view("<u8").astype(U64)
+
+
+def unpack(bits, lanes: int):
+    """ Lane values of a port from the words of its bits (LSB first) """
+    values = numpy.zeros(lanes, dtype=U64)
+    for bit, words in enumerate(bits):
+        lane_bits = numpy.unpackbits(words.astype("<u8").view(numpy.uint8), bitorder="little")
+        values |= lane_bits[:lanes].astype(U64) << U64(bit)
+    return values
+
+
+class Simulator:
+    """
+    Cycle-based simulation of an AIG on (lanes) independent stimulus vectors
+    >>> g = AIG()
+    >>> a, b = g.add_input("a", 0), g.add_input("b", 0)
+    >>> q = g.add_latch("q", 0)
+    >>> g.set_next(q, g.add_and(a, b))
+    >>> g.add_output(q, "q", 0)
+    >>> sim = Simulator(g, lanes=3)
+    >>> sim.step({"a": [1, 1, 0], "b": [1, 0, 1]})["q"].tolist()
+    [0, 0, 0]
+    >>> sim.step({})["q"].tolist()
+    [1, 0, 0]
+    """
+
+    def __init__(self, aig: AIG, lanes: int = 64 * 64):
+        self.aig = aig
+        self.lanes = lanes
+        self.words = (lanes + 63) // 64
+        self.input_ports = _ports(aig.input_names)
+        self.output_ports = _ports(aig.output_names)
+        self.latch_ports = _ports(aig.latch_names)
+        self._zero = numpy.zeros(self.words, dtype=U64)
+        self._ones = ~self._zero
+        self._evaluate = self._compile()
+        self.reset()
+
+    def _compile(self):
+        aig = self.aig
+
+        def ref(lit: int) -> str:
+            name = "zero" if lit >> 1 == 0 else f"v{lit >> 1}"
+            return f"~{name}" if lit & 1 else name
+
+        lines = ["def evaluate(inputs, latches, zero):"]
+        lines += [f"    v{lit >> 1} = inputs[{i}]" for i, lit in enumerate(aig.inputs)]
+        lines += [f"    v{lit >> 1} = latches[{i}]" for i, (lit, _, _) in enumerate(aig.latches)]
+        lines += [f"    v{lit >> 1} = {ref(a)} & {ref(b)}" for lit, a, b in aig.ordered_ands()]
+        lines.append(f"    return [{', '.join(ref(lit) for lit in aig.outputs)}], "
+                     f"[{', '.join(ref(next_state) for _, next_state, _ in aig.latches)}]")
+        scope = {}
+        exec(compile("\n".join(lines), f"<aig {len(aig.ands)} ands>", "exec"), scope)
+        return scope["evaluate"]
+
+    def reset(self):
+        """ Flip-flops to their initial value """
+        self.state = [self._ones if init else self._zero for _, _, init in self.aig.latches]
+
+    def set_state(self, name: str, values):
+        """ Loads the flip-flops of register (name) with a value per lane """
+        for bit, i in self.latch_ports[name]:
+            self.state[i] = pack(values, self.words, bit)
+
+    def step(self, inputs: dict) -> dict:
+        """
+        One clock cycle: returns the outputs (name -> value per lane) for the
+        current state and (inputs) (name -> value per lane or a single value,
+        missing inputs are 0), then updates the flip-flops
+        """
+        words = [self._zero] * len(self.aig.inputs)
+        for name, values in inputs.items():
+            if numpy.ndim(values) == 0:
+                values = numpy.full(self.lanes, values, dtype=U64)
+            for bit, i in self.input_ports.get(name, ()):
+                words[i] = pack(values, self.words, bit)
+        outputs, self.state = self._evaluate(words, self.state, self._zero)
+        return {name: unpack([outputs[i] for bit, i in sorted(bits)], self.lanes)
+                for name, bits in self.output_ports.items()}
+
+
+class Harness:
+    """
+    How the records of a unit drive its netlist
+    - inputs(f): port -> values, f is field -> array of the records
+    - outputs(f): port -> expected values after the record
+    - registered: outputs read one cycle later (outputs of flip-flops)
+    - sequential: the records of a lane must follow each other from the reset
+    """
+
+    def __init__(self, inputs, outputs, registered=(), sequential=False):
+        self.inputs = inputs
+        self.outputs = outputs
+        self.registered = set(registered)
+        self.sequential = sequential
+
+
+def _branchunit_inputs(f):
+    index = isa.identify_array(f["instr"])
+    forms = {"i_i_form": "b", "i_b_form": "bc", "i_cond_LR": "bclr", "i_cond_CTR": "bcctr",
+             "i_cond_TAR": "bctar"}
+    ports = {port: (index == isa.OPCODES.index(isa.BY_MNEMONIC[m])).astype(U64)
+             for port, m in forms.items()}
+    ports.update(i_instr=f["instr"], i_en=1, i_condition_register=f["cr"],
+                 i_target_address_register=f["tar"])
+    return ports
+
+
+def _condreg_inputs(f):
+    index = isa.identify_array(f["instr"])
+    ports = {f"i_{op.mnemonic}": (index == i).astype(U64)
+             for i, op in enumerate(isa.OPCODES) if op.unit == "condreg"}
+    ports.update(i_instr=f["instr"], i_en=1)
+    return ports
+
+
+HARNESSES = {
+    # The records hold LR and CTR before the branch (see 64b_lockstep.py)
+    "BranchUnit": Harness(
+        _branchunit_inputs,
+        lambda f: {"o_next_instr_addr": f["nia"], "o_link_register": f["lr"],
+                   "o_count_register": f["ctr"]},
+        sequential=True),
+    # The records hold the CR after the instruction
+    "CondReg": Harness(
+        _condreg_inputs, lambda f: {"o_cr": f["cr"]}, registered=["o_cr"], sequential=True),
+    "Identify": Harness(
+        lambda f: {"i_instr": f["instr"], "i_en": 1},
+        lambda f: {name: (f["outputs"] >> U64(i)) & U64(1)
+                   for i, name in enumerate(identify.OUTPUTS)}),
+    "LoadStoreUnit": Harness(
+        lambda f: {"i_instr_prefix": f["prefix"], "i_instr_suffix": f["suffix"],
+                   "i_is_op34": f["is_op34"], "i_cia": f["cia"], "i_en": 1},
+        lambda f: {"err_invalid_load_instr": f["err_invalid_load_instr"]}),
+}
+
+
+def lane_seed(seed: int, lane: int) -> int:
+    """ Seed of the records of a lane (powerverif.stimulus) """
+    return (seed << 20) | lane
+
+
+def lane_records(unit: str, count: int, lanes: int, seed: int) -> list:
+    """ (lanes) independent streams of records, (count) records in total """
+    cycles = (count + lanes - 1) // lanes
+    return [stimulus.generate(unit, cycles, lane_seed(seed, lane)) for lane in range(lanes)]
+
+
+def split(records, lanes: int) -> list:
+    """ Cuts a stream of records in (lanes) streams (combinational units) """
+    cycles = (len(records) + lanes - 1) // lanes
+    return [records[i:i + cycles] for i in range(0, len(records), cycles)]
+
+
+class Result:
+    def __init__(self, unit: str, records: int, lanes: int):
+        self.unit = unit
+        self.records = records
+        self.lanes = lanes
+        self.time = 0.0
+        self.mismatch_count = 0
+        self.mismatches = []  # (lane, cycle, port, expected, netlist)
+
+    def summary(self) -> str:
+        rate = self.records / max(self.time, 1e-9)
+        return (f"{self.unit}: {self.records} records on {self.lanes} lanes in {self.time:.2f}s "
+                f"({rate:,.0f} records/s), {self.mismatch_count} mismatches")
+
+
+def regress(aig: AIG, unit: str, streams, max_mismatches: int = 10) -> Result:
+    """
+    Replays the streams of records of powerverif.stimulus on the netlist
+    (aig) of (unit), one stream per lane after a reset cycle, and compares
+    the outputs with the records. Shorter streams repeat their last record
+    (not compared)
+    """
+    harness = HARNESSES[unit]
+    names = stimulus.RECORDS[unit]._fields
+    lanes, cycles = len(streams), max(len(stream) for stream in streams)
+    table = numpy.zeros((cycles, lanes, len(names)), dtype=U64)
+    valid = numpy.zeros((cycles, lanes), dtype=bool)
+    for lane, stream in enumerate(streams):
+        table[:len(stream), lane] = numpy.array(stream, dtype=U64).reshape(-1, len(names))
+        table[len(stream):, lane] = table[len(stream) - 1, lane]
+        valid[:len(stream), lane] = True
+    result = Result(unit, int(valid.sum()), lanes)
+
+    def compare(outputs, t, ports):
+        fields = {name: table[t, :, i] for i, name in enumerate(names)}
+        for port, expected in harness.outputs(fields).items():
+            if port not in ports:
+                continue
+            if port not in outputs:
+                raise ValueError(f"No output named {port} in the netlist of {unit}")
+            expected = numpy.broadcast_to(numpy.asarray(expected, dtype=U64), lanes)
+            diff = numpy.flatnonzero((outputs[port] != expected) & valid[t])
+            result.mismatch_count += len(diff)
+            for lane in diff[:max_mismatches - len(result.mismatches)]:
+                result.mismatches.append((int(lane), t, port, int(expected[lane]),
+                                          int(outputs[port][lane])))
+
+    start = time.perf_counter()
+    sim = Simulator(aig, lanes)
+    sim.step({"i_rst": 1})
+    ports = set(harness.outputs({name: table[0, :, i] for i, name in enumerate(names)}))
+    combinational = ports - harness.registered
+    for t in range(cycles):
+        inputs = harness.inputs({name: table[t, :, i] for i, name in enumerate(names)})
+        outputs = sim.step(inputs)
+        compare(outputs, t, combinational)
+        if t > 0:
+            compare(outputs, t - 1, harness.registered)
+    if harness.registered:
+        compare(sim.step(inputs), cycles - 1, harness.registered)
+    result.time = time.perf_counter() - start
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gate-level regression: replays the stimulus of "
+                                                 "a unit on its AIGER netlist")
+    parser.add_argument("netlist", help="AIGER file (see Tools/synth_aig)")
+    parser.add_argument("unit", choices=sorted(HARNESSES))
+    parser.add_argument("-n", "--records", type=int, default=100000)
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("-l", "--lanes", type=int, default=64 * 64,
+                        help="vectors simulated in parallel (64 per machine word)")
+    parser.add_argument("--stimulus", help="replay this stimulus file instead (a single lane "
+                                           "for the sequential units)")
+    args = parser.parse_args()
+
+    aig = AIG.read(args.netlist)
+    print(f"{args.netlist}: {len(aig.inputs)} inputs, {len(aig.latches)} flip-flops, "
+          f"{len(aig.ands)} ANDs")
+    if args.stimulus:
+        records = list(stimulus.Replay(args.stimulus, args.unit))
+        streams = [records] if HARNESSES[args.unit].sequential else split(records, args.lanes)
+    else:
+        streams = lane_records(args.unit, args.records, args.lanes, args.seed)
+    result = regress(aig, args.unit, streams)
+    print(result.summary())
+    for lane, cycle, port, expected, actual in result.mismatches:
+        seed = "" if args.stimulus else f" (seed {lane_seed(args.seed, lane)})"
+        print(f"    lane {lane}{seed} record {cycle}: {port} expected {expected:#x}, "
+              f"netlist {actual:#x}")
+    if result.mismatch_count:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,284 @@
+import os
+import sys
+import json
+import heapq
+import argparse
+import itertools
+from collections import namedtuple, deque
+from multiprocessing import Pool
+from . import isa, workload
+# Cycle-approximate model of the Arbiter (Documentation/Core/Arbiter.md)
+#
+# Replays an instruction trace of powerverif.workload cycle by cycle, to size
+# the reservation stations (RS), the Common Data Bus (CDB) and the functional
+# units before the RTL is written. Every cycle, in this order:
+# - retire: the oldest instructions of the reorder buffer (ROB) whose results
+#   were on the CDB write the register file, in order, cdb_width per cycle
+# - CDB: the results of the functional units are broadcast, oldest first,
+#   cdb_width per cycle, the waiting instructions are woken up
+# - issue: the oldest instructions of a RS whose operands are all available
+#   (broadcast a cycle before) go to a free functional unit (fu_count per
+#   unit, pipelined): this part is out of order
+# - dispatch: the instruction identified by Identify goes to the RS of its
+#   unit. Registers are renamed (an operand names the entry of the ROB which
+#   produces it) so only RAW hazards delay an instruction. If its RS is in
+#   o_full_mask (full) or the ROB is full, Identify raises o_stall_fetch_arb
+#   and fetch stalls.
+# The front end fetches one word per cycle (fetch then Identify), it restarts
+# at the target redirect_penalty cycles after a taken branch was broadcast (no
+# prediction, the wrong path is not simulated).
+#
+# Sweep: python3 -m powerverif.arbiter w1.trace --rs 2 4 8 --cdb 1 2 --fu 1 2 -o sweep.json
+
+UNITS = ("BranchUnit", "CondReg", "LoadStoreUnit")
+_UNIT_INDEX = {"branch": 0, "condreg": 1, "loadstore": 2}
+# Resources renamed by the Arbiter: CR bits 0 to 31, then LR, CTR, TAR and the GPRs
+LR, CTR, TAR, GPR = 32, 33, 34, 35
+FRONT_END = 2  # Cycles from the fetch of a word to its dispatch (fetch, Identify)
+
+# latencies: cycles of execution of each unit of UNITS (the LoadStoreUnit
+# includes the data memory)
+Config = namedtuple("Config", "rs_depth cdb_width fu_count rob_depth latencies redirect_penalty",
+                    defaults=(4, 1, 1, 16, (1, 1, 3), 1))
+# stall_fetch_arb: cycles o_stall_fetch_arb was set because of each RS (unit
+# -> cycles), stall_rob: because the ROB was full, stall_branch: cycles the
+# front end waited for a taken branch, fu_wait: cycles x instructions ready in
+# a RS without a free functional unit, cdb_wait: cycles x results waiting for
+# the CDB, occupancy: unit -> number of cycles with 0, 1, ... entries in its RS
+Result = namedtuple("Result", "config instructions cycles ipc stall_fetch_arb stall_rob "
+                              "stall_branch fu_wait cdb_wait occupancy rob_occupancy")
+# Instruction at an address: unit index, size in words, resources read and written
+Static = namedtuple("Static", "unit words srcs dsts")
+
+
+def operands(op, prefix: int, word: int) -> tuple:
+    """
+    (resources read, resources written) by an instruction, Power ISA v3.1
+    Sections 2.4, 2.5.1 and 3.3.2
+    >>> operands(isa.BY_MNEMONIC["crand"], 0, isa.encode("crand", BT=1, BA=2, BB=3))
+    ((2, 3), (1,))
+    >>> operands(isa.BY_MNEMONIC["bc"], 0, isa.encode("bc", BO=0, BI=5, BD=4, AA=0, LK=1))
+    ((5, 33), (33, 32))
+    >>> operands(isa.BY_MNEMONIC["lbz"], 0, isa.encode("lbz", RT=3, RA=4, D1=0)) == ((GPR + 4,),
+    ...                                                                             (GPR + 3,))
+    True
+    """
+    BO, BI = (word >> 21) & 0x1f, (word >> 16) & 0x1f
+    if op.unit == "loadstore":  # RT, RA
+        relative = (prefix >> 20) & 1  # plbz with R=1: CIA + D
+        return ((GPR + BI,) if BI and not relative else ()), (GPR + BO,)
+    if op.mnemonic == "mcrf":
+        BF, BFA = (word >> 23) & 7, (word >> 18) & 7
+        return tuple(range(4 * BFA, 4 * BFA + 4)), tuple(range(4 * BF, 4 * BF + 4))
+    if op.unit == "condreg":  # BT, BA, BB
+        return (BI, (word >> 11) & 0x1f), (BO,)
+    srcs, dsts = [], []
+    if op.mnemonic != "b":
+        if not BO & 0b10000:  # Tests CR[BI]
+            srcs.append(BI)
+        if op.mnemonic == "bcctr":
+            srcs.append(CTR)
+        else:
+            if op.mnemonic == "bclr":
+                srcs.append(LR)
+            elif op.mnemonic == "bctar":
+                srcs.append(TAR)
+            if not BO & 0b00100:  # Decrements the CTR
+                srcs.append(CTR)
+                dsts.append(CTR)
+    if word & 1:  # LK
+        dsts.append(LR)
+    return tuple(srcs), tuple(dsts)
+
+
+def decode(memory: bytes, cia: int) -> Static:
+    """ The instruction at (cia) of a memory image """
+    word = int.from_bytes(memory[cia:cia + 4], "big")
+    prefix = 0
+    if isa.is_prefix(word):
+        prefix, word = word, int.from_bytes(memory[cia + 4:cia + 8], "big")
+        op = isa.identify_prefixed(prefix, word)
+    else:
+        op = isa.identify(word)
+    if op is None:
+        raise ValueError(f"Unknown instruction 0x{word:08x} at 0x{cia:x}")
+    return Static(_UNIT_INDEX[op.unit], 2 if prefix else 1, *operands(op, prefix, word))
+
+
+class _Entry:
+    """ Instruction in the ROB (and in a RS until it issues) """
+    __slots__ = ("seq", "deps", "written")
+
+    def __init__(self, seq: int, deps: list):
+        self.seq = seq
+        self.deps = deps  # Entries producing the operands, not written yet at dispatch
+        self.written = None  # Cycle of the broadcast of the result on the CDB
+
+
+def simulate(memory: bytes, cias, config: Config = Config()) -> Result:
+    """ Replays the instructions at (cias) of a memory image """
+    count = len(cias)
+    width, depth, units = config.cdb_width, config.rs_depth, len(UNITS)
+    statics = {}
+    stations = [[] for u in range(units)]
+    rob = deque()
+    rename = {}  # Resource -> entry of its last producer
+    executing = []  # Heap of (cycle of the result, seq, entry)
+    finished = []  # Heap of (seq, entry): results waiting for the CDB
+    stall_fetch_arb, fu_wait = [0] * units, [0] * units
+    stall_rob = stall_branch = cdb_wait = 0
+    occupancy = [[0] * (depth + 1) for u in range(units)]
+    rob_occupancy = [0] * (config.rob_depth + 1)
+
+    i, cycle = 0, 0
+    if count:
+        static = statics[cias[0]] = decode(memory, cias[0])
+        available = FRONT_END + static.words - 1  # Cycle at which instruction i can dispatch
+    branch = None  # Taken branch not broadcast yet
+    redirect = False  # From the dispatch of a taken branch to the dispatch of its target
+    while i < count or rob:
+        # Retire, in order
+        retired = 0
+        while rob and retired < width and rob[0].written is not None and rob[0].written < cycle:
+            rob.popleft()
+            retired += 1
+        # Common Data Bus
+        while executing and executing[0][0] <= cycle:
+            heapq.heappush(finished, heapq.heappop(executing)[1:])
+        for k in range(min(width, len(finished))):
+            heapq.heappop(finished)[1].written = cycle
+        cdb_wait += len(finished)
+        # Issue, oldest ready first
+        for u, station in enumerate(stations):
+            free = config.fu_count
+            kept = []
+            for entry in station:
+                if all(d.written is not None and d.written < cycle for d in entry.deps):
+                    if free:
+                        free -= 1
+                        heapq.heappush(executing, (cycle + config.latencies[u], entry.seq, entry))
+                        continue
+                    fu_wait[u] += 1
+                kept.append(entry)
+            if len(kept) != len(station):
+                stations[u] = kept
+        # Dispatch
+        if branch is not None and branch.written is not None:
+            available = branch.written + config.redirect_penalty + FRONT_END + static.words - 1
+            branch = None
+        if i < count:
+            if redirect and (branch is not None or available > cycle):
+                stall_branch += 1
+            elif available <= cycle:
+                u = static.unit
+                if len(stations[u]) >= depth:
+                    stall_fetch_arb[u] += 1
+                elif len(rob) >= config.rob_depth:
+                    stall_rob += 1
+                else:
+                    deps = [p for p in (rename.get(r) for r in static.srcs)
+                            if p is not None and (p.written is None or p.written >= cycle)]
+                    entry = _Entry(i, deps)
+                    for r in static.dsts:
+                        rename[r] = entry
+                    stations[u].append(entry)
+                    rob.append(entry)
+                    i += 1
+                    redirect = False
+                    if i < count:
+                        if cias[i] != cias[i - 1] + 4 * static.words:  # Taken branch
+                            branch, redirect = entry, True
+                        static = statics.get(cias[i]) or statics.setdefault(
+                            cias[i], decode(memory, cias[i]))
+                        available = max(cycle + 1, available + static.words)
+        for u in range(units):
+            occupancy[u][len(stations[u])] += 1
+        rob_occupancy[len(rob)] += 1
+        cycle += 1
+
+    return Result(config, count, cycle, count / cycle if cycle else 0.0,
+                  dict(zip(UNITS, stall_fetch_arb)), stall_rob, stall_branch,
+                  dict(zip(UNITS, fu_wait)), cdb_wait, dict(zip(UNITS, occupancy)), rob_occupancy)
+
+
+_traces = {}  # (path, count) -> (memory, cias) in the processes of a sweep
+
+
+def _run(task) -> Result:
+    path, count, config = task
+    if (path, count) not in _traces:
+        memory, cias, eas, seed = workload.read(path)
+        _traces[path, count] = memory, cias[:count] if count else cias
+    return simulate(*_traces[path, count], config)
+
+
+def sweep(path: str, configs, count: int = None, workers: int = None) -> list:
+    """ Results of every configuration on the (count) first instructions of a trace file """
+    tasks = [(path, count, config) for config in configs]
+    if workers == 1 or len(tasks) == 1:
+        return [_run(task) for task in tasks]
+    with Pool(min(workers or os.cpu_count(), len(tasks))) as pool:
+        return pool.map(_run, tasks)
+
+
+def mean(histogram) -> float:
+    """
+    >>> mean([2, 0, 2])
+    1.0
+    """
+    cycles = sum(histogram)
+    return sum(k * n for k, n in enumerate(histogram)) / cycles if cycles else 0.0
+
+
+def report(results, out=None):
+    """ One line per configuration, histograms of the occupancy if there is a single one """
+    print("  RS CDB  FU ROB    IPC   o_stall_fetch_arb (Branch CondReg LoadStore ROB)  "
+          "branch   mean RS occupancy", file=out)
+    for r in results:
+        c = r.config
+        stalls = " ".join(f"{r.stall_fetch_arb[u]:>7}" for u in UNITS)
+        occupancy = " ".join(f"{mean(r.occupancy[u]):4.2f}" for u in UNITS)
+        print(f"{c.rs_depth:>4} {c.cdb_width:>3} {c.fu_count:>3} {c.rob_depth:>3} {r.ipc:6.3f}   "
+              f"{stalls} {r.stall_rob:>7}              {r.stall_branch:>8}   {occupancy}",
+              file=out)
+    if len(results) == 1:
+        r = results[0]
+        histograms = [(f"{u} RS", r.occupancy[u]) for u in UNITS]
+        for name, histogram in histograms + [("ROB", r.rob_occupancy)]:
+            print(f"{name} occupancy (entries: % of the cycles):", file=out)
+            for k, n in enumerate(histogram):
+                share = 100 * n / r.cycles
+                print(f"    {k:>3}: {share:5.1f}% {'#' * round(share / 2)}", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep the sizes of the Arbiter on a trace "
+                                                 "of powerverif.workload")
+    parser.add_argument("trace")
+    parser.add_argument("--rs", type=int, nargs="+", default=[4], help="RS depths")
+    parser.add_argument("--cdb", type=int, nargs="+", default=[1], help="CDB widths")
+    parser.add_argument("--fu", type=int, nargs="+", default=[1],
+                        help="functional units of each type")
+    parser.add_argument("--rob", type=int, nargs="+", default=[16], help="ROB depths")
+    parser.add_argument("--latencies", type=int, nargs=len(UNITS), default=Config().latencies,
+                        metavar=("BRANCH", "CONDREG", "LOADSTORE"))
+    parser.add_argument("--redirect-penalty", type=int, default=1)
+    parser.add_argument("-n", "--count", type=int, help="only the first instructions")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count())
+    parser.add_argument("-o", "--output", help="JSON file of the results")
+    args = parser.parse_args(argv)
+    if min(args.rs + args.cdb + args.fu + args.rob) < 1:
+        parser.error("the sizes must be at least 1")
+    configs = [Config(rs, cdb, fu, rob, tuple(args.latencies), args.redirect_penalty)
+               for rs, cdb, fu, rob in itertools.product(args.rs, args.cdb, args.fu, args.rob)]
+    results = sweep(args.trace, configs, args.count, args.jobs)
+    report(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump([dict(r._asdict(), config=r.config._asdict()) for r in results], f,
+                      indent=1)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,137 @@
+import random
+from functools import lru_cache
+# Integer (shift and mask) bit manipulation helpers for OpenPower verification
+# Bits are numbered like in the Power ISA: bit 0 is the Most Significant Bit (MSB)
+
+
+def select_bit(reg: int, size: int, bit: int) -> int:
+    """
+    >>> select_bit(0b0100, 4, 1)
+    1
+    >>> select_bit(0b0100, 4, 0)
+    0
+    >>> select_bit(0b0100, 4, 2)
+    0
+    """
+    return (reg >> (size - 1 - bit)) & 1
+
+
+def select_bits(reg: int, size: int, from_: int, to: int) -> int:
+    """
+    Returns reg[from_:to] (both included, MSB-0 numbering)
+    >>> select_bits(reg=0b110101, size=6, from_=3, to=5)
+    5
+    >>> select_bits(reg=0b110000, size=6, from_=0, to=1)
+    3
+    """
+    return (reg >> (size - 1 - to)) & ((1 << (to - from_ + 1)) - 1)
+
+
+def exts(num: int, length: int, new_length: int) -> int:
+    """ sign-extend an integer of size length to new_length
+    >>> exts(0b100, 3, 6) == 0b111100
+    True
+    >>> exts(0b011, 3, 6) == 0b000011
+    True
+    """
+    if num >> length:
+        raise TypeError("{} do not fit on {} bits".format(num, length))
+    if new_length > length and (num >> (length - 1)) & 1:
+        # MSB (the sign) is set: fill bits [0:new_length-length-1] with ones
+        return num | (((1 << new_length) - 1) ^ ((1 << length) - 1))
+    return num
+
+
+def int_to_bin(n, a):
+    """
+    Binary string of a on n bits (bit 0 first)
+    >>> int_to_bin(6, 5)
+    '000101'
+    """
+    if a >> n:
+        raise TypeError("{} do not fit on {} bits".format(a, n))
+    return format(a, "0{}b".format(n))
+
+
+# Bit reversed value of every byte, used by BE()
+_REVERSED_BYTES = bytes(int("{:08b}".format(i)[::-1], 2) for i in range(256))
+
+
+def BE(num: int, length: int) -> int:
+    """ Little Endian / Big Endian (reverse the order of the length bits)
+    >>> BE(0b10000111, 8) == 0b11100001
+    True
+    >>> BE(0b001, 3) == 0b100
+    True
+    """
+    num_bytes = (length + 7) >> 3
+    # Reverse the bytes order (little -> big) and the bits inside every byte
+    reversed_bytes = num.to_bytes(num_bytes, "little").translate(_REVERSED_BYTES)
+    return int.from_bytes(reversed_bytes, "big") >> ((num_bytes << 3) - length)
+
+
+@lru_cache(maxsize=None)
+def _compile_pattern(string: str):
+    """ Returns (fixed ones, random bits mask, width) for a random_bin pattern """
+    ones = 0
+    random_mask = 0
+    for c in string:
+        ones <<= 1
+        random_mask <<= 1
+        if c == '?':
+            random_mask |= 1
+        elif c == '1':
+            ones |= 1
+        elif c != '0':
+            raise TypeError("{} is not a 0 or 1".format(c))
+    return ones, random_mask, len(string)
+
+
+def random_bin(string: str) -> int:
+    """
+    Replace all '?' in the input with a random 0 or 1
+    >>> random_bin("0110")
+    6
+    """
+    ones, random_mask, width = _compile_pattern(string)
+    if random_mask == 0:
+        return ones
+    return ones | (random.getrandbits(width) & random_mask)
+
+
+class Field:
+    """
+    Precompiled field [first:last] (both included, MSB-0 numbering) of a
+    register of size bits.
+    The shift and mask are computed once so get() and set() are a couple of
+    integer operations.
+    >>> bt = Field(6, 10)
+    >>> bt.get(0b01001100111000110011001000000010)
+    7
+    >>> bin(bt.set(0, 0b11111))
+    '0b11111000000000000000000000'
+    """
+    __slots__ = ("first", "last", "size", "width", "shift", "mask")
+
+    def __init__(self, first: int, last: int, size: int = 32):
+        if not 0 <= first <= last < size:
+            raise ValueError("Field [{}:{}] does not fit on {} bits".format(first, last, size))
+        self.first = first
+        self.last = last
+        self.size = size
+        self.width = last - first + 1
+        self.shift = size - 1 - last
+        self.mask = (1 << self.width) - 1
+
+    def get(self, reg: int) -> int:
+        """ Returns the value of the field in reg """
+        return (reg >> self.shift) & self.mask
+
+    def set(self, reg: int, value: int) -> int:
+        """ Returns reg where the field has been replaced with value """
+        if value >> self.width:
+            raise TypeError("{} do not fit on {} bits".format(value, self.width))
+        return (reg & ~(self.mask << self.shift)) | (value << self.shift)
+
+    def __repr__(self):
+        return "Field({}, {}, size={})".format(self.first, self.last, self.size)
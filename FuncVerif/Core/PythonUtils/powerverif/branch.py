@@ -0,0 +1,146 @@
+from .utils import select_bit, random_bin, sub_64b
+# Golden model of the Branch Unit (Power ISA section 2.4)
+#
+# BO is classified in 9 types (tBO) like in Power ISA Section 2.4 Figure 40:
+#   0 -> Decrement CTR; Branch if CTR!=0 and CR[BI]=0
+#   1 -> Decrement CTR; Branch if CTR=0 and CR[BI]=0
+#   2 -> Branch if CR[BI]=0
+#   3 -> Decrement CTR; Branch if CTR!=0 and CR[BI]=1
+#   4 -> Decrement CTR; Branch if CTR=0 and CR[BI]=1
+#   5 -> Branch if CR[BI]=1
+#   6 -> Decrement CTR; Branch if CTR!=0
+#   7 -> Decrement CTR; Branch if CTR=0
+#   8 -> Always Branch
+
+
+def classify_BO(BO: int) -> int:
+    """
+    Returns the type (tBO) of a BO field
+    >>> classify_BO(0b00101), classify_BO(0b01011), classify_BO(0b10100)
+    (2, 4, 8)
+    """
+    test_CR = (BO >> 4) & 1 == 0  # BO[0]
+    decrement = (BO >> 2) & 1 == 0  # BO[2]
+    if test_CR and decrement:
+        return 3 * ((BO >> 3) & 1) + ((BO >> 1) & 1)  # BO[1] and BO[3]
+    elif test_CR:
+        return 5 if (BO >> 3) & 1 else 2
+    elif decrement:
+        return 7 if (BO >> 1) & 1 else 6
+    return 8
+
+
+TBO = [classify_BO(BO) for BO in range(32)]  # BO -> tBO lookup table
+
+
+def str_tBO(tBO: int) -> str:
+    if tBO == 0:
+        return "Decrement CTR; Branch if CTR!=0 and CR[BI]=0"
+    elif tBO == 1:
+        return "Decrement CTR; Branch if CTR=0 and CR[BI]=0"
+    elif tBO == 2:
+        return "Branch if CR[BI]=0"
+    elif tBO == 3:
+        return "Decrement CTR; Branch if CTR!=0 and CR[BI]=1"
+    elif tBO == 4:
+        return "Decrement CTR; Branch if CTR=0 and CR[BI]=1"
+    elif tBO == 5:
+        return "Branch if CR[BI]!=0"
+    elif tBO == 6:
+        return "Decrement CTR; Branch if CTR!=0"
+    elif tBO == 7:
+        return "Decrement CTR; Branch if CTR=0"
+    else:
+        return "Always Branch"
+
+
+def str_BH(BH: int, t: str) -> str:
+    """
+    t can be "bclr" "bcctr" "bctar"
+    """
+    if BH == 0b00 and t == "bclr":
+        return "The instruction is a subroutine return"
+    elif BH == 0b00 and (t == "bcctr" or t == "bctar"):
+        return "Target address is likely to be the same as the last time the branch was taken"
+    elif BH == 0b01 and t == "bclr":
+        return "Target address is likely to be the same as the last time the branch was taken"
+    elif BH == 0b01 and (t == "bcctr" or t == "bctar"):
+        return "Reserved"
+    elif BH == 0b11:
+        return "Target address is not predictable"
+    else:
+        return "Error"
+
+
+def should_branch(tBO, CR, BI, CTR) -> bool:
+    """
+    CTR is the value after the decrement (see expected_CTR)
+    >>> should_branch(tBO=2, CR=0x7fffffff, BI=0, CTR=0)
+    True
+    >>> should_branch(tBO=6, CR=0, BI=0, CTR=0)
+    False
+    """
+    if tBO == 0:
+        return select_bit(reg=CR, size=32, bit=BI) == 0 and CTR != 0  # CTR[0:63]
+    elif tBO == 1:
+        return select_bit(reg=CR, size=32, bit=BI) == 0 and CTR == 0
+    elif tBO == 2:
+        return select_bit(reg=CR, size=32, bit=BI) == 0
+    elif tBO == 3:
+        return select_bit(reg=CR, size=32, bit=BI) == 1 and CTR != 0
+    elif tBO == 4:
+        return select_bit(reg=CR, size=32, bit=BI) == 1 and CTR == 0
+    elif tBO == 5:
+        return select_bit(reg=CR, size=32, bit=BI) == 1
+    elif tBO == 6:
+        return CTR != 0
+    elif tBO == 7:
+        return CTR == 0
+    else:
+        return True
+
+
+def generate_BO(tBO, A, T) -> int:
+    if tBO == 0:
+        # Decrement CTR then branch if CTR[M:63] != 0 and CR[BI] == 0
+        return random_bin("0000?")
+    elif tBO == 1:
+        # Decrement the CTR then branch if CTR[M:63] == 0 and CR[BI] == 0
+        return random_bin("0001?")
+    elif tBO == 2:
+        return 0b00100 | A << 1 | T  # Branch if CR[BI] == 0
+    elif tBO == 3:
+        # Decrement the CTR, then branch if CTR[M:63] != 0 and CR[BI] == 1
+        return random_bin("0100?")
+    elif tBO == 4:
+        # Decrement the CTR, then branch if CTR[M:63] == 0 and CR[BI] == 1
+        return random_bin("0101?")
+    elif tBO == 5:
+        return 0b01100 | A << 1 | T  # Branch if CR[BI] == 1
+    elif tBO == 6:
+        # Decrement the CTR, then branch if CTR[M:63] != 0
+        return 0b10000 | A << 3 | T
+    elif tBO == 7:
+        # Decrement the CTR, then branch if CTR[M:63] == 0
+        return 0b10010 | A << 3 | T
+    else:
+        return random_bin("1?1??")  # Branch always
+
+
+def expected_CTR(CTR, tBO) -> int:
+    """
+    Returns new CTR value
+    >>> expected_CTR(CTR=0, tBO=0)
+    18446744073709551615
+    >>> expected_CTR(CTR=5, tBO=2)
+    5
+    """
+    if tBO in (2, 5, 8):
+        return CTR
+    return sub_64b(CTR, 1)
+
+
+def expected_LR(LR, CIA, LK):
+    if LK == 1:
+        return CIA+4  # Effective address of the instruction following the Branch Instruction
+    return LR
@@ -0,0 +1,120 @@
+import numpy
+from . import branch, isa
+# Vectorized (NumPy) golden model of the Branch Unit (Power ISA section 2.4)
+#
+# Same behaviour as powerverif.branch and the BranchUnit testbenches, but on
+# arrays: every element is one branch executed from its own (CIA, CR, CTR, LR,
+# TAR) state. All the registers are numpy.uint64 arrays so additions and the CTR
+# decrement wrap around like the 64-bit registers of the DUT.
+#
+# Supported instructions: b, bc, bclr, bcctr, bctar; any other instruction word
+# goes to CIA+4 without updating LR and CTR.
+# bcctr with a CTR decrement (BO[2]=0) is an invalid form, like in 64b_bcctr.py
+# it is ignored (NIA=CIA+4, LR and CTR unchanged).
+
+U64 = numpy.uint64
+# Lookup tables indexed by BO (see the tBO types in powerverif.branch)
+DECREMENT = numpy.array([tBO not in (2, 5, 8) for tBO in branch.TBO])  # CTR-- then test CTR
+TEST_CR = numpy.array([tBO < 6 for tBO in branch.TBO])  # condition on CR[BI]
+CR_VALUE = numpy.array([(BO >> 3) & 1 for BO in range(32)], dtype=numpy.uint64)  # BO[1]
+CTR_ZERO = numpy.array([(BO >> 1) & 1 == 1 for BO in range(32)])  # BO[3]: CTR=0
+
+XO_BCLR = isa.BY_MNEMONIC["bclr"].xo
+XO_BCCTR = isa.BY_MNEMONIC["bcctr"].xo
+XO_BCTAR = isa.BY_MNEMONIC["bctar"].xo
+
+
+# BO, BI, AA and LK are at the same place in the I, B and XL forms
+FIELDS = {**isa.FORM["I"].fields, **isa.FORM["B"].fields, **isa.FORM["XL"].fields}
+
+
+def _field(instr, name: str):
+    field = FIELDS[name]
+    return (instr >> U64(field.shift)) & U64(field.mask)
+
+
+def _exts(value, length: int):
+    """ Sign extends (length) bits to 64 bits """
+    sign = U64(1 << (length - 1))
+    return (value ^ sign) - sign
+
+
+def step(instr, CIA, CR, CTR, LR, TAR):
+    """
+    Executes one branch per element, returns the arrays (NIA, LR, CTR)
+    >>> NIA, LR, CTR = step([isa.encode("bc", BO=0b10000, BI=0, BD=4, AA=0, LK=1)],
+    ...                     CIA=[0x100], CR=[0], CTR=[0], LR=[0], TAR=[0])
+    >>> hex(NIA[0]), hex(LR[0]), hex(CTR[0])
+    ('0x110', '0x104', '0xffffffffffffffff')
+    """
+    instr = numpy.asarray(instr, dtype=U64)
+    CIA, CR, CTR, LR, TAR = (numpy.asarray(r, dtype=U64) for r in (CIA, CR, CTR, LR, TAR))
+
+    PO = _field(instr, "PO")
+    XO = _field(instr, "XO")
+    BO = _field(instr, "BO").astype(numpy.intp)
+    BI = _field(instr, "BI")
+    AA = _field(instr, "AA").astype(bool)
+    LK = _field(instr, "LK").astype(bool)
+    i_form = PO == U64(18)
+    b_form = PO == U64(16)
+    xl_form = PO == U64(19)
+    bclr = xl_form & (XO == U64(XO_BCLR))
+    bcctr = xl_form & (XO == U64(XO_BCCTR))
+    bctar = xl_form & (XO == U64(XO_BCTAR))
+    conditional = b_form | bclr | bcctr | bctar
+    # Power ISA section 1.8.2: bcctr can't decrement CTR (invalid form)
+    valid = ~(bcctr & DECREMENT[BO])
+    is_branch = (i_form | conditional) & valid
+
+    # CTR is decremented before being tested
+    decrement = conditional & valid & DECREMENT[BO]
+    new_CTR = numpy.where(decrement, CTR - U64(1), CTR)
+    CR_BI = (CR >> (U64(31) - BI)) & U64(1)  # CR[BI], CR is 32 bits
+    CR_ok = ~TEST_CR[BO] | (CR_BI == CR_VALUE[BO])
+    CTR_ok = ~DECREMENT[BO] | ((new_CTR == U64(0)) == CTR_ZERO[BO])
+    taken = is_branch & (i_form | (CR_ok & CTR_ok))
+
+    # Branch target address
+    offset = numpy.where(i_form, _exts(_field(instr, "LI") << U64(2), 26),
+                         _exts(_field(instr, "BD") << U64(2), 16))
+    relative = numpy.where(AA, offset, CIA + offset)
+    target = numpy.select([bclr, bcctr, bctar], [LR, CTR, TAR], relative)
+    target = numpy.where(bclr | bcctr | bctar, target & ~U64(3), target)
+
+    NIA = numpy.where(taken, target, CIA + U64(4))
+    new_LR = numpy.where(is_branch & LK, CIA + U64(4), LR)
+    return NIA, new_LR, new_CTR
+
+
+def random_branches(n: int, rng=None, forms=("b", "bc", "bclr", "bcctr", "bctar")):
+    """
+    Returns n random branch instruction words (uint32 array), every field
+    is uniformly random so all the tBO types, AA and LK are covered
+    """
+    rng = numpy.random.default_rng(rng)
+    mnemonic = rng.integers(0, len(forms), n)
+    words = numpy.empty(n, dtype=numpy.uint32)
+    for i, name in enumerate(forms):
+        op = isa.BY_MNEMONIC[name]
+        form = isa.FORM[op.form]
+        sel = mnemonic == i
+        fields = {f: rng.integers(0, 1 << form.fields[f].width, int(sel.sum()),
+                                  dtype=numpy.uint32)
+                  for f in form.names if f not in ("PO", "XO")}
+        fields["PO"] = numpy.uint32(op.po)
+        if op.xo is not None:
+            fields["XO"] = numpy.uint32(op.xo)
+        words[sel] = form.encode_array(**fields)
+    return words
+
+
+def mismatches(expected, actual):
+    """
+    Compares a tuple of expected arrays (NIA, LR, CTR) to the same arrays read
+    from the DUT, returns the indexes where at least one of them differs
+    """
+    diff = numpy.zeros(len(expected[0]), dtype=bool)
+    for e, a in zip(expected, actual):
+        diff |= numpy.asarray(e, dtype=U64) != numpy.asarray(a, dtype=U64)
+    return numpy.flatnonzero(diff)
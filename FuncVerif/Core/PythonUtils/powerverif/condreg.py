@@ -0,0 +1,130 @@
+import random
+from .utils import select_bit
+# Golden model of the Condition Register logical instructions (Power ISA section 2.5.1)
+DEBUG = False  # Main switch to turn on/off debugging prints
+
+# Extended opcode (XO) of every Condition Register instruction (XL-form, PO=19)
+XO_CRAND = 257
+XO_CRNAND = 225
+XO_CROR = 449
+XO_CRXOR = 193
+XO_CRNOR = 33
+XO_CREQV = 289
+XO_CRANDC = 129
+XO_CRORC = 417
+XO_MCRF = 0
+
+
+def replace_bit(size: int, ref: int, offset: int, value: int) -> int:
+    """
+    >>> replace_bit(size=4, ref=0b0010, offset=2, value=0)
+    0
+    >>> replace_bit(size=4, ref=0, offset=0, value=1)
+    8
+    """
+    mask = 1 << (size - 1 - offset)
+    return (ref | mask) if value else (ref & ~mask)
+
+
+def get_bit(size: int, var: int, offset: int) -> int:
+    """
+    >>> get_bit(4, 0b0001, 3)
+    1
+    >>> get_bit(4, 0b111, 0)
+    0
+    >>> get_bit(4, 0b1000, 0)
+    1
+    """
+    return select_bit(reg=var, size=size, bit=offset)
+
+
+# Truth table of every CR logical: bit (CR[BA] << 1 | CR[BB]) is the value of CR[BT]
+TRUTH_TABLE = {
+    XO_CRAND: 0b1000,
+    XO_CRNAND: 0b0111,
+    XO_CROR: 0b1110,
+    XO_CRXOR: 0b0110,
+    XO_CRNOR: 0b0001,
+    XO_CREQV: 0b1001,
+    XO_CRANDC: 0b0100,
+    XO_CRORC: 0b1101,
+}
+NAMES = {XO_CRAND: "crand", XO_CRNAND: "crnand", XO_CROR: "cror", XO_CRXOR: "crxor",
+         XO_CRNOR: "crnor", XO_CREQV: "creqv", XO_CRANDC: "crandc", XO_CRORC: "crorc",
+         XO_MCRF: "mcrf"}
+# CR is 32 bits numbered from 0 (MSB) to 31, fields are 4 bits (CR0 to CR7)
+BIT_MASK = tuple(1 << (31 - i) for i in range(32))
+FIELD_MASK = tuple(0xf << (28 - 4*i) for i in range(8))
+
+
+def expected_CR(oldcr: int, xo: int, bt: int, ba: int, bb: int, bf: int, bfa: int) -> int:
+    """
+    Returns the CR after the execution of a CR logical or mcrf
+    >>> hex(expected_CR(0xa0000000, XO_CRXOR, bt=0, ba=0, bb=2, bf=0, bfa=0))
+    '0x20000000'
+    """
+    if DEBUG: print(f"{NAMES.get(xo)}: BT={bt} BA={ba} BB={bb} BF={bf} BFA={bfa}")
+    table = TRUTH_TABLE.get(xo)
+    if table is not None:
+        index = ((oldcr >> (31 - ba)) & 1) << 1 | ((oldcr >> (31 - bb)) & 1)
+        if (table >> index) & 1:
+            return oldcr | BIT_MASK[bt]
+        return oldcr & ~BIT_MASK[bt]
+    assert xo == XO_MCRF, "xo is wrong"
+    field = ((oldcr >> (28 - 4*bfa)) & 0xf) << (28 - 4*bf)
+    return (oldcr & ~FIELD_MASK[bf]) | field
+
+
+def execute(oldcr: int, instr: int) -> int:
+    """
+    Returns the CR after the execution of (instr) a CR logical or mcrf
+    instruction word (XL-form)
+    >>> hex(execute(0xa0000000, 0x4c001182))  # crxor 0, 0, 2
+    '0x20000000'
+    """
+    xo = (instr >> 1) & 0x3ff
+    if xo == XO_MCRF:
+        return expected_CR(oldcr, xo, 0, 0, 0, (instr >> 23) & 0b111, (instr >> 18) & 0b111)
+    return expected_CR(oldcr, xo, (instr >> 21) & 0x1f, (instr >> 16) & 0x1f,
+                       (instr >> 11) & 0x1f, 0, 0)
+
+
+def run(oldcr: int, instrs) -> list:
+    """
+    Executes a sequence of instruction words, returns the CR after every one
+    of them (see also powerverif.condreg_batch)
+    >>> [hex(cr) for cr in run(0xa0000000, [0x4c001182, 0x4c001182])]
+    ['0x20000000', '0xa0000000']
+    """
+    result = []
+    for instr in instrs:
+        oldcr = execute(oldcr, instr)
+        result.append(oldcr)
+    return result
+
+
+VALID_XO = [XO_CRNOR, XO_CREQV, XO_CRANDC, XO_CRORC, XO_CRAND, XO_CRNAND, XO_CROR, XO_CRXOR, XO_MCRF]
+
+
+def random_xo() -> int:
+    return random.choice(VALID_XO)
+
+
+def is_crand(xo: int) -> bool:
+    return xo == XO_CRAND
+def is_crnand(xo: int) -> bool:
+    return xo == XO_CRNAND
+def is_cror(xo: int) -> bool:
+    return xo == XO_CROR
+def is_crxor(xo: int) -> bool:
+    return xo == XO_CRXOR
+def is_crnor(xo: int) -> bool:
+    return xo == XO_CRNOR
+def is_creqv(xo: int) -> bool:
+    return xo == XO_CREQV
+def is_crandc(xo: int) -> bool:
+    return xo == XO_CRANDC
+def is_crorc(xo: int) -> bool:
+    return xo == XO_CRORC
+def is_mcrf(xo: int) -> bool:
+    return xo == XO_MCRF
@@ -0,0 +1,83 @@
+import numpy
+from . import condreg
+# Vectorized (NumPy) golden model of the Condition Register logical instructions
+# (Power ISA section 2.5.1)
+#
+# CR values are packed in numpy.uint32 arrays (CR[0] is the MSB) and the
+# instructions are XL-form words. The CR logicals and mcrf are evaluated with
+# masks precomputed from condreg.TRUTH_TABLE, no Python code runs per element.
+
+U32 = numpy.uint32
+# Indexed by XO: truth table of the operation (see condreg.TRUTH_TABLE)
+TRUTH_TABLE = numpy.zeros(1024, dtype=U32)
+for xo, table in condreg.TRUTH_TABLE.items():
+    TRUTH_TABLE[xo] = table
+VALID = numpy.zeros(1024, dtype=bool)
+VALID[condreg.VALID_XO] = True
+_VALID_XO = frozenset(condreg.VALID_XO)
+
+
+def step(CR, instr):
+    """
+    Executes one instruction per element, returns the new CR array
+    Other instruction words leave the CR unchanged.
+    >>> [hex(cr) for cr in step([0xa0000000, 0xa0000000], [0x4c001182, 0x4f800000])]
+    ['0x20000000', '0xa000000a']
+    """
+    CR = numpy.asarray(CR, dtype=U32)
+    instr = numpy.asarray(instr, dtype=U32)
+    XO = (instr >> U32(1)) & U32(0x3ff)
+    BT = (instr >> U32(21)) & U32(0x1f)
+    BA = (instr >> U32(16)) & U32(0x1f)
+    BB = (instr >> U32(11)) & U32(0x1f)
+    BF = (instr >> U32(23)) & U32(0b111)
+    BFA = (instr >> U32(18)) & U32(0b111)
+    mcrf = XO == U32(condreg.XO_MCRF)
+    valid = VALID[XO] & ((instr >> U32(26)) == U32(19))
+
+    # CR logicals: CR[BT] <- bit (CR[BA] << 1 | CR[BB]) of the truth table
+    index = ((CR >> (U32(31) - BA)) & U32(1)) << U32(1) | ((CR >> (U32(31) - BB)) & U32(1))
+    value = (TRUTH_TABLE[XO] >> index) & U32(1)
+    bit = U32(1) << (U32(31) - BT)
+    logical = (CR & ~bit) | (value << (U32(31) - BT))
+
+    # mcrf: CR field BF <- CR field BFA
+    field = ((CR >> (U32(28) - U32(4)*BFA)) & U32(0xf)) << (U32(28) - U32(4)*BF)
+    moved = (CR & ~(U32(0xf) << (U32(28) - U32(4)*BF))) | field
+
+    return numpy.where(valid, numpy.where(mcrf, moved, logical), CR)
+
+
+def run(CR, instrs):
+    """
+    Executes a sequence of instructions and returns the CR after every one of
+    them: instrs has a shape (length,) or (length, streams) to run independent
+    streams side by side (CR is then one value per stream). Like step(), other
+    instruction words leave the CR unchanged.
+    >>> [hex(cr) for cr in run(0xa0000000, [0x4c001182, 0x88001182, 0x4c001182])]
+    ['0x20000000', '0x20000000', '0xa0000000']
+    """
+    instrs = numpy.asarray(instrs, dtype=U32)
+    CR = numpy.broadcast_to(numpy.asarray(CR, dtype=U32), instrs.shape[1:])
+    if instrs.ndim == 1:
+        # One stream: the packed model is faster without numpy's per call overhead
+        cr, result = int(CR), []
+        for instr in instrs.tolist():
+            if instr >> 26 == 19 and (instr >> 1) & 0x3ff in _VALID_XO:
+                cr = condreg.execute(cr, instr)
+            result.append(cr)
+        return numpy.array(result, dtype=U32)
+    result = numpy.empty(instrs.shape, dtype=U32)
+    for i in range(len(instrs)):
+        CR = result[i] = step(CR, instrs[i])
+    return result
+
+
+def random_instructions(shape, rng=None):
+    """ Random CR logical and mcrf instruction words (every XO is equally likely) """
+    rng = numpy.random.default_rng(rng)
+    XO = numpy.array(condreg.VALID_XO, dtype=U32)[rng.integers(0, len(condreg.VALID_XO), shape)]
+    # BT, BA, BB or BF, BFA (reserved bits and LK are 0)
+    fields = numpy.where(XO == U32(condreg.XO_MCRF), U32(0x039c0000), U32(0x03fff800))
+    words = rng.integers(0, 2**32, shape, dtype=U32) & fields
+    return words | U32(19 << 26) | (XO << U32(1))
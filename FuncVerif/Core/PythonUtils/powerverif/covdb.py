@@ -0,0 +1,200 @@
+import os
+import sys
+import json
+import struct
+import argparse
+from array import array
+# Append-only binary coverage database
+#
+# Every cocotb process appends the hits of its cover points and crosses
+# (cocotb_coverage's coverage_db) to a file, several processes can append to
+# the same file. merge() sums the hits of any number of files, per unit, so
+# the coverage of a sharded regression is known without simulating again.
+#
+# A file is a sequence of records (big-endian):
+#   MAGIC, length of the header (uint32), length of the counts (uint32)
+#   header: JSON {"unit", "test", "seed", "items": [[name, kind, bins], ...]}
+#   counts: one uint64 per bin, in the order of the header
+# Bins of crosses are lists (tuples in Python).
+#
+# Save the coverage of a test: covdb.save("Identify", "test_identify_branch")
+# Merge and report: python3 -m powerverif.covdb report build/shard/*/coverage.pvcov
+
+MAGIC = b"PVCOV1"
+_record = struct.Struct(">6sII")
+_saved = {}  # (item name, bin) -> hits already saved by this process, see save()
+
+
+def _key(b):
+    """ JSON bins -> Python bins """
+    return tuple(b) if isinstance(b, list) else b
+
+
+def _counts(values) -> bytes:
+    counts = array("Q", values)
+    if sys.byteorder == "little":
+        counts.byteswap()
+    return counts.tobytes()
+
+
+class Record:
+    """ Hits of the cover items of one unit: items[name] = (kind, {bin: hits}) """
+
+    def __init__(self, unit: str, test: str = "", seed: int = None, items: dict = None):
+        self.unit = unit
+        self.test = test
+        self.seed = seed
+        self.items = items if items is not None else {}
+
+    def pack(self) -> bytes:
+        header = json.dumps({"unit": self.unit, "test": self.test, "seed": self.seed,
+                             "items": [[name, kind, list(bins)]
+                                       for name, (kind, bins) in self.items.items()]},
+                            separators=(",", ":")).encode()
+        counts = _counts(hits for kind, bins in self.items.values() for hits in bins.values())
+        return _record.pack(MAGIC, len(header), len(counts)) + header + counts
+
+    @classmethod
+    def unpack_from(cls, data, offset: int = 0):
+        """ (record, offset of the next record) """
+        magic, header_size, counts_size = _record.unpack_from(data, offset)
+        if magic != MAGIC:
+            raise ValueError(f"Not a coverage record at offset {offset}")
+        offset += _record.size
+        header = json.loads(bytes(data[offset:offset + header_size]))
+        offset += header_size
+        counts = array("Q", data[offset:offset + counts_size])
+        if sys.byteorder == "little":
+            counts.byteswap()
+        items, i = {}, 0
+        for name, kind, bins in header["items"]:
+            items[name] = (kind, dict(zip(map(_key, bins), counts[i:i + len(bins)])))
+            i += len(bins)
+        return cls(header["unit"], header["test"], header["seed"], items), offset + counts_size
+
+    def add(self, other: "Record"):
+        """ Adds the hits of (other), bins unknown to this record are added """
+        for name, (kind, bins) in other.items.items():
+            mine = self.items.setdefault(name, (kind, {}))[1]
+            for b, hits in bins.items():
+                mine[b] = mine.get(b, 0) + hits
+
+
+def read(path: str) -> list:
+    """ Records of a coverage file """
+    with open(path, "rb") as f:
+        data = f.read()
+    records, offset = [], 0
+    while offset < len(data):
+        record, offset = Record.unpack_from(data, offset)
+        records.append(record)
+    return records
+
+
+def append(path: str, record: Record):
+    """
+    Appends (record) with a single write(2) on a file opened with O_APPEND:
+    concurrent writers do not mix their records (a buffered file object can
+    split a large record in several writes)
+    """
+    data = record.pack()
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        written = os.write(fd, data)
+    finally:
+        os.close(fd)
+    if written != len(data):
+        raise OSError(f"{path}: only {written} of the {len(data)} bytes of a record were written")
+
+
+def from_coverage_db(unit: str, test: str = "", seed: int = None, db=None) -> Record:
+    """ Record of the hits of every cover point and cross of cocotb_coverage's coverage_db """
+    if db is None:
+        from cocotb_coverage.coverage import coverage_db as db
+    from cocotb_coverage.coverage import CoverPoint, CoverCross
+    items = {}
+    for name, item in db.items():
+        if isinstance(item, CoverPoint):
+            items[name] = ("point", dict(item._hits))
+        elif isinstance(item, CoverCross):
+            items[name] = ("cross", dict(item._hits))
+    return Record(unit, test, seed, items)
+
+
+def save(unit: str, test: str = "", path: str = None, seed: int = None, db=None):
+    """
+    Appends the hits of coverage_db to (path) (default: the COVERAGE_DB
+    environment variable, or coverage.pvcov). Only the hits since the
+    previous save() of this process are written, so a testbench can save
+    at the end of every test.
+    """
+    path = path or os.environ.get("COVERAGE_DB", "coverage.pvcov")
+    if seed is None and os.environ.get("COCOTB_RANDOM_SEED"):
+        seed = int(os.environ["COCOTB_RANDOM_SEED"])
+    record = from_coverage_db(unit, test, seed, db)
+    for name, (kind, bins) in record.items.items():
+        for b, hits in bins.items():
+            bins[b] = hits - _saved.get((name, b), 0)
+            _saved[(name, b)] = hits
+    append(path, record)
+
+
+def merge(paths) -> dict:
+    """ unit -> Record: sum of the records of every file """
+    merged = {}
+    for path in paths:
+        for record in read(path):
+            if record.unit not in merged:
+                merged[record.unit] = Record(record.unit, "merged")
+            merged[record.unit].add(record)
+    return merged
+
+
+def report(record: Record, bins: bool = False, at_least: int = 1) -> str:
+    """
+    Coverage of every cover point and cross of (record)
+    >>> r = Record("Unit", items={"dut.a": ("point", {0: 3, 1: 0}),
+    ...                           "dut.cross": ("cross", {(0, 0): 1, (0, 1): 2})})
+    >>> print(report(r))
+    Unit: 3/4 bins (75.0%)
+        dut.a: 1/2 bins (50.0%)
+        dut.cross: 2/2 bins (100.0%)
+    """
+    lines = []
+    covered = total = 0
+    for name, (kind, hits) in sorted(record.items.items()):
+        hit = sum(1 for h in hits.values() if h >= at_least)
+        covered, total = covered + hit, total + len(hits)
+        lines.append(f"    {name}: {hit}/{len(hits)} bins ({100 * hit / max(len(hits), 1):.1f}%)")
+        if bins:
+            lines.extend(f"        {b}: {h}" for b, h in hits.items())
+    return "\n".join([f"{record.unit}: {covered}/{total} bins "
+                      f"({100 * covered / max(total, 1):.1f}%)"] + lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge and report coverage databases")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for command, help in (("report", "cumulative coverage of the files"),
+                          ("merge", "merge the files into one record per unit")):
+        p = sub.add_parser(command, help=help)
+        p.add_argument("files", nargs="+")
+        if command == "report":
+            p.add_argument("-b", "--bins", action="store_true", help="print the hits of every bin")
+            p.add_argument("-u", "--unit", help="only report this unit")
+        else:
+            p.add_argument("-o", "--output", required=True)
+    args = parser.parse_args(argv)
+
+    merged = merge(args.files)
+    if args.command == "merge":
+        with open(args.output, "wb") as f:
+            f.writelines(record.pack() for record in merged.values())
+    else:
+        for unit, record in sorted(merged.items()):
+            if args.unit in (None, unit):
+                print(report(record, args.bins))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+import os
+import queue
+import threading
+from collections import Counter
+from cocotb_coverage.coverage import coverage_section, CoverPoint, CoverCross
+# Coverage definitions shared by the cocotb testbenches (cocotb_coverage)
+# Every *_coverage() function returns a new coverage section, use it as a
+# decorator on the sampling coroutine of the testbench.
+# Every *_collector() function returns a Collector on the same cover points:
+# call its sample(dut) instead, it is much cheaper (see Collector).
+
+# (cover point, DUT signal, width in bits)
+IDENTIFY_POINTS = (
+    ("dut.i_arb_full_mask", "i_arb_full_mask", 1),
+    ("dut.o_stall_fetch_arb", "o_stall_fetch_arb", 1),
+    ("dut.o_unknown_instr", "o_unknown_instr", 1),
+    ("dut.o_condreg_identified", "o_condreg_identified", 1),
+    ("dut.o_branch_identified", "o_branch_identified", 1),
+
+    # Branch Instructions coverage events
+    ("top.o_branch_i_form", "o_branch_i_form", 1),
+    ("top.o_branch_b_form", "o_branch_b_form", 1),
+    ("top.o_branch_cond_LR", "o_branch_cond_LR", 1),
+    ("top.o_branch_cond_CTR", "o_branch_cond_CTR", 1),
+    ("top.o_branch_cond_TAR", "o_branch_cond_TAR", 1),
+
+    # Condition Registers conditional events
+    ("dut.o_condreg_crand", "o_condreg_crand", 1),
+    ("dut.o_condreg_crnand", "o_condreg_crnand", 1),
+    ("dut.o_condreg_cror", "o_condreg_cror", 1),
+    ("dut.o_condreg_crxor", "o_condreg_crxor", 1),
+    ("dut.o_condreg_crnor", "o_condreg_crnor", 1),
+    ("dut.o_condreg_creqv", "o_condreg_creqv", 1),
+    ("dut.o_condreg_crandc", "o_condreg_crandc", 1),
+    ("dut.o_condreg_crorc", "o_condreg_crorc", 1),
+    ("dut.o_condreg_mcrf", "o_condreg_mcrf", 1),
+)
+# (cover cross, cover points)
+IDENTIFY_CROSSES = (
+    ("dut.cross", ("dut.o_condreg_identified", "dut.o_branch_identified", "dut.o_unknown_instr")),
+)
+
+LOADSTOREUNIT_POINTS = (
+    # Branch Instructions coverage events
+    ("dut.o_bru_en", "o_bru_en", 1),
+    ("top.o_bru_i_form", "o_bru_i_form", 1),
+    ("top.o_bru_b_form", "o_bru_b_form", 1),
+    ("top.o_bru_cond_LR", "o_bru_cond_LR", 1),
+    ("top.o_bru_cond_CTR", "o_bru_cond_CTR", 1),
+    ("top.o_bru_cond_TAR", "o_bru_cond_TAR", 1),
+
+    # Condition Registers conditional events
+    ("dut.o_condreg_en", "o_condreg_en", 1),
+    ("dut.o_condreg_crand", "o_condreg_crand", 1),
+    ("dut.o_condreg_crnand", "o_condreg_crnand", 1),
+    ("dut.o_condreg_cror", "o_condreg_cror", 1),
+    ("dut.o_condreg_crxor", "o_condreg_crxor", 1),
+    ("dut.o_condreg_crnor", "o_condreg_crnor", 1),
+    ("dut.o_condreg_creqv", "o_condreg_creqv", 1),
+    ("dut.o_condreg_crandc", "o_condreg_crandc", 1),
+    ("dut.o_condreg_crorc", "o_condreg_crorc", 1),
+    ("dut.o_condreg_mcrf", "o_condreg_mcrf", 1),
+)
+LOADSTOREUNIT_CROSSES = (
+    ("dut.cross", ("dut.o_condreg_en", "dut.o_bru_en")),
+)
+
+
+def _point(name: str, signal: str, width: int = 1) -> CoverPoint:
+    """ CoverPoint with one bin per value of a DUT signal """
+    return CoverPoint(name, xf=lambda dut: getattr(dut, signal).value.integer,
+                      bins=list(range(2**width)))
+
+
+def _section(points, crosses):
+    return coverage_section(*[_point(*p) for p in points],
+                            *[CoverCross(name, items=list(items)) for name, items in crosses])
+
+
+def identify_coverage():
+    """ Coverage of the Identify unit's outputs """
+    return _section(IDENTIFY_POINTS, IDENTIFY_CROSSES)
+
+
+def loadstoreunit_coverage():
+    """ Coverage of the Load Store Unit's outputs """
+    return _section(LOADSTOREUNIT_POINTS, LOADSTOREUNIT_CROSSES)
+
+
+class Collector:
+    """
+    Packed coverage sampling
+
+    sample(dut) reads every covered signal once, packs the values in an int
+    (the snapshot) and only appends it to a buffer: its cost does not depend
+    on the bins. flush() counts the buffered snapshots and updates the bins
+    of the cover points and crosses in bulk, once per distinct snapshot.
+    The cover items are the ones of cocotb_coverage's coverage_db, so
+    coverage_db.report_coverage() works as usual after a flush(). The bins are
+    updated through the private state of the items (_hits, _items,
+    _parent._update_coverage()), which is only checked with the versions of
+    cocotb-coverage pinned by pyproject.toml (see test_coverage.py).
+
+    With (background) set (default: COVERAGE_BACKGROUND environment
+    variable), every (period) samples the buffer is handed to a thread which
+    updates the bins; close() waits for it.
+    >>> class Signal: value = 1
+    >>> class Dut: a, b = Signal(), Signal()
+    >>> c = Collector([("doc.a", "a", 1), ("doc.b", "b", 1)], [("doc.x", ("doc.a", "doc.b"))])
+    >>> c.sample(Dut)
+    >>> c.flush()
+    >>> c.points["doc.a"].detailed_coverage, c.crosses["doc.x"].detailed_coverage[(1, 1)]
+    (OrderedDict([(0, 0), (1, 1)]), 1)
+    """
+
+    def __init__(self, points, crosses=(), background: bool = None, period: int = 4096):
+        self.signals = [signal for name, signal, width in points]
+        self.points = {name: _point(name, signal, width) for name, signal, width in points}
+        self.crosses = {name: CoverCross(name, items=list(items)) for name, items in crosses}
+        # Bit field (name, shift, mask) of every cover point in the snapshot
+        self._fields = []
+        shift = 0
+        for name, signal, width in points:
+            self._fields.append((name, shift, 2**width - 1))
+            shift += width
+        self._shifts = [shift for name, shift, mask in self._fields]
+        self._handles = None
+        self._buffer = []
+        self.period = period
+        self.samples = 0
+        if background is None:
+            background = bool(os.environ.get("COVERAGE_BACKGROUND"))
+        self._thread = None
+        if background:
+            self._batches = queue.SimpleQueue()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def sample(self, dut):
+        if self._handles is None:  # Signal handles are resolved once
+            self._handles = [getattr(dut, signal) for signal in self.signals]
+        snapshot = 0
+        for handle, shift in zip(self._handles, self._shifts):
+            snapshot |= int(handle.value) << shift
+        self._buffer.append(snapshot)
+        if self._thread is not None and len(self._buffer) >= self.period:
+            self._batches.put(self._buffer)
+            self._buffer = []
+
+    def _run(self):
+        while True:
+            batch = self._batches.get()
+            if batch is None:
+                return
+            if isinstance(batch, threading.Event):  # See flush()
+                batch.set()
+            else:
+                self._update(batch)
+
+    def _update(self, snapshots: list):
+        """ Adds the hits of (snapshots) to the bins """
+        items = list(self.points.values()) + list(self.crosses.values())
+        before = [item.coverage for item in items]
+        for snapshot, count in Counter(snapshots).items():
+            values = {name: (snapshot >> shift) & mask for name, shift, mask in self._fields}
+            for name, value in values.items():
+                hits = self.points[name]._hits
+                if value in hits:
+                    hits[value] += count
+            for cross in self.crosses.values():
+                key = tuple(values[name] for name in cross._items)
+                if key in cross._hits:
+                    cross._hits[key] += count
+        for item, coverage in zip(items, before):
+            if item.coverage != coverage:
+                item._parent._update_coverage(item.coverage - coverage)
+        self.samples += len(snapshots)
+
+    def flush(self):
+        """ Updates the bins with the buffered samples (waits for the thread) """
+        buffer, self._buffer = self._buffer, []
+        if self._thread is None:
+            self._update(buffer)
+        else:
+            done = threading.Event()
+            self._batches.put(buffer)
+            self._batches.put(done)
+            done.wait()
+
+    def close(self):
+        """ flush() and stop the thread """
+        self.flush()
+        if self._thread is not None:
+            self._batches.put(None)
+            self._thread.join()
+            self._thread = None
+
+
+def identify_collector(background: bool = None) -> Collector:
+    """ Collector on the cover points of identify_coverage() """
+    return Collector(IDENTIFY_POINTS, IDENTIFY_CROSSES, background)
+
+
+def loadstoreunit_collector(background: bool = None) -> Collector:
+    """ Collector on the cover points of loadstoreunit_coverage() """
+    return Collector(LOADSTOREUNIT_POINTS, LOADSTOREUNIT_CROSSES, background)
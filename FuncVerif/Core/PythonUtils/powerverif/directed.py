@@ -0,0 +1,437 @@
+import os
+import random
+import warnings
+import argparse
+from . import isa, condreg, identify, covdb
+from .branch import TBO
+from .iss import ISS
+from .stimulus import RECORDS, random_instr, generate, write_records
+# Coverage-directed stimulus generation
+#
+# Every unit has a coverage model (bins computed from the stimulus records,
+# with the golden models) and knobs which drive the generation of a record
+# (instruction class, tBO, field values...). The DirectedGenerator targets
+# the least hit bin: the knobs named by the bin are constrained and the other
+# ones are random, candidates which do not hit the target are dropped. The
+# hits of the records it generates are fed back, so the next target is
+# always a bin that has been hit the least, and the generation stops at the
+# target coverage.
+#
+# python3 -m powerverif.directed BranchUnit --target 1.0 -o bu.stim
+# The hit counts can be loaded from / saved to a coverage database (covdb).
+# The cover points of the testbenches (powerverif.coverage) are mapped onto
+# the bins by bench_bins(), a testbench can also save the bins of the
+# records it checked with save().
+
+MASK_64B = 2**64 - 1
+BRANCHES = ("b", "bc", "bclr", "bcctr", "bctar")
+XL_BRANCHES = ("bclr", "bcctr", "bctar")
+CONDREG_OPS = tuple(op.mnemonic for op in isa.OPCODES if op.unit == "condreg")
+DECREMENT_TBO = (0, 1, 3, 4, 6, 7)
+BO_BY_TBO = {t: [BO for BO in range(32) if TBO[BO] == t] for t in range(9)}
+
+
+def _bit(value: int, bit: int, size: int = 32) -> int:
+    """ Bit (bit) of (value), MSB-0 """
+    return (value >> (size - 1 - bit)) & 1
+
+
+class BranchUnitModel:
+    """
+    Bins: instruction, (instruction, tBO), (instruction, BH), taken or not and
+    (tBO, CTR=0 after the decrement).
+    CTR is only changed by the decrements in this unit (no mtspr yet): from
+    reset, CTR=0 after a decrement needs 2**64-1 decrements, so these bins are
+    ignored (IGNORED).
+    """
+    unit = "BranchUnit"
+    KNOBS = {"mnemonic": BRANCHES, "tBO": tuple(range(9)), "cr_bit": (0, 1), "BH": (0, 1, 2, 3)}
+    IGNORED = [("branch.ctr_zero", (t, 1)) for t in DECREMENT_TBO]
+
+    def __init__(self):
+        self._iss = ISS(memory_size=0)
+
+    def initial_state(self):
+        return (0, 0, 0)  # CIA, LR, CTR at reset
+
+    def build(self, rng, knobs, state):
+        mnemonic = knobs["mnemonic"]
+        form = isa.FORM[isa.BY_MNEMONIC[mnemonic].form]
+        fields = {f: rng.getrandbits(form.fields[f].width) for f in form.names
+                  if f not in ("PO", "XO")}
+        if mnemonic != "b":
+            fields["BO"] = rng.choice(BO_BY_TBO[knobs["tBO"]])
+        if mnemonic in XL_BRANCHES:
+            fields["BH"] = knobs["BH"]
+        instr = isa.encode(mnemonic, **fields)
+        cr = rng.getrandbits(32)
+        if mnemonic != "b":  # CR[BI] = cr_bit
+            mask = 1 << (31 - fields["BI"])
+            cr = cr | mask if knobs["cr_bit"] else cr & ~mask
+        iss = self._iss
+        iss.cia, iss.lr, iss.ctr = state
+        iss.cr, iss.tar = cr, rng.getrandbits(64)
+        cia, lr, ctr = state
+        nia = iss.execute(instr).nia
+        return (instr, cr, iss.tar, cia, lr, ctr, nia), (iss.cia, iss.lr, iss.ctr)
+
+    def all_bins(self) -> list:
+        bins = [("branch.form", m) for m in BRANCHES]
+        bins += [("branch.tBO", (m, t)) for m in BRANCHES[1:] for t in range(9)
+                 if m != "bcctr" or t not in DECREMENT_TBO]  # bcctr can't decrement CTR
+        bins += [("branch.BH", (m, bh)) for m in XL_BRANCHES for bh in range(4)]
+        bins += [("branch.taken", ("b", True))]
+        bins += [("branch.taken", (m, taken)) for m in BRANCHES[1:] for taken in (False, True)]
+        bins += [("branch.ctr_zero", (t, 0)) for t in DECREMENT_TBO]
+        return bins
+
+    def bins(self, record, prev=None) -> list:
+        op, f = isa.decode(record.instr)
+        if op is None or op.unit != "branch":
+            return []
+        m = op.mnemonic
+        if m == "b":
+            return [("branch.form", m), ("branch.taken", (m, True))]
+        BO = f["BO"]
+        t = TBO[BO]
+        decrement = not (BO >> 2) & 1
+        bins = [("branch.form", m)]
+        if m in XL_BRANCHES:
+            bins.append(("branch.BH", (m, f["BH"])))
+        if m == "bcctr" and decrement:  # Invalid form, ignored by the unit
+            return bins + [("branch.taken", (m, False))]
+        bins.append(("branch.tBO", (m, t)))
+        ctr = (record.ctr - 1) & MASK_64B if decrement else record.ctr
+        if decrement:
+            bins.append(("branch.ctr_zero", (t, int(ctr == 0))))
+        ctr_ok = (BO >> 2) & 1 or ((ctr != 0) ^ ((BO >> 1) & 1))
+        cond_ok = (BO >> 4) & 1 or _bit(record.cr, f["BI"]) == (BO >> 3) & 1
+        bins.append(("branch.taken", (m, bool(ctr_ok and cond_ok))))
+        return bins
+
+    def constrain(self, group, key) -> dict:
+        if group == "branch.form":
+            return {"mnemonic": [key]}
+        if group == "branch.tBO":
+            return {"mnemonic": [key[0]], "tBO": [key[1]]}
+        if group == "branch.BH":
+            return {"mnemonic": [key[0]], "BH": [key[1]]}
+        if group == "branch.ctr_zero":
+            return {"mnemonic": ["bc", "bclr", "bctar"], "tBO": [key[0]]}
+        return {"mnemonic": [key[0]]}  # branch.taken
+
+    def bench_bins(self, name, key) -> list:
+        return []
+
+
+class CondRegModel:
+    """ Bins: instruction, (BF, BFA) of mcrf, (instruction, CR[BA], CR[BB]) """
+    unit = "CondReg"
+    KNOBS = {"op": CONDREG_OPS, "BF": tuple(range(8)), "BFA": tuple(range(8)),
+             "a": (0, 1), "b": (0, 1)}
+    IGNORED = []
+
+    def initial_state(self):
+        return 0  # CR at reset
+
+    def build(self, rng, knobs, cr):
+        op = knobs["op"]
+        if op == "mcrf":
+            instr = isa.encode("mcrf", BF=knobs["BF"], BFA=knobs["BFA"])
+        else:
+            # BA and BB are picked among the CR bits equal to the a and b knobs
+            a = [i for i in range(32) if _bit(cr, i) == knobs["a"]] or range(32)
+            b = [i for i in range(32) if _bit(cr, i) == knobs["b"]] or range(32)
+            instr = isa.encode(op, BT=rng.getrandbits(5), BA=rng.choice(a), BB=rng.choice(b))
+        new_cr = condreg.execute(cr, instr)
+        return (instr, new_cr), new_cr
+
+    def all_bins(self) -> list:
+        return ([("condreg.op", op) for op in CONDREG_OPS]
+                + [("condreg.mcrf", (bf, bfa)) for bf in range(8) for bfa in range(8)]
+                + [("condreg.operands", (op, a, b)) for op in CONDREG_OPS if op != "mcrf"
+                   for a in (0, 1) for b in (0, 1)])
+
+    def bins(self, record, prev=None) -> list:
+        op, f = isa.decode(record.instr)
+        if op is None or op.unit != "condreg":
+            return []
+        if op.mnemonic == "mcrf":
+            return [("condreg.op", "mcrf"), ("condreg.mcrf", (f["BF"], f["BFA"]))]
+        cr = prev.cr if prev is not None else 0
+        return [("condreg.op", op.mnemonic),
+                ("condreg.operands", (op.mnemonic, _bit(cr, f["BA"]), _bit(cr, f["BB"])))]
+
+    def constrain(self, group, key) -> dict:
+        if group == "condreg.op":
+            return {"op": [key]}
+        if group == "condreg.mcrf":
+            return {"op": ["mcrf"], "BF": [key[0]], "BFA": [key[1]]}
+        return {"op": [key[0]], "a": [key[1]], "b": [key[2]]}
+
+    def bench_bins(self, name, key) -> list:
+        return []
+
+
+class IdentifyModel:
+    """ Bins: every output of the unit set at least once, and no output (prefix) """
+    unit = "Identify"
+    KINDS = tuple(op.mnemonic for op in isa.OPCODES) + ("prefix", "unknown")
+    KNOBS = {"kind": KINDS}
+    IGNORED = []
+
+    def __init__(self):
+        # Kinds of instruction setting every output
+        rng = random.Random(0)
+        self._kinds = {"none": ["prefix"]}
+        for kind in self.KINDS[:-2]:
+            for name in identify.decode_outputs(identify.expected_outputs(random_instr(rng,
+                                                                                       kind))):
+                self._kinds.setdefault(name, []).append(kind)
+        self._kinds["o_unknown_instr"].append("unknown")
+
+    def initial_state(self):
+        return None
+
+    def build(self, rng, knobs, state):
+        kind = knobs["kind"]
+        if kind == "prefix":
+            instr = isa.d_form_prefix(R=rng.getrandbits(1), D0=rng.getrandbits(18))
+        elif kind == "unknown":
+            instr = rng.getrandbits(32)
+        else:
+            instr = random_instr(rng, kind)
+        return (instr, identify.expected_outputs(instr)), state
+
+    def all_bins(self) -> list:
+        return [("identify.outputs", name) for name in identify.OUTPUTS] + \
+               [("identify.outputs", "none")]
+
+    def bins(self, record, prev=None) -> list:
+        names = identify.decode_outputs(record.outputs) or ["none"]
+        return [("identify.outputs", name) for name in names]
+
+    def constrain(self, group, key) -> dict:
+        return {"kind": self._kinds[key]}
+
+    def bench_bins(self, name, key) -> list:
+        """
+        Bins of a bin of the cover points of coverage.identify_collector():
+        an output at 1, or nothing identified nor unknown (a prefix)
+        >>> IdentifyModel().bench_bins("top.o_branch_cond_LR", 1)
+        [('identify.outputs', 'o_branch_cond_LR')]
+        """
+        signal = name.split(".", 1)[-1]
+        if signal in identify.OUTPUTS and key == 1:
+            return [("identify.outputs", signal)]
+        if name == "dut.cross" and key == (0, 0, 0):
+            return [("identify.outputs", "none")]
+        return []
+
+
+class LoadStoreUnitModel:
+    """ Bins: (lbz/plbz, R, RA=0) and err_invalid_load_instr """
+    unit = "LoadStoreUnit"
+    KNOBS = {"prefixed": (0, 1), "R": (0, 1), "RA_zero": (0, 1)}
+    IGNORED = []
+
+    def initial_state(self):
+        return None
+
+    def build(self, rng, knobs, state):
+        suffix = random_instr(rng, "lbz") & ~(0x1f << 16)
+        if not knobs["RA_zero"]:
+            suffix |= rng.randrange(1, 32) << 16
+        prefix = isa.d_form_prefix(R=knobs["R"], D0=rng.getrandbits(18)) if knobs["prefixed"] \
+            else 0
+        # PLBZ: if R is equal to 1 and RA is not equal to 0, the instruction form is invalid
+        invalid = int(bool(knobs["prefixed"] and knobs["R"] and not knobs["RA_zero"]))
+        return (prefix, suffix, 1, rng.getrandbits(62) << 2, invalid), state
+
+    def all_bins(self) -> list:
+        return [("loadstore.form", ("lbz", 0, ra_zero)) for ra_zero in (0, 1)] + \
+               [("loadstore.form", ("plbz", r, ra_zero)) for r in (0, 1) for ra_zero in (0, 1)] + \
+               [("loadstore.invalid", invalid) for invalid in (0, 1)]
+
+    def bins(self, record, prev=None) -> list:
+        ra_zero = int((record.suffix >> 16) & 0x1f == 0)
+        if record.prefix >> 26 == isa.PREFIX_PO:
+            form = ("plbz", (record.prefix >> 20) & 1, ra_zero)
+        else:
+            form = ("lbz", 0, ra_zero)
+        return [("loadstore.form", form), ("loadstore.invalid", record.err_invalid_load_instr)]
+
+    def constrain(self, group, key) -> dict:
+        if group == "loadstore.form":
+            return {"prefixed": [int(key[0] == "plbz")], "R": [key[1]], "RA_zero": [key[2]]}
+        return {"prefixed": [1], "R": [1], "RA_zero": [0]} if key else {}
+
+    def bench_bins(self, name, key) -> list:
+        return []  # The testbench saves the bins of its records, see save()
+
+
+MODELS = {model.unit: model for model in (BranchUnitModel, CondRegModel, IdentifyModel,
+                                          LoadStoreUnitModel)}
+
+
+class DirectedGenerator:
+    """
+    Generates the records of (unit) biased to the least hit bins
+    >>> gen = DirectedGenerator("LoadStoreUnit", seed=1)
+    >>> records = list(gen.generate(target=1.0))
+    >>> gen.coverage(), len(records) <= 16
+    (1.0, True)
+    """
+
+    def __init__(self, unit: str, seed: int = 0, tries: int = 16):
+        self.unit = unit
+        self.model = MODELS[unit]()
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.tries = tries  # Candidates generated to hit the target bin
+        self.hits = dict.fromkeys(self.model.all_bins(), 0)
+        self.new_hits = dict.fromkeys(self.hits, 0)  # Hits of the generated records
+        self._state = self.model.initial_state()
+        self._prev = None
+        self._make = RECORDS[unit]._make
+
+    def coverage(self) -> float:
+        return sum(1 for hits in self.hits.values() if hits) / len(self.hits)
+
+    def unhit(self) -> list:
+        return [b for b, hits in self.hits.items() if not hits]
+
+    def target(self):
+        """ One of the least hit bins """
+        least = min(self.hits.values())
+        return self.rng.choice([b for b, hits in self.hits.items() if hits == least])
+
+    def next(self):
+        """ Next record, generated to hit the target bin """
+        target = self.target()
+        allowed = self.model.constrain(*target)
+        rng = self.rng
+        for attempt in range(self.tries):
+            knobs = {knob: rng.choice(allowed.get(knob, values))
+                     for knob, values in self.model.KNOBS.items()}
+            values, state = self.model.build(rng, knobs, self._state)
+            record = self._make(values)
+            observed = self.model.bins(record, self._prev)
+            if target in observed:
+                break
+        for b in observed:
+            if b in self.hits:
+                self.hits[b] += 1
+                self.new_hits[b] += 1
+        self._state, self._prev = state, record
+        return record
+
+    def generate(self, target: float = 1.0, limit: int = None):
+        """ Yields records until the coverage reaches (target) or (limit) records """
+        count = 0
+        while self.coverage() < target and (limit is None or count < limit):
+            yield self.next()
+            count += 1
+
+    def load(self, path: str):
+        """
+        Adds the hits of the records of this unit in a coverage database, the
+        cover points of the testbenches are mapped onto the bins (warns about
+        the records without any bin of the model)
+        """
+        for record in covdb.read(path):
+            if record.unit != self.unit:
+                continue
+            matched = False
+            for group, (kind, bins) in record.items.items():
+                for key, hits in bins.items():
+                    targets = [(group, key)] if (group, key) in self.hits else \
+                        self.model.bench_bins(group, key)
+                    for b in targets:
+                        if b in self.hits:
+                            self.hits[b] += hits
+                            matched = True
+            if not matched:
+                warnings.warn(f"{path}: the {self.unit} record of {record.test or 'a test'} "
+                              f"has no bin of the directed model, it is ignored")
+
+    def record(self) -> covdb.Record:
+        """ Hits of the generated records, for a coverage database """
+        return _record(self.unit, "directed", self.seed, self.new_hits)
+
+
+def _record(unit: str, test: str, seed, hits: dict) -> covdb.Record:
+    """ covdb.Record of (bin -> hits) """
+    items = {}
+    for (group, key), count in hits.items():
+        kind = "cross" if isinstance(key, tuple) else "point"
+        items.setdefault(group, (kind, {}))[1][key] = count
+    return covdb.Record(unit, test, seed, items)
+
+
+def save(unit: str, test: str, records, path: str = None, seed: int = None):
+    """
+    Appends the hits of the bins of (records), checked by a testbench, to a
+    coverage database (path and seed as covdb.save())
+    """
+    model = MODELS[unit]()
+    hits = dict.fromkeys(model.all_bins(), 0)
+    prev = None
+    for record in records:
+        for b in model.bins(record, prev):
+            if b in hits:
+                hits[b] += 1
+        prev = record
+    path = path or os.environ.get("COVERAGE_DB", "coverage.pvcov")
+    if seed is None and os.environ.get("COCOTB_RANDOM_SEED"):
+        seed = int(os.environ["COCOTB_RANDOM_SEED"])
+    covdb.append(path, _record(unit, test, seed, hits))
+
+
+def cycles_to_coverage(unit: str, records, target: float = 1.0):
+    """ Number of (records) needed to reach (target) coverage, None if never reached """
+    model = MODELS[unit]()
+    hits = set()
+    total = len(model.all_bins())
+    prev = None
+    for cycle, record in enumerate(records, 1):
+        hits.update(model.bins(record, prev))
+        prev = record
+        if len(hits) >= target * total:
+            return cycle
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a coverage-directed stimulus file")
+    parser.add_argument("unit", choices=sorted(MODELS))
+    parser.add_argument("-t", "--target", type=float, default=1.0, help="target coverage (0-1)")
+    parser.add_argument("-l", "--limit", type=int, default=1000000, help="maximum records")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("-c", "--coverage-db", help="start from the hits of this database and "
+                                                   "append the new ones to it")
+    parser.add_argument("--compare", action="store_true",
+                        help="also count the random records needed for the same coverage")
+    parser.add_argument("-o", "--output", help="default: <unit>_directed_<seed>.stim")
+    args = parser.parse_args()
+
+    gen = DirectedGenerator(args.unit, args.seed)
+    if args.coverage_db:
+        gen.load(args.coverage_db)
+    records = list(gen.generate(args.target, args.limit))
+    output = args.output or f"{args.unit}_directed_{args.seed}.stim"
+    write_records(output, args.unit, records, len(records), args.seed)
+    print(f"{output}: {len(records)} {args.unit} records, coverage {100 * gen.coverage():.1f}% "
+          f"(ignored bins: {len(gen.model.IGNORED)})")
+    for group, key in gen.unhit():
+        print(f"    not hit: {group} {key}")
+    if args.coverage_db:
+        covdb.append(args.coverage_db, gen.record())
+    if args.compare:
+        cycles = cycles_to_coverage(args.unit, generate(args.unit, args.limit, args.seed),
+                                    min(args.target, gen.coverage()))
+        print(f"random stimulus: {cycles or f'more than {args.limit}'} records")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,344 @@
+import os
+import json
+import time
+import argparse
+import subprocess
+import numpy
+from multiprocessing import Pool
+from . import isa, identify, aig
+# Equivalence sweep of the Identify unit (needs numpy)
+#
+# Every instruction word of a space (all the 2**32 words, or the subspaces of
+# some primary opcodes / extended opcodes) goes through a bulk model of
+# Logic/Core/Identify.sv and through the table-driven decoder of
+# powerverif.identify, the packed outputs must be equal.
+# The models (-m):
+# - aig: the synthesized netlist of Identify.sv, simulated by powerverif.aig,
+#   the default when the netlist exists:
+#   AIGER_FILE=build/aig/Identify.aag Tools/synth_aig Logic/Core/Identify.sv
+# - rtl: the equations of Identify.sv written again with numpy, when there is
+#   no synthesis
+# The space is cut in chunks of words, evaluated in parallel by a pool of
+# processes. The checked chunks are saved in a checkpoint file so an
+# interrupted sweep resumes where it stopped.
+#
+# python3 -m powerverif.equivalence --po 19 -j 8 -c build/identify_po19.json
+# python3 -m powerverif.equivalence -j 8 -c build/identify_full.json  # 2**32 words
+
+U32 = numpy.uint32
+CHUNK = 1 << 22  # Words per task
+MAX_MISMATCHES = 100  # Mismatching words kept in the checkpoint
+NETLIST_LANES = 1 << 16  # Words per step of the netlist simulation
+
+
+def rtl_outputs(words):
+    """
+    Packed outputs (see powerverif.identify) of the equations of Identify.sv,
+    written again on arrays of instruction words. The opcodes are the
+    constants of the RTL, not the ones of powerverif.isa.
+    >>> identify.decode_outputs(int(rtl_outputs([isa.encode("bctar", BO=4, BI=2, BH=0, LK=0)])[0]))
+    ['o_branch_identified', 'o_branch_cond_TAR']
+    """
+    words = numpy.asarray(words, dtype=U32)
+    primary_opcode = words >> U32(26)  # i_instr[0:5]
+    xo = (words >> U32(1)) & U32(0x3ff)  # i_instr[21:30]
+    is_prefixed = primary_opcode == U32(0b000001)
+    is_branch_xl_form = primary_opcode == U32(0b010011)
+    o = {
+        "o_branch_i_form": primary_opcode == U32(0b010010),
+        "o_branch_b_form": primary_opcode == U32(0b010000),
+        "o_branch_cond_LR": is_branch_xl_form & (xo == U32(0b0000010000)),
+        "o_branch_cond_CTR": is_branch_xl_form & (xo == U32(0b1000010000)),
+        "o_branch_cond_TAR": is_branch_xl_form & (xo == U32(0b1000110000)),
+        "o_condreg_crand": is_branch_xl_form & (xo == U32(0b0100000001)),
+        "o_condreg_crnand": is_branch_xl_form & (xo == U32(0b0011100001)),
+        "o_condreg_cror": is_branch_xl_form & (xo == U32(0b0111000001)),
+        "o_condreg_crxor": is_branch_xl_form & (xo == U32(0b0011000001)),
+        "o_condreg_crnor": is_branch_xl_form & (xo == U32(0b0000100001)),
+        "o_condreg_creqv": is_branch_xl_form & (xo == U32(0b0100100001)),
+        "o_condreg_crandc": is_branch_xl_form & (xo == U32(0b0010000001)),
+        "o_condreg_crorc": is_branch_xl_form & (xo == U32(0b0110100001)),
+        "o_condreg_mcrf": is_branch_xl_form & (xo == U32(0b0000000000)),
+    }
+    o["o_branch_identified"] = (o["o_branch_i_form"] | o["o_branch_b_form"]
+                                | o["o_branch_cond_LR"] | o["o_branch_cond_CTR"]
+                                | o["o_branch_cond_TAR"])
+    o["o_condreg_identified"] = numpy.logical_or.reduce(
+        [o[name] for name in identify.OUTPUTS if name.startswith("o_condreg_")
+         and name != "o_condreg_identified"])
+    o["o_unknown_instr"] = ~is_prefixed & ~o["o_branch_identified"] & ~o["o_condreg_identified"]
+    outputs = numpy.zeros(len(words), dtype=U32)
+    for i, name in enumerate(identify.OUTPUTS):
+        outputs |= o[name].astype(U32) << U32(i)
+    return outputs
+
+
+def netlist_path() -> str:
+    """ AIGER netlist of Identify.sv: $IDENTIFY_NETLIST or build/aig/Identify.aag """
+    if os.environ.get("IDENTIFY_NETLIST"):
+        return os.environ["IDENTIFY_NETLIST"]
+    root = subprocess.run(["git", "rev-parse", "--show-toplevel"], capture_output=True,
+                          text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    return os.path.join(root, "build", "aig", "Identify.aag")
+
+
+_simulators = {}  # Netlist path -> aig.Simulator, one per process
+
+
+def aig_outputs(words):
+    """
+    Packed outputs of the netlist of Identify.sv (see netlist_path()),
+    NETLIST_LANES words are simulated in parallel
+    """
+    words = numpy.asarray(words, dtype=U32)
+    path = netlist_path()
+    if path not in _simulators:
+        _simulators[path] = aig.Simulator(aig.AIG.read(path), NETLIST_LANES)
+    sim = _simulators[path]
+    outputs = numpy.zeros(len(words), dtype=U32)
+    for start in range(0, len(words), NETLIST_LANES):
+        batch = words[start:start + NETLIST_LANES]
+        ports = sim.step({"i_instr": batch, "i_en": 1})
+        for i, name in enumerate(identify.OUTPUTS):
+            if name not in ports:
+                raise ValueError(f"No output named {name} in the netlist {path}")
+            outputs[start:start + len(batch)] |= ports[name][:len(batch)].astype(U32) << U32(i)
+    return outputs
+
+
+# Bulk models of Identify.sv: name -> function(words) -> packed outputs
+MODELS = {"aig": aig_outputs, "rtl": rtl_outputs}
+
+
+def default_model() -> str:
+    """ The netlist if it was synthesized, else the equations of the RTL """
+    return "aig" if os.path.exists(netlist_path()) else "rtl"
+
+# Table-driven decoder: expected_outputs() only depends on the PO and XO bits, the
+# table is indexed by isa.id_index() (entry i: the word with these bits of i)
+_TABLE = numpy.array([identify.expected_outputs(((i & 0xfc00) << 16) | ((i & 0x3ff) << 1))
+                      for i in range(1 << 16)], dtype=U32)
+
+
+def expected_outputs(words):
+    """
+    powerverif.identify.expected_outputs() on an array of words
+    >>> expected_outputs([isa.d_form_prefix(R=0, D0=0), 0]).tolist() == [0, identify.UNKNOWN]
+    True
+    """
+    words = numpy.asarray(words, dtype=U32)
+    return _TABLE[isa.id_index(words)]
+
+
+class Space:
+    """
+    Instruction words with the bits of (mask) equal to (value), the other
+    bits (free) take every value. Word i of the space is i deposited in the
+    free bits (LSB first).
+    >>> s = Space.opcodes(po=19, xo=16)
+    >>> len(s), hex(s[0]), hex(s[len(s) - 1])
+    (65536, '0x4c000020', '0x4ffff821')
+    """
+
+    def __init__(self, mask: int = 0, value: int = 0):
+        self.mask = mask & 0xffffffff
+        self.value = value & self.mask
+        # Runs of contiguous free bits: (shift in the index, shift in the word, width)
+        self.runs = []
+        index_shift = bit = 0
+        while bit < 32:
+            if (self.mask >> bit) & 1:
+                bit += 1
+                continue
+            width = 0
+            while bit + width < 32 and not (self.mask >> (bit + width)) & 1:
+                width += 1
+            self.runs.append((index_shift, bit, width))
+            index_shift, bit = index_shift + width, bit + width
+
+    @classmethod
+    def opcodes(cls, po: int = None, xo: int = None):
+        """ Words of primary opcode (po) and extended opcode (bits 21:30) (xo) """
+        mask = value = 0
+        if po is not None:
+            mask, value = 0x3f << 26, po << 26
+        if xo is not None:
+            mask, value = mask | (0x3ff << 1), value | (xo << 1)
+        return cls(mask, value)
+
+    def __len__(self):
+        return 1 << (32 - bin(self.mask).count("1"))
+
+    def __getitem__(self, i: int) -> int:
+        return int(self.words(i, i + 1)[0])
+
+    def words(self, start: int, stop: int):
+        """ Words start to stop (excluded) of the space """
+        index = numpy.arange(start, stop, dtype=numpy.uint64)
+        words = numpy.full(stop - start, self.value, dtype=numpy.uint64)
+        for index_shift, shift, width in self.runs:
+            words |= ((index >> numpy.uint64(index_shift)) & numpy.uint64((1 << width) - 1)) \
+                << numpy.uint64(shift)
+        return words.astype(U32)
+
+    def to_json(self):
+        return [self.mask, self.value]
+
+    def __repr__(self):
+        return f"Space(mask={self.mask:#010x}, value={self.value:#010x})"
+
+
+def check(task):
+    """ Compares the model to the decoder on one chunk
+    -> (chunk, words checked, mismatch count, first mismatches) """
+    chunk, space, start, stop, model = task
+    words = space.words(start, stop)
+    expected = expected_outputs(words)
+    actual = MODELS[model](words)
+    diff = numpy.flatnonzero(expected != actual)
+    mismatches = [(int(words[i]), int(expected[i]), int(actual[i]))
+                  for i in diff[:MAX_MISMATCHES]]
+    return chunk, len(words), len(diff), mismatches
+
+
+class Sweep:
+    """
+    Equivalence sweep of (model) over (spaces), resumed from (checkpoint)
+    if the file exists
+    >>> sweep = Sweep([Space.opcodes(po=19, xo=x) for x in (16, 528)], chunk=1 << 14)
+    >>> sweep.run(workers=1).summary()
+    'rtl: 131072/131072 words checked, 0 mismatches'
+    """
+
+    def __init__(self, spaces, model: str = "rtl", checkpoint: str = None, chunk: int = CHUNK):
+        self.spaces = list(spaces)
+        self.model = model
+        self.checkpoint = checkpoint
+        self.chunk = chunk
+        self.done = set()
+        self.checked = 0
+        self.mismatch_count = 0
+        self.mismatches = []
+        self.tasks = []
+        for space in self.spaces:
+            for start in range(0, len(space), chunk):
+                self.tasks.append((len(self.tasks), space, start,
+                                   min(start + chunk, len(space)), model))
+        self.total = sum(len(space) for space in self.spaces)
+        if checkpoint and os.path.exists(checkpoint):
+            self._load()
+
+    def _header(self) -> dict:
+        return {"model": self.model, "chunk": self.chunk,
+                "spaces": [space.to_json() for space in self.spaces]}
+
+    def _load(self):
+        with open(self.checkpoint) as f:
+            state = json.load(f)
+        if {key: state[key] for key in self._header()} != self._header():
+            raise ValueError(f"{self.checkpoint} is the checkpoint of another sweep")
+        self.done = set(state["done"])
+        self.checked = state["checked"]
+        self.mismatch_count = state["mismatch_count"]
+        self.mismatches = [tuple(m) for m in state["mismatches"]]
+
+    def save(self):
+        """ Writes the checkpoint (atomic: a sweep killed while saving can resume) """
+        state = dict(self._header(), done=sorted(self.done), checked=self.checked,
+                     total=self.total, mismatch_count=self.mismatch_count,
+                     mismatches=self.mismatches)
+        tmp = f"{self.checkpoint}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.checkpoint)
+
+    def run(self, workers: int = None, progress=None, save_period: float = 5.0):
+        """
+        Checks the remaining chunks with (workers) processes, calls
+        progress(sweep) after every chunk
+        """
+        todo = [task for task in self.tasks if task[0] not in self.done]
+        last_save = time.monotonic()
+        with Pool(workers or os.cpu_count()) as pool:
+            for chunk, count, mismatch_count, mismatches in pool.imap_unordered(check, todo):
+                self.done.add(chunk)
+                self.checked += count
+                self.mismatch_count += mismatch_count
+                self.mismatches += mismatches[:MAX_MISMATCHES - len(self.mismatches)]
+                if progress:
+                    progress(self)
+                if self.checkpoint and time.monotonic() - last_save > save_period:
+                    self.save()
+                    last_save = time.monotonic()
+        if self.checkpoint:
+            self.save()
+        return self
+
+    def summary(self) -> str:
+        return (f"{self.model}: {self.checked}/{self.total} words checked, "
+                f"{self.mismatch_count} mismatches")
+
+
+def _int(value: str) -> int:
+    return int(value, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Equivalence sweep of the Identify unit against "
+                                                 "the table-driven decoder")
+    parser.add_argument("--po", type=_int, nargs="+",
+                        help="sweep these primary opcodes (default: the 2**32 words)")
+    parser.add_argument("--xo", type=_int, nargs="+",
+                        help="only these extended opcodes (bits 21:30) of the primary opcodes")
+    parser.add_argument("--opcodes", action="store_true",
+                        help="sweep the primary opcodes of powerverif.isa and the prefix")
+    parser.add_argument("-m", "--model", choices=sorted(MODELS),
+                        help="default: aig if the netlist exists, else rtl")
+    parser.add_argument("--netlist", help="AIGER netlist of Identify.sv for the aig model "
+                                          "(default: build/aig/Identify.aag)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count())
+    parser.add_argument("-c", "--checkpoint", help="checkpoint file, the sweep resumes from it")
+    parser.add_argument("--chunk", type=int, default=CHUNK, help="words per task")
+    args = parser.parse_args()
+    if args.netlist:
+        os.environ["IDENTIFY_NETLIST"] = os.path.abspath(args.netlist)  # For the workers
+    model = args.model or default_model()
+    if model == "aig" and not os.path.exists(netlist_path()):
+        parser.error(f"{netlist_path()} does not exist, see Tools/synth_aig")
+    print(f"Model: {model}" + (f" (netlist {netlist_path()})" if model == "aig" else ""))
+
+    pos = args.po
+    if args.opcodes:
+        pos = sorted({op.po for op in isa.OPCODES} | {isa.PREFIX_PO})
+    if args.xo and not pos:
+        parser.error("--xo needs --po or --opcodes")
+    if pos:
+        spaces = [Space.opcodes(po, xo) for po in pos for xo in (args.xo or [None])]
+    else:
+        spaces = [Space()]
+    sweep = Sweep(spaces, model, args.checkpoint, args.chunk)
+    if sweep.done:
+        print(f"Resuming from {args.checkpoint}: {sweep.checked}/{sweep.total} words checked")
+    start, checked = time.monotonic(), sweep.checked
+
+    def progress(sweep):
+        rate = (sweep.checked - checked) / max(time.monotonic() - start, 1e-9)
+        print(f"\r{sweep.summary()} ({rate / 1e6:.1f} Mwords/s)", end="", flush=True)
+
+    try:
+        sweep.run(args.jobs, progress)
+    except KeyboardInterrupt:
+        if args.checkpoint:
+            sweep.save()
+            print(f"\nInterrupted, resume with the same command")
+        raise SystemExit(130)
+    print()
+    for word, expected, actual in sweep.mismatches:
+        print(f"    {word:#010x}: expected {identify.decode_outputs(expected)}, "
+              f"model {identify.decode_outputs(actual)}")
+    if sweep.mismatch_count:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
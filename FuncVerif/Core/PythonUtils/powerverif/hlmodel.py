@@ -0,0 +1,158 @@
+import os
+import sys
+import time
+import ctypes
+import argparse
+import subprocess
+from array import array
+from . import stimulus
+# Python bindings of the C++ High Level Model (HLModel/Core/hlmodel.h)
+#
+# The models are called through ctypes on a shared library, built with
+# make -C HLModel/Core (build() does it when the library is missing). Every
+# call steps a model over a batch of instructions, one per clock cycle, so the
+# cost of a call is paid once per batch and not once per instruction.
+# A numpy array (uint32) is passed without a copy and the results are numpy
+# arrays, any other sequence gives array("I") results.
+#
+# Library: $HLMODEL_LIB or HLModel/Core/libhlmodel.so of the repository
+# Usage: outputs, prefixes = hlmodel.Identify().step(instrs)
+#        crs = hlmodel.CondReg().step(instrs)
+# Check against the golden models: python3 -m powerverif.hlmodel Identify 100000
+# The stimulus uses these models with HLMODEL=1 (see powerverif.stimulus)
+
+ABI_VERSION = 1  # HLM_ABI_VERSION of hlmodel.h
+_u32p = ctypes.POINTER(ctypes.c_uint32)
+_lib = None
+
+
+def model_dir() -> str:
+    """ HLModel/Core of the repository containing this package """
+    root = subprocess.run(["git", "rev-parse", "--show-toplevel"], capture_output=True,
+                          text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    return os.path.join(root, "HLModel", "Core")
+
+
+def library_path() -> str:
+    return os.environ.get("HLMODEL_LIB") or os.path.join(model_dir(), "libhlmodel.so")
+
+
+def build():
+    """ Builds (or rebuilds if a source changed) HLModel/Core/libhlmodel.so """
+    subprocess.run(["make", "-s", "-C", model_dir()], check=True)
+
+
+def load() -> ctypes.CDLL:
+    """ The shared library, built if needed (raises OSError if it cannot be loaded) """
+    global _lib
+    if _lib is not None:
+        return _lib
+    path = library_path()
+    if "HLMODEL_LIB" not in os.environ:
+        try:
+            build()
+        except (OSError, subprocess.CalledProcessError) as e:
+            raise OSError(f"Cannot build {path}: {e}")
+    lib = ctypes.CDLL(path)
+    if lib.hlm_abi_version() != ABI_VERSION:
+        raise OSError(f"{path}: ABI version {lib.hlm_abi_version()}, expected {ABI_VERSION}")
+    for unit in ("identify", "condreg"):
+        getattr(lib, f"hlm_{unit}_new").restype = ctypes.c_void_p
+        getattr(lib, f"hlm_{unit}_free").argtypes = [ctypes.c_void_p]
+    lib.hlm_identify_reset.argtypes = [ctypes.c_void_p]
+    lib.hlm_identify_step.argtypes = [ctypes.c_void_p, _u32p, ctypes.c_size_t, _u32p, _u32p]
+    lib.hlm_condreg_reset.argtypes = [ctypes.c_void_p, ctypes.c_uint32]
+    lib.hlm_condreg_step.argtypes = [ctypes.c_void_p, _u32p, ctypes.c_size_t, _u32p]
+    _lib = lib
+    return lib
+
+
+def _buffers(instrs, outputs: int):
+    """ (instructions, (outputs) result buffers, pointer getter) of a batch """
+    if hasattr(instrs, "__array_interface__"):  # numpy
+        import numpy
+        instrs = numpy.ascontiguousarray(instrs, dtype=numpy.uint32)
+        results = [numpy.empty(len(instrs), dtype=numpy.uint32) for i in range(outputs)]
+        return instrs, results, lambda a: a.ctypes.data_as(_u32p)
+    instrs = array("I", instrs)
+    results = [array("I", bytes(4 * len(instrs))) for i in range(outputs)]
+    return instrs, results, lambda a: ctypes.cast(a.buffer_info()[0], _u32p)
+
+
+class _Model:
+    _unit = None
+
+    def __init__(self):
+        self._lib = load()
+        self._model = getattr(self._lib, f"hlm_{self._unit}_new")()
+
+    def __del__(self):
+        if getattr(self, "_model", None):
+            getattr(self._lib, f"hlm_{self._unit}_free")(self._model)
+
+
+class Identify(_Model):
+    """
+    Identify unit: outputs packed like powerverif.identify.OUTPUTS
+    """
+    _unit = "identify"
+
+    def reset(self):
+        self._lib.hlm_identify_reset(self._model)
+
+    def step(self, instrs):
+        """ (outputs, o_instr_prefix) of every instruction of (instrs) """
+        instrs, (outputs, prefixes), pointer = _buffers(instrs, 2)
+        self._lib.hlm_identify_step(self._model, pointer(instrs), len(instrs), pointer(outputs),
+                                    pointer(prefixes))
+        return outputs, prefixes
+
+
+class CondReg(_Model):
+    """
+    Condition Register unit (reset value: 0), instructions which are not CR
+    logicals or mcrf do not change the CR
+    """
+    _unit = "condreg"
+
+    def reset(self, cr: int = 0):
+        self._lib.hlm_condreg_reset(self._model, cr)
+
+    def step(self, instrs):
+        """ CR after every instruction of (instrs) """
+        instrs, (crs,), pointer = _buffers(instrs, 1)
+        self._lib.hlm_condreg_step(self._model, pointer(instrs), len(instrs), pointer(crs))
+        return crs
+
+
+def check(unit: str, count: int, seed: int) -> list:
+    """
+    (index, expected, actual) of the stimulus records the model disagrees
+    with, the expected values come from the Python golden models
+    """
+    instrs = [r[0] for r in stimulus.generate(unit, count, seed)]
+    expected = [r[1] for r in stimulus.EXPECTED[unit]((instr,) for instr in instrs)]
+    if unit == "Identify":
+        actual = Identify().step(instrs)[0]
+    else:
+        actual = CondReg().step(instrs)
+    return [(i, e, a) for i, (e, a) in enumerate(zip(expected, actual)) if e != a]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the C++ model against the golden models")
+    parser.add_argument("unit", choices=("Identify", "CondReg"))
+    parser.add_argument("count", type=int, help="number of instructions")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    mismatches = check(args.unit, args.count, args.seed)
+    print(f"{args.unit}: {args.count} instructions (seed {args.seed}), {len(mismatches)} "
+          f"mismatches ({time.perf_counter() - start:.2f}s)")
+    for i, expected, actual in mismatches[:10]:
+        print(f"    record {i}: expected 0x{expected:08x}, model 0x{actual:08x}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
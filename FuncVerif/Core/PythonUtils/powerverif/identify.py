@@ -0,0 +1,48 @@
+from . import isa
+# Golden model of the Identify unit (Logic/Core/Identify.sv)
+# The outputs of the unit are packed in an int: bit i is the value of OUTPUTS[i]
+
+OUTPUTS = (
+    "o_branch_identified", "o_condreg_identified", "o_unknown_instr",
+    "o_branch_i_form", "o_branch_b_form", "o_branch_cond_LR", "o_branch_cond_CTR",
+    "o_branch_cond_TAR",
+    "o_condreg_crand", "o_condreg_crnand", "o_condreg_cror", "o_condreg_crxor",
+    "o_condreg_crnor", "o_condreg_creqv", "o_condreg_crandc", "o_condreg_crorc",
+    "o_condreg_mcrf",
+)
+_BIT = {name: 1 << i for i, name in enumerate(OUTPUTS)}
+# Outputs set for every instruction identified by the unit
+_MNEMONIC_OUTPUTS = {
+    "b": ("o_branch_identified", "o_branch_i_form"),
+    "bc": ("o_branch_identified", "o_branch_b_form"),
+    "bclr": ("o_branch_identified", "o_branch_cond_LR"),
+    "bcctr": ("o_branch_identified", "o_branch_cond_CTR"),
+    "bctar": ("o_branch_identified", "o_branch_cond_TAR"),
+}
+for _op in isa.OPCODES:
+    if _op.unit == "condreg":
+        _MNEMONIC_OUTPUTS[_op.mnemonic] = ("o_condreg_identified", f"o_condreg_{_op.mnemonic}")
+UNKNOWN = _BIT["o_unknown_instr"]
+# Indexed like isa.OPCODES (loads are not identified yet -> unknown)
+_OPCODE_OUTPUTS = [sum(_BIT[name] for name in _MNEMONIC_OUTPUTS[op.mnemonic])
+                   if op.mnemonic in _MNEMONIC_OUTPUTS else UNKNOWN for op in isa.OPCODES]
+
+
+def expected_outputs(instr: int) -> int:
+    """
+    Packed outputs of the Identify unit for (instr)
+    A prefix is neither identified nor unknown.
+    >>> decode_outputs(expected_outputs(isa.encode("cror", BT=1, BA=2, BB=3)))
+    ['o_condreg_identified', 'o_condreg_cror']
+    >>> expected_outputs(isa.d_form_prefix(R=0, D0=0))
+    0
+    """
+    if instr >> 26 == isa.PREFIX_PO:
+        return 0
+    i = isa.ID_TABLE[isa.id_index(instr)]
+    return _OPCODE_OUTPUTS[i] if i >= 0 else UNKNOWN
+
+
+def decode_outputs(value: int) -> list:
+    """ Names of the outputs set in (value) """
+    return [name for name in OUTPUTS if value & _BIT[name]]
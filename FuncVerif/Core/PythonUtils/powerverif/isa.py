@@ -0,0 +1,218 @@
+from collections import namedtuple
+from .bitfield import Field
+# Table driven instruction encoder/decoder for the Power ISA subset implemented
+# in Logic/Core
+#
+# Every instruction form is described once in FORMS (Power ISA v3.1 section 1.6),
+# the encoders and decoders are compiled from this table into plain shift/mask
+# Python functions: ints in, ints out, no string.
+
+# Instruction forms: form name -> ((field, first bit, last bit), ...)
+# Bits are numbered like in the Power ISA (bit 0 is the MSB), bits not covered
+# by a field are reserved (/) and encoded as 0.
+FORMS = {
+    # I-form, Section 1.6.1.7
+    "I": (("PO", 0, 5), ("LI", 6, 29), ("AA", 30, 30), ("LK", 31, 31)),
+    # B-form, Section 1.6.1.2
+    "B": (("PO", 0, 5), ("BO", 6, 10), ("BI", 11, 15), ("BD", 16, 29), ("AA", 30, 30),
+          ("LK", 31, 31)),
+    # XL-form (branch conditional to LR/CTR/TAR), Section 1.6.1.18
+    "XL": (("PO", 0, 5), ("BO", 6, 10), ("BI", 11, 15), ("BH", 19, 20), ("XO", 21, 30),
+           ("LK", 31, 31)),
+    # XL-form (Condition Register logical), Section 1.6.1.18
+    "XL_CR": (("PO", 0, 5), ("BT", 6, 10), ("BA", 11, 15), ("BB", 16, 20), ("XO", 21, 30),
+              ("LK", 31, 31)),
+    # XL-form (Move Condition Register Field), Section 1.6.1.18
+    "XL_MCRF": (("PO", 0, 5), ("BF", 6, 8), ("BFA", 11, 13), ("XO", 21, 30), ("LK", 31, 31)),
+    # D-form, Section 1.6.1.4 (D1 is the displacement, D0||D1 when prefixed)
+    "D": (("PO", 0, 5), ("RT", 6, 10), ("RA", 11, 15), ("D1", 16, 31)),
+    # Modified Load/Store (MLS) prefix, Section 1.6.3.3
+    # R and D0 come first so they can be given as positional arguments
+    "MLS": (("R", 11, 11), ("D0", 14, 31), ("PO", 0, 5), ("TYPE", 6, 7), ("ST", 8, 8)),
+}
+
+# Value of the fields which are not operands (used as default by the encoders)
+FORM_DEFAULTS = {
+    "MLS": {"PO": 1, "TYPE": 2, "ST": 0},
+}
+
+
+class Form:
+    """
+    Instruction form compiled from its description in FORMS
+    - encode(**fields) -> instruction word
+    - decode(word) -> tuple of the fields' values (in the order of FORMS)
+    - encode_array(**fields) -> like encode() but on numpy arrays (fields are
+      masked instead of checked)
+    decode() also works on numpy arrays of instruction words.
+    >>> FORM["B"].encode(PO=16, BO=18, BI=27, BD=0xafe, AA=1, LK=0) == 0x425b2bfa
+    True
+    >>> FORM["B"].decode(0x425b2bfa)
+    (16, 18, 27, 2814, 1, 0)
+    """
+
+    def __init__(self, name: str, fields, defaults=None):
+        self.name = name
+        self.fields = {f: Field(first, last) for f, first, last in fields}
+        self.names = tuple(f for f, first, last in fields)
+        defaults = defaults or {}
+        args = ", ".join(f"{f}={defaults.get(f, 0)}" for f in self.names)
+        overflow = " | ".join(f"({f} >> {self.fields[f].width})" for f in self.names)
+        word = " | ".join(f"({f} << {self.fields[f].shift})" for f in self.names)
+        masked = " | ".join(f"(({f} & {self.fields[f].mask}) << {self.fields[f].shift})"
+                            for f in self.names)
+        values = ", ".join(f"(word >> {self.fields[f].shift}) & {self.fields[f].mask}"
+                           for f in self.names)
+        source = (f"def encode({args}):\n"
+                  f"    if {overflow}:\n"
+                  f"        raise TypeError('A field does not fit in the {name}-form')\n"
+                  f"    return {word}\n"
+                  f"def encode_array({args}):\n"
+                  f"    return {masked}\n"
+                  f"def decode(word):\n"
+                  f"    return ({values},)\n")
+        namespace = {}
+        exec(compile(source, f"<{name}-form>", "exec"), namespace)
+        self.encode = namespace["encode"]
+        self.decode = namespace["decode"]
+        self.encode_array = namespace["encode_array"]
+
+    def decode_dict(self, word: int) -> dict:
+        """ Returns {field: value} """
+        return dict(zip(self.names, self.decode(word)))
+
+    def __repr__(self):
+        return f"Form({self.name})"
+
+
+FORM = {name: Form(name, fields, FORM_DEFAULTS.get(name)) for name, fields in FORMS.items()}
+
+# Compiled encoders: ints in, 32-bit instruction word out
+branch_i_form = FORM["I"].encode
+branch_b_form = FORM["B"].encode
+branch_xl_form = FORM["XL"].encode
+condreg_xl_form = FORM["XL_CR"].encode
+mcrf_xl_form = FORM["XL_MCRF"].encode
+d_form = FORM["D"].encode
+d_form_prefix = FORM["MLS"].encode
+
+
+# Instructions implemented in Logic/Core
+# po: primary opcode (bits 0:5), xo: extended opcode (bits 21:30) or None
+# unit: functional unit executing the instruction
+Opcode = namedtuple("Opcode", ["mnemonic", "form", "po", "xo", "unit"])
+OPCODES = (
+    Opcode("b", "I", 18, None, "branch"),  # Section 2.4
+    Opcode("bc", "B", 16, None, "branch"),
+    Opcode("bclr", "XL", 19, 16, "branch"),
+    Opcode("bcctr", "XL", 19, 528, "branch"),
+    Opcode("bctar", "XL", 19, 560, "branch"),
+    Opcode("crand", "XL_CR", 19, 257, "condreg"),  # Section 2.5.1
+    Opcode("crnand", "XL_CR", 19, 225, "condreg"),
+    Opcode("cror", "XL_CR", 19, 449, "condreg"),
+    Opcode("crxor", "XL_CR", 19, 193, "condreg"),
+    Opcode("crnor", "XL_CR", 19, 33, "condreg"),
+    Opcode("creqv", "XL_CR", 19, 289, "condreg"),
+    Opcode("crandc", "XL_CR", 19, 129, "condreg"),
+    Opcode("crorc", "XL_CR", 19, 417, "condreg"),
+    Opcode("mcrf", "XL_MCRF", 19, 0, "condreg"),
+    Opcode("lbz", "D", 34, None, "loadstore"),  # Section 3.3.2
+)
+# Prefixed instruction: MLS prefix + D-form suffix
+PLBZ = Opcode("plbz", "D", 34, None, "loadstore")  # Section 3.3.2, MLS prefix
+PREFIX_PO = 1  # Primary opcode of all the prefixes, Section 1.6.3
+BY_MNEMONIC = {op.mnemonic: op for op in OPCODES + (PLBZ,)}
+
+
+def _build_id_table():
+    """
+    Identification table indexed by (PO << 10) | XO, where XO is bits 21:30
+    (whatever the form is) -> index in OPCODES or -1 (unknown)
+    """
+    table = [-1] * (64 << 10)
+    for i, op in enumerate(OPCODES):
+        if op.xo is None:
+            table[op.po << 10:(op.po + 1) << 10] = [i] * 1024
+        else:
+            table[(op.po << 10) | op.xo] = i
+    return table
+
+
+ID_TABLE = _build_id_table()
+
+
+def id_index(word: int) -> int:
+    """ (PO << 10) | XO of a 32-bit instruction word (or of a numpy array of words) """
+    return ((word >> 16) & 0xfc00) | ((word >> 1) & 0x3ff)
+
+
+def identify(word: int):
+    """
+    Returns the Opcode of a (word) instruction, None if unknown
+    >>> identify(0x4ce33202).mnemonic
+    'crand'
+    >>> identify(0x04000000) is None
+    True
+    """
+    i = ID_TABLE[id_index(word)]
+    return OPCODES[i] if i >= 0 else None
+
+
+def is_prefix(word: int) -> bool:
+    """ Prefixed instructions start with a prefix of primary opcode 1 """
+    return word >> 26 == PREFIX_PO
+
+
+def identify_prefixed(prefix: int, suffix: int):
+    """
+    Returns the Opcode of a prefixed instruction {prefix, suffix}, None if unknown
+    >>> identify_prefixed(d_form_prefix(R=0, D0=4), d_form(34, 3, 6, 0xbe)).mnemonic
+    'plbz'
+    """
+    if prefix >> 26 != PREFIX_PO:
+        return None
+    type_, st = (prefix >> 24) & 0b11, (prefix >> 23) & 0b1
+    if type_ == 2 and st == 0 and suffix >> 26 == PLBZ.po:
+        return PLBZ
+    return None
+
+
+def decode(word: int):
+    """
+    Returns (Opcode, {field: value}) or (None, {}) if unknown
+    >>> decode(0x4ce33202)
+    (Opcode(mnemonic='crand', form='XL_CR', po=19, xo=257, unit='condreg'), {'PO': 19, 'BT': 7, 'BA': 3, 'BB': 6, 'XO': 257, 'LK': 0})
+    """
+    op = identify(word)
+    if op is None:
+        return None, {}
+    return op, FORM[op.form].decode_dict(word)
+
+
+def encode(mnemonic: str, **fields) -> int:
+    """
+    Encode an instruction from its mnemonic, PO and XO are filled from OPCODES
+    >>> hex(encode("bcctr", BO=7, BI=4, BH=2, LK=1))
+    '0x4ce41421'
+    """
+    op = BY_MNEMONIC[mnemonic]
+    fields.setdefault("PO", op.po)
+    if op.xo is not None:
+        fields.setdefault("XO", op.xo)
+    return FORM[op.form].encode(**fields)
+
+
+_id_array = None  # numpy copy of ID_TABLE, built on the first identify_array()
+
+
+def identify_array(words):
+    """
+    Vectorized identify (needs numpy): returns the index in OPCODES (-1 if
+    unknown) of every instruction word of an array
+    """
+    global _id_array
+    import numpy
+    if _id_array is None:
+        _id_array = numpy.array(ID_TABLE, dtype=numpy.int8)
+    words = numpy.asarray(words, dtype=numpy.uint32)
+    return _id_array[id_index(words)]
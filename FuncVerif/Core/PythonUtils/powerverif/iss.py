@@ -0,0 +1,192 @@
+import struct
+from array import array
+from collections import namedtuple
+from . import isa, condreg
+from .utils import MASK_64B
+# Instruction Set Simulator (ISS) of the Power ISA subset implemented in Logic/Core
+# - Branch instructions: b, bc, bclr, bcctr, bctar (Power ISA section 2.4)
+# - Condition Register logicals and mcrf (Power ISA section 2.5.1)
+# - Fixed-point loads: lbz, plbz (Power ISA section 3.3.2)
+#
+# 64-bit mode only. The state is flat: GPRs in an array of 64-bit words, the
+# memory in a bytearray (addresses start at 0) holding big-endian instructions
+# and data. Every executed instruction returns a Delta: the architectural state
+# it wrote, to be compared with any unit (or a whole core) of the RTL.
+
+# cia/nia: address of the instruction and of the next one, instr: instruction
+# word (64-bit {prefix, suffix} for prefixed instructions), changes: tuple of
+# (register, new value) with register in "CR", "LR", "CTR", "GPR0".."GPR31",
+# access: (effective address, size) of the load or None
+Delta = namedtuple("Delta", ["cia", "instr", "nia", "changes", "access"])
+
+GPR_NAMES = tuple(f"GPR{i}" for i in range(32))
+_unpack_word = struct.Struct(">I").unpack_from
+
+
+class IllegalInstruction(Exception):
+    """ Unknown instruction or invalid instruction form """
+
+
+class ISS:
+    """
+    >>> iss = ISS(memory_size=64)
+    >>> iss.load_program(0, [isa.encode("crnor", BT=0, BA=1, BB=1),
+    ...                      isa.encode("b", LI=-1 & 0xffffff, AA=0, LK=1)])
+    >>> iss.step().changes
+    (('CR', 2147483648),)
+    >>> delta = iss.step()
+    >>> delta.nia, delta.changes
+    (0, (('LR', 8),))
+    """
+    __slots__ = ("gpr", "cr", "lr", "ctr", "tar", "cia", "memory", "_handlers")
+
+    def __init__(self, memory_size: int = 1 << 16):
+        self.gpr = array("Q", bytes(8 * 32))  # General Purpose Registers
+        self.cr = 0  # Condition Register (32 bits)
+        self.lr = 0  # Link Register
+        self.ctr = 0  # Count Register
+        self.tar = 0  # Target Address Register
+        self.cia = 0  # Current Instruction Address
+        self.memory = bytearray(memory_size)
+        handlers = {"b": self._b, "bc": self._bc, "bclr": self._bclr, "bcctr": self._bcctr,
+                    "bctar": self._bctar, "lbz": self._lbz, "mcrf": self._condreg}
+        self._handlers = [handlers.get(op.mnemonic, self._condreg) for op in isa.OPCODES]
+
+    def load_program(self, address: int, instrs):
+        """ Writes 32-bit instruction words (big-endian) at (address) """
+        for i, instr in enumerate(instrs):
+            self.memory[address + 4*i:address + 4*i + 4] = instr.to_bytes(4, "big")
+
+    def state(self) -> dict:
+        """ Architectural state (registers only) """
+        state = dict(zip(GPR_NAMES, self.gpr))
+        state.update(CR=self.cr, LR=self.lr, CTR=self.ctr, TAR=self.tar, CIA=self.cia)
+        return state
+
+    def step(self) -> Delta:
+        """ Executes the instruction at CIA """
+        instr = _unpack_word(self.memory, self.cia)[0]
+        if instr >> 26 == isa.PREFIX_PO:
+            return self.execute(instr, _unpack_word(self.memory, self.cia + 4)[0])
+        return self.execute(instr)
+
+    def execute(self, instr: int, suffix: int = None) -> Delta:
+        """
+        Executes (instr) as if it was fetched at CIA, (suffix) is the second
+        word of a prefixed instruction. Used to check a unit fed directly with
+        instruction words (no instruction memory).
+        """
+        cia = self.cia
+        if suffix is not None:
+            delta = self._prefixed(cia, instr, suffix)
+        else:
+            i = isa.ID_TABLE[isa.id_index(instr)]
+            if i < 0:
+                raise IllegalInstruction(f"Unknown instruction 0x{instr:08x} at 0x{cia:x}")
+            delta = self._handlers[i](cia, instr)
+        self.cia = delta.nia
+        return delta
+
+    def run(self, count: int, stop: int = None) -> list:
+        """ Executes up to (count) instructions or until CIA == (stop) """
+        deltas = []
+        step = self.step
+        for i in range(count):
+            if self.cia == stop:
+                break
+            deltas.append(step())
+        return deltas
+
+    # Branch instructions (Power ISA section 2.4)
+    def _branch_taken(self, instr: int, decrement: bool = True):
+        """ Returns (taken, changes) of a conditional branch """
+        BO = (instr >> 21) & 0x1f
+        BI = (instr >> 16) & 0x1f
+        changes = ()
+        ctr_ok = True
+        if decrement and not BO & 0b00100:  # BO[2]=0: decrement CTR
+            self.ctr = (self.ctr - 1) & MASK_64B
+            changes = (("CTR", self.ctr),)
+            ctr_ok = (self.ctr != 0) != bool(BO & 0b00010)  # BO[3]
+        cond_ok = BO & 0b10000 or ((self.cr >> (31 - BI)) & 1) == (BO >> 3) & 1  # BO[0], BO[1]
+        return ctr_ok and cond_ok, changes
+
+    def _link(self, instr: int, cia: int, changes: tuple) -> tuple:
+        if instr & 1:  # LK
+            self.lr = (cia + 4) & MASK_64B
+            return changes + (("LR", self.lr),)
+        return changes
+
+    def _b(self, cia: int, instr: int) -> Delta:
+        LI = (instr >> 2) & 0xffffff
+        target = ((LI ^ 0x800000) - 0x800000) << 2  # EXTS(LI || 0b00)
+        if not instr & 0b10:  # AA
+            target += cia
+        changes = self._link(instr, cia, ())
+        return Delta(cia, instr, target & MASK_64B, changes, None)
+
+    def _bc(self, cia: int, instr: int) -> Delta:
+        taken, changes = self._branch_taken(instr)
+        nia = cia + 4
+        if taken:
+            BD = (instr >> 2) & 0x3fff
+            nia = ((BD ^ 0x2000) - 0x2000) << 2  # EXTS(BD || 0b00)
+            if not instr & 0b10:  # AA
+                nia += cia
+        changes = self._link(instr, cia, changes)
+        return Delta(cia, instr, nia & MASK_64B, changes, None)
+
+    def _bclr(self, cia: int, instr: int) -> Delta:
+        target = self.lr & ~0b11  # LR before the update of LK
+        taken, changes = self._branch_taken(instr)
+        changes = self._link(instr, cia, changes)
+        return Delta(cia, instr, target if taken else (cia + 4) & MASK_64B, changes, None)
+
+    def _bcctr(self, cia: int, instr: int) -> Delta:
+        if not instr & (0b00100 << 21):
+            # BO[2]=0 is an invalid form (Power ISA section 1.8.2), ignored like
+            # in Logic/Core/BranchUnit.sv
+            return Delta(cia, instr, (cia + 4) & MASK_64B, (), None)
+        taken, changes = self._branch_taken(instr, decrement=False)
+        target = self.ctr & ~0b11
+        changes = self._link(instr, cia, changes)
+        return Delta(cia, instr, target if taken else (cia + 4) & MASK_64B, changes, None)
+
+    def _bctar(self, cia: int, instr: int) -> Delta:
+        taken, changes = self._branch_taken(instr)
+        changes = self._link(instr, cia, changes)
+        target = self.tar & ~0b11
+        return Delta(cia, instr, target if taken else (cia + 4) & MASK_64B, changes, None)
+
+    # Condition Register instructions (Power ISA section 2.5.1)
+    def _condreg(self, cia: int, instr: int) -> Delta:
+        self.cr = condreg.execute(self.cr, instr)
+        return Delta(cia, instr, (cia + 4) & MASK_64B, (("CR", self.cr),), None)
+
+    # Fixed-point loads (Power ISA section 3.3.2)
+    def _load_byte(self, RT: int, EA: int) -> tuple:
+        EA &= MASK_64B
+        self.gpr[RT] = self.memory[EA]
+        return ((GPR_NAMES[RT], self.gpr[RT]),), (EA, 1)
+
+    def _lbz(self, cia: int, instr: int) -> Delta:
+        RT = (instr >> 21) & 0x1f
+        RA = (instr >> 16) & 0x1f
+        D = ((instr & 0xffff) ^ 0x8000) - 0x8000
+        b = self.gpr[RA] if RA else 0
+        changes, access = self._load_byte(RT, b + D)
+        return Delta(cia, instr, (cia + 4) & MASK_64B, changes, access)
+
+    def _prefixed(self, cia: int, prefix: int, suffix: int) -> Delta:
+        instr = prefix << 32 | suffix
+        if isa.identify_prefixed(prefix, suffix) is not isa.PLBZ:
+            raise IllegalInstruction(f"Unknown prefixed instruction 0x{instr:016x} at 0x{cia:x}")
+        RT = (suffix >> 21) & 0x1f
+        RA = (suffix >> 16) & 0x1f
+        R = (prefix >> 20) & 1
+        D = (((prefix & 0x3ffff) << 16 | (suffix & 0xffff)) ^ (1 << 33)) - (1 << 33)
+        if R and RA:
+            raise IllegalInstruction(f"plbz with R=1 and RA={RA} at 0x{cia:x}")
+        b = cia if R else (self.gpr[RA] if RA else 0)
+        changes, access = self._load_byte(RT, b + D)
+        return Delta(cia, instr, (cia + 8) & MASK_64B, changes, access)
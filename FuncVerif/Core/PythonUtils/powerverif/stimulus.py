@@ -0,0 +1,288 @@
+import os
+import mmap
+import random
+import struct
+import logging
+import warnings
+import argparse
+from collections import namedtuple
+from . import isa, condreg, identify
+from .iss import ISS
+from .trace import FORMATS
+# Pre-generated stimulus files and their memory mapped replay
+#
+# A stimulus file holds constrained-random inputs of a unit together with the
+# outputs expected from the golden models, so the simulation only replays it.
+# Layout (big-endian):
+#   header (HEADER_SIZE bytes): magic, unit name, record size, record count, seed
+#   records: count fixed-size records, fields given by LAYOUTS[unit]
+#
+# Generate a file: python3 -m powerverif.stimulus BranchUnit 100000 -s 42 -o bu.stim
+# Replay it: STIMULUS=bu.stim make (see load())
+# With HLMODEL=1 the expected outputs of Identify and CondReg come from the
+# C++ models (powerverif.hlmodel) instead of the Python ones, see golden_model()
+
+MAGIC = b"PVSTIM01"
+_header = struct.Struct(">8s16sIQQ")
+HEADER_SIZE = 64
+
+# unit -> ((field, size in bits), ...): inputs first, then expected outputs
+LAYOUTS = {
+    # CIA, LR and CTR are sampled before the branch (see 64b_lockstep.py)
+    "BranchUnit": (("instr", 32), ("cr", 32), ("tar", 64),
+                   ("cia", 64), ("lr", 64), ("ctr", 64), ("nia", 64)),
+    # cr: value of the CR after the instruction
+    "CondReg": (("instr", 32), ("cr", 32)),
+    # outputs: packed outputs of the unit, see powerverif.identify
+    "Identify": (("instr", 32), ("outputs", 32)),
+    "LoadStoreUnit": (("prefix", 32), ("suffix", 32), ("is_op34", 8), ("cia", 64),
+                      ("err_invalid_load_instr", 8)),
+}
+RECORDS = {unit: namedtuple(unit + "Record", [name for name, size in fields])
+           for unit, fields in LAYOUTS.items()}
+_STRUCTS = {unit: struct.Struct(">" + "".join(FORMATS[size] for name, size in fields))
+            for unit, fields in LAYOUTS.items()}
+
+
+def random_instr(rng: random.Random, mnemonic: str) -> int:
+    """ (mnemonic) instruction with random operands (PO and XO are fixed) """
+    op = isa.BY_MNEMONIC[mnemonic]
+    form = isa.FORM[op.form]
+    return isa.encode(mnemonic, **{f: rng.getrandbits(form.fields[f].width)
+                                   for f in form.names if f not in ("PO", "XO")})
+
+
+def _branchunit(rng: random.Random, count: int):
+    mnemonics = ["b", "bc", "bclr", "bcctr", "bctar"]
+    return _branchunit_expected((random_instr(rng, rng.choice(mnemonics)), rng.getrandbits(32),
+                                 rng.getrandbits(64)) for i in range(count))
+
+
+def _branchunit_expected(inputs):
+    iss = ISS(memory_size=0)
+    for instr, cr, tar in inputs:
+        iss.cr, iss.tar = cr, tar
+        cia, lr, ctr = iss.cia, iss.lr, iss.ctr
+        yield instr, cr, tar, cia, lr, ctr, iss.execute(instr).nia
+
+
+def _condreg(rng: random.Random, count: int):
+    return golden_model("CondReg")((isa.condreg_xl_form(19, rng.getrandbits(5), rng.getrandbits(5),
+                                                  rng.getrandbits(5),
+                                                  rng.choice(condreg.VALID_XO)),)
+                             for i in range(count))
+
+
+def _condreg_expected(inputs):
+    cr = 0  # Reset value
+    for instr, in inputs:
+        cr = condreg.execute(cr, instr)
+        yield instr, cr
+
+
+def _identify(rng: random.Random, count: int):
+    mnemonics = [op.mnemonic for op in isa.OPCODES]
+
+    def instrs():
+        for i in range(count):
+            kind = rng.random()
+            if kind < 0.7:
+                yield random_instr(rng, rng.choice(mnemonics)),
+            elif kind < 0.8:
+                yield isa.d_form_prefix(R=rng.getrandbits(1), D0=rng.getrandbits(18)),
+            else:
+                yield rng.getrandbits(32),  # Mostly unknown instructions
+    return golden_model("Identify")(instrs())
+
+
+def _identify_expected(inputs):
+    for instr, in inputs:
+        yield instr, identify.expected_outputs(instr)
+
+
+def _hlmodel_identify_expected(inputs):
+    from .hlmodel import Identify
+    instrs = [instr for instr, in inputs]
+    return zip(instrs, Identify().step(instrs)[0])
+
+
+def _hlmodel_condreg_expected(inputs):
+    from .hlmodel import CondReg
+    instrs = [instr for instr, in inputs]
+    return zip(instrs, CondReg().step(instrs))
+
+
+def _loadstoreunit(rng: random.Random, count: int):
+    for i in range(count):
+        suffix = random_instr(rng, "lbz")
+        if rng.random() < 0.5:
+            prefix = isa.d_form_prefix(R=rng.getrandbits(1), D0=rng.getrandbits(18))
+            # Half of the plbz with R=1 have RA=0 (valid form)
+            if prefix & (1 << 20) and rng.random() < 0.5:
+                suffix &= ~(0x1f << 16)
+        else:
+            prefix = 0
+        yield prefix, suffix, 1, rng.getrandbits(62) << 2, invalid_load(prefix, suffix)
+
+
+def _loadstoreunit_expected(inputs):
+    for prefix, suffix, is_op34, cia in inputs:
+        yield prefix, suffix, is_op34, cia, invalid_load(prefix, suffix)
+
+
+def invalid_load(prefix: int, suffix: int) -> int:
+    """
+    PLBZ: if R is equal to 1 and RA is not equal to 0, the instruction form is invalid
+    >>> prefix = isa.d_form_prefix(R=1, D0=0)
+    >>> invalid_load(prefix, isa.encode("lbz", RT=1, RA=2, D1=0)), invalid_load(0, 0)
+    (1, 0)
+    """
+    return int(bool(prefix >> 26 == isa.PREFIX_PO and (prefix >> 20) & 1
+                    and (suffix >> 16) & 0x1f))
+
+
+GENERATORS = {
+    "BranchUnit": _branchunit,
+    "CondReg": _condreg,
+    "Identify": _identify,
+    "LoadStoreUnit": _loadstoreunit,
+}
+# unit -> golden model: records from the inputs (the first fields of LAYOUTS)
+EXPECTED = {
+    "BranchUnit": _branchunit_expected,
+    "CondReg": _condreg_expected,
+    "Identify": _identify_expected,
+    "LoadStoreUnit": _loadstoreunit_expected,
+}
+# Same with the C++ models of HLModel/Core (HLMODEL=1)
+HLMODEL_EXPECTED = {
+    "CondReg": _hlmodel_condreg_expected,
+    "Identify": _hlmodel_identify_expected,
+}
+
+
+def golden_model(unit: str):
+    """
+    EXPECTED[unit], or HLMODEL_EXPECTED[unit] if the HLMODEL environment
+    variable is 1 and the shared library of powerverif.hlmodel can be loaded
+    (warns and keeps the Python model otherwise)
+    """
+    if os.environ.get("HLMODEL") == "1" and unit in HLMODEL_EXPECTED:
+        from . import hlmodel
+        try:
+            hlmodel.load()
+            return HLMODEL_EXPECTED[unit]
+        except OSError as e:
+            warnings.warn(f"HLMODEL=1: {e}, the Python golden models are used")
+    return EXPECTED[unit]
+
+
+def generate(unit: str, count: int, seed: int) -> list:
+    """
+    Returns (count) records of (unit), the same seed gives the same records
+    >>> generate("CondReg", 2, seed=1) == generate("CondReg", 2, seed=1)
+    True
+    """
+    return [RECORDS[unit]._make(r) for r in GENERATORS[unit](random.Random(seed), count)]
+
+
+def complete(unit: str, inputs) -> list:
+    """
+    Records of (unit) for given inputs (tuples of the input fields of LAYOUTS,
+    CIA/LR/CTR excluded for the BranchUnit), expected outputs from the golden
+    models (see golden_model())
+    >>> [hex(r.cr) for r in complete("CondReg", [(isa.encode("crnor", BT=0, BA=1, BB=2),)])]
+    ['0x80000000']
+    """
+    return [RECORDS[unit]._make(r) for r in golden_model(unit)(inputs)]
+
+
+def write(path: str, unit: str, count: int, seed: int):
+    """ Generates a stimulus file """
+    write_records(path, unit, GENERATORS[unit](random.Random(seed), count), count, seed)
+
+
+def write_records(path: str, unit: str, records, count: int, seed: int):
+    """ Writes (count) (records) of (unit) to a stimulus file """
+    pack = _STRUCTS[unit].pack
+    with open(path, "wb") as f:
+        f.write(_header.pack(MAGIC, unit.encode(), _STRUCTS[unit].size, count, seed)
+                .ljust(HEADER_SIZE, b"\0"))
+        f.writelines(pack(*r) for r in records)
+
+
+class Replay:
+    """ Memory mapped stimulus file, records are decoded when they are read """
+
+    def __init__(self, path: str, unit: str = None):
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, name, size, self.count, self.seed = _header.unpack_from(self._mmap)
+        self.unit = name.rstrip(b"\0").decode()
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a stimulus file")
+        if unit is not None and unit != self.unit:
+            raise ValueError(f"{path} is a {self.unit} stimulus, not {unit}")
+        self._struct = _STRUCTS[self.unit]
+        if size != self._struct.size or len(self._mmap) < HEADER_SIZE + self.count * size:
+            raise ValueError(f"{path}: unexpected record layout")
+        self._record = RECORDS[self.unit]
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i: int):
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        return self._record._make(self._struct.unpack_from(self._mmap,
+                                                           HEADER_SIZE + i * self._struct.size))
+
+    def __iter__(self):
+        make = self._record._make
+        for i in range(self.count):
+            yield make(self._struct.unpack_from(self._mmap, HEADER_SIZE + i * self._struct.size))
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
+
+
+def load(unit: str, count: int, seed: int = None):
+    """
+    Stimulus of a testbench: replays the file given by the STIMULUS environment
+    variable if it is set, generates (count) records otherwise.
+    With STIMULUS_DIRECTED=<target coverage> the records are generated by
+    powerverif.directed and stop at the target coverage (at most (count))
+    Without (seed), the seed is drawn from random (seeded by cocotb) or given by
+    STIMULUS_SEED, and logged to replay the same records
+    """
+    path = os.environ.get("STIMULUS")
+    if path:
+        return Replay(path, unit)
+    if seed is None:
+        seed = random.getrandbits(32)  # Drawn anyway: the testbench's next draws do not change
+        if os.environ.get("STIMULUS_SEED"):
+            seed = int(os.environ["STIMULUS_SEED"], 0)
+        logging.getLogger("cocotb.stimulus").info(
+            f"{unit} stimulus seed: {seed} (replay with STIMULUS_SEED={seed})")
+    target = os.environ.get("STIMULUS_DIRECTED")
+    if target:
+        from .directed import DirectedGenerator
+        return list(DirectedGenerator(unit, seed).generate(float(target), count))
+    return generate(unit, count, seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a stimulus file")
+    parser.add_argument("unit", choices=sorted(LAYOUTS))
+    parser.add_argument("count", type=int, help="number of records")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="default: <unit>_<seed>.stim")
+    args = parser.parse_args()
+    output = args.output or f"{args.unit}_{args.seed}.stim"
+    write(output, args.unit, args.count, args.seed)
+    print(f"{output}: {args.count} {args.unit} records (seed {args.seed})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+import struct
+import threading
+import queue
+# Compact binary traces and lockstep comparison against a golden model
+#
+# Instead of asserting every signal on every cycle, a testbench appends one
+# fixed-size record per cycle to a Trace (a bytearray, big-endian fields) and
+# the whole trace is compared with the one of the golden model afterwards, or
+# while the simulation runs with a LockstepChecker (background thread).
+# compare() reports the first mismatching cycle with the records around it.
+
+# struct format of the supported field sizes (in bits)
+FORMATS = {1: "B", 8: "B", 16: "H", 32: "I", 64: "Q"}
+
+
+class Trace:
+    """
+    Sequence of records, every record has the same (name, size in bits) fields
+    >>> t = Trace([("cia", 64), ("lr", 64), ("en", 1)])
+    >>> t.append(0, 4, 1)
+    >>> t.append(4, 4, 0)
+    >>> len(t), t[1], t.record_size
+    (2, (4, 4, 0), 17)
+    """
+
+    def __init__(self, fields, data: bytes = b""):
+        self.fields = tuple(fields)
+        self.names = tuple(name for name, size in self.fields)
+        self._struct = struct.Struct(">" + "".join(FORMATS[size] for name, size in self.fields))
+        self.record_size = self._struct.size
+        self.data = bytearray(data)
+        self._pack = self._struct.pack
+
+    def append(self, *values):
+        self.data += self._pack(*values)
+
+    def extend(self, records):
+        pack = self._pack
+        self.data += b"".join(pack(*values) for values in records)
+
+    def __len__(self):
+        return len(self.data) // self.record_size
+
+    def __getitem__(self, cycle: int) -> tuple:
+        return self._struct.unpack_from(self.data, cycle * self.record_size)
+
+    def __iter__(self):
+        return self._struct.iter_unpack(self.data)
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            f.write(self.data)
+
+    @classmethod
+    def load(cls, fields, path: str):
+        with open(path, "rb") as f:
+            return cls(fields, f.read())
+
+
+class Mismatch:
+    """ First cycle where two traces differ """
+
+    def __init__(self, cycle: int, actual: Trace, expected: Trace, context: int = 3):
+        self.cycle = cycle
+        self.names = actual.names
+        self.actual = actual[cycle] if cycle < len(actual) else None
+        self.expected = expected[cycle] if cycle < len(expected) else None
+        first = max(0, cycle - context)
+        last = min(max(len(actual), len(expected)), cycle + context + 1)
+        self.context = [(c, actual[c] if c < len(actual) else None,
+                         expected[c] if c < len(expected) else None) for c in range(first, last)]
+
+    def fields(self) -> list:
+        """ (name, actual, expected) of the fields which differ """
+        if self.actual is None or self.expected is None:
+            return []
+        return [(name, a, e) for name, a, e in zip(self.names, self.actual, self.expected)
+                if a != e]
+
+    def __str__(self):
+        if self.actual is None or self.expected is None:
+            lines = [f"Traces differ in length at cycle {self.cycle}"]
+        else:
+            lines = [f"First mismatch at cycle {self.cycle}: " + ", ".join(
+                f"{name}=0x{a:x} (expected 0x{e:x})" for name, a, e in self.fields())]
+        lines.append("cycle    " + " ".join(f"{name:>18}" for name in self.names))
+        for c, a, e in self.context:
+            for kind, values in (("dut", a), ("ref", e)):
+                if values is None:
+                    continue
+                mark = ">" if c == self.cycle else " "
+                lines.append(f"{mark}{c:<5}{kind} " + " ".join(f"{v:>#18x}" for v in values))
+        return "\n".join(lines)
+
+
+def first_mismatch(actual: Trace, expected: Trace, start: int = 0, stop: int = None,
+                   block: int = 4096):
+    """
+    Returns the first cycle of [start, stop) (default: to the end) where the
+    traces differ, None if they are identical. Blocks of records are
+    compared as bytes, only the block holding the first difference is
+    scanned record by record. No buffer of the traces is held, they can grow
+    while they are compared (LockstepChecker).
+    >>> a, b = Trace([("x", 32)]), Trace([("x", 32)])
+    >>> a.extend([(i,) for i in range(10000)])
+    >>> b.extend([(i,) for i in range(10000)])
+    >>> first_mismatch(a, b) is None
+    True
+    >>> b.data[4 * 9000 + 3] ^= 1
+    >>> first_mismatch(a, b), first_mismatch(a, b, stop=9000), first_mismatch(a, b, 9001)
+    (9000, None, None)
+    """
+    size = actual.record_size
+    assert size == expected.record_size, "Traces do not have the same fields"
+    a, e = actual.data, expected.data
+    a_end, e_end = len(a), len(e)
+    if stop is not None:
+        a_end, e_end = min(a_end, stop * size), min(e_end, stop * size)
+    end = min(a_end, e_end)
+    for offset in range(start * size, end, block * size):
+        last = min(offset + block * size, end)
+        if a[offset:last] != e[offset:last]:
+            for record in range(offset, last, size):
+                if a[record:record + size] != e[record:record + size]:
+                    return record // size
+    if a_end != e_end:
+        return end // size
+    return None
+
+
+def compare(actual: Trace, expected: Trace, context: int = 3):
+    """ Returns a Mismatch for the first cycle where the traces differ, None if identical """
+    cycle = first_mismatch(actual, expected)
+    if cycle is None:
+        return None
+    return Mismatch(cycle, actual, expected, context)
+
+
+class LockstepChecker:
+    """
+    Compares a trace with the expected one in a background thread while it is
+    being recorded: call check() from time to time (every N cycles) and
+    close() at the end of the simulation, which returns the first Mismatch or
+    None. The expected trace can also be filled while the checker runs.
+    """
+
+    def __init__(self, actual: Trace, expected: Trace, context: int = 3):
+        self.actual = actual
+        self.expected = expected
+        self.context = context
+        self.mismatch = None
+        self._checked = 0  # Cycles already compared
+        self._requests = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def check(self):
+        """ Compare what has been recorded so far (asynchronous) """
+        self._requests.put(min(len(self.actual), len(self.expected)))
+
+    def _run(self):
+        while True:
+            cycles = self._requests.get()
+            if cycles is None:
+                return
+            if self.mismatch is not None or cycles <= self._checked:
+                continue
+            # Only the new records: the traces are not copied
+            cycle = first_mismatch(self.actual, self.expected, self._checked, cycles)
+            if cycle is not None:
+                self.mismatch = Mismatch(cycle, self.actual, self.expected, self.context)
+            self._checked = cycles
+
+    def close(self):
+        """ Wait for the thread and check the end of the traces """
+        self._requests.put(None)
+        self._thread.join()
+        if self.mismatch is None:
+            cycle = first_mismatch(self.actual, self.expected, start=self._checked)
+            if cycle is not None:
+                self.mismatch = Mismatch(cycle, self.actual, self.expected, self.context)
+        return self.mismatch
@@ -0,0 +1,88 @@
+import os
+import random
+# Integer (shift and mask) implementation of the bit manipulation helpers
+from .bitfield import select_bit, select_bits, exts, int_to_bin, BE, random_bin, Field
+from . import isa
+# Non-Unit specific helper functions for OpenPower verification
+
+MASK_64B = 2**64-1
+
+
+def adds_64b(a: int, b: int) -> int:
+    """
+    >>> adds_64b(2**64-1, 1)
+    0
+    >>> adds_64b(374, 698)
+    1072
+    """
+    return (a + b) & MASK_64B
+
+
+def sub_64b(a: int, b: int) -> int:
+    """
+    >>> sub_64b(1, 2)
+    18446744073709551615
+    >>> sub_64b(2**64-1, -1)
+    0
+    """
+    return (a - b) & MASK_64B
+
+
+def random_bit() -> int:
+    return random.randint(0, 1)
+
+
+def random_32b() -> int:
+    return random.randint(0, 2**32-1)
+
+
+def random_64b() -> int:
+    return random.randint(0, 2**64-1)
+
+
+def iterations(default: int) -> int:
+    """
+    Iteration budget of a random test: the ITERATIONS environment variable if
+    it is set (see Tools/shard), (default) otherwise
+    """
+    return int(os.environ.get("ITERATIONS", default))
+
+
+# String encoders (kept for the existing testbenches), see powerverif.isa for
+# the integer encoders and the layout of every instruction form
+def branch_i_form_to_string(PO, LI, AA, LK):
+    """ Branch I-form: Section 2.4 """
+    return int_to_bin(32, isa.branch_i_form(PO, LI, AA, LK))
+
+
+def branch_b_form_to_string(PO, BO, BI, BD, AA, LK):
+    """ Branch Conditional B-form: Section 2.4 """
+    return int_to_bin(32, isa.branch_b_form(PO, BO, BI, BD, AA, LK))
+
+
+def branch_xl_form_to_string(PO, BO, BI, BH, XO, LK):
+    """ Branch Conditional to LR/CTR/TAR XL-form: Section 2.4 """
+    return int_to_bin(32, isa.branch_xl_form(PO, BO, BI, BH, XO, LK))
+
+
+def condreg_xl_form_to_string(PO, BT, BA, BB, XO):
+    """ Condition Register logical XL-form: Section 2.5.1 """
+    return int_to_bin(32, isa.condreg_xl_form(PO, BT, BA, BB, XO))
+
+
+def d_form_to_string(PO, RT, RA, D1):
+    """
+    Described in Power ISA section 3.3.1
+    >>> d_form_to_string(PO=1, RT=0x3, RA=0x6, D1=0xbe)
+    '00000100011001100000000010111110'
+    """
+    return int_to_bin(32, isa.d_form(PO, RT, RA, D1))
+
+
+def d_form_to_string_prefix(R, D0):
+    """
+    Modified Load/Store Form (MLS) Section 1.6.3.3
+    >>> d_form_to_string_prefix(R=1, D0=0x16)
+    '00000110000100000000000000010110'
+    """
+    return int_to_bin(32, isa.d_form_prefix(R, D0))
@@ -0,0 +1,241 @@
+import os
+import re
+import sys
+import glob
+import json
+import argparse
+from collections import namedtuple
+from . import isa, condreg, stimulus
+# Formal counterexamples -> stimulus files
+#
+# When a proof of FormalVerif/ fails, sby writes the counterexample in its
+# working directory (engine_*/trace.yw, Yosys witness, and trace.vcd). The
+# inputs of the unit are read at every step of the trace, the cycles the
+# testbench would drive (enabled, not in reset, not stalled) become the inputs
+# of stimulus records and the expected outputs are computed by the golden
+# models (see stimulus.complete), so the cocotb testbench replays the
+# counterexample at full speed: STIMULUS=<file> make
+#
+# The testbenches start from reset and drive the decoded inputs (i_crand,
+# i_i_form...) from the instruction: a counterexample which starts from an
+# arbitrary state or whose decoded inputs do not match its instruction is
+# converted with a warning, its replay may not reach the same failure.
+#
+# Convert: python3 -m powerverif.witness build/formal/CondReg/smtbmc_z3 -o cex.stim
+
+# unit -> input ports of the records (the input fields of stimulus.LAYOUTS)
+PORTS = {
+    "BranchUnit": ("i_instr", "i_condition_register", "i_target_address_register"),
+    "CondReg": ("i_instr",),
+    "Identify": ("i_instr",),
+    "LoadStoreUnit": ("i_instr_prefix", "i_instr_suffix", "i_is_op34", "i_cia"),
+}
+# Ports of the cycles driven by the testbenches: port -> value
+ENABLED = {"i_en": 1, "i_rst": 0, "i_stall": 0}
+BRANCH_FORMS = {"i_i_form": "b", "i_b_form": "bc", "i_cond_LR": "bclr", "i_cond_CTR": "bcctr",
+                "i_cond_TAR": "bctar"}
+
+Conversion = namedtuple("Conversion", "unit records cycles warnings")
+
+
+def _int(bits: str) -> int:
+    """ Undefined bits (x, z, ?) are 0 """
+    return int(re.sub(r"[^01]", "0", bits) or "0", 2)
+
+
+def parse_yw(trace: dict) -> tuple:
+    """
+    Values of the top-level signals at every step of a Yosys witness trace,
+    and the number of state bits with an arbitrary initial value.
+    A step is a string of bits, MSB first, the first signal in the LSBs.
+    >>> trace = {"signals": [{"path": ["\\\\i_en"], "width": 1, "offset": 0, "init_only": False},
+    ...                      {"path": ["\\\\i_instr"], "width": 4, "offset": 0, "init_only": False}],
+    ...          "steps": [{"bits": "10101"}, {"bits": "0011x"}]}
+    >>> parse_yw(trace)
+    ([{'i_en': 1, 'i_instr': 10}, {'i_en': 0, 'i_instr': 3}], 0)
+    """
+    arbitrary = sum(s["width"] for s in trace["signals"] if s["init_only"])
+    steps = []
+    for step in trace["steps"]:
+        value = _int(step["bits"])
+        values, position = {}, 0
+        for s in trace["signals"]:
+            bits = (value >> position) & ((1 << s["width"]) - 1)
+            position += s["width"]
+            if len(s["path"]) == 1 and not s["init_only"]:
+                name = s["path"][0].lstrip("\\")
+                values[name] = values.get(name, 0) | (bits << s["offset"])
+        steps.append(values)
+    return steps, arbitrary
+
+
+def parse_vcd(text: str, clock: str = "i_clk") -> list:
+    """
+    Values of the signals of the top module at every step of a VCD trace: the
+    steps of yosys-smtbmc (smt_step), else the rising edges of (clock)
+    >>> print(parse_vcd('''$scope module CondReg $end
+    ... $var wire 1 ! i_clk $end
+    ... $var wire 32 " i_instr [0:31] $end
+    ... $upscope $end
+    ... $enddefinitions $end
+    ... #0
+    ... 1!
+    ... b101 "
+    ... #5
+    ... 0!
+    ... #10
+    ... 1!
+    ... bx1 "
+    ... '''))
+    [{'i_clk': 1, 'i_instr': 5}, {'i_clk': 1, 'i_instr': 1}]
+    """
+    names, values, steps = {}, {}, []
+    step_id, depth, sample = None, 0, False
+    for line in text.split("\n"):
+        tokens = line.split()
+        if not tokens:
+            continue
+        if tokens[0] == "$scope":
+            depth += 1
+        elif tokens[0] == "$upscope":
+            depth -= 1
+        elif tokens[0] == "$var":
+            if tokens[4] == "smt_step":
+                step_id = tokens[3]
+            elif depth == 1:
+                names[tokens[3]] = tokens[4]
+        elif tokens[0].startswith("#"):
+            if sample:
+                steps.append(dict(values))
+            sample = False
+        elif tokens[0][0] in "bB" and len(tokens) == 2:
+            sample |= tokens[1] == step_id
+            if tokens[1] in names:
+                values[names[tokens[1]]] = _int(tokens[0][1:])
+        elif tokens[0][0] in "01xXzZ":
+            value, id_ = _int(tokens[0][0]), tokens[0][1:]
+            sample |= step_id is None and names.get(id_) == clock and value == 1
+            if id_ in names:
+                values[names[id_]] = value
+    if sample:
+        steps.append(dict(values))
+    return steps
+
+
+def read(path: str) -> tuple:
+    """ Steps of a .yw or .vcd trace, number of state bits with an arbitrary initial value """
+    with open(path) as f:
+        if path.endswith(".yw"):
+            return parse_yw(json.load(f))
+        return parse_vcd(f.read()), 0
+
+
+def find_trace(path: str) -> tuple:
+    """
+    (trace, unit) of an sby working directory (or any directory above it, like
+    build/formal/<task>/), the unit is None if it is not known
+    """
+    if os.path.isfile(path):
+        return path, None
+    for pattern in ("trace*.yw", "trace*.vcd"):
+        # The counterexamples of a failed induction step are not reachable from reset
+        traces = sorted(t for t in glob.glob(os.path.join(path, "**", pattern), recursive=True)
+                        if "induct" not in os.path.basename(t))
+        if traces:
+            break
+    else:
+        raise FileNotFoundError(f"No counterexample (trace*.yw, trace*.vcd) in {path}")
+    config = os.path.join(os.path.dirname(os.path.dirname(traces[0])), "config.sby")
+    unit = None
+    if os.path.exists(config):
+        with open(config) as f:
+            match = re.search(r"\bprep\b.*-top\s+(\w+)", f.read())
+        unit = match and match.group(1)
+    return traces[0], unit
+
+
+def decoded_inputs(unit: str, instr: int) -> dict:
+    """
+    Decoded inputs driven by the testbench for (instr): port -> value
+    >>> decoded_inputs("BranchUnit", isa.encode("bclr", BO=20, BI=0, BH=0, LK=0))["i_cond_LR"]
+    1
+    """
+    if unit == "BranchUnit":
+        op = isa.identify(instr)
+        return {port: int(op is not None and op.mnemonic == m) for port, m in BRANCH_FORMS.items()}
+    if unit == "CondReg":
+        xo = isa.FORM["XL_CR"].decode_dict(instr)["XO"]
+        return {f"i_{m}": int(getattr(condreg, f"is_{m}")(xo))
+                for m in ("crand", "crnand", "cror", "crxor", "crnor", "creqv", "crandc", "crorc",
+                          "mcrf")}
+    return {}
+
+
+def driven(unit: str, instr: int) -> bool:
+    """ The testbenches of the BranchUnit and CondReg only drive instructions of their unit """
+    if unit == "BranchUnit":
+        op = isa.identify(instr)
+        return op is not None and op.mnemonic in BRANCH_FORMS.values()
+    if unit == "CondReg":
+        return isa.FORM["XL_CR"].decode_dict(instr)["XO"] in condreg.VALID_XO
+    return True
+
+
+def convert(unit: str, steps: list, arbitrary: int = 0) -> Conversion:
+    """ Stimulus records of the cycles of (steps) driven by the testbench of (unit) """
+    inputs, cycles, warnings = [], [], []
+    idle = 0
+    if arbitrary:
+        warnings.append(f"the trace starts from an arbitrary state ({arbitrary} bits), "
+                        "the replay starts from reset")
+    for cycle, values in enumerate(steps):
+        missing = [port for port in PORTS[unit] if port not in values]
+        if missing:
+            raise ValueError(f"{unit}: {', '.join(missing)} not in the trace")
+        if any(values.get(port, value) != value for port, value in ENABLED.items()):
+            idle += 1
+            continue
+        record = tuple(values[port] for port in PORTS[unit])
+        if not driven(unit, record[0]):
+            warnings.append(f"cycle {cycle}: 0x{record[0]:08x} is skipped, the testbench only "
+                            f"drives {unit} instructions")
+            continue
+        for port, value in decoded_inputs(unit, record[0]).items():
+            if values.get(port, value) != value:
+                warnings.append(f"cycle {cycle}: {port}={values[port]} in the trace, the "
+                                f"testbench drives {value}")
+        inputs.append(record)
+        cycles.append(cycle)
+    if idle:
+        warnings.append(f"{idle} cycles not enabled (i_en=0, i_rst=1 or i_stall=1) are not "
+                        "replayed")
+    return Conversion(unit, stimulus.complete(unit, inputs), cycles, warnings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert a formal counterexample to a "
+                                                 "stimulus file")
+    parser.add_argument("trace", help=".yw or .vcd trace, or an sby working directory")
+    parser.add_argument("-u", "--unit", choices=sorted(PORTS),
+                        help="default: the top module of the sby working directory")
+    parser.add_argument("-o", "--output", help="default: <unit>_cex.stim")
+    args = parser.parse_args(argv)
+
+    trace, unit = find_trace(args.trace)
+    unit = args.unit or unit
+    if unit not in PORTS:
+        parser.error(f"unknown unit {unit}, use --unit")
+    steps, arbitrary = read(trace)
+    conversion = convert(unit, steps, arbitrary)
+    output = args.output or f"{unit}_cex.stim"
+    stimulus.write_records(output, unit, conversion.records, len(conversion.records), seed=0)
+    print(f"{trace}: {len(steps)} steps -> {output}: {len(conversion.records)} {unit} records "
+          f"(cycles {conversion.cycles})")
+    for warning in conversion.warnings:
+        print(f"Warning: {warning}")
+    print(f"Replay: STIMULUS={os.path.abspath(output)} make")
+    return 0 if conversion.records else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,142 @@
+import sys
+import random
+import struct
+import argparse
+from array import array
+from . import isa, condreg
+from .iss import ISS
+# Instruction traces of the ISS for the performance models (HLModel/Core/Pipeline)
+#
+# A program of the implemented subset (CR logicals, branches, loads) is
+# generated from a seed and executed by the ISS. The trace holds the memory
+# image (instructions and data) and one record per executed instruction: a
+# model fetches the real instruction words from the image and follows the real
+# control flow (a branch is taken when the next CIA is not the next address).
+# Layout (big-endian):
+#   header (HEADER_SIZE bytes): magic, memory size, record count, seed
+#   memory image: memory size bytes
+#   records: count x (cia, effective address of the load or NO_ACCESS), 64 bits each
+#
+# Generate a trace: python3 -m powerverif.workload 1000000 -s 1 -o w1.trace
+
+MAGIC = b"PVTRACE1"
+_header = struct.Struct(">8sQQQ")
+HEADER_SIZE = 64
+NO_ACCESS = (1 << 64) - 1
+MEMORY_SIZE = 1 << 16
+DATA = 0x4000  # Loads read [DATA, MEMORY_SIZE), the code is below
+
+
+def _body(rng: random.Random, count: int) -> list:
+    """ (count) CR logicals and loads, a plbz is two words """
+    words = []
+    for i in range(count):
+        kind = rng.random()
+        if kind < 0.6:
+            words.append(isa.condreg_xl_form(19, rng.getrandbits(5), rng.getrandbits(5),
+                                             rng.getrandbits(5), rng.choice(condreg.VALID_XO)))
+        elif kind < 0.9:  # lbz RT, D(0): EA = D (positive)
+            words.append(isa.encode("lbz", RT=rng.randrange(1, 32), RA=0,
+                                    D1=rng.randrange(DATA, 0x8000)))
+        else:  # plbz RT, D(0), R=0
+            ea = rng.randrange(DATA, MEMORY_SIZE)
+            words += [isa.d_form_prefix(R=0, D0=ea >> 16),
+                      isa.encode("lbz", RT=rng.randrange(1, 32), RA=0, D1=ea & 0xffff)]
+    return words
+
+
+def program(rng: random.Random, blocks: int) -> tuple:
+    """
+    (instruction words at address 0, TAR) of a random program: basic blocks
+    of CR logicals and loads ended by a forward conditional branch (bc on a CR
+    bit), a call (bl or bctarl) to a leaf function returning with blr, or no
+    branch. The last block branches back to the first one.
+    """
+    bodies = [_body(rng, rng.randrange(1, 8)) for i in range(blocks)]
+    ends = [rng.choice(("bc", "bc", "bl", "bctarl", None)) for i in range(blocks - 1)] + ["b"]
+    starts, address = [], 0
+    for body, end in zip(bodies, ends):
+        starts.append(address)
+        address += 4 * (len(body) + (end is not None))
+    function = address
+    words = []
+    for i, (body, end) in enumerate(zip(bodies, ends)):
+        words += body
+        cia = 4 * len(words)
+        if end == "bc":  # Skips the next block if CR[BI] is (un)set
+            target = starts[min(i + 2, blocks - 1)]
+            words.append(isa.encode("bc", BO=rng.choice((4, 12)), BI=rng.getrandbits(5),
+                                    BD=(target - cia) >> 2, AA=0, LK=0))
+        elif end == "bl":
+            words.append(isa.encode("b", LI=(function - cia) >> 2, AA=0, LK=1))
+        elif end == "bctarl":
+            words.append(isa.encode("bctar", BO=20, BI=0, BH=0, LK=1))
+        elif end == "b":
+            words.append(isa.encode("b", LI=(-cia >> 2) & 0xffffff, AA=0, LK=0))
+    words += _body(rng, rng.randrange(1, 8))
+    words.append(isa.encode("bclr", BO=20, BI=0, BH=0, LK=0))
+    return words, function
+
+
+def generate(count: int, seed: int, blocks: int = 64) -> tuple:
+    """
+    (memory image, records) of (count) instructions of a random program, a
+    record is (cia, effective address of the load or NO_ACCESS)
+    >>> memory, records = generate(1000, seed=3)
+    >>> len(memory), len(records), generate(1000, seed=3)[1] == records
+    (65536, 1000, True)
+    >>> all(DATA <= ea < MEMORY_SIZE for cia, ea in records if ea != NO_ACCESS)
+    True
+    """
+    rng = random.Random(seed)
+    words, function = program(rng, blocks)
+    if 4 * len(words) > DATA:
+        raise ValueError(f"{blocks} blocks do not fit below 0x{DATA:x}")
+    iss = ISS(MEMORY_SIZE)
+    iss.load_program(0, words)
+    iss.memory[DATA:] = rng.randbytes(MEMORY_SIZE - DATA)
+    iss.tar = function
+    records = [(d.cia, d.access[0] if d.access else NO_ACCESS) for d in iss.run(count)]
+    return bytes(iss.memory), records
+
+
+def write(path: str, memory: bytes, records, seed: int):
+    """ Writes a trace file """
+    flat = array("Q", (value for record in records for value in record))
+    if sys.byteorder == "little":
+        flat.byteswap()
+    with open(path, "wb") as f:
+        f.write(_header.pack(MAGIC, len(memory), len(flat) // 2, seed).ljust(HEADER_SIZE, b"\0"))
+        f.write(memory)
+        f.write(flat.tobytes())
+
+
+def read(path: str) -> tuple:
+    """ (memory image, cias, effective addresses, seed) of a trace file, arrays of 64-bit words """
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, size, count, seed = _header.unpack_from(data)
+    if magic != MAGIC or len(data) < HEADER_SIZE + size + 16 * count:
+        raise ValueError(f"{path} is not a trace file")
+    flat = array("Q", data[HEADER_SIZE + size:HEADER_SIZE + size + 16 * count])
+    if sys.byteorder == "little":
+        flat.byteswap()
+    return data[HEADER_SIZE:HEADER_SIZE + size], flat[0::2], flat[1::2], seed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate an instruction trace of the ISS")
+    parser.add_argument("count", type=int, help="number of executed instructions")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("-b", "--blocks", type=int, default=64, help="basic blocks of the program")
+    parser.add_argument("-o", "--output", help="default: workload_<seed>.trace")
+    args = parser.parse_args(argv)
+    output = args.output or f"workload_{args.seed}.trace"
+    memory, records = generate(args.count, args.seed, args.blocks)
+    write(output, memory, records, args.seed)
+    loads = sum(ea != NO_ACCESS for cia, ea in records)
+    print(f"{output}: {len(records)} instructions ({loads} loads, seed {args.seed})")
+
+
+if __name__ == '__main__':
+    main()
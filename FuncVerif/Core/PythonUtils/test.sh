@@ -1,5 +1,6 @@
 echo ">>> Running Python unit tests (Not Logic design)"
-python3 utils.py &> >(tee doctest.log) # Redirect both stdout and stderr
+# Unit tests and doctests of the powerverif package
+python3 -m unittest -v test_*.py &> >(tee doctest.log) # Redirect both stdout and stderr
 
 # If it fails, you have a problem in your verification code, not in your design
 fails=`grep "FAILED" doctest.log | wc -l`
@@ -24,4 +25,7 @@ then
 fi
 echo ">>> Python doctest PASSED"
 
+echo ">>> Measuring powerverif's cold start"
+python3 -c "import powerverif; print(f'>>> powerverif imported in {powerverif.IMPORT_TIME*1e3:.2f} ms')"
+
 exit 0
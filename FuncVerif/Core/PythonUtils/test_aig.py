@@ -0,0 +1,221 @@
+import os
+import tempfile
+import unittest
+import doctest
+from powerverif import isa, identify, stimulus
+try:
+    import numpy
+    from powerverif import aig
+    from powerverif.aig import *
+except ImportError:
+    numpy = None
+
+
+class Builder:
+    """ Bit-blasts small netlists: bits are AIG literals, LSB first """
+
+    def __init__(self):
+        self.g = AIG()
+
+    def inputs(self, name, width):
+        return [self.g.add_input(name, bit) for bit in range(width)]
+
+    def outputs(self, name, bits):
+        for bit, lit in enumerate(bits):
+            self.g.add_output(lit, name, bit)
+
+    def and_(self, *lits):
+        result = 1
+        for lit in lits:
+            result = lit if result == 1 else self.g.add_and(result, lit)
+        return result
+
+    def or_(self, *lits):
+        return self.and_(*(lit ^ 1 for lit in lits)) ^ 1
+
+    def xor(self, a, b):
+        return self.or_(self.and_(a, b ^ 1), self.and_(a ^ 1, b))
+
+    def mux(self, sel, a, b):
+        """ sel ? a : b """
+        return self.or_(self.and_(sel, a), self.and_(sel ^ 1, b))
+
+    def eq(self, bits, value):
+        return self.and_(*(lit ^ (1 - ((value >> i) & 1)) for i, lit in enumerate(bits)))
+
+    def select(self, table, index):
+        """ table[index] """
+        return self.or_(*(self.and_(self.eq(index, i), lit) for i, lit in enumerate(table)))
+
+
+def identify_netlist(skip=None):
+    """ Identify.sv, bit-blasted (without the prefix latch) """
+    b = Builder()
+    instr = b.inputs("i_instr", 32)
+    b.inputs("i_rst", 1)
+    po, xo = instr[26:32], instr[1:11]
+    xl = b.eq(po, 19)
+    o = {"o_branch_i_form": b.eq(po, 18), "o_branch_b_form": b.eq(po, 16)}
+    for op in isa.OPCODES:
+        if op.po == 19 and op.mnemonic != skip:
+            name = {"bclr": "o_branch_cond_LR", "bcctr": "o_branch_cond_CTR",
+                    "bctar": "o_branch_cond_TAR"}.get(op.mnemonic, f"o_condreg_{op.mnemonic}")
+            o[name] = b.and_(xl, b.eq(xo, op.xo))
+    o["o_branch_identified"] = b.or_(*(o[n] for n in o if n.startswith("o_branch_")))
+    o["o_condreg_identified"] = b.or_(*(o[n] for n in o if n.startswith("o_condreg_")))
+    o["o_unknown_instr"] = b.and_(b.eq(po, 1) ^ 1, o["o_branch_identified"] ^ 1,
+                                  o["o_condreg_identified"] ^ 1)
+    for name in identify.OUTPUTS:
+        b.outputs(name, [o.get(name, 0)])
+    return b.g
+
+
+def condreg_netlist():
+    """ CondReg.sv, bit-blasted, the reset is synchronous like after yosys async2sync """
+    b = Builder()
+    rst = b.inputs("i_rst", 1)[0]
+    en = b.inputs("i_en", 1)[0]
+    instr = b.inputs("i_instr", 32)
+    ops = {op.mnemonic: b.inputs(f"i_{op.mnemonic}", 1)[0]
+           for op in isa.OPCODES if op.unit == "condreg"}
+    cr_q = [b.g.add_latch("cr_q", bit) for bit in range(32)]
+    cr = [cr_q[31 - i] for i in range(32)]  # CR bits numbered like the ISA
+    bt, ba, bb = instr[21:26], instr[16:21], instr[11:16]
+    a, c = b.select(cr, ba), b.select(cr, bb)
+    results = [("crand", b.and_(a, c)), ("crnand", b.and_(a, c) ^ 1), ("cror", b.or_(a, c)),
+               ("crxor", b.xor(a, c)), ("crnor", b.or_(a, c) ^ 1), ("creqv", b.xor(a, c) ^ 1),
+               ("crandc", b.and_(a, c ^ 1)), ("crorc", b.or_(a, c ^ 1))]
+    int_d = b.select(cr, bt)
+    for name, value in reversed(results):
+        int_d = b.mux(ops[name], value, int_d)
+    int_cr = [b.mux(b.eq(bt, i), int_d, cr[i]) for i in range(32)]
+    bf, bfa = instr[23:26], instr[18:21]
+    cr_d = [b.mux(b.and_(ops["mcrf"], b.eq(bf, i // 4)),
+                  b.select([int_cr[4 * f + i % 4] for f in range(8)], bfa), int_cr[i])
+            for i in range(32)]
+    for i in range(32):
+        b.g.set_next(cr[i], b.and_(rst ^ 1, b.mux(en, cr_d[i], cr[i])))
+    b.outputs("o_cr", [b.and_(rst ^ 1, lit) for lit in cr_q])
+    return b.g
+
+
+def normalized(ands):
+    return sorted((lit, max(a, b), min(a, b)) for lit, a, b in ands)
+
+
+def write_binary(g, path):
+    """ Binary AIGER writer (the variables of the builder are already in order) """
+    header = f"aig {g.max_var} {len(g.inputs)} {len(g.latches)} {len(g.outputs)} {len(g.ands)}\n"
+    data = bytearray(header.encode())
+    data += "".join(f"{n} {i}\n" for _, n, i in g.latches).encode()
+    data += "".join(f"{lit}\n" for lit in g.outputs).encode()
+    for lhs, a, c in g.ands:
+        a, c = max(a, c), min(a, c)
+        for delta in (lhs - a, a - c):
+            while delta >= 0x80:
+                data.append(0x80 | (delta & 0x7f))
+                delta >>= 7
+            data.append(delta)
+    for kind, names in (("i", g.input_names), ("l", g.latch_names), ("o", g.output_names)):
+        data += "".join(f"{kind}{i} {n}[{bit}]\n" for i, (n, bit) in enumerate(names)).encode()
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+# Written by yosys 0.70 (Tools/yosys_aig.tcl: write_aiger -ascii -no-startoffset -map) for
+# module Fields (input [0:31] i_instr, output [0:7] o_po_xo, output [3:0] o_and);
+#   assign o_po_xo = {i_instr[0:3], i_instr[28:31]};
+#   assign o_and = i_instr[0:3] & i_instr[28:31];
+FIELDS_AAG = ("aag 36 32 0 12 4\n" + "".join(f"{2 * (i + 1)}\n" for i in range(32)) +
+              "2\n4\n6\n8\n58\n60\n62\n64\n66\n68\n70\n72\n"
+              "66 58 2\n68 60 4\n70 62 6\n72 64 8\nc\nGenerated by Yosys 0.70\n")
+FIELDS_MAP = ("".join(f"input {i} {i} i_instr\n" for i in range(32)) +
+              "".join(f"output {i} {i} o_po_xo\n" for i in range(8)) +
+              "".join(f"output {i + 8} {i} o_and\n" for i in range(4)))
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestAIG(unittest.TestCase):
+    """
+    Unit test for the bit-parallel AIG simulator
+    """
+
+    def test_pack(self):
+        values = numpy.random.default_rng(0).integers(0, 1 << 63, 200, dtype=numpy.uint64)
+        bits = [pack(values, 4, bit) for bit in range(64)]
+        self.assertEqual(unpack(bits, 200).tolist(), values.tolist())
+
+    def test_read_write(self):
+        g = condreg_netlist()
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, write in (("cr.aag", AIG.write), ("cr.aig", write_binary)):
+                path = os.path.join(tmp, name)
+                write(g, path)
+                back = AIG.read(path)
+                self.assertEqual((back.inputs, back.latches, back.outputs),
+                                 (g.inputs, g.latches, g.outputs))
+                self.assertEqual(normalized(back.ands), normalized(g.ands))
+                self.assertEqual(back.input_names, g.input_names)
+                self.assertEqual(back.latch_names, g.latch_names)
+
+    def test_map_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "Identify.aag")
+            g = identify_netlist()
+            g.write(path)
+            with open(os.path.join(tmp, "Identify.map"), "w") as f:
+                f.write("input 0 3 i_instr\ninput 1 4 i_instr\noutput 0 0 o_branch_identified\n")
+            back = AIG.read(path)
+            self.assertEqual(back.input_names[:3], [("i_instr", 0), ("i_instr", 1), ("i2", 0)])
+
+    def test_yosys_map(self):
+        # The ports of the repository are [0:N]: i_instr[31] is the LSB
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "Fields.aag")
+            with open(path, "w") as f:
+                f.write(FIELDS_AAG)
+            with open(os.path.join(tmp, "Fields.map"), "w") as f:
+                f.write(FIELDS_MAP)
+            g = AIG.read(path)
+        instr = numpy.random.default_rng(0).integers(0, 1 << 32, 1000, dtype=numpy.uint64)
+        instr[:3] = [0x80000000, 0x00000001, 0x90000009]
+        outputs = Simulator(g, lanes=len(instr)).step({"i_instr": instr})
+        first, last = instr >> numpy.uint64(28), instr & numpy.uint64(0xf)
+        self.assertEqual(outputs["o_po_xo"].tolist(), ((first << numpy.uint64(4)) | last).tolist())
+        self.assertEqual(outputs["o_and"].tolist(), (first & last).tolist())
+        self.assertEqual(outputs["o_po_xo"][:3].tolist(), [0x80, 0x01, 0x99])
+
+    def test_order(self):
+        # The ANDs of an ASCII file are not always in order
+        g = identify_netlist()
+        g.ands.reverse()
+        sim = Simulator(g, lanes=2)
+        word = isa.encode("crnor", BT=1, BA=2, BB=3)
+        outputs = sim.step({"i_instr": [word, 0]})
+        self.assertEqual(outputs["o_condreg_crnor"].tolist(), [1, 0])
+
+    def test_identify(self):
+        records = stimulus.generate("Identify", 5000, seed=1)
+        result = regress(identify_netlist(), "Identify", split(records, 100))
+        self.assertEqual((result.records, result.mismatch_count), (5000, 0))
+        # A netlist which lost an opcode
+        result = regress(identify_netlist(skip="crorc"), "Identify", split(records, 100))
+        self.assertGreater(result.mismatch_count, 0)
+        lane, cycle, port, expected, actual = result.mismatches[0]
+        self.assertEqual(isa.identify(records[lane * 50 + cycle].instr).mnemonic, "crorc")
+
+    def test_condreg(self):
+        streams = lane_records("CondReg", 64 * 20, 64 * 2, seed=3)
+        self.assertEqual(len(streams), 128)
+        self.assertEqual(streams[5], stimulus.generate("CondReg", 10, lane_seed(3, 5)))
+        result = regress(condreg_netlist(), "CondReg", streams)
+        self.assertEqual((result.records, result.mismatch_count), (64 * 20, 0), result.mismatches)
+        # The records of a lane follow each other: a single lane works too
+        result = regress(condreg_netlist(), "CondReg", [stimulus.generate("CondReg", 200, 1)])
+        self.assertEqual(result.mismatch_count, 0)
+
+
+def load_tests(loader, tests, ignore):
+    if numpy is not None:
+        tests.addTests(doctest.DocTestSuite(aig))
+    return tests
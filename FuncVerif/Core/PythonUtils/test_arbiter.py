@@ -0,0 +1,100 @@
+import os
+import json
+import tempfile
+import unittest
+import doctest
+import contextlib
+import io
+from powerverif import isa, workload, arbiter
+from powerverif.arbiter import *
+from powerverif.iss import ISS
+
+
+def trace(words, count: int) -> tuple:
+    """ (memory image, cias) of (count) instructions of a program at address 0 """
+    iss = ISS(1 << 12)
+    iss.load_program(0, words)
+    return bytes(iss.memory), [delta.cia for delta in iss.run(count)]
+
+
+class TestArbiter(unittest.TestCase):
+    """
+    Unit test for the cycle-approximate model of the Arbiter
+    """
+
+    def test_independent(self):
+        # Writes CR[0:15], reads CR[16:31]: no hazard, one instruction per cycle
+        words = [isa.encode("crxor", BT=i % 16, BA=16 + i % 16, BB=31 - i % 16)
+                 for i in range(200)]
+        result = simulate(*trace(words, 200))
+        self.assertEqual(result.instructions, 200)
+        self.assertLess(result.cycles, 200 + 10)
+        self.assertEqual(result.stall_branch, 0)
+        self.assertEqual(sum(result.stall_fetch_arb.values()), 0)
+
+    def test_dependent(self):
+        words = [isa.encode("crand", BT=0, BA=0, BB=1)] * 100  # RAW hazard on CR[0]
+        memory, cias = trace(words, 100)
+        # Issue, CDB broadcast (after the latency), issue of the next one
+        for latency in (1, 3):
+            result = simulate(memory, cias, Config(latencies=(1, latency, 3)))
+            self.assertAlmostEqual(result.cycles / 100, latency + 1, delta=0.1)
+        # The CondReg RS fills up, a deeper one does not change the IPC
+        small = simulate(memory, cias, Config(rs_depth=1, latencies=(1, 3, 3)))
+        large = simulate(memory, cias, Config(rs_depth=8, latencies=(1, 3, 3)))
+        self.assertGreater(small.stall_fetch_arb["CondReg"], large.stall_fetch_arb["CondReg"])
+        self.assertEqual(small.cycles, large.cycles)
+        for r in (small, large):
+            self.assertEqual(sum(r.occupancy["CondReg"]), r.cycles)
+            self.assertEqual(sum(r.rob_occupancy), r.cycles)
+        self.assertEqual(len(small.occupancy["CondReg"]), 2)
+
+    def test_renaming(self):
+        # WAW and WAR on CR[0] do not delay the second instruction of a pair
+        words = [isa.encode("crand", BT=0, BA=1, BB=2), isa.encode("cror", BT=0, BA=3, BB=4)]
+        result = simulate(*trace(words * 50, 100), Config(latencies=(1, 4, 3), fu_count=2))
+        self.assertLess(result.cycles, 100 + 10)
+
+    def test_branch(self):
+        # A loop: the taken branch stalls the front end until it is broadcast
+        words = [isa.encode("crnor", BT=1, BA=2, BB=3), isa.encode("b", LI=-1 & 0xffffff, AA=0,
+                                                                   LK=0)]
+        result = simulate(*trace(words, 100))
+        self.assertGreater(result.stall_branch, 2 * 40)
+        penalty = simulate(*trace(words, 100), Config(redirect_penalty=5))
+        self.assertGreater(penalty.cycles, result.cycles + 4 * 40)
+
+    def test_cdb_and_rob(self):
+        memory, records = workload.generate(3000, seed=5)
+        cias = [cia for cia, ea in records]
+        narrow = simulate(memory, cias, Config(latencies=(1, 1, 1)))
+        wide = simulate(memory, cias, Config(cdb_width=2, latencies=(1, 1, 1)))
+        self.assertLessEqual(wide.cdb_wait, narrow.cdb_wait)
+        self.assertGreaterEqual(wide.ipc, narrow.ipc)
+        small = simulate(memory, cias, Config(rob_depth=2, latencies=(1, 1, 6)))
+        self.assertGreater(small.stall_rob, 0)
+        self.assertEqual(max(i for i, n in enumerate(small.rob_occupancy) if n), 2)
+
+    def test_sweep(self):
+        memory, records = workload.generate(500, seed=1)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "w.trace")
+            workload.write(path, memory, records, seed=1)
+            configs = [Config(rs_depth=1), Config(rs_depth=2, cdb_width=2)]
+            results = sweep(path, configs, count=400, workers=1)
+            self.assertEqual([r.config for r in results], configs)
+            self.assertEqual(results[0].instructions, 400)
+            output = os.path.join(tmp, "sweep.json")
+            with contextlib.redirect_stdout(io.StringIO()) as out:
+                arbiter.main([path, "--rs", "1", "2", "--cdb", "1", "2", "-j", "1",
+                              "-o", output])
+            self.assertEqual(len(out.getvalue().splitlines()), 1 + 4)
+            with open(output) as f:
+                saved = json.load(f)
+            self.assertEqual([r["config"]["rs_depth"] for r in saved], [1, 1, 2, 2])
+            self.assertEqual(saved[0]["instructions"], 500)
+
+
+def load_tests(loader, tests, ignore):
+    tests.addTests(doctest.DocTestSuite(arbiter))
+    return tests
@@ -0,0 +1,76 @@
+import unittest
+import doctest
+from powerverif import bitfield
+from powerverif.bitfield import *
+
+
+class TestBitfield(unittest.TestCase):
+    """
+    Unit test for the bitfield helpers (compared to the previous string based
+    implementation)
+    """
+
+    def test_select_bit(self):
+        for reg in (0, 1, 0x80000000, 0xcafebabe, 0xffffffff):
+            s = "{:032b}".format(reg)
+            for bit in range(32):
+                self.assertEqual(select_bit(reg, 32, bit), int(s[bit]))
+
+    def test_select_bits(self):
+        reg = 0x0123456789abcdef
+        s = "{:064b}".format(reg)
+        for from_ in range(0, 64, 3):
+            for to in range(from_, 64, 5):
+                self.assertEqual(select_bits(reg, 64, from_, to), int(s[from_:to+1], 2))
+
+    def test_exts(self):
+        self.assertEqual(exts(0b11, 3, 6), 0b000011)
+        self.assertEqual(exts(0b100, 3, 6), 0b111100)
+        self.assertEqual(exts(0x800FEE << 2, 26, 64), 0xfffffffffe003fb8)
+        self.assertEqual(exts(0xCAFE << 2, 26, 64), 0xCAFE << 2)
+        with self.assertRaises(TypeError):
+            exts(0b1000, 3, 6)
+
+    def test_int_to_bin(self):
+        self.assertEqual(int_to_bin(5, 0b101), "00101")
+        with self.assertRaises(TypeError):
+            int_to_bin(2, 4)
+
+    def test_be(self):
+        for length in (1, 3, 8, 13, 32, 64):
+            for num in (0, 1, 0b101, (1 << length) - 1, 0x5a5a5a5a5a5a5a5a & ((1 << length) - 1)):
+                if num >= 1 << length:
+                    continue
+                expected = int("{:0{}b}".format(num, length)[::-1], 2)
+                self.assertEqual(BE(num, length), expected)
+
+    def test_random_bin(self):
+        self.assertEqual(random_bin("0110"), 0b110)
+        for i in range(20):
+            self.assertIn(random_bin("01?0"), (0b110, 0b100))
+            self.assertIn(random_bin("1?1??") >> 2, (0b101, 0b111))
+        with self.assertRaises(TypeError):
+            random_bin("01x")
+
+    def test_field(self):
+        f = Field(6, 10)
+        self.assertEqual(f.width, 5)
+        for reg in (0, 0xffffffff, 0x4ce33202):
+            self.assertEqual(f.get(reg), select_bits(reg, 32, 6, 10))
+            self.assertEqual(f.get(f.set(reg, 0b10101)), 0b10101)
+            # Other bits are untouched
+            self.assertEqual(f.set(reg, f.get(reg)), reg)
+        self.assertEqual(Field(0, 63, size=64).get(2**64-1), 2**64-1)
+        with self.assertRaises(ValueError):
+            Field(30, 32)
+        with self.assertRaises(TypeError):
+            f.set(0, 32)
+
+
+def load_tests(loader, tests, ignore):
+    tests.addTests(doctest.DocTestSuite(bitfield))
+    return tests
+
+
+if __name__ == '__main__':
+    unittest.main()
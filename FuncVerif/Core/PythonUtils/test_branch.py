@@ -0,0 +1,43 @@
+import unittest
+import doctest
+from powerverif import branch
+from powerverif.branch import *
+
+
+class TestBranch(unittest.TestCase):
+    """
+    Unit test for the Branch Unit golden model
+    """
+
+    def test_generate_BO(self):
+        # Every generated BO must be decoded back to the same type
+        for tBO in range(9):
+            for i in range(10):
+                BO = generate_BO(tBO=tBO, A=i & 1, T=(i >> 1) & 1)
+                decrement = (BO >> 2) & 1 == 0
+                self.assertEqual(expected_CTR(CTR=1, tBO=tBO) == 0, decrement)
+                self.assertEqual(classify_BO(BO), tBO)
+
+    def test_should_branch(self):
+        CR = 0x80000000  # CR[0] = 1, CR[1] = 0
+        self.assertTrue(should_branch(tBO=0, CR=CR, BI=1, CTR=1))
+        self.assertFalse(should_branch(tBO=0, CR=CR, BI=0, CTR=1))
+        self.assertTrue(should_branch(tBO=1, CR=CR, BI=1, CTR=0))
+        self.assertTrue(should_branch(tBO=3, CR=CR, BI=0, CTR=1))
+        self.assertTrue(should_branch(tBO=4, CR=CR, BI=0, CTR=0))
+        self.assertTrue(should_branch(tBO=5, CR=CR, BI=0, CTR=0))
+        self.assertTrue(should_branch(tBO=7, CR=CR, BI=0, CTR=0))
+        self.assertTrue(should_branch(tBO=8, CR=0, BI=0, CTR=0))
+
+    def test_expected_LR(self):
+        self.assertEqual(expected_LR(LR=8, CIA=16, LK=1), 20)
+        self.assertEqual(expected_LR(LR=8, CIA=16, LK=0), 8)
+
+
+def load_tests(loader, tests, ignore):
+    tests.addTests(doctest.DocTestSuite(branch))
+    return tests
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import random
+import unittest
+import doctest
+from powerverif import isa
+from powerverif.branch import classify_BO, should_branch, expected_CTR, expected_LR
+from powerverif.utils import exts, adds_64b, random_64b, random_32b
+try:
+    import numpy
+    from powerverif import branch_batch
+    from powerverif.branch_batch import *
+except ImportError:
+    numpy = None
+
+
+def reference(instr, CIA, CR, CTR, LR, TAR):
+    """ Scalar model, written like the BranchUnit testbenches -> (NIA, LR, CTR) """
+    op, f = isa.decode(instr)
+    if op is None or op.unit != "branch":
+        return adds_64b(CIA, 4), LR, CTR
+    if op.mnemonic == "b":
+        offset = exts(f["LI"] << 2, length=26, new_length=64)
+        NIA = offset if f["AA"] else adds_64b(CIA, offset)
+        return NIA, expected_LR(LR, CIA, f["LK"]), CTR
+    tBO = classify_BO(f["BO"])
+    if op.mnemonic == "bcctr" and tBO not in (2, 5, 8):
+        return adds_64b(CIA, 4), LR, CTR  # Invalid form, ignored
+    new_CTR = expected_CTR(CTR, tBO)
+    if op.mnemonic == "bc":
+        offset = exts(f["BD"] << 2, length=16, new_length=64)
+        target = offset if f["AA"] else adds_64b(CIA, offset)
+    else:
+        target = {"bclr": LR, "bcctr": CTR, "bctar": TAR}[op.mnemonic] & ~3
+    taken = should_branch(tBO=tBO, CR=CR, BI=f["BI"], CTR=new_CTR)
+    NIA = target if taken else adds_64b(CIA, 4)
+    return NIA, expected_LR(LR, CIA, f["LK"]), new_CTR
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestBranchBatch(unittest.TestCase):
+    """
+    The vectorized model must match the scalar one
+    """
+
+    def check(self, instr, CIA, CR, CTR, LR, TAR):
+        NIA_, LR_, CTR_ = step(instr, CIA, CR, CTR, LR, TAR)
+        for i in range(len(instr)):
+            expected = reference(int(instr[i]), CIA[i], CR[i], CTR[i], LR[i], TAR[i])
+            self.assertEqual((int(NIA_[i]), int(LR_[i]), int(CTR_[i])), expected,
+                             f"instr 0x{int(instr[i]):08x}")
+
+    def test_random(self):
+        n = 5000
+        instr = random_branches(n, rng=1)
+        CIA = [random_64b() & ~3 for i in range(n)]
+        CR = [random_32b() for i in range(n)]
+        # Small CTR values to hit CTR=0 after the decrement and the wraparound
+        CTR = [random.choice([0, 1, 2, random_64b()]) for i in range(n)]
+        LR = [random_64b() for i in range(n)]
+        TAR = [random_64b() for i in range(n)]
+        self.check(instr, CIA, CR, CTR, LR, TAR)
+
+    def test_every_tBO(self):
+        instr, state = [], []
+        for name in ("bc", "bclr", "bcctr", "bctar"):
+            for BO in range(32):
+                for CTR in (0, 1, 2**64-1):
+                    fields = dict(BO=BO, BI=5, LK=BO & 1)
+                    if name == "bc":
+                        fields.update(BD=0x2000, AA=(BO >> 1) & 1)  # Negative offset
+                    instr.append(isa.encode(name, **fields))
+                    state.append((0x1000, 0x04000000 * (BO & 1), CTR, 0x2003, 0x3002))
+        CIA, CR, CTR, LR, TAR = zip(*state)
+        self.check(numpy.array(instr, dtype=numpy.uint32), CIA, CR, CTR, LR, TAR)
+        NIA_, LR_, CTR_ = step(instr, CIA, CR, CTR, LR, TAR)
+        self.assertTrue((CTR_ == numpy.uint64(2**64-1)).any(), "CTR wraparound")
+
+    def test_not_a_branch(self):
+        instr = [isa.encode("crand", BT=1, BA=2, BB=3), isa.encode("lbz", RT=1, RA=2, D1=3)]
+        NIA_, LR_, CTR_ = step(instr, CIA=[2**64-4, 8], CR=[0, 0], CTR=[5, 5], LR=[7, 7],
+                               TAR=[0, 0])
+        self.assertEqual(list(NIA_), [0, 12])
+        self.assertEqual(list(LR_), [7, 7])
+        self.assertEqual(list(CTR_), [5, 5])
+
+    def test_mismatches(self):
+        expected = ([4, 8, 12], [0, 0, 0], [1, 1, 1])
+        self.assertEqual(list(mismatches(expected, expected)), [])
+        self.assertEqual(list(mismatches(expected, ([4, 8, 12], [0, 1, 0], [1, 1, 2]))), [1, 2])
+
+
+def load_tests(loader, tests, ignore):
+    if numpy is not None:
+        tests.addTests(doctest.DocTestSuite(branch_batch))
+    return tests
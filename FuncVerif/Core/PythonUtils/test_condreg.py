@@ -0,0 +1,51 @@
+import unittest
+import doctest
+from powerverif import condreg, isa
+from powerverif.condreg import *
+
+
+class TestCondReg(unittest.TestCase):
+    """
+    Unit test for the Condition Register golden model
+    """
+
+    def test_logical(self):
+        CR = 0xa0000000  # CR[0] = 1, CR[1] = 0, CR[2] = 1
+        self.assertEqual(expected_CR(CR, XO_CRAND, bt=3, ba=0, bb=2, bf=0, bfa=0), 0xb0000000)
+        self.assertEqual(expected_CR(CR, XO_CRAND, bt=0, ba=0, bb=1, bf=0, bfa=0), 0x20000000)
+        self.assertEqual(expected_CR(CR, XO_CRNAND, bt=31, ba=0, bb=1, bf=0, bfa=0), 0xa0000001)
+        self.assertEqual(expected_CR(CR, XO_CROR, bt=1, ba=0, bb=1, bf=0, bfa=0), 0xe0000000)
+        self.assertEqual(expected_CR(CR, XO_CRXOR, bt=0, ba=0, bb=2, bf=0, bfa=0), 0x20000000)
+        self.assertEqual(expected_CR(CR, XO_CRNOR, bt=4, ba=1, bb=1, bf=0, bfa=0), 0xa8000000)
+        self.assertEqual(expected_CR(CR, XO_CREQV, bt=4, ba=0, bb=2, bf=0, bfa=0), 0xa8000000)
+        self.assertEqual(expected_CR(CR, XO_CRANDC, bt=4, ba=0, bb=1, bf=0, bfa=0), 0xa8000000)
+        self.assertEqual(expected_CR(CR, XO_CRORC, bt=0, ba=1, bb=2, bf=0, bfa=0), 0x20000000)
+
+    def test_mcrf(self):
+        self.assertEqual(expected_CR(0xa0000000, XO_MCRF, bt=0, ba=0, bb=0, bf=7, bfa=0), 0xa000000a)
+        self.assertEqual(expected_CR(0x1234abcd, XO_MCRF, bt=0, ba=0, bb=0, bf=3, bfa=3), 0x1234abcd)
+
+    def test_execute(self):
+        CR = 0x1234abcd
+        for xo in VALID_XO:
+            if xo == XO_MCRF:
+                instr = isa.encode("mcrf", BF=2, BFA=5)
+                expected = expected_CR(CR, xo, bt=0, ba=0, bb=0, bf=2, bfa=5)
+            else:
+                instr = isa.condreg_xl_form(PO=19, BT=9, BA=17, BB=30, XO=xo)
+                expected = expected_CR(CR, xo, bt=9, ba=17, bb=30, bf=0, bfa=0)
+            self.assertEqual(execute(CR, instr), expected, NAMES[xo])
+        self.assertEqual(run(CR, [instr, instr]), [expected, expected])
+
+    def test_random_xo(self):
+        for i in range(20):
+            self.assertIn(random_xo(), VALID_XO)
+
+
+def load_tests(loader, tests, ignore):
+    tests.addTests(doctest.DocTestSuite(condreg))
+    return tests
+
+
+if __name__ == '__main__':
+    unittest.main()
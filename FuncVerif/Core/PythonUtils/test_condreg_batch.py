@@ -0,0 +1,56 @@
+import unittest
+import doctest
+from powerverif import condreg
+try:
+    import numpy
+    from powerverif import condreg_batch
+    from powerverif.condreg_batch import *
+except ImportError:
+    numpy = None
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestCondRegBatch(unittest.TestCase):
+    """
+    The vectorized model must match the scalar one
+    """
+
+    def test_step(self):
+        rng = numpy.random.default_rng(1)
+        instr = random_instructions(20000, rng)
+        CR = rng.integers(0, 2**32, 20000, dtype=numpy.uint32)
+        for cr, word, new in zip(CR.tolist(), instr.tolist(), step(CR, instr).tolist()):
+            self.assertEqual(new, condreg.execute(cr, word), f"instr 0x{word:08x}")
+
+    def test_every_xo(self):
+        self.assertEqual(set(((random_instructions(1000, 2) >> 1) & 0x3ff).tolist()),
+                         set(condreg.VALID_XO))
+
+    def test_not_a_condreg(self):
+        self.assertEqual(list(step([0xcafe, 0xcafe], [0x7c000000, 0x4c000020])), [0xcafe, 0xcafe])
+
+    def test_run(self):
+        instrs = random_instructions((500, 4), 3)
+        CR0 = numpy.array([0, 0xffffffff, 0x12345678, 0xa0000000], dtype=numpy.uint32)
+        streams = run(CR0, instrs)
+        for s in range(4):
+            expected = condreg.run(int(CR0[s]), instrs[:, s].tolist())
+            self.assertEqual(streams[:, s].tolist(), expected)
+            self.assertEqual(run(CR0[s], instrs[:, s]).tolist(), expected)
+
+    def test_run_not_a_condreg(self):
+        # lbz with the XO bits of crxor, XL-forms which are not CR instructions (bclr, isync)
+        rng = numpy.random.default_rng(4)
+        instrs = random_instructions(300, rng)
+        others = numpy.array([0x88001182, 0x4c000020, 0x4c00012c, 0x7c000000], dtype=numpy.uint32)
+        instrs[rng.integers(0, 300, 100)] = others[rng.integers(0, 4, 100)]
+        CR0 = numpy.uint32(0xa0000000)
+        streams = run(CR0, instrs[:, None])[:, 0]
+        self.assertEqual(run(CR0, instrs).tolist(), streams.tolist())
+        self.assertEqual(run(CR0, [0x88001182]).tolist(), [0xa0000000])
+
+
+def load_tests(loader, tests, ignore):
+    if numpy is not None:
+        tests.addTests(doctest.DocTestSuite(condreg_batch))
+    return tests
@@ -0,0 +1,105 @@
+import os
+import tempfile
+from multiprocessing import Pool
+import unittest
+import doctest
+from powerverif import covdb
+from powerverif.covdb import *
+try:
+    from cocotb_coverage.coverage import CoverPoint, CoverCross, coverage_section, coverage_db
+except ImportError:  # Optional dependency (pip install powerverif[cocotb])
+    CoverPoint = None
+
+
+def make_record(unit, seed, a0, a1):
+    return Record(unit, "test", seed, {
+        "dut.a": ("point", {0: a0, 1: a1}),
+        "dut.cross": ("cross", {(0, 0): a0, (0, 1): 0, (1, 1): a1}),
+    })
+
+
+def append_large(task):
+    """ Appends records larger than the buffer of a file object """
+    path, seed = task
+    bins = {i: seed for i in range(5000)}
+    for i in range(10):
+        append(path, Record("Identify", "test", seed, {"dut.big": ("point", bins)}))
+
+
+class TestCovDB(unittest.TestCase):
+    """
+    Unit test for the coverage database
+    """
+
+    def test_pack(self):
+        r = make_record("Identify", 3, 5, 2**40)
+        back, offset = Record.unpack_from(r.pack())
+        self.assertEqual(offset, len(r.pack()))
+        self.assertEqual((back.unit, back.test, back.seed), ("Identify", "test", 3))
+        self.assertEqual(back.items, r.items)
+
+    def test_merge(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = [os.path.join(tmp, f"shard_{i}.pvcov") for i in range(20)]
+            for i, path in enumerate(paths):
+                append(path, make_record("Identify", i, i, 0))
+                append(path, make_record("LoadStoreUnit", i, 1, 1))  # Same item names
+            merged = merge(paths)
+            self.assertEqual(merged["Identify"].items["dut.a"], ("point", {0: 190, 1: 0}))
+            self.assertEqual(merged["Identify"].items["dut.cross"][1][(0, 0)], 190)
+            self.assertEqual(merged["LoadStoreUnit"].items["dut.cross"][1],
+                             {(0, 0): 20, (0, 1): 0, (1, 1): 20})
+            self.assertIn("Identify: 2/5 bins (40.0%)", report(merged["Identify"]))
+
+            # A merged file gives the same result
+            out = os.path.join(tmp, "merged.pvcov")
+            main(["merge", "-o", out] + paths)
+            self.assertEqual({u: r.items for u, r in merge([out]).items()},
+                             {u: r.items for u, r in merged.items()})
+
+    def test_concurrent_append(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cov.pvcov")
+            with Pool(4) as pool:
+                pool.map(append_large, [(path, seed) for seed in range(8)])
+            records = read(path)
+            self.assertEqual(len(records), 80)
+            for r in records:
+                self.assertEqual(set(r.items["dut.big"][1].values()), {r.seed})
+
+    def test_bad_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bad.pvcov")
+            with open(path, "wb") as f:
+                f.write(b"x" * 32)
+            with self.assertRaises(ValueError):
+                read(path)
+
+    @unittest.skipIf(CoverPoint is None, "cocotb_coverage is not installed")
+    def test_save(self):
+        section = coverage_section(
+            CoverPoint("covdb.a", xf=lambda x: x, bins=[0, 1]),
+            CoverPoint("covdb.b", xf=lambda x: x & 1, bins=[0, 1]),
+            CoverCross("covdb.cross", items=["covdb.a", "covdb.b"]))
+
+        @section
+        def sample(x):
+            pass
+
+        db = {name: item for name, item in coverage_db.items() if name.startswith("covdb.")}
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cov.pvcov")
+            sample(1)
+            save("Unit", "t1", path, db=db)
+            sample(0)
+            sample(1)
+            save("Unit", "t2", path, db=db)  # Only the new hits are saved
+            first, second = read(path)
+            self.assertEqual(first.items["covdb.a"][1], {0: 0, 1: 1})
+            self.assertEqual(second.items["covdb.a"][1], {0: 1, 1: 1})
+            self.assertEqual(merge([path])["Unit"].items["covdb.cross"][1][(1, 1)], 2)
+
+
+def load_tests(loader, tests, ignore):
+    tests.addTests(doctest.DocTestSuite(covdb))
+    return tests
@@ -0,0 +1,107 @@
+import random
+import unittest
+import doctest
+try:
+    from cocotb_coverage.coverage import coverage_section, coverage_db
+    from powerverif import coverage
+    from powerverif.coverage import *
+except ImportError:  # Optional dependency (pip install powerverif[cocotb])
+    coverage = None
+
+
+class Value(int):
+    """ Signal value as returned by cocotb """
+    @property
+    def integer(self):
+        return int(self)
+
+
+class Signal:
+    def __init__(self):
+        self.value = Value(0)
+
+
+class Dut:
+    def __init__(self, signals):
+        for signal in signals:
+            setattr(self, signal, Signal())
+
+    def randomize(self, rng):
+        for signal in vars(self).values():
+            signal.value = Value(rng.getrandbits(1))
+
+
+def points(prefix):
+    return [(f"{prefix}.{s}", s, 1) for s in ("a", "b", "c")], \
+           [(f"{prefix}.cross", (f"{prefix}.a", f"{prefix}.c"))]
+
+
+@unittest.skipIf(coverage is None, "cocotb_coverage is not installed")
+class TestCoverage(unittest.TestCase):
+    """
+    Unit test for the packed coverage sampling
+    """
+
+    def check_same_bins(self, prefix, background):
+        # The Collector and a classic coverage section see the same DUT values: the bulk
+        # update gives the bins and coverage of sample() on the installed cocotb-coverage
+        ref_points, ref_crosses = points(prefix + "_ref")
+        section = coverage._section(ref_points, ref_crosses)
+        collector = Collector(*points(prefix), background=background, period=10)
+
+        @section
+        def sample(dut):
+            pass
+
+        rng = random.Random(3)
+        dut = Dut(["a", "b", "c"])
+        for i in range(1000):
+            dut.randomize(rng)
+            sample(dut)
+            collector.sample(dut)
+        collector.close()
+        self.assertEqual(collector.samples, 1000)
+        for name in ("a", "b", "c", "cross"):
+            self.assertEqual(coverage_db[f"{prefix}.{name}"].detailed_coverage,
+                             coverage_db[f"{prefix}_ref.{name}"].detailed_coverage)
+        self.assertEqual(coverage_db[prefix].coverage, coverage_db[prefix + "_ref"].coverage)
+
+    def test_same_bins(self):
+        self.check_same_bins("fg", background=False)
+
+    def test_background(self):
+        self.check_same_bins("bg", background=True)
+
+    def test_flush(self):
+        c = Collector(*points("fl"), background=True, period=4)
+        dut = Dut(["a", "b", "c"])
+        dut.a.value = Value(1)
+        for i in range(6):
+            c.sample(dut)
+        c.flush()  # Every sample is in the bins, even with the thread
+        self.assertEqual(c.points["fl.a"].detailed_coverage[1], 6)
+        c.sample(dut)
+        c.close()
+        self.assertEqual(c.points["fl.a"].detailed_coverage[1], 7)
+
+    def test_private_state(self):
+        # What _update() relies on, see the pin of cocotb-coverage in pyproject.toml
+        c = Collector(*points("ps"), background=False)
+        for item in list(c.points.values()) + list(c.crosses.values()):
+            self.assertIsInstance(item._hits, dict)
+            self.assertTrue(callable(item._parent._update_coverage))
+        self.assertEqual(list(c.crosses["ps.cross"]._items), ["ps.a", "ps.c"])
+        self.assertEqual(set(c.crosses["ps.cross"]._hits), {(0, 0), (0, 1), (1, 0), (1, 1)})
+
+    def test_units(self):
+        # Same cover items for the section and the collector
+        collector = identify_collector(background=False)
+        identify_coverage()
+        self.assertIs(coverage_db["dut.cross"], collector.crosses["dut.cross"])
+        self.assertEqual(len(collector.points), len(IDENTIFY_POINTS))
+
+
+def load_tests(loader, tests, ignore):
+    if coverage is not None:
+        tests.addTests(doctest.DocTestSuite(coverage))
+    return tests
@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+import doctest
+from powerverif import directed, stimulus, covdb, condreg
+from powerverif.directed import *
+
+
+class TestDirected(unittest.TestCase):
+    """
+    Unit test for the coverage-directed stimulus
+    """
+
+    def test_closure(self):
+        # Full coverage, with fewer records than the random stimulus
+        for unit in MODELS:
+            gen = DirectedGenerator(unit, seed=1)
+            records = list(gen.generate(1.0, limit=10000))
+            self.assertEqual(gen.coverage(), 1.0, unit)
+            self.assertEqual(cycles_to_coverage(unit, records), len(records))
+            random_cycles = cycles_to_coverage(unit, stimulus.generate(unit, 20000, seed=1))
+            self.assertLess(len(records), random_cycles or 20000, unit)
+
+    def test_deterministic(self):
+        for unit in MODELS:
+            self.assertEqual(list(DirectedGenerator(unit, seed=4).generate(limit=50)),
+                             list(DirectedGenerator(unit, seed=4).generate(limit=50)))
+
+    def test_records(self):
+        # The records are the ones of the golden models
+        records = list(DirectedGenerator("BranchUnit", seed=2).generate(limit=500))
+        for r, next_r in zip(records, records[1:]):
+            self.assertEqual(next_r.cia, r.nia)
+        cr = 0
+        for r in DirectedGenerator("CondReg", seed=2).generate(limit=500):
+            cr = condreg.execute(cr, r.instr)
+            self.assertEqual(r.cr, cr)
+
+    def test_ignored(self):
+        model = BranchUnitModel()
+        self.assertFalse(set(model.IGNORED) & set(model.all_bins()))
+
+    def test_coverage_db(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cov.pvcov")
+            gen = DirectedGenerator("CondReg", seed=3)
+            first = list(gen.generate(0.5))
+            covdb.append(path, gen.record())
+            # Starting from the database, only the missing bins are targeted
+            again = DirectedGenerator("CondReg", seed=3)
+            again.load(path)
+            self.assertEqual(again.coverage(), gen.coverage())
+            self.assertLess(len(list(again.generate(1.0))), len(first) * 4)
+            self.assertEqual(again.coverage(), 1.0)
+
+    def test_bench_coverage(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cov.pvcov")
+            # Cover points of coverage.identify_collector()
+            items = {"top.o_branch_cond_LR": ("point", {0: 5, 1: 2}),
+                     "dut.o_condreg_mcrf": ("point", {0: 7, 1: 0}),
+                     "dut.cross": ("cross", {(0, 0, 0): 1, (0, 1, 0): 2})}
+            covdb.append(path, covdb.Record("Identify", "test_identify_random", 1, items))
+            gen = DirectedGenerator("Identify")
+            gen.load(path)
+            self.assertEqual(gen.hits[("identify.outputs", "o_branch_cond_LR")], 2)
+            self.assertEqual(gen.hits[("identify.outputs", "none")], 1)
+            self.assertEqual(gen.hits[("identify.outputs", "o_condreg_mcrf")], 0)
+            # The records checked by a testbench
+            records = stimulus.generate("LoadStoreUnit", 200, 1)
+            save("LoadStoreUnit", "test_loadstoreunit_replay", records, path)
+            gen = DirectedGenerator("LoadStoreUnit")
+            gen.load(path)
+            self.assertEqual(sum(gen.hits.values()), 2 * 200)
+            # A record without any bin of the model
+            covdb.append(path, covdb.Record("LoadStoreUnit", "test_loadstoreunit", 1,
+                                            {"dut.o_bru_en": ("point", {0: 1, 1: 1})}))
+            with self.assertWarns(UserWarning):
+                DirectedGenerator("LoadStoreUnit").load(path)
+
+    def test_load(self):
+        os.environ["STIMULUS_DIRECTED"] = "1.0"
+        try:
+            records = stimulus.load("LoadStoreUnit", 1000, seed=0)
+        finally:
+            del os.environ["STIMULUS_DIRECTED"]
+        self.assertLess(len(records), 100)
+        self.assertEqual({r.err_invalid_load_instr for r in records}, {0, 1})
+
+
+def load_tests(loader, tests, ignore):
+    tests.addTests(doctest.DocTestSuite(directed))
+    return tests
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+import doctest
+from powerverif import isa, identify
+try:
+    import numpy
+    from powerverif import equivalence
+    from powerverif.equivalence import *
+except ImportError:
+    numpy = None
+
+BAD_WORD = isa.encode("cror", BT=1, BA=2, BB=3)
+
+
+def buggy_outputs(words):
+    """ rtl_outputs() with cror not identified for BAD_WORD """
+    outputs = rtl_outputs(words)
+    outputs[words == BAD_WORD] = identify.UNKNOWN
+    return outputs
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestEquivalence(unittest.TestCase):
+    """
+    Unit test for the Identify equivalence sweep
+    """
+
+    def test_space(self):
+        space = Space.opcodes(po=19, xo=528)
+        words = space.words(0, len(space))
+        self.assertEqual(len(numpy.unique(words)), 1 << 16)
+        self.assertTrue(numpy.all(isa.identify_array(words) == 3))  # bcctr
+        self.assertEqual(len(Space()), 1 << 32)
+        self.assertEqual(Space()[0xdeadbeef], 0xdeadbeef)
+
+    def test_decoder(self):
+        words = numpy.random.default_rng(1).integers(0, 1 << 32, 5000, dtype=numpy.uint32)
+        self.assertEqual(expected_outputs(words).tolist(),
+                         [identify.expected_outputs(int(w)) for w in words])
+
+    def test_equivalent(self):
+        xos = set(range(0, 1024, 31)) | {op.xo for op in isa.OPCODES if op.po == 19}
+        sweep = Sweep([Space.opcodes(19, xo) for xo in sorted(xos)], chunk=1 << 15)
+        sweep.run(workers=2)
+        self.assertEqual((sweep.checked, sweep.mismatch_count), (sweep.total, 0))
+
+    @unittest.skipIf(numpy is None or not os.path.exists(netlist_path()),
+                     "no netlist of Identify.sv (Tools/synth_aig)")
+    def test_netlist(self):
+        self.assertEqual(default_model(), "aig")
+        xos = set(range(0, 1024, 61)) | {op.xo for op in isa.OPCODES if op.po == 19}
+        spaces = [Space.opcodes(19, xo) for xo in sorted(xos)] + [Space.opcodes(po=18)]
+        sweep = Sweep(spaces[:4], "aig", chunk=1 << 15).run(workers=2)
+        self.assertEqual((sweep.checked, sweep.mismatch_count), (sweep.total, 0))
+        words = spaces[-1].words(0, 5000)
+        self.assertEqual(aig_outputs(words).tolist(), rtl_outputs(words).tolist())
+
+    def test_mismatch_and_resume(self):
+        MODELS["buggy"] = buggy_outputs
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                checkpoint = os.path.join(tmp, "sweep.json")
+                spaces = [Space.opcodes(19, 449), Space.opcodes(19, 16)]
+                sweep = Sweep(spaces, "buggy", checkpoint, chunk=1 << 12)
+                sweep.tasks = sweep.tasks[:8]  # Interrupted in the first space
+                sweep.run(workers=1)
+                self.assertEqual(sweep.mismatches, [(BAD_WORD, identify.expected_outputs(BAD_WORD),
+                                                     identify.UNKNOWN)])
+                resumed = Sweep(spaces, "buggy", checkpoint, chunk=1 << 12)
+                self.assertEqual(resumed.checked, 8 << 12)
+                resumed.run(workers=1)
+                self.assertEqual((resumed.checked, resumed.mismatch_count), (1 << 17, 1))
+                with self.assertRaises(ValueError):  # Not the same sweep
+                    Sweep(spaces[:1], "buggy", checkpoint, chunk=1 << 12)
+        finally:
+            del MODELS["buggy"]
+
+
+def load_tests(loader, tests, ignore):
+    if numpy is not None:
+        tests.addTests(doctest.DocTestSuite(equivalence))
+    return tests
@@ -0,0 +1,74 @@
+import os
+import unittest
+from array import array
+from powerverif import isa, identify, condreg, stimulus
+try:
+    from powerverif import hlmodel
+    hlmodel.load()
+except OSError:  # No C++ compiler
+    hlmodel = None
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+@unittest.skipIf(hlmodel is None, "the shared library of HLModel/Core cannot be built")
+class TestHLModel(unittest.TestCase):
+    """
+    Unit test for the Python bindings of the C++ High Level Model
+    """
+
+    def test_identify(self):
+        self.assertEqual(hlmodel.check("Identify", 5000, seed=4), [])
+        instrs = [isa.encode("cror", BT=1, BA=2, BB=3), 0x04000000, 0]
+        outputs, prefixes = hlmodel.Identify().step(instrs)
+        self.assertIsInstance(outputs, array)
+        self.assertEqual(list(outputs), [identify.expected_outputs(i) for i in instrs])
+
+    def test_prefix(self):
+        prefix = isa.d_form_prefix(R=1, D0=3)
+        suffix = isa.encode("lbz", RT=1, RA=0, D1=8)
+        model = hlmodel.Identify()
+        outputs, prefixes = model.step([prefix, suffix, suffix])
+        self.assertEqual(list(prefixes), [0, prefix, 0])
+        self.assertEqual(outputs[0], 0)  # A prefix is neither identified nor unknown
+        # The latch is kept from one batch to the next
+        model.step([prefix])
+        self.assertEqual(model.step([suffix])[1][0], prefix)
+        model.step([prefix])
+        model.reset()
+        self.assertEqual(model.step([suffix])[1][0], 0)
+
+    def test_condreg(self):
+        self.assertEqual(hlmodel.check("CondReg", 5000, seed=4), [])
+        model = hlmodel.CondReg()
+        crxor = 0x4c001182  # crxor 0, 0, 2
+        self.assertEqual(list(model.step([crxor, crxor])), [0, 0])
+        model.reset(0xa0000000)
+        self.assertEqual(list(model.step([crxor, crxor])), condreg.run(0xa0000000, [crxor] * 2))
+        # Not a CR instruction: the CR does not change
+        self.assertEqual(list(model.step([isa.encode("b", LI=4, AA=0, LK=0)])), [0xa0000000])
+
+    def test_stimulus_backend(self):
+        python = [stimulus.generate(unit, 2000, seed=5) for unit in ("Identify", "CondReg")]
+        os.environ["HLMODEL"] = "1"
+        try:
+            self.assertIs(stimulus.golden_model("CondReg"),
+                          stimulus.HLMODEL_EXPECTED["CondReg"])
+            self.assertIs(stimulus.golden_model("BranchUnit"), stimulus.EXPECTED["BranchUnit"])
+            self.assertEqual([stimulus.generate(unit, 2000, seed=5)
+                              for unit in ("Identify", "CondReg")], python)
+            inputs = [(r.instr,) for r in python[1]]
+            self.assertEqual(stimulus.complete("CondReg", inputs), python[1])
+            self.assertEqual(hlmodel.check("CondReg", 100, seed=1), [])
+        finally:
+            del os.environ["HLMODEL"]
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_numpy(self):
+        instrs = numpy.array([r.instr for r in stimulus.generate("CondReg", 1000, seed=2)],
+                             dtype=numpy.uint32)
+        crs = hlmodel.CondReg().step(instrs[::2])  # Not contiguous
+        self.assertIsInstance(crs, numpy.ndarray)
+        self.assertEqual(crs.tolist(), condreg.run(0, instrs[::2].tolist()))
@@ -0,0 +1,63 @@
+import random
+import unittest
+import doctest
+from powerverif import isa
+from powerverif.isa import *
+
+
+class TestISA(unittest.TestCase):
+    """
+    Unit test for the table driven encoder/decoder
+    """
+
+    def test_round_trip(self):
+        # decode(encode(fields)) == fields for every form
+        for name, form in FORM.items():
+            for i in range(200):
+                fields = {f: random.getrandbits(form.fields[f].width) for f in form.names}
+                word = form.encode(**fields)
+                self.assertLess(word, 2**32)
+                self.assertEqual(form.decode_dict(word), fields, name)
+
+    def test_overflow(self):
+        with self.assertRaises(TypeError):
+            branch_b_form(PO=16, BO=32, BI=0, BD=0, AA=0, LK=0)
+        with self.assertRaises(TypeError):
+            d_form(PO=34, RT=0, RA=0, D1=2**16)
+
+    def test_identify(self):
+        for op in OPCODES:
+            word = encode(op.mnemonic)
+            self.assertEqual(identify(word), op)
+            self.assertEqual(decode(word)[0], op)
+        self.assertIsNone(identify(branch_xl_form(PO=19, BO=0, BI=0, BH=0, XO=17, LK=0)))
+        self.assertIsNone(identify(0))
+
+    def test_identify_prefixed(self):
+        prefix = d_form_prefix(R=1, D0=0x16)
+        suffix = d_form(PO=34, RT=3, RA=0, D1=0xbe)
+        self.assertTrue(is_prefix(prefix))
+        self.assertFalse(is_prefix(suffix))
+        self.assertEqual(identify_prefixed(prefix, suffix), PLBZ)
+        self.assertIsNone(identify_prefixed(prefix | (1 << 23), suffix))  # ST=1
+        self.assertIsNone(identify_prefixed(suffix, suffix))
+
+    def test_arrays(self):
+        try:
+            import numpy
+        except ImportError:
+            self.skipTest("numpy is not installed")
+        words = numpy.array([encode(op.mnemonic, LK=0) if "LK" in FORM[op.form].names
+                             else encode(op.mnemonic) for op in OPCODES] + [0],
+                            dtype=numpy.uint32)
+        self.assertEqual(list(identify_array(words)), list(range(len(OPCODES))) + [-1])
+        BO = numpy.arange(32, dtype=numpy.uint32)
+        words = FORM["B"].encode_array(PO=16, BO=BO, BI=3, BD=0x1234, AA=1, LK=1)
+        for bo, word in zip(BO, words):
+            self.assertEqual(int(word), branch_b_form(16, int(bo), 3, 0x1234, 1, 1))
+        self.assertTrue((FORM["B"].decode(words)[1] == BO).all())
+
+
+def load_tests(loader, tests, ignore):
+    tests.addTests(doctest.DocTestSuite(isa))
+    return tests
@@ -0,0 +1,89 @@
+import random
+import unittest
+import doctest
+from powerverif import iss, isa, condreg
+from powerverif.iss import *
+try:
+    import numpy
+    from powerverif import branch_batch
+except ImportError:
+    numpy = None
+
+
+class TestISS(unittest.TestCase):
+    """
+    Unit test for the Instruction Set Simulator
+    """
+
+    def test_condreg(self):
+        instrs = [isa.condreg_xl_form(19, random.getrandbits(5), random.getrandbits(5),
+                                      random.getrandbits(5), random.choice(condreg.VALID_XO))
+                  for i in range(200)]
+        sim = ISS(memory_size=4 * len(instrs))
+        sim.cr = 0x1234abcd
+        sim.load_program(0, instrs)
+        deltas = sim.run(len(instrs))
+        self.assertEqual([d.changes[0][1] for d in deltas], condreg.run(0x1234abcd, instrs))
+        self.assertEqual([d.nia for d in deltas], list(range(4, 4 * len(instrs) + 4, 4)))
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_branches(self):
+        # Every branch is executed from a random state and compared to the batch model
+        instrs = branch_batch.random_branches(2000, rng=4)
+        sim = ISS(memory_size=16)
+        for instr in instrs.tolist():
+            state = dict(CIA=random.getrandbits(3) * 4 & 0xc, CR=random.getrandbits(32),
+                         CTR=random.choice([0, 1, 2, random.getrandbits(64)]),
+                         LR=random.getrandbits(64), TAR=random.getrandbits(64))
+            sim.cia, sim.cr, sim.ctr, sim.lr, sim.tar = (state[r] for r in
+                                                         ("CIA", "CR", "CTR", "LR", "TAR"))
+            sim.load_program(sim.cia, [instr])
+            delta = sim.step()
+            NIA, LR, CTR = branch_batch.step([instr], *([state[r]] for r in
+                                                        ("CIA", "CR", "CTR", "LR", "TAR")))
+            self.assertEqual((delta.nia, sim.lr, sim.ctr), (int(NIA[0]), int(LR[0]), int(CTR[0])),
+                             f"instr 0x{instr:08x}")
+            self.assertEqual(sim.cia, delta.nia)
+
+    def test_loop(self):
+        # CTR=3: bdnz back to the crnot twice then fall through and return to LR
+        sim = ISS(memory_size=32)
+        sim.ctr = 3
+        sim.lr = 0x11
+        sim.load_program(0, [isa.encode("crnor", BT=0, BA=0, BB=0),
+                             isa.encode("bc", BO=0b10000, BI=0, BD=-1 & 0x3fff, AA=0, LK=0),
+                             isa.encode("bclr", BO=0b10100, BI=0, BH=0, LK=1)])
+        deltas = sim.run(100, stop=0x10)
+        self.assertEqual([d.cia for d in deltas], [0, 4, 0, 4, 0, 4, 8])
+        self.assertEqual(sim.cia, 0x10)
+        self.assertEqual((sim.ctr, sim.lr, sim.cr), (0, 12, 0x80000000))
+        self.assertEqual(deltas[-1].changes, (("LR", 12),))
+
+    def test_loads(self):
+        sim = ISS(memory_size=0x200)
+        sim.memory[0x100:0x104] = bytes([0xde, 0xad, 0xbe, 0xef])
+        sim.gpr[5] = 0x102
+        sim.load_program(0, [isa.encode("lbz", RT=3, RA=5, D1=-1 & 0xffff),  # 0x101
+                             isa.encode("lbz", RT=4, RA=0, D1=0x100),
+                             isa.d_form_prefix(R=0, D0=0), isa.encode("lbz", RT=6, RA=5, D1=1),
+                             isa.d_form_prefix(R=1, D0=0), isa.encode("lbz", RT=7, RA=0, D1=0xf3)])
+        deltas = sim.run(4)
+        self.assertEqual([d.access for d in deltas], [(0x101, 1), (0x100, 1), (0x103, 1),
+                                                      (0x103, 1)])
+        self.assertEqual([d.nia for d in deltas], [4, 8, 16, 24])
+        self.assertEqual(deltas[2].instr >> 32, isa.d_form_prefix(R=0, D0=0))
+        self.assertEqual(list(sim.gpr[3:8]), [0xad, 0xde, 0x102, 0xef, 0xef])
+        self.assertEqual(deltas[0].changes, (("GPR3", 0xad),))
+
+    def test_illegal(self):
+        sim = ISS(memory_size=16)
+        with self.assertRaises(IllegalInstruction):
+            sim.step()  # 0x00000000
+        sim.load_program(0, [isa.d_form_prefix(R=1, D0=0), isa.encode("lbz", RT=1, RA=2, D1=0)])
+        with self.assertRaises(IllegalInstruction):
+            sim.step()  # plbz with R=1 and RA!=0
+
+
+def load_tests(loader, tests, ignore):
+    tests.addTests(doctest.DocTestSuite(iss))
+    return tests
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+import doctest
+from powerverif import stimulus, isa, identify
+from powerverif.stimulus import *
+
+
+class TestStimulus(unittest.TestCase):
+    """
+    Unit test for the stimulus files
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_replay(self):
+        for unit in LAYOUTS:
+            path = os.path.join(self.directory.name, unit + ".stim")
+            write(path, unit, 500, seed=3)
+            stim = Replay(path, unit)
+            self.assertEqual((len(stim), stim.seed, stim.unit), (500, 3, unit))
+            self.assertEqual(list(stim), generate(unit, 500, seed=3))
+            self.assertEqual(stim[499], generate(unit, 500, seed=3)[499])
+            self.assertEqual(os.path.getsize(path),
+                             HEADER_SIZE + 500 * stimulus._STRUCTS[unit].size)
+            stim.close()
+
+    def test_wrong_unit(self):
+        path = os.path.join(self.directory.name, "condreg.stim")
+        write(path, "CondReg", 10, seed=0)
+        with self.assertRaises(ValueError):
+            Replay(path, "BranchUnit")
+
+    def test_expected(self):
+        # BranchUnit: the state of the next record follows the NIA/LR/CTR updates
+        records = generate("BranchUnit", 1000, seed=5)
+        for r, next_r in zip(records, records[1:]):
+            self.assertEqual(next_r.cia, r.nia)
+        self.assertEqual({isa.identify(r.instr).unit for r in records}, {"branch"})
+        # Identify: every output is covered
+        outputs = 0
+        for r in generate("Identify", 1000, seed=5):
+            outputs |= r.outputs
+        self.assertEqual(identify.decode_outputs(outputs), list(identify.OUTPUTS))
+        # LoadStoreUnit: valid and invalid plbz
+        self.assertEqual({r.err_invalid_load_instr for r in generate("LoadStoreUnit", 200, 5)},
+                         {0, 1})
+
+    def test_load(self):
+        path = os.path.join(self.directory.name, "identify.stim")
+        write(path, "Identify", 20, seed=7)
+        os.environ["STIMULUS"] = path
+        try:
+            self.assertIsInstance(load("Identify", 1000), Replay)
+        finally:
+            del os.environ["STIMULUS"]
+        self.assertEqual(len(load("Identify", 1000)), 1000)
+
+    def test_load_seed(self):
+        with self.assertLogs("cocotb.stimulus", "INFO") as logs:
+            records = load("CondReg", 50)
+        seed = int(logs.output[0].rsplit("=", 1)[1].rstrip(")"))
+        self.assertEqual(records, generate("CondReg", 50, seed))
+        os.environ["STIMULUS_SEED"] = str(seed)
+        try:
+            self.assertEqual(load("CondReg", 50), records)
+        finally:
+            del os.environ["STIMULUS_SEED"]
+
+
+def load_tests(loader, tests, ignore):
+    tests.addTests(doctest.DocTestSuite(stimulus))
+    return tests
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+import doctest
+from powerverif import trace
+from powerverif.trace import *
+
+FIELDS = [("cia", 64), ("cr", 32), ("en", 1)]
+
+
+def make_trace(n: int) -> Trace:
+    t = Trace(FIELDS)
+    t.extend((4 * i, i * 0x01010101 & 0xffffffff, i & 1) for i in range(n))
+    return t
+
+
+class TestTrace(unittest.TestCase):
+    """
+    Unit test for the binary traces and the lockstep comparison
+    """
+
+    def test_records(self):
+        t = make_trace(100)
+        self.assertEqual(len(t), 100)
+        self.assertEqual(t.record_size, 13)
+        self.assertEqual(t[3], (12, 0x03030303, 1))
+        self.assertEqual(list(t)[99], t[99])
+
+    def test_save_load(self):
+        t = make_trace(100)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "test.trace")
+            t.save(path)
+            self.assertEqual(Trace.load(FIELDS, path).data, t.data)
+
+    def test_compare(self):
+        expected, actual = make_trace(20000), make_trace(20000)
+        self.assertIsNone(compare(actual, expected))
+        actual.data[13 * 12345 + 10] ^= 0x10  # cr of cycle 12345
+        mismatch = compare(actual, expected, context=2)
+        self.assertEqual(mismatch.cycle, 12345)
+        self.assertEqual([name for name, a, e in mismatch.fields()], ["cr"])
+        self.assertEqual([c for c, a, e in mismatch.context], [12343, 12344, 12345, 12346, 12347])
+        self.assertIn("First mismatch at cycle 12345", str(mismatch))
+
+    def test_length(self):
+        mismatch = compare(make_trace(10), make_trace(12))
+        self.assertEqual(mismatch.cycle, 10)
+        self.assertIn("differ in length", str(mismatch))
+
+    def test_lockstep(self):
+        expected, actual = make_trace(5000), Trace(FIELDS)
+        checker = LockstepChecker(actual, expected)
+        for i, record in enumerate(expected):
+            actual.append(*(record if i != 4321 else (0,) + record[1:]))
+            if i % 1000 == 999:
+                checker.check()
+        self.assertEqual(checker.close().cycle, 4321)
+        checker = LockstepChecker(make_trace(10), make_trace(10))
+        checker.check()
+        self.assertIsNone(checker.close())
+
+
+def load_tests(loader, tests, ignore):
+    tests.addTests(doctest.DocTestSuite(trace))
+    return tests
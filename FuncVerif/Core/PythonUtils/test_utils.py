@@ -0,0 +1,58 @@
+import unittest
+import doctest
+from powerverif import utils
+from powerverif.utils import *
+
+
+class TestPythonUtils(unittest.TestCase):
+    """
+    Unit test for the python verif environment itself (no dut testing)
+    """
+
+    def test_branch_i_form(self):
+        # Checking branch_i_form_to_string gives the expect result
+        self.assertEqual(branch_i_form_to_string(PO=18, LI=0xcafe, AA=1, LK=1),
+                         "01001000000000110010101111111011")
+
+    def test_branch_b_form(self):
+        self.assertEqual(branch_b_form_to_string(PO=16, BO=18, BI=27, BD=0xafe, AA=1, LK=0),
+                         "01000010010110110010101111111010")
+
+    def test_branch_xl_form(self):
+        #   BO     BO    BI   //  BH      XO      LK
+        # 010011 00111 00100 010  10  0000010110  1
+        self.assertEqual(branch_xl_form_to_string(PO=19, BO=7, BI=4, BH=0b10, XO=0x16, LK=1),
+                         "01001100111001000001000000101101")
+    def test_condreg_xl_form(self):
+        self.assertEqual(condreg_xl_form_to_string(PO=19, BT=7, BA=3, BB=6, XO=257),
+                "01001100111000110011001000000010")
+        self.assertEqual(len(condreg_xl_form_to_string(PO=19, BT=7, BA=3, BB=6, XO=257)), 32)
+    def test_exts(self):
+        self.assertEqual(exts(0b11, 3, 6), 0b000011)
+        self.assertEqual(exts(0b100, 3, 6), 0b111100)
+
+    def test_random(self):
+        rd = random_bit()
+        self.assertTrue(rd == 0 or rd == 1)
+        rd = random_32b()
+        self.assertTrue(rd >= 0 and rd <= 2**32-1)
+        rd = random_64b()
+        self.assertTrue(rd >= 0 and rd <= 2**64-1)
+
+    def test_be(self):
+        self.assertEqual(BE(0b10000111, 8), 0b11100001)
+
+    def test_random_bin(self):
+        self.assertEqual(random_bin("0110"), 0b110)
+        for i in range(5):
+            val = random_bin("01?0")
+            self.assertTrue(val == 0b110 or val == 0b100)
+
+
+def load_tests(loader, tests, ignore):
+    tests.addTests(doctest.DocTestSuite(utils))
+    return tests
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import json
+import random
+import tempfile
+import unittest
+import doctest
+import contextlib
+import io
+from powerverif import isa, stimulus, witness
+from powerverif.witness import *
+
+CONDREG_PORTS = [("i_rst", 1), ("i_en", 1), ("i_instr", 32)] + \
+    [(f"i_{m}", 1) for m in ("crand", "crnand", "cror", "crxor", "crnor", "creqv", "crandc",
+                             "crorc", "mcrf")]
+
+
+def yw(ports, steps, arbitrary=0):
+    """ Yosys witness trace of (steps) (port -> value), the first port in the LSBs """
+    signals = [{"path": ["\\" + name], "width": width, "offset": 0, "init_only": False}
+               for name, width in ports]
+    if arbitrary:
+        signals.append({"path": ["\\_witness_", "\\anyinit_cr_q"], "width": arbitrary,
+                        "offset": 0, "init_only": True})
+    width = sum(s["width"] for s in signals)
+    bits = []
+    for values in steps:
+        value, position = 0, 0
+        for name, w in ports:
+            value |= values.get(name, 0) << position
+            position += w
+        bits.append({"bits": f"{value:0{width}b}"})
+    return {"format": "Yosys Witness Trace", "signals": signals, "steps": bits}
+
+
+def vcd(module, ports, steps):
+    """ VCD trace of (steps) like yosys-smtbmc writes them """
+    ids = {name: f"n{i}" for i, (name, _) in enumerate(ports)}
+    lines = ["$var integer 32 t smt_step $end", f"$scope module {module} $end"]
+    lines += [f"$var wire {w} {ids[name]} {name} $end" for name, w in ports]
+    lines += ["$upscope $end", "$enddefinitions $end"]
+    for step, values in enumerate(steps):
+        lines += [f"#{10 * step}", f"b{step:b} t"]
+        lines += [f"b{values.get(name, 0):b} {ids[name]}" for name, _ in ports]
+        lines.append(f"#{10 * step + 5}")
+    return "\n".join(lines) + "\n"
+
+
+def condreg_step(mnemonic, en=1, **fields):
+    instr = isa.encode(mnemonic, **fields)
+    values = {"i_en": en, "i_instr": instr}
+    values.update(decoded_inputs("CondReg", instr))
+    return values
+
+
+class TestWitness(unittest.TestCase):
+    """
+    Unit test for the conversion of formal counterexamples to stimulus files
+    """
+
+    def test_condreg(self):
+        steps = [condreg_step("crnor", BT=3, BA=1, BB=2),
+                 condreg_step("crand", en=0, BT=4, BA=1, BB=2),  # Not replayed
+                 condreg_step("mcrf", BF=1, BFA=0),
+                 {"i_en": 1, "i_instr": isa.encode("bcctr", BO=0, BI=0, BH=0, LK=0)}]
+        steps[3].update(decoded_inputs("CondReg", steps[3]["i_instr"]))  # Not a CR instruction
+        steps[2]["i_crorc"] = 1  # The formal assumptions allow any decoded input
+        conversion = convert("CondReg", *parse_yw(yw(CONDREG_PORTS, steps, arbitrary=32)))
+        self.assertEqual(conversion.cycles, [0, 2])
+        self.assertEqual(conversion.records, stimulus.complete(
+            "CondReg", [(steps[0]["i_instr"],), (steps[2]["i_instr"],)]))
+        self.assertEqual(conversion.records[1].cr, 0x11000000)
+        self.assertEqual(len(conversion.warnings), 4, conversion.warnings)
+        self.assertIn("i_crorc=1", conversion.warnings[1])
+
+    def test_vcd(self):
+        ports = [("i_clk", 1), ("i_en", 1), ("i_stall", 1), ("i_instr", 32),
+                 ("i_condition_register", 32), ("i_target_address_register", 64)]
+        steps = []
+        for i, mnemonic in enumerate(["bc", "bclr", "bctar", "b"]):
+            instr = stimulus.random_instr(random.Random(i), mnemonic)
+            steps.append({"i_clk": 1, "i_en": 1, "i_stall": i == 1, "i_instr": instr,
+                          "i_condition_register": 0xdeadbeef,
+                          "i_target_address_register": 0x1234 << i})
+        from_vcd = parse_vcd(vcd("BranchUnit", ports, steps))
+        self.assertEqual(from_vcd, parse_yw(yw(ports, steps))[0])
+        conversion = convert("BranchUnit", from_vcd)
+        self.assertEqual(conversion.cycles, [0, 2, 3])
+        self.assertEqual([r.instr for r in conversion.records],
+                         [steps[i]["i_instr"] for i in (0, 2, 3)])
+        # The state (CIA, LR, CTR) follows the replayed branches
+        for r, next_r in zip(conversion.records, conversion.records[1:]):
+            self.assertEqual(next_r.cia, r.nia)
+
+    def test_missing_port(self):
+        with self.assertRaises(ValueError):
+            convert("LoadStoreUnit", [{"i_en": 1, "i_instr_prefix": 0}])
+
+    def test_main(self):
+        steps = [condreg_step("creqv", BT=0, BA=0, BB=0), condreg_step("crorc", BT=9, BA=0, BB=1)]
+        with tempfile.TemporaryDirectory() as tmp:
+            # Working directory of sby: config.sby, engine_0/trace.yw
+            os.makedirs(os.path.join(tmp, "CondReg", "engine_0"))
+            with open(os.path.join(tmp, "CondReg", "config.sby"), "w") as f:
+                f.write("[script]\nread -formal CondReg.sv\nprep -top CondReg\n")
+            with open(os.path.join(tmp, "CondReg", "engine_0", "trace.yw"), "w") as f:
+                json.dump(yw(CONDREG_PORTS, steps), f)
+            output = os.path.join(tmp, "cex.stim")
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(witness.main([tmp, "-o", output]), 0)
+            replay = stimulus.Replay(output, "CondReg")
+            self.assertEqual(list(replay), convert("CondReg", steps).records)
+            replay.close()
+
+
+def load_tests(loader, tests, ignore):
+    tests.addTests(doctest.DocTestSuite(witness))
+    return tests
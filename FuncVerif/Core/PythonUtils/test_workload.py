@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+import doctest
+from powerverif import isa, workload
+from powerverif.workload import *
+
+
+class TestWorkload(unittest.TestCase):
+    """
+    Unit test for the instruction traces of the performance models
+    """
+
+    def test_round_trip(self):
+        memory, records = generate(2000, seed=7, blocks=16)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "w.trace")
+            write(path, memory, records, seed=7)
+            self.assertEqual(os.path.getsize(path), HEADER_SIZE + MEMORY_SIZE + 16 * 2000)
+            image, cias, eas, seed = read(path)
+        self.assertEqual((image, seed), (memory, 7))
+        self.assertEqual(list(zip(cias, eas)), records)
+
+    def test_control_flow(self):
+        memory, records = generate(5000, seed=2)
+        cias = [cia for cia, ea in records]
+        self.assertEqual(cias[0], 0)
+        self.assertTrue(all(cia < DATA for cia in cias))
+        # Every executed word is an instruction of the subset
+        for cia, ea in records:
+            word = int.from_bytes(memory[cia:cia + 4], "big")
+            if isa.is_prefix(word):
+                suffix = int.from_bytes(memory[cia + 4:cia + 8], "big")
+                self.assertIs(isa.identify_prefixed(word, suffix), isa.PLBZ)
+            else:
+                self.assertIsNotNone(isa.identify(word))
+                self.assertEqual(ea != NO_ACCESS, isa.identify(word).mnemonic == "lbz")
+        # Taken and not taken branches, calls and returns
+        taken = sum(next_cia not in (cia + 4, cia + 8) for cia, next_cia in zip(cias, cias[1:]))
+        self.assertGreater(taken, 100)
+        self.assertGreater(cias.count(0), 1)  # The program loops
+
+    def test_not_a_trace(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "w.trace")
+            with open(path, "wb") as f:
+                f.write(b"PVSTIM01".ljust(HEADER_SIZE, b"\0"))
+            with self.assertRaises(ValueError):
+                read(path)
+
+
+def load_tests(loader, tests, ignore):
+    tests.addTests(doctest.DocTestSuite(workload))
+    return tests
@@ -0,0 +1,19 @@
+# Simulator of the cocotb testbenches, included by the FuncVerif Makefiles
+# before cocotb's Makefile.sim
+#   make                                   Icarus Verilog (default)
+#   make SIM=verilator                     Verilator, built from the sv2v output
+#   make SIM=verilator VERILATOR_FROM_SV=1 Verilator, built from the SystemVerilog sources
+#   VERILATOR_THREADS=N                    Threads of the Verilator model (default: 1)
+# Each simulator has its own build directory: sim_build/<simulator>
+
+export SIM ?= icarus
+export SIM_BUILD ?= sim_build/$(SIM)
+
+ifeq ($(SIM),verilator)
+VERILATOR_THREADS ?= 1
+export COMPILE_ARGS += -O3 --threads $(VERILATOR_THREADS) -Wno-fatal
+ifeq ($(VERILATOR_FROM_SV),1)
+export VERILOG_SOURCES = $(SVERILOG_SOURCES)
+export COMPILE_ARGS += -DSYNTHESIS
+endif
+endif
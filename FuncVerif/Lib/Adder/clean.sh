@@ -0,0 +1,2 @@
+echo "Cleaning System Verilog Sim"
+rm -rf sv_bin sv.log
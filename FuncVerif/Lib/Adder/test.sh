@@ -0,0 +1,21 @@
+echo ">>> Running SystemVerilog based verification"
+iverilog -g2012 -Wall test_Adder.sv -o sv_bin && ./sv_bin | tee sv.log
+if [[ $? != 0 ]]
+then
+    echo ">>> Error: Verification failed (returned an error)"
+    exit 1
+fi
+fails=`grep "ERROR" sv.log | wc -l`
+if ! [ $fails -eq 0 ]
+then
+    echo ">>> Error: Verification failed (sv.log contains \"ERROR\")"
+    exit 1
+fi
+if ! grep -q "Simulation done" sv.log
+then
+    echo ">>> Error: Verification failed (the simulation did not finish)"
+    exit 1
+fi
+
+echo ">>> Verification PASSED"
+exit 0
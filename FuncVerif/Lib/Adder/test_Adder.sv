@@ -0,0 +1,64 @@
+// SystemVerilog verification code of the adder library
+// Every architecture is compared to the "+" operator, on 64 and 13 bits
+
+`include "../../../Logic/Lib/Adder.sv"
+`timescale 100ps / 100ps
+
+module check_Adder #(
+    parameter integer WIDTH = 64,
+    parameter ARCH = "BEHAVIORAL"
+) (
+    input logic [0:WIDTH-1] i_a,
+    input logic [0:WIDTH-1] i_b,
+    input logic i_carry
+);
+  logic [0:WIDTH-1] sum;
+  logic carry;
+
+  Adder #(
+      .WIDTH(WIDTH),
+      .ARCH (ARCH),
+      .BLOCK(5)
+  ) UUT (
+      .i_a(i_a),
+      .i_b(i_b),
+      .i_carry(i_carry),
+      .o_sum(sum),
+      .o_carry(carry)
+  );
+
+  always @(i_a, i_b, i_carry) begin
+    #1;
+    if ({carry, sum} != {1'b0, i_a} + {1'b0, i_b} + {{WIDTH{1'b0}}, i_carry})
+      $display("ERROR: %s (%0d bits) %h + %h + %b = %b %h", ARCH, WIDTH, i_a, i_b, i_carry,
+               carry, sum);
+  end
+endmodule
+
+module test_Adder;
+  logic [0:63] a = 64'b0;
+  logic [0:63] b = 64'b0;
+  logic carry = 1'b0;
+
+  check_Adder #(.ARCH("BEHAVIORAL")) behavioral (a, b, carry);
+  check_Adder #(.ARCH("RIPPLE")) ripple (a, b, carry);
+  check_Adder #(.ARCH("KOGGE_STONE")) kogge_stone (a, b, carry);
+  check_Adder #(.ARCH("BRENT_KUNG")) brent_kung (a, b, carry);
+  check_Adder #(.ARCH("CARRY_SELECT")) carry_select (a, b, carry);
+  // A width which is neither a power of 2 nor a multiple of the blocks
+  check_Adder #(.WIDTH(13), .ARCH("RIPPLE")) ripple_13 (a[51:63], b[51:63], carry);
+  check_Adder #(.WIDTH(13), .ARCH("KOGGE_STONE")) kogge_stone_13 (a[51:63], b[51:63], carry);
+  check_Adder #(.WIDTH(13), .ARCH("BRENT_KUNG")) brent_kung_13 (a[51:63], b[51:63], carry);
+  check_Adder #(.WIDTH(13), .ARCH("CARRY_SELECT")) carry_select_13 (a[51:63], b[51:63], carry);
+
+  initial begin
+    for (int n = 0; n < 10000; n++) begin
+      a = {$urandom, $urandom};
+      b = (n % 4 == 0) ? ~a : {$urandom, $urandom};  // ~a: the carry goes through every bit
+      carry = $urandom;
+      #10;
+    end
+    $display("Simulation done");
+    $finish;
+  end
+endmodule
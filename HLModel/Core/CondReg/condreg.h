@@ -0,0 +1,49 @@
+// Documentation about this module can be found in Documentation/Core/CondReg.md
+// Model of the Condition Register unit (Logic/Core/CondReg.sv), used by the C
+// API of the shared library (HLModel/Core/hlmodel.cpp)
+#ifndef HLMODEL_CONDREG_H
+#define HLMODEL_CONDREG_H
+
+#include <cstdint>
+
+// CR is 32 bits numbered from 0 (MSB) to 31, fields are 4 bits (CR0 to CR7)
+inline uint32_t cr_bit(uint32_t cr, uint32_t bit) { return (cr >> (31 - bit)) & 1; }
+
+struct CondRegModel {
+    uint32_t cr = 0;
+
+    void reset(uint32_t value = 0) { cr = value; }
+
+    // Executes a CR logical or mcrf (XL-form, Section 2.5.1), returns the CR
+    // after it. The CR does not change for the other extended opcodes (no
+    // decoded input set, like the RTL)
+    uint32_t step(uint32_t instr)
+    {
+        uint32_t bt = (instr >> 21) & 0x1f, ba = (instr >> 16) & 0x1f, bb = (instr >> 11) & 0x1f;
+        // Truth table: bit (CR[BA] << 1 | CR[BB]) is the value of CR[BT]
+        uint32_t table;
+        switch ((instr >> 1) & 0x3ff) {
+        case 257: table = 0b1000; break; // crand
+        case 225: table = 0b0111; break; // crnand
+        case 449: table = 0b1110; break; // cror
+        case 193: table = 0b0110; break; // crxor
+        case 33: table = 0b0001; break; // crnor
+        case 289: table = 0b1001; break; // creqv
+        case 129: table = 0b0100; break; // crandc
+        case 417: table = 0b1101; break; // crorc
+        case 0: { // mcrf BF, BFA
+            uint32_t bf = (instr >> 23) & 0b111, bfa = (instr >> 18) & 0b111;
+            uint32_t field = ((cr >> (28 - 4 * bfa)) & 0xf) << (28 - 4 * bf);
+            cr = (cr & ~(0xfu << (28 - 4 * bf))) | field;
+            return cr;
+        }
+        default:
+            return cr;
+        }
+        uint32_t mask = 1u << (31 - bt);
+        cr = ((table >> (cr_bit(cr, ba) << 1 | cr_bit(cr, bb))) & 1) ? cr | mask : cr & ~mask;
+        return cr;
+    }
+};
+
+#endif // HLMODEL_CONDREG_H
@@ -0,0 +1,87 @@
+// Documentation about this module can be found in Documentation/Core/Identify.md
+// Model of the Identify unit (Logic/Core/Identify.sv) without SystemC: used
+// by the Identify SC_MODULE (sc_main.cpp) and by the C API of the shared
+// library (HLModel/Core/hlmodel.cpp)
+#ifndef HLMODEL_IDENTIFY_H
+#define HLMODEL_IDENTIFY_H
+
+#include <cstdint>
+
+// Outputs packed in an integer: bit i is the i-th output, in the order of
+// powerverif.identify.OUTPUTS
+enum IdentifyOutput : uint32_t {
+    BRANCH_IDENTIFIED = 1u << 0,
+    CONDREG_IDENTIFIED = 1u << 1,
+    UNKNOWN_INSTR = 1u << 2,
+    BRANCH_I_FORM = 1u << 3,
+    BRANCH_B_FORM = 1u << 4,
+    BRANCH_COND_LR = 1u << 5,
+    BRANCH_COND_CTR = 1u << 6,
+    BRANCH_COND_TAR = 1u << 7,
+    CONDREG_CRAND = 1u << 8,
+    CONDREG_CRNAND = 1u << 9,
+    CONDREG_CROR = 1u << 10,
+    CONDREG_CRXOR = 1u << 11,
+    CONDREG_CRNOR = 1u << 12,
+    CONDREG_CREQV = 1u << 13,
+    CONDREG_CRANDC = 1u << 14,
+    CONDREG_CRORC = 1u << 15,
+    CONDREG_MCRF = 1u << 16,
+};
+
+// Primary opcode: bits [0:5] (Big Endian), Power ISA v3.1 Section 1.6.3
+inline uint32_t primary_opcode(uint32_t instr) { return instr >> 26; }
+// Extended opcode of the XL-form: bits [21:30]
+inline uint32_t xl_extended_opcode(uint32_t instr) { return (instr >> 1) & 0x3ff; }
+inline bool is_prefix(uint32_t instr) { return primary_opcode(instr) == 1; }
+
+// Packed outputs of the unit for (instr), a prefix is neither identified nor unknown
+inline uint32_t identify(uint32_t instr)
+{
+    uint32_t outputs = 0;
+    switch (primary_opcode(instr)) {
+    case 1: // Prefix
+        return 0;
+    case 18:
+        outputs = BRANCH_IDENTIFIED | BRANCH_I_FORM;
+        break;
+    case 16:
+        outputs = BRANCH_IDENTIFIED | BRANCH_B_FORM;
+        break;
+    case 19: // XL-form, Section 2.4 (branches) and 2.5.1 (Condition Register)
+        switch (xl_extended_opcode(instr)) {
+        case 16: outputs = BRANCH_IDENTIFIED | BRANCH_COND_LR; break;
+        case 528: outputs = BRANCH_IDENTIFIED | BRANCH_COND_CTR; break;
+        case 560: outputs = BRANCH_IDENTIFIED | BRANCH_COND_TAR; break;
+        case 257: outputs = CONDREG_IDENTIFIED | CONDREG_CRAND; break;
+        case 225: outputs = CONDREG_IDENTIFIED | CONDREG_CRNAND; break;
+        case 449: outputs = CONDREG_IDENTIFIED | CONDREG_CROR; break;
+        case 193: outputs = CONDREG_IDENTIFIED | CONDREG_CRXOR; break;
+        case 33: outputs = CONDREG_IDENTIFIED | CONDREG_CRNOR; break;
+        case 289: outputs = CONDREG_IDENTIFIED | CONDREG_CREQV; break;
+        case 129: outputs = CONDREG_IDENTIFIED | CONDREG_CRANDC; break;
+        case 417: outputs = CONDREG_IDENTIFIED | CONDREG_CRORC; break;
+        case 0: outputs = CONDREG_IDENTIFIED | CONDREG_MCRF; break;
+        }
+        break;
+    }
+    return outputs ? outputs : UNKNOWN_INSTR;
+}
+
+// Identify unit with its prefix latch (o_instr_prefix)
+struct IdentifyModel {
+    uint32_t prefix_q = 0;
+
+    void reset() { prefix_q = 0; }
+
+    // One clock cycle with i_en set: returns the outputs for (instr), (prefix)
+    // is o_instr_prefix during this cycle (the previous instruction if it was a prefix)
+    uint32_t step(uint32_t instr, uint32_t &prefix)
+    {
+        prefix = prefix_q;
+        prefix_q = is_prefix(instr) ? instr : 0;
+        return identify(instr);
+    }
+};
+
+#endif // HLMODEL_IDENTIFY_H
@@ -2,6 +2,7 @@
 
 #include <systemc.h>
 #include <iostream>
+#include "identify.h"
 
 // Monitors the DUT's output
 SC_MODULE(Monitor)
@@ -124,8 +125,36 @@ SC_MODULE(Identify)
 
     void do_identify()
     {
+        uint32_t outputs = identify(i_instr.read().to_uint());
         o_instr_suffix.write(i_instr.read());
-        // TODO
+        o_stall_fetch_arb.write(false);
+        o_branch_identified.write(outputs & BRANCH_IDENTIFIED);
+        o_condreg_identified.write(outputs & CONDREG_IDENTIFIED);
+        o_unknown_instr.write(outputs & UNKNOWN_INSTR);
+        o_branch_i_form.write(outputs & BRANCH_I_FORM);
+        o_branch_b_form.write(outputs & BRANCH_B_FORM);
+        o_branch_cond_lr.write(outputs & BRANCH_COND_LR);
+        o_branch_cond_ctr.write(outputs & BRANCH_COND_CTR);
+        o_branch_cond_tar.write(outputs & BRANCH_COND_TAR);
+        o_condreg_crand.write(outputs & CONDREG_CRAND);
+        o_condreg_crnand.write(outputs & CONDREG_CRNAND);
+        o_condreg_cror.write(outputs & CONDREG_CROR);
+        o_condreg_crxor.write(outputs & CONDREG_CRXOR);
+        o_condreg_crnor.write(outputs & CONDREG_CRNOR);
+        o_condreg_creqv.write(outputs & CONDREG_CREQV);
+        o_condreg_crandc.write(outputs & CONDREG_CRANDC);
+        o_condreg_crorc.write(outputs & CONDREG_CRORC);
+        o_condreg_mcrf.write(outputs & CONDREG_MCRF);
+    }
+
+    // Prefix latch: the prefix is output with its suffix, next cycle
+    void latch_prefix()
+    {
+        uint32_t instr = i_instr.read().to_uint();
+        if (i_rst.read())
+            o_instr_prefix.write(0);
+        else if (i_en.read())
+            o_instr_prefix.write(is_prefix(instr) ? instr : 0);
     }
 
     SC_CTOR(Identify)
@@ -134,6 +163,8 @@ SC_MODULE(Identify)
         // Combinational: sensitive to all inputs
         sensitive << i_clk << i_rst << i_en << i_instr;
         sensitive << i_arb_full_mask;
+        SC_METHOD(latch_prefix);
+        sensitive << i_clk.pos() << i_rst.pos();
     }
 };
 int sc_main(int argc, char* argv[])
@@ -1 +1,16 @@
-exit 0 # TODO run unit tests for the High Level Model
+gitroot="`git rev-parse --show-toplevel`"
+
+make -C $gitroot/HLModel/Core # Shared library of the models (C API)
+if ! [ $? -eq 0 ]
+then
+    exit 1
+fi
+
+# The C++ model against the golden model of powerverif
+PYTHONPATH=$gitroot/FuncVerif/Core/PythonUtils python3 -m powerverif.hlmodel Identify 100000
+if ! [ $? -eq 0 ]
+then
+    exit 1
+fi
+
+exit 0
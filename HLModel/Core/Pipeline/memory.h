@@ -0,0 +1,135 @@
+// Memories of the performance model: a TLM-2.0 target with a fixed access
+// latency granting DMI over its whole range (like the memories of the lt_dmi
+// example of HLModel/Lib/systemc-2.3.3), and the initiator side of DMI
+#ifndef PIPELINE_MEMORY_H
+#define PIPELINE_MEMORY_H
+
+#include <cstring>
+#include <vector>
+#include <systemc>
+#include <tlm>
+#include <tlm_utils/simple_target_socket.h>
+
+struct Memory : sc_core::sc_module {
+    tlm_utils::simple_target_socket<Memory> socket;
+
+    Memory(sc_core::sc_module_name name, const std::vector<unsigned char> &image,
+           const sc_core::sc_time &latency)
+        : sc_core::sc_module(name), socket("socket"), data(image), latency(latency)
+    {
+        socket.register_b_transport(this, &Memory::b_transport);
+        socket.register_get_direct_mem_ptr(this, &Memory::get_direct_mem_ptr);
+        socket.register_transport_dbg(this, &Memory::transport_dbg);
+    }
+
+private:
+    std::vector<unsigned char> data;
+    sc_core::sc_time latency;
+
+    bool in_range(const tlm::tlm_generic_payload &gp) const
+    {
+        return gp.get_address() < data.size() &&
+               gp.get_data_length() <= data.size() - gp.get_address();
+    }
+
+    void copy(tlm::tlm_generic_payload &gp)
+    {
+        unsigned char *p = &data[gp.get_address()];
+        if (gp.is_read())
+            memcpy(gp.get_data_ptr(), p, gp.get_data_length());
+        else if (gp.is_write())
+            memcpy(p, gp.get_data_ptr(), gp.get_data_length());
+    }
+
+    void b_transport(tlm::tlm_generic_payload &gp, sc_core::sc_time &delay)
+    {
+        if (!in_range(gp)) {
+            gp.set_response_status(tlm::TLM_ADDRESS_ERROR_RESPONSE);
+            return;
+        }
+        if (gp.get_byte_enable_ptr() || gp.get_streaming_width() < gp.get_data_length()) {
+            gp.set_response_status(tlm::TLM_BYTE_ENABLE_ERROR_RESPONSE);
+            return;
+        }
+        copy(gp);
+        delay += latency;
+        gp.set_dmi_allowed(true);
+        gp.set_response_status(tlm::TLM_OK_RESPONSE);
+    }
+
+    bool get_direct_mem_ptr(tlm::tlm_generic_payload &gp, tlm::tlm_dmi &dmi)
+    {
+        dmi.allow_read_write();
+        dmi.set_dmi_ptr(data.data());
+        dmi.set_start_address(0);
+        dmi.set_end_address(data.size() - 1);
+        dmi.set_read_latency(latency);
+        dmi.set_write_latency(latency);
+        return true;
+    }
+
+    unsigned int transport_dbg(tlm::tlm_generic_payload &gp)
+    {
+        if (!in_range(gp))
+            return 0;
+        copy(gp);
+        return gp.get_data_length();
+    }
+};
+
+// DMI region of an initiator: reads go through the DMI pointer when the
+// target granted it, through b_transport otherwise (DMI is requested again
+// when a transaction has its DMI hint set)
+struct DmiPort {
+    tlm::tlm_dmi dmi;
+    bool valid = false, requested = false;
+    uint64_t direct = 0, transported = 0; // Number of reads of each kind
+
+    void invalidate(sc_dt::uint64 start, sc_dt::uint64 end)
+    {
+        if (start <= dmi.get_end_address() && end >= dmi.get_start_address())
+            valid = requested = false;
+    }
+
+    // Reads (length) bytes at (address), adds the latency of the access to (delay)
+    template <class Socket>
+    void read(Socket &socket, uint64_t address, unsigned char *buffer, unsigned length,
+              sc_core::sc_time &delay)
+    {
+        if (!requested) {
+            prepare(address, buffer, length);
+            dmi.init();
+            valid = socket->get_direct_mem_ptr(gp, dmi) && dmi.is_read_allowed();
+            requested = true;
+        }
+        if (valid && address >= dmi.get_start_address() &&
+            address + length - 1 <= dmi.get_end_address()) {
+            memcpy(buffer, dmi.get_dmi_ptr() + (address - dmi.get_start_address()), length);
+            delay += dmi.get_read_latency();
+            direct++;
+            return;
+        }
+        prepare(address, buffer, length);
+        socket->b_transport(gp, delay);
+        if (gp.is_response_error())
+            SC_REPORT_ERROR("/implPower/Pipeline", gp.get_response_string().c_str());
+        requested = !gp.is_dmi_allowed();
+        transported++;
+    }
+
+private:
+    tlm::tlm_generic_payload gp; // Allocated once: a payload holds its extension array
+
+    void prepare(uint64_t address, unsigned char *buffer, unsigned length)
+    {
+        gp.set_command(tlm::TLM_READ_COMMAND);
+        gp.set_address(address);
+        gp.set_data_ptr(buffer);
+        gp.set_data_length(length);
+        gp.set_streaming_width(length);
+        gp.set_dmi_allowed(false);
+        gp.set_response_status(tlm::TLM_INCOMPLETE_RESPONSE);
+    }
+};
+
+#endif // PIPELINE_MEMORY_H
@@ -0,0 +1,440 @@
+// Documentation about this model can be found in Documentation/PerformanceModel.md
+// Loosely-timed (TLM-2.0 LT) performance model of the pipeline:
+//   Fetch -> Identify -> Arbiter -> BranchUnit | CondReg | LoadStoreUnit
+//
+// Every executed instruction of a trace (trace.h) is one transaction going
+// down the chain of b_transport calls, the data pointer of the generic payload
+// is the Instr being timed. A stage computes the cycles at which the
+// instruction enters and leaves it from its own state (occupancy of its
+// queues), annotates the delay and calls the next stage. The whole chain runs
+// in the thread of Fetch, decoupled in time (tlm_quantumkeeper): the kernel
+// only runs once per quantum. Back-pressure is the return path, a stage knows
+// when an instruction left the next one once the call returned.
+// Not modelled: the instructions of the wrong path (Fetch restarts at the
+// target once the BranchUnit resolved a taken branch) and out of order issue
+// within a unit (a unit issues in order, the units are independent).
+#ifndef PIPELINE_H
+#define PIPELINE_H
+
+#include <algorithm>
+#include <cstdio>
+#include <cstdint>
+#include <vector>
+#include <systemc>
+#include <tlm>
+#include <tlm_utils/simple_initiator_socket.h>
+#include <tlm_utils/simple_target_socket.h>
+#include <tlm_utils/tlm_quantumkeeper.h>
+#include "memory.h"
+#include "trace.h"
+#include "../Identify/identify.h"
+
+enum UnitId { BRANCH_UNIT, CONDREG_UNIT, LOADSTORE_UNIT, UNIT_COUNT };
+static const char *const UNIT_NAMES[UNIT_COUNT] = {"BranchUnit", "CondReg", "LoadStoreUnit"};
+
+// Latencies are in cycles, a queue depth is a number of instructions
+struct PipelineConfig {
+    sc_core::sc_time period = sc_core::sc_time(1, sc_core::SC_NS);
+    unsigned quantum = 10000; // Cycles of time decoupling (global quantum)
+    unsigned imem_latency = 1, dmem_latency = 2;
+    unsigned fetch_queue = 4; // Fetched instructions waiting for Identify
+    unsigned identify_latency = 1, arbiter_latency = 1;
+    unsigned redirect_penalty = 1; // Cycles from the resolution of a taken branch to the fetch
+    unsigned rs_depth[UNIT_COUNT] = {4, 4, 4}; // Reservation stations of the Arbiter
+    unsigned unit_latency[UNIT_COUNT] = {1, 1, 1}; // The LoadStoreUnit adds dmem_latency
+    unsigned cdb_width = 1; // Results retired per cycle over the Common Data Bus
+};
+
+struct PipelineStats {
+    uint64_t instructions = 0, prefixed = 0, taken = 0, cycles = 0;
+    // Cycles Fetch could not fetch: waiting for a taken branch to resolve, or
+    // the fetch queue was full (back-pressure of Identify and o_stall_fetch_arb)
+    uint64_t stall_branch = 0, stall_fetch_queue = 0;
+    // Cycles an instruction waited in Identify because the RS of its unit was full
+    uint64_t stall_fetch_arb[UNIT_COUNT] = {};
+    // Cycles an instruction waited in its RS for an operand (RAW hazard)
+    uint64_t operand_wait[UNIT_COUNT] = {};
+    uint64_t executed[UNIT_COUNT] = {};
+    // Cycles results waited to retire (older instruction not retired or CDB full)
+    uint64_t retire_wait = 0;
+};
+
+// Architectural resources renamed by the Arbiter: CR bits, LR, CTR, TAR, GPRs
+enum Resource { RES_CR = 0, RES_LR = 32, RES_CTR, RES_TAR, RES_GPR, RES_COUNT = RES_GPR + 32 };
+
+struct Instr {
+    uint64_t cia, ea; // From the trace, ea is Trace::NO_ACCESS if not a load
+    uint32_t prefix, word; // Fetched, prefix is 0 if the instruction is not prefixed
+    bool taken; // The next CIA is not the next address
+    uint32_t outputs; // Of the Identify unit (IdentifyOutput)
+    UnitId unit;
+    uint8_t srcs[4], dsts[4], nsrcs, ndsts; // Resources read and written
+    // Cycle at which the instruction enters each step
+    uint64_t fetch, identify, dispatch, ready, issue, complete, retire;
+};
+
+inline Instr &instr_of(tlm::tlm_generic_payload &gp)
+{
+    return *reinterpret_cast<Instr *>(gp.get_data_ptr());
+}
+
+// Conversions between the annotated delays and cycles
+struct Clock {
+    sc_core::sc_time period;
+
+    // Cycle reached at sc_time_stamp() + (delay), rounded up
+    uint64_t cycle(const sc_core::sc_time &delay) const
+    {
+        uint64_t t = (sc_core::sc_time_stamp() + delay).value();
+        return (t + period.value() - 1) / period.value();
+    }
+    uint64_t cycles(const sc_core::sc_time &latency) const
+    {
+        return (latency.value() + period.value() - 1) / period.value();
+    }
+    // Delay from sc_time_stamp() to (cycle)
+    sc_core::sc_time delay(uint64_t cycle) const
+    {
+        return sc_core::sc_time::from_value(cycle * period.value()) - sc_core::sc_time_stamp();
+    }
+};
+
+// Cycles at which the last (depth) entries of a queue left it: an entry can
+// enter once the entry (depth) places before it left
+class Occupancy {
+    std::vector<uint64_t> left;
+    size_t next = 0;
+
+public:
+    explicit Occupancy(unsigned depth) : left(std::max(depth, 1u), 0) {}
+    uint64_t free() const { return left[next]; }
+    void push(uint64_t leaves)
+    {
+        left[next] = leaves;
+        next = next + 1 == left.size() ? 0 : next + 1;
+    }
+};
+
+// Fetches the instructions of the trace from the instruction memory (DMI),
+// one word per cycle, and sends them to Identify
+SC_MODULE(Fetch)
+{
+    tlm_utils::simple_initiator_socket<Fetch> imem;
+    tlm_utils::simple_initiator_socket<Fetch> out;
+    DmiPort port;
+
+    Fetch(sc_core::sc_module_name name, const Trace &trace, const PipelineConfig &config,
+          PipelineStats &stats)
+        : sc_core::sc_module(name), imem("imem"), out("out"), trace(trace), config(config),
+          stats(stats), clock{config.period}
+    {
+        imem.register_invalidate_direct_mem_ptr(this, &Fetch::invalidate_direct_mem_ptr);
+        SC_THREAD(run);
+    }
+    SC_HAS_PROCESS(Fetch);
+
+private:
+    const Trace &trace;
+    const PipelineConfig &config;
+    PipelineStats &stats;
+    Clock clock;
+
+    void invalidate_direct_mem_ptr(sc_dt::uint64 start, sc_dt::uint64 end)
+    {
+        port.invalidate(start, end);
+    }
+
+    uint32_t read(uint64_t address, sc_core::sc_time &delay)
+    {
+        unsigned char word[4];
+        port.read(imem, address, word, 4, delay);
+        return load_be(word, 4);
+    }
+
+    void run()
+    {
+        tlm_utils::tlm_quantumkeeper keeper;
+        tlm_utils::tlm_quantumkeeper::set_global_quantum(config.period * config.quantum);
+        keeper.reset();
+        Instr instr;
+        tlm::tlm_generic_payload gp;
+        gp.set_command(tlm::TLM_WRITE_COMMAND);
+        gp.set_data_ptr(reinterpret_cast<unsigned char *>(&instr));
+        gp.set_data_length(sizeof instr);
+        gp.set_streaming_width(sizeof instr);
+        Occupancy queue(config.fetch_queue);
+        uint64_t next = 0, redirect = 0, end = 0; // Sequential fetch, fetch of a branch target
+        for (size_t i = 0; i < trace.count(); i++) {
+            uint64_t start = next;
+            if (redirect > start) {
+                stats.stall_branch += redirect - start;
+                start = redirect;
+            }
+            if (queue.free() > start) {
+                stats.stall_fetch_queue += queue.free() - start;
+                start = queue.free();
+            }
+            keeper.set(clock.delay(start));
+            if (keeper.need_sync())
+                keeper.sync();
+
+            instr.cia = trace.cia(i);
+            instr.ea = trace.ea(i);
+            instr.fetch = start;
+            sc_core::sc_time delay = clock.delay(start);
+            instr.word = read(instr.cia, delay);
+            instr.prefix = 0;
+            if (is_prefix(instr.word)) { // The suffix is fetched the next cycle
+                instr.prefix = instr.word;
+                delay += config.period;
+                instr.word = read(instr.cia + 4, delay);
+                stats.prefixed++;
+            }
+            unsigned words = instr.prefix ? 2 : 1;
+            instr.taken = i + 1 < trace.count() && trace.cia(i + 1) != instr.cia + 4 * words;
+            gp.set_response_status(tlm::TLM_INCOMPLETE_RESPONSE);
+            out->b_transport(gp, delay);
+            if (gp.is_response_error()) { // Not identified
+                char message[80];
+                snprintf(message, sizeof message, "instruction 0x%08x at 0x%llx: %s", instr.word,
+                         (unsigned long long)instr.cia, gp.get_response_string().c_str());
+                SC_REPORT_ERROR(name(), message);
+            }
+
+            queue.push(instr.identify); // The slot is free once Identify took the instruction
+            next = start + words;
+            if (instr.taken) {
+                redirect = instr.complete + config.redirect_penalty;
+                stats.taken++;
+            }
+            end = std::max(end, instr.retire);
+            stats.instructions++;
+        }
+        keeper.set(clock.delay(end));
+        keeper.sync();
+        stats.cycles = trace.count() ? end + 1 : 0;
+    }
+};
+
+// Identify unit (identify.h): one word per cycle, the instruction waits in
+// Identify until the Arbiter accepts it (o_stall_fetch_arb)
+SC_MODULE(IdentifyStage)
+{
+    tlm_utils::simple_target_socket<IdentifyStage> in;
+    tlm_utils::simple_initiator_socket<IdentifyStage> out;
+
+    IdentifyStage(sc_core::sc_module_name name, const PipelineConfig &config)
+        : sc_core::sc_module(name), in("in"), out("out"), config(config), clock{config.period}
+    {
+        in.register_b_transport(this, &IdentifyStage::b_transport);
+    }
+
+private:
+    const PipelineConfig &config;
+    Clock clock;
+    IdentifyModel model;
+    uint64_t next_word = 0; // Cycle at which the next word can enter
+
+    void b_transport(tlm::tlm_generic_payload &gp, sc_core::sc_time &delay)
+    {
+        Instr &instr = instr_of(gp);
+        // The prefix word arrives one cycle before the suffix
+        uint64_t start = std::max(clock.cycle(delay) - (instr.prefix ? 1 : 0), next_word);
+        uint32_t prefix;
+        unsigned words = 1;
+        if (instr.prefix) {
+            model.step(instr.prefix, prefix);
+            words = 2;
+        }
+        instr.outputs = model.step(instr.word, prefix);
+        if (instr.outputs & BRANCH_IDENTIFIED)
+            instr.unit = BRANCH_UNIT;
+        else if (instr.outputs & CONDREG_IDENTIFIED)
+            instr.unit = CONDREG_UNIT;
+        else if (primary_opcode(instr.word) == 34) // lbz and plbz, not identified by the RTL yet
+            instr.unit = LOADSTORE_UNIT;
+        else {
+            gp.set_response_status(tlm::TLM_GENERIC_ERROR_RESPONSE);
+            return;
+        }
+        instr.identify = start;
+        uint64_t identified = start + words - 1 + config.identify_latency;
+        delay = clock.delay(identified);
+        out->b_transport(gp, delay);
+        // Stalled by the Arbiter: the following words wait as long
+        next_word = start + words + (instr.dispatch - identified);
+    }
+};
+
+// Arbiter (Documentation/Core/Arbiter.md): a reservation station per unit,
+// renaming (only RAW hazards delay an instruction) and in order retirement
+// over the Common Data Bus
+SC_MODULE(Arbiter)
+{
+    tlm_utils::simple_target_socket<Arbiter> in;
+    tlm_utils::simple_initiator_socket<Arbiter> branch, condreg, loadstore;
+
+    Arbiter(sc_core::sc_module_name name, const PipelineConfig &config, PipelineStats &stats)
+        : sc_core::sc_module(name), in("in"), branch("branch"), condreg("condreg"),
+          loadstore("loadstore"), config(config), stats(stats), clock{config.period},
+          units{&branch, &condreg, &loadstore}, ready(RES_COUNT, 0)
+    {
+        in.register_b_transport(this, &Arbiter::b_transport);
+        for (unsigned u = 0; u < UNIT_COUNT; u++)
+            rs.emplace_back(config.rs_depth[u]);
+    }
+
+private:
+    const PipelineConfig &config;
+    PipelineStats &stats;
+    Clock clock;
+    tlm_utils::simple_initiator_socket<Arbiter> *units[UNIT_COUNT];
+    std::vector<Occupancy> rs;
+    std::vector<uint64_t> ready; // Cycle at which the last producer of a resource completes
+    uint64_t dispatched = 0, retired = 0;
+    unsigned retired_in_cycle = 0;
+
+    static void add(uint8_t *resources, uint8_t &count, unsigned resource)
+    {
+        resources[count++] = resource;
+    }
+
+    // Resources read and written by (instr), Power ISA v3.1 Sections 2.4, 2.5.1 and 3.3.2
+    static void operands(Instr &instr)
+    {
+        uint32_t w = instr.word, bo = (w >> 21) & 0x1f, bi = (w >> 16) & 0x1f;
+        instr.nsrcs = instr.ndsts = 0;
+        if (instr.unit == LOADSTORE_UNIT) {
+            uint32_t ra = (w >> 16) & 0x1f;
+            if (ra && !(instr.prefix >> 20 & 1)) // R=1: CIA relative
+                add(instr.srcs, instr.nsrcs, RES_GPR + ra);
+            add(instr.dsts, instr.ndsts, RES_GPR + ((w >> 21) & 0x1f));
+        } else if (instr.unit == CONDREG_UNIT) {
+            if (xl_extended_opcode(w) == 0) { // mcrf BF, BFA
+                for (unsigned b = 0; b < 4; b++) {
+                    add(instr.srcs, instr.nsrcs, RES_CR + 4 * ((w >> 18) & 7) + b);
+                    add(instr.dsts, instr.ndsts, RES_CR + 4 * ((w >> 23) & 7) + b);
+                }
+            } else {
+                add(instr.srcs, instr.nsrcs, RES_CR + bi);
+                add(instr.srcs, instr.nsrcs, RES_CR + ((w >> 11) & 0x1f));
+                add(instr.dsts, instr.ndsts, RES_CR + bo);
+            }
+        } else {
+            if (primary_opcode(w) != 18) { // Conditional branches
+                if (!(bo & 0b10000))
+                    add(instr.srcs, instr.nsrcs, RES_CR + bi);
+                if (instr.outputs & BRANCH_COND_LR)
+                    add(instr.srcs, instr.nsrcs, RES_LR);
+                if (instr.outputs & BRANCH_COND_TAR)
+                    add(instr.srcs, instr.nsrcs, RES_TAR);
+                if (instr.outputs & BRANCH_COND_CTR)
+                    add(instr.srcs, instr.nsrcs, RES_CTR);
+                else if (!(bo & 0b00100)) { // Decrements the CTR
+                    add(instr.srcs, instr.nsrcs, RES_CTR);
+                    add(instr.dsts, instr.ndsts, RES_CTR);
+                }
+            }
+            if (w & 1) // LK
+                add(instr.dsts, instr.ndsts, RES_LR);
+        }
+    }
+
+    void b_transport(tlm::tlm_generic_payload &gp, sc_core::sc_time &delay)
+    {
+        Instr &instr = instr_of(gp);
+        operands(instr);
+        uint64_t earliest = std::max(clock.cycle(delay), dispatched + 1);
+        Occupancy &queue = rs[instr.unit];
+        instr.dispatch = std::max(earliest, queue.free());
+        stats.stall_fetch_arb[instr.unit] += instr.dispatch - earliest;
+        dispatched = instr.dispatch;
+        instr.ready = 0;
+        for (unsigned i = 0; i < instr.nsrcs; i++)
+            instr.ready = std::max(instr.ready, ready[instr.srcs[i]]);
+
+        delay = clock.delay(instr.dispatch + config.arbiter_latency);
+        (*units[instr.unit])->b_transport(gp, delay);
+        queue.push(instr.issue);
+        for (unsigned i = 0; i < instr.ndsts; i++)
+            ready[instr.dsts[i]] = instr.complete;
+
+        // In order, at most cdb_width results per cycle
+        uint64_t retire = std::max(instr.complete, retired);
+        if (retire == retired && retired_in_cycle == config.cdb_width)
+            retire++;
+        retired_in_cycle = retire == retired ? retired_in_cycle + 1 : 1;
+        stats.retire_wait += retire - instr.complete;
+        instr.retire = retired = retire;
+        delay = clock.delay(retire);
+    }
+};
+
+// Functional unit: pipelined, issues one instruction per cycle in order once
+// its operands are ready
+SC_MODULE(Unit)
+{
+    tlm_utils::simple_target_socket<Unit> in;
+
+    Unit(sc_core::sc_module_name name, UnitId id, const PipelineConfig &config,
+         PipelineStats &stats)
+        : sc_core::sc_module(name), in("in"), id(id), config(config), stats(stats),
+          clock{config.period}
+    {
+        in.register_b_transport(this, &Unit::b_transport);
+    }
+
+protected:
+    UnitId id;
+    const PipelineConfig &config;
+    PipelineStats &stats;
+    Clock clock;
+    uint64_t next_issue = 0;
+
+    // Cycles to execute (instr) (reads the data memory...)
+    virtual uint64_t execute(Instr &instr) { return config.unit_latency[id]; }
+
+    void b_transport(tlm::tlm_generic_payload &gp, sc_core::sc_time &delay)
+    {
+        Instr &instr = instr_of(gp);
+        uint64_t start = std::max(clock.cycle(delay), next_issue);
+        instr.issue = std::max(start, instr.ready);
+        stats.operand_wait[id] += instr.issue - start;
+        next_issue = instr.issue + 1;
+        instr.complete = instr.issue + execute(instr);
+        stats.executed[id]++;
+        delay = clock.delay(instr.complete);
+        gp.set_response_status(tlm::TLM_OK_RESPONSE);
+    }
+};
+
+// Reads the loaded byte from the data memory (DMI)
+struct LoadStoreUnit : Unit {
+    tlm_utils::simple_initiator_socket<LoadStoreUnit> dmem;
+    DmiPort port;
+
+    LoadStoreUnit(sc_core::sc_module_name name, const PipelineConfig &config,
+                  PipelineStats &stats)
+        : Unit(name, LOADSTORE_UNIT, config, stats), dmem("dmem")
+    {
+        dmem.register_invalidate_direct_mem_ptr(this, &LoadStoreUnit::invalidate_direct_mem_ptr);
+    }
+
+private:
+    void invalidate_direct_mem_ptr(sc_dt::uint64 start, sc_dt::uint64 end)
+    {
+        port.invalidate(start, end);
+    }
+
+    uint64_t execute(Instr &instr) override
+    {
+        if (instr.ea == Trace::NO_ACCESS)
+            return config.unit_latency[id];
+        unsigned char byte;
+        sc_core::sc_time latency = sc_core::SC_ZERO_TIME;
+        port.read(dmem, instr.ea, &byte, 1, latency);
+        return config.unit_latency[id] + clock.cycles(latency);
+    }
+};
+
+#endif // PIPELINE_H
@@ -0,0 +1,139 @@
+// Documentation about this model can be found in Documentation/PerformanceModel.md
+// Performance model of the pipeline (pipeline.h) replaying an instruction trace
+// of powerverif.workload, reports the IPC and where the cycles were lost.
+// Usage: ./pipeline [--option=value]... <trace>
+
+#include <chrono>
+#include <cstdio>
+#include <cstdlib>
+#include <cstring>
+#include <string>
+#include <systemc>
+#include "pipeline.h"
+
+struct Option {
+    const char *name;
+    unsigned *value;
+    const char *help;
+};
+
+static void usage(const char *program, const Option *options, size_t count)
+{
+    fprintf(stderr, "Usage: %s [--option=value]... <trace>\nOptions (cycles or instructions):\n",
+            program);
+    for (size_t i = 0; i < count; i++)
+        fprintf(stderr, "    --%-20s %s (%u)\n", options[i].name, options[i].help,
+                *options[i].value);
+}
+
+static double percent(uint64_t part, uint64_t total)
+{
+    return total ? 100.0 * part / total : 0.0;
+}
+
+static void report(const PipelineStats &stats, double seconds)
+{
+    printf("Pipeline: %llu instructions (%llu prefixed, %llu taken branches) in %llu cycles, "
+           "IPC %.3f\n", (unsigned long long)stats.instructions,
+           (unsigned long long)stats.prefixed, (unsigned long long)stats.taken,
+           (unsigned long long)stats.cycles,
+           stats.cycles ? double(stats.instructions) / stats.cycles : 0.0);
+    printf("Simulation: %.3fs, %.2f million instructions per second\n", seconds,
+           seconds > 0 ? stats.instructions / seconds / 1e6 : 0.0);
+    printf("Fetch stalls (cycles):\n");
+    printf("    %-28s %12llu (%5.1f%%)\n", "taken branch",
+           (unsigned long long)stats.stall_branch, percent(stats.stall_branch, stats.cycles));
+    printf("    %-28s %12llu (%5.1f%%)\n", "fetch queue full",
+           (unsigned long long)stats.stall_fetch_queue,
+           percent(stats.stall_fetch_queue, stats.cycles));
+    printf("Per unit (cycles):           executed  o_stall_fetch_arb   operand wait\n");
+    for (unsigned u = 0; u < UNIT_COUNT; u++)
+        printf("    %-20s %12llu %18llu %14llu\n", UNIT_NAMES[u],
+               (unsigned long long)stats.executed[u], (unsigned long long)stats.stall_fetch_arb[u],
+               (unsigned long long)stats.operand_wait[u]);
+    printf("Retirement wait (cycles): %llu\n", (unsigned long long)stats.retire_wait);
+}
+
+int sc_main(int argc, char *argv[])
+{
+    PipelineConfig config;
+    const Option options[] = {
+        {"fetch-queue", &config.fetch_queue, "depth of the fetch queue"},
+        {"imem-latency", &config.imem_latency, "instruction memory latency"},
+        {"dmem-latency", &config.dmem_latency, "data memory latency"},
+        {"identify-latency", &config.identify_latency, "Identify latency"},
+        {"arbiter-latency", &config.arbiter_latency, "Arbiter latency (dispatch to issue)"},
+        {"redirect-penalty", &config.redirect_penalty, "taken branch resolved to fetch"},
+        {"branch-rs", &config.rs_depth[BRANCH_UNIT], "BranchUnit RS depth"},
+        {"condreg-rs", &config.rs_depth[CONDREG_UNIT], "CondReg RS depth"},
+        {"loadstore-rs", &config.rs_depth[LOADSTORE_UNIT], "LoadStoreUnit RS depth"},
+        {"branch-latency", &config.unit_latency[BRANCH_UNIT], "BranchUnit latency"},
+        {"condreg-latency", &config.unit_latency[CONDREG_UNIT], "CondReg latency"},
+        {"loadstore-latency", &config.unit_latency[LOADSTORE_UNIT],
+         "LoadStoreUnit latency (+ dmem-latency)"},
+        {"cdb-width", &config.cdb_width, "results retired per cycle"},
+        {"quantum", &config.quantum, "global quantum of the time decoupling"},
+    };
+    const size_t count = sizeof options / sizeof options[0];
+    const char *path = nullptr;
+    for (int i = 1; i < argc; i++) {
+        const char *arg = argv[i], *equal = strchr(arg, '=');
+        if (strncmp(arg, "--", 2)) {
+            path = arg;
+            continue;
+        }
+        const Option *option = nullptr;
+        for (size_t o = 0; o < count && equal; o++)
+            if (size_t(equal - arg - 2) == strlen(options[o].name) &&
+                !strncmp(arg + 2, options[o].name, equal - arg - 2))
+                option = &options[o];
+        if (!option) {
+            usage(argv[0], options, count);
+            return 1;
+        }
+        *option->value = strtoul(equal + 1, nullptr, 0);
+    }
+    if (!path || !config.cdb_width) {
+        usage(argv[0], options, count);
+        return 1;
+    }
+
+    Trace trace;
+    std::string error;
+    if (!trace.load(path, error)) {
+        fprintf(stderr, "%s\n", error.c_str());
+        return 1;
+    }
+    PipelineStats stats;
+    // Harvard: both memories start with the image of the trace
+    Memory imem("imem", trace.memory, config.period * config.imem_latency);
+    Memory dmem("dmem", trace.memory, config.period * config.dmem_latency);
+    Fetch fetch("fetch", trace, config, stats);
+    IdentifyStage identify("identify", config);
+    Arbiter arbiter("arbiter", config, stats);
+    Unit branch("branch_unit", BRANCH_UNIT, config, stats);
+    Unit condreg("condreg", CONDREG_UNIT, config, stats);
+    LoadStoreUnit loadstore("loadstore_unit", config, stats);
+    fetch.imem(imem.socket);
+    fetch.out(identify.in);
+    identify.out(arbiter.in);
+    arbiter.branch(branch.in);
+    arbiter.condreg(condreg.in);
+    arbiter.loadstore(loadstore.in);
+    loadstore.dmem(dmem.socket);
+
+    auto start = std::chrono::steady_clock::now();
+    sc_core::sc_start();
+    std::chrono::duration<double> seconds = std::chrono::steady_clock::now() - start;
+    if (stats.instructions != trace.count()) {
+        fprintf(stderr, "%llu instructions of %zu simulated\n",
+                (unsigned long long)stats.instructions, trace.count());
+        return 1;
+    }
+    report(stats, seconds.count());
+    printf("DMI: %llu instruction reads, %llu data reads (%llu and %llu with b_transport)\n",
+           (unsigned long long)fetch.port.direct, (unsigned long long)loadstore.port.direct,
+           (unsigned long long)fetch.port.transported,
+           (unsigned long long)loadstore.port.transported);
+    return 0;
+}
@@ -0,0 +1,32 @@
+gitroot="`git rev-parse --show-toplevel`"
+
+# The SystemC of HLModel/Lib is not built by default: no SystemC, no test
+SYSTEMC_HOME=${SYSTEMC_HOME:-$gitroot/HLModel/Lib/systemc-2.3.3}
+if ! [ -f $SYSTEMC_HOME/include/systemc.h ]
+then
+    echo "SKIPPED: no SystemC in $SYSTEMC_HOME (build it or set SYSTEMC_HOME)"
+    exit 77 # Reported as SKIPPED by Tools/regress
+fi
+
+make -C $gitroot/HLModel/Core/Pipeline SYSTEMC_HOME=$SYSTEMC_HOME
+if ! [ $? -eq 0 ]
+then
+    exit 1
+fi
+
+# Trace of 1M instructions of the ISS, replayed by the performance model
+mkdir -p $gitroot/build/pipeline
+trace=$gitroot/build/pipeline/workload_1.trace
+PYTHONPATH=$gitroot/FuncVerif/Core/PythonUtils python3 -m powerverif.workload 1000000 -s 1 -o $trace
+if ! [ $? -eq 0 ]
+then
+    exit 1
+fi
+
+$gitroot/HLModel/Core/Pipeline/pipeline $trace
+if ! [ $? -eq 0 ]
+then
+    exit 1
+fi
+
+exit 0
@@ -0,0 +1,64 @@
+// Instruction trace written by powerverif.workload (FuncVerif/Core/PythonUtils):
+// the memory image of the program and one (cia, effective address) record per
+// executed instruction, see the layout in workload.py
+#ifndef PIPELINE_TRACE_H
+#define PIPELINE_TRACE_H
+
+#include <cstdint>
+#include <cstring>
+#include <fstream>
+#include <iterator>
+#include <string>
+#include <vector>
+
+// Big-endian word of (bytes) bytes at (p)
+inline uint64_t load_be(const unsigned char *p, unsigned bytes)
+{
+    uint64_t value = 0;
+    for (unsigned i = 0; i < bytes; i++)
+        value = value << 8 | p[i];
+    return value;
+}
+
+struct Trace {
+    static const size_t HEADER_SIZE = 64;
+    static const uint64_t NO_ACCESS = ~uint64_t(0); // Not a load
+
+    std::vector<unsigned char> memory; // Big-endian image, address 0 first
+    std::vector<uint64_t> records; // cia, ea of every instruction (host order)
+    uint64_t seed = 0;
+
+    size_t count() const { return records.size() / 2; }
+    uint64_t cia(size_t i) const { return records[2 * i]; }
+    uint64_t ea(size_t i) const { return records[2 * i + 1]; }
+
+    // Returns false and sets (error) if (path) cannot be read
+    bool load(const std::string &path, std::string &error)
+    {
+        std::ifstream file(path, std::ios::binary);
+        if (!file) {
+            error = "cannot open " + path;
+            return false;
+        }
+        std::vector<unsigned char> data((std::istreambuf_iterator<char>(file)),
+                                        std::istreambuf_iterator<char>());
+        if (data.size() < HEADER_SIZE || memcmp(data.data(), "PVTRACE1", 8)) {
+            error = path + " is not a trace file";
+            return false;
+        }
+        uint64_t size = load_be(&data[8], 8), count = load_be(&data[16], 8);
+        seed = load_be(&data[24], 8);
+        if (data.size() < HEADER_SIZE + size + 16 * count) {
+            error = path + " is truncated";
+            return false;
+        }
+        memory.assign(&data[HEADER_SIZE], &data[HEADER_SIZE] + size);
+        records.resize(2 * count);
+        const unsigned char *p = &data[HEADER_SIZE + size];
+        for (size_t i = 0; i < records.size(); i++, p += 8)
+            records[i] = load_be(p, 8);
+        return true;
+    }
+};
+
+#endif // PIPELINE_TRACE_H
@@ -0,0 +1,40 @@
+// C API of the High Level Model, see hlmodel.h
+
+#include "hlmodel.h"
+#include "Identify/identify.h"
+#include "CondReg/condreg.h"
+
+struct hlm_identify {
+    IdentifyModel model;
+};
+
+struct hlm_condreg {
+    CondRegModel model;
+};
+
+int hlm_abi_version(void) { return HLM_ABI_VERSION; }
+
+hlm_identify *hlm_identify_new(void) { return new hlm_identify(); }
+void hlm_identify_free(hlm_identify *model) { delete model; }
+void hlm_identify_reset(hlm_identify *model) { model->model.reset(); }
+
+void hlm_identify_step(hlm_identify *model, const uint32_t *instrs, size_t count,
+                       uint32_t *outputs, uint32_t *prefixes)
+{
+    uint32_t prefix;
+    for (size_t i = 0; i < count; i++) {
+        outputs[i] = model->model.step(instrs[i], prefix);
+        if (prefixes)
+            prefixes[i] = prefix;
+    }
+}
+
+hlm_condreg *hlm_condreg_new(void) { return new hlm_condreg(); }
+void hlm_condreg_free(hlm_condreg *model) { delete model; }
+void hlm_condreg_reset(hlm_condreg *model, uint32_t cr) { model->model.reset(cr); }
+
+void hlm_condreg_step(hlm_condreg *model, const uint32_t *instrs, size_t count, uint32_t *crs)
+{
+    for (size_t i = 0; i < count; i++)
+        crs[i] = model->model.step(instrs[i]);
+}
@@ -0,0 +1,40 @@
+// C API of the High Level Model, built as a shared library (libhlmodel.so,
+// see Makefile) so the models can be called from Python (powerverif.hlmodel)
+// The step functions process a batch of instructions, one per clock cycle
+// (i_en set), to keep the cost of a call low.
+#ifndef HLMODEL_H
+#define HLMODEL_H
+
+#include <stddef.h>
+#include <stdint.h>
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+// Incremented when a signature changes, checked by powerverif.hlmodel
+#define HLM_ABI_VERSION 1
+int hlm_abi_version(void);
+
+// Identify unit: outputs packed like powerverif.identify.OUTPUTS
+typedef struct hlm_identify hlm_identify;
+hlm_identify *hlm_identify_new(void);
+void hlm_identify_free(hlm_identify *model);
+void hlm_identify_reset(hlm_identify *model);
+// outputs[i]: outputs for instrs[i], prefixes[i]: o_instr_prefix (prefixes can be NULL)
+void hlm_identify_step(hlm_identify *model, const uint32_t *instrs, size_t count,
+                       uint32_t *outputs, uint32_t *prefixes);
+
+// Condition Register unit
+typedef struct hlm_condreg hlm_condreg;
+hlm_condreg *hlm_condreg_new(void);
+void hlm_condreg_free(hlm_condreg *model);
+void hlm_condreg_reset(hlm_condreg *model, uint32_t cr);
+// crs[i]: CR after instrs[i]
+void hlm_condreg_step(hlm_condreg *model, const uint32_t *instrs, size_t count, uint32_t *crs);
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif // HLMODEL_H
@@ -2,7 +2,15 @@
 // Documentation/BranchUnit.md
 `timescale 100ps / 100ps
 
-module BranchUnit (
+// Architecture of the adders of the next instruction address (and of the count
+// register decrement), see Logic/Lib/Adder.sv and Tools/critpath
+`ifndef NIA_ADDER
+`define NIA_ADDER "BEHAVIORAL"
+`endif
+
+module BranchUnit #(
+    parameter NIA_ADDER = `NIA_ADDER
+) (
     input logic i_clk,
     input logic i_rst,
     input logic i_32b_mode,
@@ -57,7 +65,18 @@ module BranchUnit (
     if (i_rst == 1'b1) ctr_q <= 64'b0;
     else ctr_q <= ctr_d;
   end
-  assign ctr_d = (decr_ctr == 1'b1) ? ctr_q - 1 : ctr_q;
+  logic [0:63] ctr_decr;  // ctr_q - 1
+  Adder #(
+      .WIDTH(64),
+      .ARCH (NIA_ADDER)
+  ) ctr_decr_adder (
+      .i_a(ctr_q),
+      .i_b({64{1'b1}}),
+      .i_carry(1'b0),
+      .o_sum(ctr_decr),
+      .o_carry()
+  );
+  assign ctr_d = (decr_ctr == 1'b1) ? ctr_decr : ctr_q;
   assign o_count_register = ctr_q;
   logic ctr_d_null;
   assign ctr_d_null = (ctr_d == 64'b0) ? 1 : 0;
@@ -68,6 +87,19 @@ module BranchUnit (
   logic [0:4] bi;
   assign bi = i_instr[11:15];
 
+  // Sequential next instruction address, see the Adder library
+  logic [0:63] nia_seq;  // cia + 4
+  Adder #(
+      .WIDTH(64),
+      .ARCH (NIA_ADDER)
+  ) nia_seq_adder (
+      .i_a(cia),
+      .i_b(64'd4),
+      .i_carry(1'b0),
+      .o_sum(nia_seq),
+      .o_carry()
+  );
+
   logic lk;
   assign lk = i_instr[31];
   // If LK=1 -> then save current address+4 in the Link Register (LR)
@@ -78,13 +110,17 @@ module BranchUnit (
     else lr_q <= lr_d;
   end
   // (1) Invalid instructions should not change any state (register)
-  assign lr_d = (i_en == 1'b1 && lk == 1'b1 && invalid_bcctr_form == 1'b0) ? cia + 4 : lr_q;
+  assign lr_d = (i_en == 1'b1 && lk == 1'b1 && invalid_bcctr_form == 1'b0) ? nia_seq : lr_q;
   assign o_link_register = lr_q;
 
   logic [0:25] li;  // LI field in a Branch I-form instruction, see Section 2.4
   assign li = {i_instr[6:29], 2'b00};  // LI << 2
   logic [0:63] exts_li;  // Sign extended LI
   assign exts_li = {{38{li[0]}}, li};  // LI[0] is the MSB (and the sign)
+  logic [0:15] bd;  // BD field in a Branch B-form instruction, see Section 2.4
+  assign bd = {i_instr[16:29], 2'b00};  // BD << 2
+  logic [0:63] exts_bd;  // Sign extended BD
+  assign exts_bd = {{48{bd[0]}}, bd};  // BD[0] is the MSB (and the sign)
 
   logic [0:63] a_lr_q;  // The LR register aligned
   assign a_lr_q = {lr_q[0:61], 2'b00};  // aligned
@@ -119,14 +155,37 @@ module BranchUnit (
     endcase
   end
 
+  // Candidates for the next instruction address, see the Adder library
+  // TODO Reuse the 64b adder (and check if the synthesis does a good job)
+  logic [0:63] nia_li;  // exts_li + cia
+  logic [0:63] nia_bd;  // exts_bd + cia
+  Adder #(
+      .WIDTH(64),
+      .ARCH (NIA_ADDER)
+  ) nia_li_adder (
+      .i_a(exts_li),
+      .i_b(cia),
+      .i_carry(1'b0),
+      .o_sum(nia_li),
+      .o_carry()
+  );
+  Adder #(
+      .WIDTH(64),
+      .ARCH (NIA_ADDER)
+  ) nia_bd_adder (
+      .i_a(exts_bd),
+      .i_b(cia),
+      .i_carry(1'b0),
+      .o_sum(nia_bd),
+      .o_carry()
+  );
+
   // TODO high order 32bits set to 0 in 32 bit mode
   always_comb begin
     if (i_en == 1'b1) begin  // This is a branch
       if (i_i_form == 1'b1) begin
         if (aa == 1'b0) begin
-          // TODO Reuse the 64b adder (and check if the synthesis does
-          // a good job)
-          nia = exts_li + cia;  // CIA = address of the current instruction
+          nia = nia_li;  // exts_li + cia, CIA = address of the current instruction
           // TODO high order 32bits set to 0 in 32 bit mode
         end else begin
           nia = exts_li;
@@ -135,39 +194,34 @@ module BranchUnit (
       end else if (i_b_form == 1'b1) begin
         if (branch_taken == 1'b1) begin
           if (aa == 1'b0) begin
-            nia = exts_bd + cia;
+            nia = nia_bd;  // exts_bd + cia
             // TODO high order 32bits set to 0 in 32 bit mode
           end else begin
             nia = exts_bd;
             // TODO high order 32bits set to 0 in 32 bit mode
           end
-        end else nia = cia + 4;  // Branch is not taken: sequential instructions
+        end else nia = nia_seq;  // Branch is not taken: sequential instructions
       end else if (i_cond_LR == 1'b1) begin
         if (branch_taken == 1'b1) begin
           nia = a_lr_q;  // LR register, aligned
           // TODO high order 32bits set to 0 in 32 bit mode
-        end else nia = cia + 4;  // Branch is not taken: sequential instructions
+        end else nia = nia_seq;  // Branch is not taken: sequential instructions
       end else if (i_cond_CTR == 1'b1) begin
         if (invalid_bcctr_form == 1'b1)
-          nia = cia + 4;  // TODO (1) branch to custom error recovery handler
+          nia = nia_seq;  // TODO (1) branch to custom error recovery handler
         else if (branch_taken == 1'b1) nia = a_ctr_q;
-        else nia = cia + 4;
+        else nia = nia_seq;
       end else if (i_cond_TAR == 1'b1) begin
         if (branch_taken == 1'b1) nia = a_tar;  // TAR register, aligned
-        else nia = cia + 4;  // Branch is not taken: sequential instructions
-      end else nia = cia + 4;  // Also raises (2)
+        else nia = nia_seq;  // Branch is not taken: sequential instructions
+      end else nia = nia_seq;  // Also raises (2)
     end else begin  // Not a branch
       if (boot == 1'b1) nia = cia;
-      else nia = cia + 4;  // sequential instructions
+      else nia = nia_seq;  // sequential instructions
     end
   end
   assign dbg_unknown_branch = i_en & ~(i_i_form | i_b_form | i_cond_LR | i_cond_CTR | i_cond_TAR);
 
-  logic [0:15] bd;
-  assign bd = {i_instr[16:29], 2'b00};  // BD << 2
-  logic [0:63] exts_bd;
-  assign exts_bd = {{48{bd[0]}}, bd};  // BD[0] is the MSB (and the sign)
-
   // For Branch Conditional instruction, the BO field specifies the condition
   // For Branch Conditional B-form (see Power ISA section 2.4)
   logic [0:4] bo;  // Branch condition
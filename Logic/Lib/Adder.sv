@@ -0,0 +1,137 @@
+// Documentation about this module is located in
+// Documentation/Lib/Adder.md
+// Configurable adder: o_carry, o_sum = i_a + i_b + i_carry
+// ARCH selects the architecture, to trade area for delay:
+// - "BEHAVIORAL": a + b, the synthesis tool picks the architecture
+// - "RIPPLE": ripple-carry, WIDTH full adders in series
+// - "KOGGE_STONE": parallel prefix, log2(WIDTH) levels, the fastest and largest
+// - "BRENT_KUNG": parallel prefix, 2*log2(WIDTH)-1 levels, with fewer cells
+// - "CARRY_SELECT": blocks of BLOCK bits computed for both carries, the
+//   incoming carry selects the result
+// Bit 0 is the MSB (Big Endian): the bit of significance k is [WIDTH-1-k]
+
+module Adder #(
+    parameter integer WIDTH = 64,
+    parameter ARCH = "BEHAVIORAL",  // BEHAVIORAL, RIPPLE, KOGGE_STONE, BRENT_KUNG, CARRY_SELECT
+    parameter integer BLOCK = 8  // Bits per block of the CARRY_SELECT architecture
+) (
+    input logic [0:WIDTH-1] i_a,
+    input logic [0:WIDTH-1] i_b,
+    input logic i_carry,  // Carry in
+    output logic [0:WIDTH-1] o_sum,
+    output logic o_carry  // Carry out
+);
+  localparam integer LEVELS = $clog2(WIDTH);
+
+  // Generate and propagate of every bit
+  logic [0:WIDTH-1] g, p;
+  assign g = i_a & i_b;
+  assign p = i_a ^ i_b;
+
+  // Carry into every bit (significance k at [WIDTH-1-k]), c[0] is the carry out
+  logic [0:WIDTH] c;
+  assign c[WIDTH] = i_carry;
+  assign o_carry = c[0];
+
+  // Parallel prefix architectures: (gg, pp)[stage][WIDTH-1-k] generate and
+  // propagate of a group of bits ending at k
+  logic [0:2*LEVELS] [0:WIDTH-1] gg, pp;
+  // The carry in is folded in the generate of the bit 0
+  assign gg[0] = {g[0:WIDTH-2], g[WIDTH-1] | (p[WIDTH-1] & i_carry)};
+  assign pp[0] = p;
+
+  genvar k, l;
+  if (ARCH == "BEHAVIORAL") begin : gen_behavioral
+    assign {c[0], o_sum} = {1'b0, i_a} + {1'b0, i_b} + {{WIDTH{1'b0}}, i_carry};
+    assign c[1:WIDTH-1] = '0;  // Unused
+
+  end else if (ARCH == "RIPPLE") begin : gen_ripple
+    for (k = 0; k < WIDTH; k++) begin : gen_bit
+      assign c[WIDTH-1-k] = g[WIDTH-1-k] | (p[WIDTH-1-k] & c[WIDTH-k]);
+    end
+    assign o_sum = p ^ c[1:WIDTH];
+
+  end else if (ARCH == "KOGGE_STONE") begin : gen_kogge_stone
+    // Stage l: the group of the bits k-2**l+1..k
+    for (l = 1; l <= LEVELS; l++) begin : gen_level
+      for (k = 0; k < WIDTH; k++) begin : gen_bit
+        if (k >= 2 ** (l - 1)) begin : gen_combine
+          assign gg[l][WIDTH-1-k] = gg[l-1][WIDTH-1-k] |
+              (pp[l-1][WIDTH-1-k] & gg[l-1][WIDTH-1-k+2**(l-1)]);
+          assign pp[l][WIDTH-1-k] = pp[l-1][WIDTH-1-k] & pp[l-1][WIDTH-1-k+2**(l-1)];
+        end else begin : gen_copy
+          assign gg[l][WIDTH-1-k] = gg[l-1][WIDTH-1-k];
+          assign pp[l][WIDTH-1-k] = pp[l-1][WIDTH-1-k];
+        end
+      end
+    end
+    assign c[0:WIDTH-1] = gg[LEVELS];
+    assign o_sum = p ^ c[1:WIDTH];
+
+  end else if (ARCH == "BRENT_KUNG") begin : gen_brent_kung
+    // Up-sweep (stages 1..LEVELS): the bits k = m*2**l-1 combine with k-2**(l-1)
+    // Down-sweep (stages LEVELS+1..2*LEVELS-1): the prefixes are completed
+    localparam integer STAGES = (LEVELS > 0) ? 2 * LEVELS - 1 : 0;
+    for (l = 1; l <= STAGES; l++) begin : gen_stage
+      // Distance between the combined bits
+      localparam integer D = (l <= LEVELS) ? 2 ** (l - 1) : 2 ** (2 * LEVELS - l - 1);
+      for (k = 0; k < WIDTH; k++) begin : gen_bit
+        if ((l <= LEVELS && (k + 1) % (2 * D) == 0) ||
+            (l > LEVELS && (k + 1) % (2 * D) == D && k >= 2 * D)) begin : gen_combine
+          assign gg[l][WIDTH-1-k] = gg[l-1][WIDTH-1-k] |
+              (pp[l-1][WIDTH-1-k] & gg[l-1][WIDTH-1-k+D]);
+          assign pp[l][WIDTH-1-k] = pp[l-1][WIDTH-1-k] & pp[l-1][WIDTH-1-k+D];
+        end else begin : gen_copy
+          assign gg[l][WIDTH-1-k] = gg[l-1][WIDTH-1-k];
+          assign pp[l][WIDTH-1-k] = pp[l-1][WIDTH-1-k];
+        end
+      end
+    end
+    assign c[0:WIDTH-1] = gg[STAGES];
+    assign o_sum = p ^ c[1:WIDTH];
+
+  end else if (ARCH == "CARRY_SELECT") begin : gen_carry_select
+    // Every block is added twice (ripple-carry), for a carry in of 0 and of 1,
+    // the carry into the block selects the result. The hierarchy is kept: once
+    // flattened, the synthesis shares the two additions (opt -full) and turns
+    // them back into a ripple-carry adder
+    for (k = 0; k < WIDTH; k += BLOCK) begin : gen_block
+      // Bits k..k+SIZE-1 of the operands, [WIDTH-k-SIZE:WIDTH-1-k]
+      localparam integer SIZE = (WIDTH - k < BLOCK) ? WIDTH - k : BLOCK;
+      logic [0:SIZE-1] sum0, sum1;
+      logic carry0, carry1;
+      (* keep_hierarchy *)
+      Adder #(
+          .WIDTH(SIZE),
+          .ARCH ("RIPPLE")
+      ) adder0 (
+          .i_a(i_a[WIDTH-k-SIZE:WIDTH-1-k]),
+          .i_b(i_b[WIDTH-k-SIZE:WIDTH-1-k]),
+          .i_carry(1'b0),
+          .o_sum(sum0),
+          .o_carry(carry0)
+      );
+      (* keep_hierarchy *)
+      Adder #(
+          .WIDTH(SIZE),
+          .ARCH ("RIPPLE")
+      ) adder1 (
+          .i_a(i_a[WIDTH-k-SIZE:WIDTH-1-k]),
+          .i_b(i_b[WIDTH-k-SIZE:WIDTH-1-k]),
+          .i_carry(1'b1),
+          .o_sum(sum1),
+          .o_carry(carry1)
+      );
+      assign o_sum[WIDTH-k-SIZE:WIDTH-1-k] = c[WIDTH-k] ? sum1 : sum0;
+      assign c[WIDTH-k-SIZE] = c[WIDTH-k] ? carry1 : carry0;
+      if (SIZE > 1) begin : gen_unused
+        assign c[WIDTH-k-SIZE+1:WIDTH-1-k] = '0;  // Only the carry out of a block is computed
+      end
+    end
+
+  end else begin : gen_unknown_arch
+    // Unknown architecture: fail the elaboration
+    Adder_unknown_ARCH unknown_arch ();
+  end
+
+endmodule
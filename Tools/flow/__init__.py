@@ -0,0 +1,10 @@
+# Python side of the EDA flow (regressions, builds...), see the scripts in Tools/
+# Every module can be run with: PYTHONPATH=Tools python3 -m flow.<module> --help
+import os
+import subprocess
+
+
+def gitroot() -> str:
+    """ Root of the repository (the one of Tools/, whatever the current directory) """
+    return subprocess.run(["git", "rev-parse", "--show-toplevel"], capture_output=True,
+                          text=True, check=True, cwd=os.path.dirname(__file__)).stdout.strip()
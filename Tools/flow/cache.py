@@ -0,0 +1,231 @@
+import os
+import re
+import sys
+import shutil
+import hashlib
+import argparse
+import tempfile
+import subprocess
+from functools import lru_cache
+from . import gitroot
+# Content-hashed build cache
+#
+# The products of sv2v (converted Verilog) and iverilog (compiled simulation
+# image) are stored under a key computed from the content of the input files,
+# the other arguments (defines...) and the version of the tool: a unit whose
+# sources did not change skips the conversion and the compilation, whatever
+# the directory it is built in (regress and shard copies share the cache).
+# The files `included by the inputs (recursively) are part of the key; a
+# command with an include which cannot be found is run without the cache.
+# Every lookup is logged in stats.log, see stats() and Tools/regress.
+#
+# Cache directory: $BUILD_CACHE or build/cache/ at the root of the repository
+# Usage: build_cache sv2v --define=SYNTHESIS -o CondReg.v Logic/Core/CondReg.sv
+#        build_cache iverilog <iverilog arguments>   (see Tools/icarus/)
+
+
+def cache_dir() -> str:
+    return os.environ.get("BUILD_CACHE") or os.path.join(gitroot(), "build", "cache")
+
+
+@lru_cache(maxsize=None)
+def tool_version(tool: str, flag: str = "--version") -> str:
+    """ First line printed by (tool) (flag), the tool must be installed """
+    result = subprocess.run([tool, flag], capture_output=True, text=True)
+    return (result.stdout or result.stderr).strip().split("\n")[0]
+
+
+def file_digest(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+INCLUDE = re.compile(rb'^\s*`include\s+"([^"]+)"', re.M)
+
+
+def include_dirs(args: list) -> list:
+    """
+    Directories given with -I dir, -Idir or --incdir=dir (sv2v and iverilog)
+    >>> include_dirs(["-I", "rtl", "-Ivendor", "--incdir=lib", "top.sv"])
+    ['rtl', 'vendor', 'lib']
+    """
+    dirs = []
+    for i, arg in enumerate(args):
+        if arg == "-I" and i + 1 < len(args):
+            dirs.append(args[i + 1])
+        elif arg.startswith("--incdir="):
+            dirs.append(arg[len("--incdir="):])
+        elif arg.startswith("-I") and len(arg) > 2:
+            dirs.append(arg[2:])
+    return dirs
+
+
+def include_closure(paths: list, dirs: list = ()):
+    """
+    Files `included by (paths), directly or not. An include is looked up in
+    the directory of the file including it, the current directory and (dirs):
+    every candidate which exists is in the closure, whichever one the tool
+    reads. Returns None if an include is found nowhere
+    """
+    closure, todo = [], list(paths)
+    seen = {os.path.realpath(path) for path in paths}
+    while todo:
+        path = todo.pop(0)
+        with open(path, "rb") as f:
+            names = [name.decode() for name in INCLUDE.findall(f.read())]
+        for name in names:
+            candidates = [name] if os.path.isabs(name) else \
+                [os.path.join(d, name) for d in (os.path.dirname(path), os.curdir, *dirs)]
+            candidates = [c for c in candidates if os.path.isfile(c)]
+            if not candidates:
+                return None
+            for candidate in candidates:
+                if os.path.realpath(candidate) not in seen:
+                    seen.add(os.path.realpath(candidate))
+                    closure.append(candidate)
+                    todo.append(candidate)
+    return closure
+
+
+class Cache:
+    """
+    Files stored by key in (path)/objects, lookups logged in (path)/stats.log
+    Objects are written to a temporary file and renamed so concurrent builds
+    never read a partial object.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or cache_dir()
+        self.objects = os.path.join(self.path, "objects")
+        self.stats_log = os.path.join(self.path, "stats.log")
+        os.makedirs(self.objects, exist_ok=True)
+
+    @staticmethod
+    def key(*parts) -> str:
+        """ Hash of (parts), an existing file is replaced by the hash of its content """
+        h = hashlib.sha256()
+        for part in parts:
+            if os.path.isfile(part):
+                part = "file:" + file_digest(part)
+            h.update(f"{len(part)}:{part}".encode())
+        return h.hexdigest()
+
+    def _object(self, key: str) -> str:
+        return os.path.join(self.objects, key[:2], key)
+
+    def get(self, kind: str, key: str, output: str) -> bool:
+        """ Copies the object (key) to (output), returns False on a miss """
+        try:
+            shutil.copyfile(self._object(key), output)
+            hit = True
+        except FileNotFoundError:
+            hit = False
+        self.log(kind, hit, key)
+        return hit
+
+    def put(self, key: str, path: str):
+        obj = self._object(key)
+        os.makedirs(os.path.dirname(obj), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(obj))
+        os.close(fd)
+        shutil.copyfile(path, tmp)
+        os.replace(tmp, obj)
+
+    def log(self, kind: str, hit: bool, key: str):
+        # Short appends are atomic: no lock needed between concurrent builds
+        with open(self.stats_log, "a") as f:
+            f.write(f"{'hit' if hit else 'miss'} {kind} {key}\n")
+
+    def position(self) -> int:
+        """ Current end of the statistics, see stats(since) """
+        try:
+            return os.path.getsize(self.stats_log)
+        except FileNotFoundError:
+            return 0
+
+    def stats(self, since: int = 0) -> dict:
+        """ kind -> [hits, misses] of the lookups logged after (since) """
+        stats = {}
+        try:
+            with open(self.stats_log) as f:
+                f.seek(since)
+                for line in f:
+                    result, kind, key = line.split()
+                    stats.setdefault(kind, [0, 0])[result == "miss"] += 1
+        except FileNotFoundError:
+            pass
+        return stats
+
+    def clear(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def report(stats: dict) -> str:
+    """
+    >>> report({"sv2v": [3, 1]})
+    'Build cache: sv2v 3 hits / 1 misses (75%)'
+    """
+    return "Build cache: " + (", ".join(
+        f"{kind} {hits} hits / {misses} misses ({100 * hits // (hits + misses)}%)"
+        for kind, (hits, misses) in sorted(stats.items())) or "unused")
+
+
+def inputs_key(cache: Cache, tool: str, version: str, inputs: list):
+    """ Key of (tool) run on (inputs) with the files they include, None if one is missing """
+    includes = include_closure([arg for arg in inputs if os.path.isfile(arg)],
+                               include_dirs(inputs))
+    if includes is None:
+        return None
+    return cache.key(tool, version, *inputs, "includes", *includes)
+
+
+def sv2v(cache: Cache, args: list, output: str) -> int:
+    """ sv2v (args) > (output) """
+    key = inputs_key(cache, "sv2v", tool_version("sv2v"), args)
+    if key is not None and cache.get("sv2v", key, output):
+        return 0
+    with open(output, "w") as f:
+        result = subprocess.run(["sv2v"] + args, stdout=f)
+    if result.returncode == 0 and key is not None:
+        cache.put(key, output)
+    return result.returncode
+
+
+def iverilog(cache: Cache, args: list) -> int:
+    """ iverilog (args), the image is the file given by -o """
+    output = args[args.index("-o") + 1]
+    inputs = args[:args.index("-o")] + args[args.index("-o") + 2:]
+    key = inputs_key(cache, "iverilog", tool_version("iverilog", "-V"), inputs)
+    if key is not None and cache.get("iverilog", key, output):
+        return 0
+    result = subprocess.run(["iverilog"] + args)
+    if result.returncode == 0 and key is not None:
+        cache.put(key, output)
+    return result.returncode
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Content-hashed cache of the sv2v and "
+                                                 "iverilog products")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("sv2v", help="sv2v <args>, output written to -o")
+    p.add_argument("-o", "--output", required=True)
+    sub.add_parser("iverilog", help="iverilog <args> (with -o)")
+    sub.add_parser("stats", help="print the hits and misses")
+    sub.add_parser("clear", help="remove every cached file")
+    args, rest = parser.parse_known_args(argv)
+
+    cache = Cache()
+    if args.command == "sv2v":
+        return sv2v(cache, rest, args.output)
+    if args.command == "iverilog":
+        return iverilog(cache, rest)
+    if args.command == "stats":
+        print(report(cache.stats()))
+    elif args.command == "clear":
+        cache.clear()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,254 @@
+import os
+import re
+import sys
+import json
+import argparse
+from . import gitroot
+from .qor import PDKS, Synthesis, discover_units, table, _PIN
+from .regress import run_jobs
+# Critical path explorer
+#
+# Attributes the delay of the critical path reported by sta_<pdk>.tcl (BATCH=1,
+# see Tools/qor) to the RTL signals it goes through: the path is cut at every
+# net which kept its RTL name, the delay of the cells before it is charged to
+# it. The synthesis optimizes most names away, the nets of KEEP_NETS are kept
+# (yosys keep attribute) so they stay on the path: by default the signals of
+# the next instruction address (nia) logic of the BranchUnit.
+#
+# It also synthesizes a unit with every architecture of the adder library
+# (Logic/Lib/Adder.sv, selected with the NIA_ADDER define of the BranchUnit)
+# and tells which one gives the fastest NIA path (the worst path through nia,
+# THROUGH_NET of sta_<pdk>.tcl), or with --smallest the smallest one meeting
+# the clock period on that path.
+# Outputs: build/critpath/<pdk>/<architecture>/ and build/critpath/<pdk>/critpath.json
+#
+# Usage: Tools/critpath report build/qor/ng45/BranchUnit/sta.log
+#        Tools/critpath adders ng45 --period 1.0 -j 5
+
+ARCHS = ("BEHAVIORAL", "RIPPLE", "KOGGE_STONE", "BRENT_KUNG", "CARRY_SELECT")
+# unit -> (define selecting the adder architecture, nets kept on the paths, net of the
+# path the architectures are ranked on)
+UNITS = {
+    "BranchUnit": ("NIA_ADDER", ("ctr_decr", "ctr_d_null", "branch_taken", "nia_li", "nia_bd",
+                                 "nia_seq", "nia"), "nia"),
+}
+_NET = re.compile(r"^\s+(\S.*?) \(net\)\s*$")
+_INTERNAL = re.compile(r"^_\d+_$|\$")  # Names given by yosys and abc
+_KEYWORDS = {"input", "output", "inout", "logic", "assert", "assume", "cover", "if", "case"}
+
+
+def path_stages(text: str, name: str = "report_checks") -> list:
+    """
+    (pin, cell, delay, arrival time, net driven) of the path of the QOR
+    section (name) (report_checks with -fields {net}), the net of the last
+    pin is None. report_checks_through: the path through THROUGH_NET
+    """
+    # Without QOR sections (interactive run) the first report is the critical path
+    allowed = (None, name) if name == "report_checks" else (name,)
+    stages = []
+    section = None
+    for line in text.split("\n"):
+        if line.startswith("QOR "):
+            section = line[4:].strip()
+        elif section not in allowed:
+            continue
+        elif line.strip().endswith("data arrival time"):
+            break
+        elif "external delay" in line:
+            continue
+        match = _PIN.match(line)
+        if match:
+            delay, at, pin, cell = match.groups()
+            stages.append([pin, cell, float(delay), float(at), None])
+            continue
+        match = _NET.match(line)
+        if match and stages:
+            stages[-1][4] = match.group(1)
+    return [tuple(stage) for stage in stages]
+
+
+def signal(net: str) -> str:
+    """
+    RTL name of a net, None for the nets named by the synthesis
+    >>> signal("nia[12]"), signal("\\\\nia_li_adder.c [3]"), signal("_0042_")
+    ('nia', 'nia_li_adder.c', None)
+    """
+    name = re.sub(r"\s*\[\d+\]$", "", net.lstrip("\\"))
+    return None if _INTERNAL.search(name) else name
+
+
+def attribute(stages: list, signals: set = None) -> list:
+    """
+    (signal, delay, arrival time) of the segments of the path: the delay of
+    the cells between two named nets goes to the second one, the last segment
+    to the endpoint. (signals) restricts the names to the RTL signals given
+    >>> stages = [("cia_q[3]/Q", "DFFR_X1", 0.09, 0.09, "cia[3]"),
+    ...           ("_12_/ZN", "NAND2_X1", 0.03, 0.12, "_0042_"),
+    ...           ("_13_/ZN", "XOR2_X1", 0.05, 0.17, "nia_li[3]"),
+    ...           ("_14_/Z", "MUX2_X1", 0.06, 0.23, "nia[3]"),
+    ...           ("cia_q[2]/D", "DFFR_X1", 0.0, 0.23, None)]
+    >>> attribute(stages)
+    [('cia', 0.09, 0.09), ('nia_li', 0.08, 0.17), ('nia', 0.06, 0.23), ('cia_q[2]/D', 0.0, 0.23)]
+    >>> attribute(stages, {"nia"})
+    [('nia', 0.23, 0.23), ('cia_q[2]/D', 0.0, 0.23)]
+    """
+    segments = []
+    delay = 0.0
+    for pin, cell, stage_delay, at, net in stages:
+        delay += stage_delay
+        name = net and signal(net)
+        if name and (signals is None or name.split(".")[0] in signals):
+            if segments and segments[-1][0] == name:  # Several cells driving the same signal
+                segments[-1] = (name, round(segments[-1][1] + delay, 6), at)
+            else:
+                segments.append((name, round(delay, 6), at))
+            delay = 0.0
+    if stages:
+        segments.append((stages[-1][0], round(delay, 6), stages[-1][3]))
+    return segments
+
+
+def net_arrival(segments: list, net: str):
+    """
+    Arrival time of (net) on a path attributed by attribute(), None if the
+    path does not go through it
+    >>> net_arrival([("cia", 0.09, 0.09), ("nia", 0.14, 0.23), ("cia_q[2]/D", 0.0, 0.23)], "nia")
+    0.23
+    """
+    arrivals = [at for name, delay, at in segments if name == net]
+    return arrivals[-1] if arrivals else None
+
+
+def rtl_signals(source: str) -> set:
+    """ Names declared in a SystemVerilog file (signals and instances), to filter the nets """
+    with open(source) as f:
+        text = re.sub(r"//.*", "", f.read())
+    names = set()
+    for group in re.findall(r"\blogic\b(?:\s*\[[^]]*\])*\s+(\w+(?:\s*,\s*\w+)*)", text):
+        names.update(n.strip() for n in group.split(","))
+    names.update(re.findall(r"\)\s*(\w+)\s*\(", text))  # Module instances
+    return names - _KEYWORDS
+
+
+def format_segments(segments: list) -> str:
+    """
+    >>> print(format_segments([("cia", 0.09, 0.09), ("nia", 0.14, 0.23)]))
+    signal                           delay  arrival  share
+    cia                              0.090    0.090  39.1%
+    nia                              0.140    0.230  60.9%
+    """
+    total = sum(delay for _, delay, _ in segments) or 1.0
+    lines = [f"{'signal':<30} {'delay':>7} {'arrival':>8} {'share':>6}"]
+    for name, delay, at in segments:
+        lines.append(f"{name:<30} {delay:>7.3f} {at:>8.3f} {100 * delay / total:>5.1f}%")
+    return "\n".join(lines)
+
+
+def adder_jobs(root: str, unit: str, pdk: str, period: float, archs=ARCHS) -> list:
+    """
+    One synthesis of (unit) per adder architecture, with the nets of UNITS
+    kept and the path through the ranked net reported
+    """
+    define, nets, through = UNITS[unit]
+    source = discover_units(root)[unit]
+    return [Synthesis(unit, source, pdk, period, defines=[f'--define={define}="{arch}"'],
+                      env={"KEEP_NETS": " ".join(nets), "THROUGH_NET": through}, name=arch)
+            for arch in archs]
+
+
+def best(jobs: list, period: float, arrivals: dict, smallest: bool = False):
+    """
+    The architecture with the fastest path through the ranked net
+    ((arrivals): architecture -> arrival time on that net), or with
+    (smallest) the smallest area among the ones meeting (period) on that
+    path (the fastest one if none does): (job, met)
+    >>> from types import SimpleNamespace as Job
+    >>> jobs = [Job(name="RIPPLE", qor={"area": 100.0}),
+    ...         Job(name="KOGGE_STONE", qor={"area": 300.0})]
+    >>> arrivals = {"RIPPLE": 0.9, "KOGGE_STONE": 0.4}
+    >>> [(job.name, met) for job, met in (best(jobs, 1.0, arrivals),
+    ...                                   best(jobs, 1.0, arrivals, smallest=True))]
+    [('KOGGE_STONE', True), ('RIPPLE', True)]
+    """
+    done = [job for job in jobs if job.qor and arrivals.get(job.name) is not None]
+    if not done:
+        return None, False
+    met = [job for job in done if arrivals[job.name] <= period]
+    if smallest and met:
+        return min(met, key=lambda job: (job.qor["area"] or 0, arrivals[job.name])), True
+    fastest = min(done, key=lambda job: (arrivals[job.name], job.qor["area"] or 0))
+    return fastest, arrivals[fastest.name] <= period
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Attribute the critical path to RTL signals "
+                                                 "and compare the adder architectures")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("report", help="RTL signals on the critical path of a sta.log")
+    p.add_argument("sta_log")
+    p.add_argument("-s", "--source", help="only keep the signals declared in this SystemVerilog "
+                                          "file")
+    p = sub.add_parser("adders", help="synthesize a unit with every adder architecture")
+    p.add_argument("pdk", choices=sorted(pdk for pdk, (_, period) in PDKS.items() if period))
+    p.add_argument("-u", "--unit", default="BranchUnit", choices=sorted(UNITS))
+    p.add_argument("-a", "--archs", nargs="+", default=ARCHS, choices=ARCHS)
+    p.add_argument("--period", type=float, help="target clock period in ns (default: per PDK)")
+    p.add_argument("--smallest", action="store_true",
+                   help="pick the smallest architecture meeting the period on the NIA path "
+                        "(default: the fastest NIA path)")
+    p.add_argument("-j", "--jobs", type=int, default=os.cpu_count())
+    p.add_argument("--timeout", type=float, help="timeout of a synthesis in seconds")
+    args = parser.parse_args(argv)
+
+    if args.command == "report":
+        with open(args.sta_log) as f:
+            stages = path_stages(f.read())
+        signals = rtl_signals(args.source) if args.source else None
+        print(format_segments(attribute(stages, signals)))
+        return 0
+
+    variable, period = PDKS[args.pdk]
+    if not os.path.isdir(os.environ.get(variable, "")):
+        print(f"Error: Please add {args.pdk} to your environment variable ${variable} "
+              f"(see Tools/synth_{args.pdk})")
+        return 1
+    period = args.period or period
+    root = gitroot()
+    build_root = os.path.join(root, "build", "critpath", args.pdk)
+    jobs = adder_jobs(root, args.unit, args.pdk, period, args.archs)
+    run_jobs(jobs, build_root, args.jobs, args.timeout)
+    print(table(jobs))
+    define, nets, net = UNITS[args.unit]
+    results, arrivals = {}, {}
+    for job in jobs:
+        if job.qor is None:
+            continue
+        with open(os.path.join(job.build_dir, "sta.log")) as f:
+            log = f.read()
+        segments = attribute(path_stages(log), set(nets))
+        # The worst path through the net if STA reported it, else the critical path
+        through = attribute(path_stages(log, "report_checks_through"), set(nets)) or segments
+        arrivals[job.name] = net_arrival(through, net)
+        results[job.name] = dict(job.qor, segments=segments, through_segments=through,
+                                 through_arrival=arrivals[job.name])
+        print(f">>> {job.name}: {job.qor['startpoint']} -> {job.qor['endpoint']}")
+        print(format_segments(segments))
+        if through is not segments:
+            print(f">>> {job.name}: worst path through {net}")
+            print(format_segments(through))
+    with open(os.path.join(build_root, "critpath.json"), "w") as f:
+        json.dump({"unit": args.unit, "pdk": args.pdk, "period": period, "net": net,
+                   "archs": results}, f, indent=2)
+    job, met = best(jobs, period, arrivals, args.smallest)
+    if job is None:
+        print(f"Error: no architecture was synthesized and timed through {net}")
+        return 1
+    kind = "Smallest" if args.smallest and met else "Fastest"
+    print(f"{kind} architecture on the {net} path, {'meeting' if met else 'missing'} {period}ns: "
+          f"{job.name} ({arrivals[job.name]}ns on {net}, critical path {job.qor['arrival']}ns, "
+          f"area {job.qor['area']})")
+    return 0 if met else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,337 @@
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import signal
+import hashlib
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from . import gitroot, cache
+from .qor import discover_units, library
+# Parallel formal verification
+#
+# Runs the proofs of every .sby file of FormalVerif/ concurrently. Every task
+# races several engines (one sby process per engine, see ENGINES): the first
+# conclusive answer (PASS or FAIL) wins and the other engines are killed. An
+# engine which is not installed or gives up (ERROR, UNKNOWN) does not stop the
+# others.
+#
+# Proven results are cached by the hash of the formal netlist: the design read
+# by yosys with the [script] of the .sby file (src attributes removed) and the
+# [options]. A unit whose netlist did not change is not proven again, whatever
+# the commit. A FAIL is not cached so its counterexample is always in the build
+# directory. The .v files of [files] are generated with sv2v --define=FORMAL
+# from the unit of Logic/ and the library (like FormalVerif/Core/BranchUnit/test.sh)
+#
+# Outputs: build/formal/<task>/<engine>/ (sby working directories),
+#          build/formal/summary.json
+# Cache: the build cache (see cache.py), kind "formal"
+#
+# Usage: Tools/formal                      # Every task, every engine
+#        Tools/formal -k CondReg -e "abc pdr" "smtbmc z3"
+
+FORMAL_ROOT = "FormalVerif"
+ENGINES = ("smtbmc yices", "smtbmc boolector", "smtbmc z3", "abc pdr")
+CONCLUSIVE = ("PASS", "FAIL")
+_DONE = re.compile(r"\bDONE \((\w+), rc=\d+\)")
+POLL = 0.2  # Period of the engine status checks (s)
+
+
+def parse_sby(text: str) -> dict:
+    """
+    section -> lines of a .sby file, without the comments and the blank lines
+    >>> parse_sby("[options]\\nmode prove\\n\\n# Default solver\\n[engines]\\nsmtbmc\\n")
+    {'options': ['mode prove'], 'engines': ['smtbmc']}
+    """
+    sections = {}
+    lines = None
+    for line in text.split("\n"):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        match = re.match(r"^\[(.+)\]$", line)
+        if match:
+            lines = sections.setdefault(match.group(1).strip(), [])
+        elif lines is not None:
+            lines.append(line)
+    return sections
+
+
+def write_sby(sections: dict) -> str:
+    """
+    >>> print(write_sby({"options": ["mode prove"], "engines": ["abc pdr"]}), end="")
+    [options]
+    mode prove
+    <BLANKLINE>
+    [engines]
+    abc pdr
+    """
+    return "\n".join(f"[{name}]\n" + "".join(line + "\n" for line in lines)
+                     for name, lines in sections.items())
+
+
+def engine_name(engine: str) -> str:
+    """
+    >>> engine_name("smtbmc yices"), engine_name("abc pdr")
+    ('smtbmc_yices', 'abc_pdr')
+    """
+    return re.sub(r"\W+", "_", engine.strip())
+
+
+def sby_status(log: str) -> str:
+    """
+    Status printed by sby at the end of a task, ERROR if it did not finish
+    >>> sby_status("SBY 14:15:56 [CondReg] DONE (PASS, rc=0)\\n")
+    'PASS'
+    >>> sby_status("bash: line 1: yosys-abc: command not found\\n")
+    'ERROR'
+    """
+    statuses = _DONE.findall(log)
+    return statuses[-1] if statuses else "ERROR"
+
+
+def verdict(statuses: list) -> str:
+    """
+    Status of a task whose engines all finished without a conclusive answer
+    >>> verdict(["ERROR", "UNKNOWN", "TIMEOUT"]), verdict(["ERROR", "TIMEOUT"]), verdict([])
+    ('UNKNOWN', 'TIMEOUT', 'ERROR')
+    """
+    for status in ("UNKNOWN", "TIMEOUT"):
+        if status in statuses:
+            return status
+    return "ERROR"
+
+
+def netlist_digest(path: str) -> str:
+    """ Hash of a RTLIL file, without the comments (the version of yosys) """
+    h = hashlib.sha256()
+    with open(path) as f:
+        for line in f:
+            if not line.startswith("#"):
+                h.update(line.encode())
+    return h.hexdigest()
+
+
+class Task:
+    """
+    The proof of a .sby file, raced with several engines
+    """
+
+    def __init__(self, name: str, sby: str):
+        self.name = name
+        self.sby = sby
+        self.directory = os.path.dirname(sby)
+        with open(sby) as f:
+            self.sections = parse_sby(f.read())
+        self.status = "PENDING"
+        self.engine = None  # Engine which gave the status
+        self.engines = {}  # engine -> status
+        self.time = 0.0  # Wall-clock time (s)
+        self.cached = False
+        self.key = None
+        self.log = None
+        self.build_dir = None
+
+    def files(self) -> list:
+        """ (name in the sby working directory, path) of the [files] section """
+        files = []
+        for line in self.sections.get("files", []):
+            parts = line.split()
+            name, path = parts if len(parts) == 2 else (os.path.basename(parts[0]), parts[0])
+            files.append((name, os.path.join(self.directory, path)))
+        return files
+
+    def prepare(self, root: str, build_cache: cache.Cache, src_dir: str, log) -> bool:
+        """ Copies the files to (src_dir), the missing .v files are converted from Logic/ """
+        os.makedirs(src_dir)
+        units = discover_units(root)
+        for name, path in self.files():
+            output = os.path.join(src_dir, name)
+            unit = os.path.basename(path)[:-2]
+            if os.path.exists(path):
+                shutil.copyfile(path, output)
+            elif path.endswith(".v") and unit in units:
+                sources = [units[unit]] + [f for f in library(root) if f != units[unit]]
+                log.write(f"sv2v --define=FORMAL {' '.join(sources)} > {output}\n")
+                log.flush()
+                if cache.sv2v(build_cache, ["--define=FORMAL"] + sources, output) != 0:
+                    return False
+            else:
+                log.write(f"Error: {path} not found\n")
+                return False
+        return True
+
+    def netlist(self, src_dir: str, log) -> str:
+        """ Reads the design like sby does, writes it to netlist.il, returns its hash """
+        script = os.path.join(src_dir, "netlist.ys")
+        netlist = os.path.join(self.build_dir, "netlist.il")
+        with open(script, "w") as f:
+            f.write("\n".join(self.sections.get("script", []) + [
+                "attrmap -remove src", "attrmap -modattr -remove src",
+                f"write_rtlil {netlist}"]) + "\n")
+        result = subprocess.run(["yosys", "-q", "netlist.ys"], cwd=src_dir, stdout=log,
+                                stderr=subprocess.STDOUT)
+        return netlist_digest(netlist) if result.returncode == 0 else None
+
+    def race(self, engines: list, src_dir: str, timeout: float = None):
+        """ One sby per engine, the first conclusive status kills the others """
+        files = [os.path.join(src_dir, name) for name, _ in self.files()]
+        processes = {}
+        for engine in engines:
+            name = engine_name(engine)
+            sby = os.path.join(self.build_dir, name + ".sby")
+            with open(sby, "w") as f:
+                f.write(write_sby(dict(self.sections, engines=[engine], files=files)))
+            with open(os.path.join(self.build_dir, name + ".log"), "w") as log:
+                try:
+                    # Own process group: the solvers started by sby are killed with it
+                    processes[engine] = subprocess.Popen(
+                        ["sby", "-f", sby], cwd=self.build_dir, stdout=log,
+                        stderr=subprocess.STDOUT, start_new_session=True)
+                except OSError as e:
+                    log.write(f"{e}\n")
+                    self.engines[engine] = "ERROR"
+        start = time.perf_counter()
+        while processes:
+            time.sleep(POLL)
+            for engine, process in list(processes.items()):
+                if process.poll() is None:
+                    continue
+                del processes[engine]
+                with open(os.path.join(self.build_dir, engine_name(engine) + ".log")) as f:
+                    self.engines[engine] = sby_status(f.read())
+                if self.engines[engine] in CONCLUSIVE and self.engine is None:
+                    self.status, self.engine = self.engines[engine], engine
+                    self.log = os.path.join(self.build_dir, engine_name(engine) + ".log")
+            if self.engine is not None or (timeout and time.perf_counter() - start > timeout):
+                for engine, process in processes.items():
+                    try:
+                        os.killpg(process.pid, signal.SIGTERM)
+                    except ProcessLookupError:
+                        pass  # Exited (with its solvers) since the last poll()
+                    process.wait()
+                    self.engines[engine] = "KILLED" if self.engine else "TIMEOUT"
+                processes = {}
+        if self.engine is None:
+            self.status = verdict(list(self.engines.values()))
+            self.log = self.build_dir  # The logs of every engine
+
+    def run(self, root: str, build_root: str, build_cache: cache.Cache, engines: list,
+            timeout: float = None, use_cache: bool = True):
+        start = time.perf_counter()
+        self.build_dir = os.path.join(build_root, self.name)
+        shutil.rmtree(self.build_dir, ignore_errors=True)
+        src_dir = os.path.join(self.build_dir, "src")
+        os.makedirs(self.build_dir)
+        self.log = os.path.join(self.build_dir, "netlist.log")
+        result = os.path.join(self.build_dir, "result.json")
+        with open(self.log, "w") as log:
+            try:
+                digest = (self.prepare(root, build_cache, src_dir, log)
+                          and self.netlist(src_dir, log))
+            except OSError as e:  # sv2v or yosys not installed
+                log.write(f"{e}\n")
+                digest = None
+        if not digest:
+            self.status = "ERROR"
+        else:
+            self.key = cache.Cache.key("formal", digest, *self.sections.get("options", []))
+            if use_cache and build_cache.get("formal", self.key, result):
+                with open(result) as f:
+                    cached = json.load(f)
+                self.status, self.engine, self.cached = cached["status"], cached["engine"], True
+            else:
+                self.race(engines, src_dir, timeout)
+                with open(result, "w") as f:
+                    json.dump({"status": self.status, "engine": self.engine,
+                               "time": round(time.perf_counter() - start, 3)}, f)
+                if self.status == "PASS":
+                    build_cache.put(self.key, result)
+        self.time = time.perf_counter() - start
+        return self
+
+    def summary(self) -> dict:
+        return {"name": self.name, "status": self.status, "engine": self.engine,
+                "engines": self.engines, "cached": self.cached, "time": round(self.time, 3),
+                "sby": self.sby, "key": self.key, "log": self.log}
+
+
+def discover_tasks(root: str) -> list:
+    """ One Task per .sby file of FormalVerif/ (named after the file) """
+    tasks = []
+    for directory, dirs, files in os.walk(os.path.join(root, FORMAL_ROOT)):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for f in sorted(files):
+            # config.sby: copy made by sby in its working directory
+            if f.endswith(".sby") and f != "config.sby":
+                tasks.append(Task(f[:-4], os.path.join(directory, f)))
+    return tasks
+
+
+def report(tasks: list, wall_time: float) -> str:
+    """ Summary of the proofs """
+    lines = ["Formal summary:"]
+    for task in tasks:
+        engine = f"{task.engine or '-'}{' (cached)' if task.cached else ''}"
+        lines.append(f"    - {task.name:<30} {task.status:<7} {task.time:8.1f}s  {engine}")
+    failed = [task for task in tasks if task.status != "PASS"]
+    lines.append(f"{len(tasks) - len(failed)}/{len(tasks)} proven, wall-clock {wall_time:.1f}s")
+    for task in failed:
+        lines.append(f"    {task.status}: {task.name}, see {task.log}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the proofs of FormalVerif/ in parallel, "
+                                                 "racing several engines per proof")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="number of proofs running at the same time, each one runs an sby "
+                             "process per engine (default: cores)")
+    parser.add_argument("-k", "--filter", default="",
+                        help="only run the proofs whose name contains this string")
+    parser.add_argument("-e", "--engines", nargs="+", default=ENGINES,
+                        help=f"sby engines raced on every proof (default: {', '.join(ENGINES)})")
+    parser.add_argument("--timeout", type=float, help="timeout of a proof in seconds")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="prove again the netlists already proven")
+    parser.add_argument("--list", action="store_true", help="only list the proofs")
+    parser.add_argument("-o", "--output", help="build directory (default: build/formal)")
+    args = parser.parse_args(argv)
+
+    root = gitroot()
+    build_root = args.output or os.path.join(root, "build", "formal")
+    tasks = [task for task in discover_tasks(root) if args.filter in task.name]
+    if args.list:
+        print("\n".join(f"{task.name:<30} {os.path.relpath(task.sby, root)}" for task in tasks))
+        return 0
+
+    build_cache = cache.Cache()
+    since = build_cache.position()
+    os.makedirs(build_root, exist_ok=True)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        futures = [pool.submit(task.run, root, build_root, build_cache, args.engines,
+                               args.timeout, not args.no_cache) for task in tasks]
+        for future in as_completed(futures):
+            task = future.result()
+            print(f">>> {task.status:<7} {task.time:8.1f}s  {task.name} "
+                  f"({task.engine or 'no conclusive engine'})", flush=True)
+    wall_time = time.perf_counter() - start
+    with open(os.path.join(build_root, "summary.json"), "w") as f:
+        json.dump({"wall_time": round(wall_time, 3), "engines": list(args.engines),
+                   "tasks": [task.summary() for task in tasks]}, f, indent=2)
+    print(report(tasks, wall_time))
+    for task in tasks:
+        if task.status == "FAIL":
+            print(f"Replay the counterexample of {task.name}: python3 -m powerverif.witness "
+                  f"{os.path.dirname(task.log)}/{engine_name(task.engine)} -o cex.stim "
+                  "(see FuncVerif/Core/PythonUtils)")
+    print(cache.report(build_cache.stats(since)))
+    return 0 if all(task.status == "PASS" for task in tasks) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
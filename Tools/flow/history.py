@@ -0,0 +1,299 @@
+import os
+import re
+import sys
+import json
+import sqlite3
+import argparse
+from . import gitroot
+# QoR history and regression report
+#
+# Every run of Tools/qor records the QoR of its units (build/qor/<pdk>/qor.json)
+# in a SQLite database, one row per commit, PDK (ng45, sky130, xil, aig) and
+# unit, so the numbers of a change can be compared with the ones before it:
+# a critical path, area, power, cell count or logic depth which grows by more
+# than a threshold is reported as a regression (and the exit status is 1).
+# The "Performance" sections of Documentation/ are generated from the latest
+# results of each unit (between the QOR markers, the rest is left untouched).
+#
+# Database: $QOR_HISTORY or build/qor/history.sqlite at the root of the repository
+# Usage: Tools/qor_history record build/qor/ng45/qor.json
+#        Tools/qor_history list ng45 -k CondReg
+#        Tools/qor_history compare ng45 --threshold 2 (latest commit against the previous one)
+#        Tools/qor_history compare ng45 --base 3af1b90 --head f9cc076
+#        Tools/qor_history docs (then review the diff of Documentation/)
+
+# Metrics compared between commits, all of them are better when lower
+METRICS = ("arrival", "area", "power", "cells", "levels")
+COLUMNS = ("commit_hash", "date", "pdk", "period", "unit", "status", "cells", "area",
+           "arrival", "worst_slack", "tns", "power", "levels", "startpoint", "endpoint")
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS qor (id INTEGER PRIMARY KEY, {", ".join(COLUMNS)});
+CREATE INDEX IF NOT EXISTS qor_run ON qor (pdk, commit_hash, unit);
+"""
+BEGIN = "<!-- QOR begin: generated by Tools/qor_history docs, do not edit -->"
+END = "<!-- QOR end -->"
+
+
+def short(commit: str) -> str:
+    """
+    >>> short("f9cc0768f5e4d9db7373a5d3495a6a328044f047-dirty")
+    'f9cc0768f5-dirty'
+    """
+    return commit[:10] + ("-dirty" if commit.endswith("-dirty") else "")
+
+
+def history_path() -> str:
+    return os.environ.get("QOR_HISTORY") or os.path.join(gitroot(), "build", "qor",
+                                                         "history.sqlite")
+
+
+class History:
+    """
+    QoR of every recorded run, the latest row of a commit/PDK/unit wins
+    >>> db = History(":memory:")
+    >>> qor = {"cells": 40, "area": 50.0, "arrival": 0.40, "power": 1e-5, "levels": None}
+    >>> db.record({"pdk": "ng45", "commit": "aaaa", "units": {"CondReg": qor}})
+    1
+    >>> db.record({"pdk": "ng45", "commit": "bbbb", "units": {"CondReg": dict(qor, area=60.0)}})
+    1
+    >>> db.commits("ng45")
+    ['aaaa', 'bbbb']
+    >>> [(unit, metric, change) for unit, metric, _, _, change in db.regressions("ng45", 5)]
+    [('CondReg', 'area', 20.0)]
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or history_path()
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+
+    def record(self, summary: dict) -> int:
+        """ Records the units of a qor.json summary, returns the number of rows """
+        rows = []
+        for unit, qor in sorted(summary["units"].items()):
+            row = dict(qor, commit_hash=summary["commit"], date=summary.get("date"),
+                       pdk=summary["pdk"], period=summary.get("period"), unit=unit,
+                       status=qor.get("status", "PASSED"))
+            rows.append(tuple(row.get(column) for column in COLUMNS))
+        with self.db:
+            self.db.executemany(f"INSERT INTO qor ({', '.join(COLUMNS)}) VALUES "
+                                f"({', '.join('?' * len(COLUMNS))})", rows)
+        return len(rows)
+
+    def pdks(self) -> list:
+        return [row[0] for row in self.db.execute("SELECT DISTINCT pdk FROM qor ORDER BY pdk")]
+
+    def commits(self, pdk: str) -> list:
+        """ Commits recorded for (pdk), from the oldest to the latest recording """
+        return [row[0] for row in self.db.execute(
+            "SELECT commit_hash FROM qor WHERE pdk = ? GROUP BY commit_hash ORDER BY MAX(id)",
+            (pdk,))]
+
+    def commit(self, pdk: str, prefix: str) -> str:
+        """ Recorded commit of (pdk) starting with (prefix), the latest one if several """
+        matches = [c for c in self.commits(pdk) if c.startswith(prefix)]
+        if not matches:
+            raise KeyError(f"No QoR recorded for commit {prefix} on {pdk}")
+        return matches[-1]
+
+    def results(self, pdk: str, commit: str) -> dict:
+        """ unit -> latest row of (commit) on (pdk) """
+        return {row["unit"]: dict(row) for row in self.db.execute(
+            "SELECT * FROM qor WHERE pdk = ? AND commit_hash = ? ORDER BY id", (pdk, commit))}
+
+    def latest(self, unit: str) -> dict:
+        """ pdk -> latest row of (unit) which passed """
+        return {row["pdk"]: dict(row) for row in self.db.execute(
+            "SELECT * FROM qor WHERE unit = ? AND status = 'PASSED' ORDER BY id", (unit,))}
+
+    def units(self) -> list:
+        return [row[0] for row in self.db.execute("SELECT DISTINCT unit FROM qor ORDER BY unit")]
+
+    def compare(self, pdk: str, base: str = None, head: str = None) -> list:
+        """
+        (unit, metric, base value, head value, change in %) of the units of
+        both commits, by default the latest commit against the previous one
+        """
+        commits = self.commits(pdk)
+        if not commits:
+            raise KeyError(f"No QoR recorded on {pdk}")
+        head = self.commit(pdk, head) if head else commits[-1]
+        if base:
+            base = self.commit(pdk, base)
+        else:
+            older = commits[:commits.index(head)]
+            if not older:
+                raise KeyError(f"No QoR recorded on {pdk} before commit {head}")
+            base = older[-1]
+        old, new = self.results(pdk, base), self.results(pdk, head)
+        changes = []
+        for unit in sorted(old.keys() & new.keys()):
+            for metric in METRICS:
+                a, b = old[unit][metric], new[unit][metric]
+                if a is None or b is None:
+                    continue
+                change = 100.0 * (b - a) / a if a else (0.0 if b == a else float("inf"))
+                changes.append((unit, metric, a, b, round(change, 2)))
+        return changes
+
+    def regressions(self, pdk: str, threshold: float, base: str = None,
+                    head: str = None) -> list:
+        """ The changes of compare() above (threshold) % """
+        return [c for c in self.compare(pdk, base, head) if c[4] > threshold]
+
+
+def report(changes: list, threshold: float) -> str:
+    """
+    >>> print(report([("CondReg", "area", 50.0, 60.0, 20.0),
+    ...               ("CondReg", "arrival", 0.4, 0.39, -2.5)], 5))
+    unit                 metric         base        head   change
+    CondReg              area             50          60   +20.0%  REGRESSION
+    CondReg              arrival         0.4        0.39    -2.5%
+    """
+    lines = [f"{'unit':<20} {'metric':<8} {'base':>10} {'head':>11} {'change':>8}"]
+    for unit, metric, a, b, change in changes:
+        flag = "  REGRESSION" if change > threshold else ""
+        lines.append(f"{unit:<20} {metric:<8} {a:>10.4g} {b:>11.4g} {change:>+7.1f}%{flag}")
+    return "\n".join(lines)
+
+
+def performance_table(results: dict) -> str:
+    """
+    Markdown table of the latest results (pdk -> row) of a unit
+    >>> print(performance_table({"aig": {"commit_hash": "0123456789ab", "cells": 120,
+    ...     "area": None, "arrival": None, "worst_slack": None, "power": None, "levels": 9,
+    ...     "startpoint": None, "endpoint": None, "period": None}}))
+    | PDK | Commit | Cells | Area (um²) | Critical path | Arrival (ns) | Slack (ns) | Power (W) |
+    |---|---|---|---|---|---|---|---|
+    | aig | 0123456789 | 120 | - | 9 logic levels | - | - | - |
+    """
+    def num(value, fmt):
+        return "-" if value is None else format(value, fmt)
+    lines = ["| PDK | Commit | Cells | Area (um²) | Critical path | Arrival (ns) "
+             "| Slack (ns) | Power (W) |", "|---|---|---|---|---|---|---|---|"]
+    for pdk, row in sorted(results.items()):
+        if row["startpoint"]:
+            path = f"`{row['startpoint']}` -> `{row['endpoint']}`"
+        else:
+            path = "-" if row["levels"] is None else f"{row['levels']} logic levels"
+        lines.append(f"| {pdk} | {short(row['commit_hash'])} | {row['cells']} "
+                     f"| {num(row['area'], '.1f')} | {path} | {num(row['arrival'], '.3f')} "
+                     f"| {num(row['worst_slack'], '.3f')} | {num(row['power'], '.3e')} |")
+    return "\n".join(lines)
+
+
+def update_section(text: str, block: str) -> str:
+    """
+    Replaces the generated part of the "## Performance" section of a markdown
+    document by (block), the text written by hand is kept
+    >>> doc = "# Unit\\n## Performance\\nTODO\\n\\n## Verification\\n"
+    >>> doc = update_section(doc, "| table |")
+    >>> print(doc.replace(BEGIN, "<begin>"))
+    # Unit
+    ## Performance
+    <begin>
+    | table |
+    <!-- QOR end -->
+    TODO
+    <BLANKLINE>
+    ## Verification
+    <BLANKLINE>
+    >>> update_section(doc, "| table |") == doc
+    True
+    """
+    generated = f"{BEGIN}\n{block}\n{END}\n"
+    if BEGIN in text:
+        pattern = re.compile(re.escape(BEGIN) + ".*?" + re.escape(END) + "\n?", re.S)
+        return pattern.sub(lambda _: generated, text, count=1)
+    match = re.search(r"^## Performance[^\n]*\n", text, re.M)
+    if match is None:
+        raise ValueError("No \"## Performance\" section")
+    return text[:match.end()] + generated + text[match.end():]
+
+
+def documentation(root: str, unit: str) -> str:
+    """ Markdown file of Documentation/ describing (unit) (fpu_adder.md for fpu_adder_vanilla) """
+    candidates = [(len(f), os.path.join(directory, f))
+                  for directory, dirs, files in os.walk(os.path.join(root, "Documentation"))
+                  for f in files if f.endswith(".md") and unit.startswith(f[:-3])]
+    return max(candidates)[1] if candidates else None
+
+
+def update_docs(db: History, root: str) -> list:
+    """ Writes the Performance sections of every recorded unit, returns the files changed """
+    changed = []
+    for unit in db.units():
+        results = db.latest(unit)
+        path = documentation(root, unit)
+        if not results or path is None:
+            print(f"{unit}: no documentation or no passing result, skipped")
+            continue
+        with open(path) as f:
+            text = f.read()
+        try:
+            new_text = update_section(text, performance_table(results))
+        except ValueError:
+            print(f"{unit}: {os.path.relpath(path, root)} has no Performance section, skipped")
+            continue
+        if new_text != text:
+            with open(path, "w") as f:
+                f.write(new_text)
+            changed.append(path)
+    return changed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="QoR history: record, compare and document "
+                                                 "the results of Tools/qor")
+    parser.add_argument("--db", help="database (default: $QOR_HISTORY or "
+                                     "build/qor/history.sqlite)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("record", help="record qor.json files written by Tools/qor")
+    p.add_argument("summaries", nargs="+")
+    p = sub.add_parser("list", help="recorded commits and results of a PDK")
+    p.add_argument("pdk")
+    p.add_argument("-k", "--filter", default="", help="only the units containing this string")
+    p = sub.add_parser("compare", help="compare two commits, exit status 1 on a regression")
+    p.add_argument("pdk", nargs="?", help="default: every recorded PDK")
+    p.add_argument("--base", help="commit (prefix), default: the one recorded before head")
+    p.add_argument("--head", help="commit (prefix), default: the latest recorded")
+    p.add_argument("-t", "--threshold", type=float, default=5.0,
+                   help="increase in %% reported as a regression (default: 5)")
+    sub.add_parser("docs", help="generate the Performance sections of Documentation/")
+    args = parser.parse_args(argv)
+
+    db = History(args.db)
+    if args.command == "record":
+        for path in args.summaries:
+            with open(path) as f:
+                print(f"{path}: {db.record(json.load(f))} units recorded")
+    elif args.command == "list":
+        for commit in db.commits(args.pdk):
+            for unit, row in sorted(db.results(args.pdk, commit).items()):
+                if args.filter in unit:
+                    print(f"{short(commit)} {row['date']} {unit:<20} {row['status']:<8} "
+                          + " ".join(f"{m}={row[m]}" for m in METRICS if row[m] is not None))
+    elif args.command == "compare":
+        regressions = 0
+        for pdk in [args.pdk] if args.pdk else db.pdks():
+            try:
+                changes = db.compare(pdk, args.base, args.head)
+            except KeyError as e:
+                print(f"{pdk}: {e.args[0]}")
+                continue
+            print(f">>> {pdk}")
+            print(report(changes, args.threshold))
+            regressions += sum(1 for c in changes if c[4] > args.threshold)
+        print(f"{regressions} regression(s) above {args.threshold}%")
+        return 1 if regressions else 0
+    elif args.command == "docs":
+        for path in update_docs(db, gitroot()):
+            print(f"Updated {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
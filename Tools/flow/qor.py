@@ -0,0 +1,311 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import subprocess
+from . import gitroot, cache, history
+from .regress import Job, run_jobs
+# Batch synthesis and static timing analysis (Quality of Results)
+#
+# Every module of Logic/Core is converted (sv2v, build cache), synthesized by
+# yosys and timed by OpenSTA with the scripts of Tools/ for a PDK, without
+# anyone at the keyboard (BATCH=1: no pause, sta exits after its reports).
+# The units run in parallel, each in build/qor/<pdk>/<unit>/ (netlist and
+# logs are kept), and its QoR is parsed from the yosys statistics and the STA
+# reports: cell count, area, worst slack, critical path and power.
+# The FPGA (xil) and And Inverter Graph (aig) targets are only synthesized:
+# cell count, and the number of logic levels of the AIG.
+# Outputs: build/qor/<pdk>/<unit>/qor.json and build/qor/<pdk>/qor.json, which
+# is also recorded in the QoR history (see history.py)
+#
+# Usage: Tools/qor ng45 -j 4
+#        Tools/qor sky130 -k BranchUnit --period 4.0
+
+# pdk -> environment variable pointing to its files, default clock period (ns)
+# Without a clock period there is no STA
+PDKS = {
+    "ng45": ("NANGATE45", 1.0),
+    "sky130": ("SKY130A", 5.0),
+    "xil": (None, None),
+    "aig": (None, None),
+}
+SOURCES = os.path.join("Logic", "Core")
+LIBRARY = os.path.join("Logic", "Lib")  # Modules instantiated by the units
+
+
+def discover_units(root: str) -> dict:
+    """ unit (module name = file name) -> SystemVerilog file of Logic/Core """
+    units = {}
+    for directory, dirs, files in os.walk(os.path.join(root, SOURCES)):
+        dirs.sort()
+        for f in sorted(files):
+            if f.endswith(".sv"):
+                units[f[:-3]] = os.path.join(directory, f)
+    return units
+
+
+def library(root: str) -> list:
+    """ SystemVerilog files of Logic/Lib, converted with every unit """
+    directory = os.path.join(root, LIBRARY)
+    return [os.path.join(directory, f) for f in sorted(os.listdir(directory)) if f.endswith(".sv")]
+
+
+def parse_stats(text: str) -> dict:
+    """
+    Cell count and area from the output of yosys stat -json
+    >>> parse_stats('Printing statistics.\\n{"design": {"num_cells": 12, "area": 30.5}}')
+    {'cells': 12, 'area': 30.5}
+    """
+    stats, _ = json.JSONDecoder().raw_decode(text, text.index("{"))
+    design = stats.get("design") or next(iter(stats["modules"].values()))
+    return {"cells": design["num_cells"], "area": design.get("area")}
+
+
+_PIN = re.compile(r"^\s*(-?[\d.]+)\s+(-?[\d.]+)\s+[\^v]\s+(\S+)(?:\s+\((\S+)\))?\s*$")
+
+
+def parse_sta(text: str) -> dict:
+    """
+    Worst slack, total negative slack, critical path and power from the
+    reports printed by sta_<pdk>.tcl with BATCH=1
+    >>> qor = parse_sta('''QOR report_checks
+    ... Startpoint: a[0] (input port clocked by clk)
+    ... Endpoint: o[1] (output port clocked by clk)
+    ...    0.0000    0.0000 v input external delay
+    ...    0.0000    0.0000 v a[0] (in)
+    ...    0.0523    0.0523 ^ _12_/ZN (NAND2_X1)
+    ...    0.0300    0.0823 v o[1] (out)
+    ...              0.0823   data arrival time
+    ... QOR report_worst_slack
+    ... worst slack 0.9177
+    ... tns 0.0000
+    ... QOR report_power
+    ... Total                  1.0e-05   2.0e-06   3.0e-07   1.23e-05 100.0%''')
+    >>> qor["worst_slack"], qor["arrival"], qor["power"], qor["endpoint"]
+    (0.9177, 0.0823, 1.23e-05, 'o[1]')
+    >>> [(p["pin"], p["cell"], p["delay"]) for p in qor["critical_path"]]
+    [('a[0]', 'in', 0.0), ('_12_/ZN', 'NAND2_X1', 0.0523), ('o[1]', 'out', 0.03)]
+    """
+    sections = {}
+    name = None
+    for line in text.split("\n"):
+        if line.startswith("QOR "):
+            name = line[4:].strip()
+            sections[name] = []
+        elif name:
+            sections[name].append(line)
+    qor = {"worst_slack": None, "tns": None, "arrival": None, "startpoint": None,
+           "endpoint": None, "critical_path": [], "power": None}
+    for line in sections.get("report_checks", []):
+        if line.startswith("Startpoint:") and qor["startpoint"] is None:
+            qor["startpoint"] = line.split()[1]
+        elif line.startswith("Endpoint:") and qor["endpoint"] is None:
+            qor["endpoint"] = line.split()[1]
+        elif line.strip().endswith("data arrival time"):
+            qor["arrival"] = float(line.split()[0])
+            break
+        elif "external delay" not in line:
+            match = _PIN.match(line)
+            if match:
+                delay, at, pin, cell = match.groups()
+                qor["critical_path"].append({"pin": pin, "cell": cell, "delay": float(delay),
+                                             "time": float(at)})
+    for line in sections.get("report_worst_slack", []):
+        words = line.split()
+        if line.startswith("worst slack"):
+            qor["worst_slack"] = float(words[-1])
+        elif line.startswith("tns"):
+            qor["tns"] = float(words[-1])
+    for line in sections.get("report_power", []):
+        if line.startswith("Total"):
+            qor["power"] = float(line.split()[4])  # Internal, switching, leakage, total
+    return qor
+
+
+def aig_levels(text: str) -> int:
+    """
+    Logic levels (ANDs on the longest path to an output or a latch) of an
+    ASCII AIGER file
+    >>> aig_levels("aag 5 2 0 1 3\\n2\\n4\\n10\\n6 2 4\\n8 6 3\\n10 8 7\\n")
+    3
+    """
+    lines = text.split("\n")
+    _, _, inputs, latches, outputs, ands = lines[0].split()[:6]
+    first = 1 + int(inputs)
+    roots = [int(line.split()[1]) for line in lines[first:first + int(latches)]]
+    first += int(latches)
+    roots += [int(line.split()[0]) for line in lines[first:first + int(outputs)]]
+    first += int(outputs)
+    gates = {}
+    for line in lines[first:first + int(ands)]:
+        lhs, a, b = map(int, line.split())
+        gates[lhs >> 1] = (a >> 1, b >> 1)
+    level = {}
+    for root in roots:
+        stack = [root >> 1]  # The ANDs are not always in order, no recursion on deep graphs
+        while stack:
+            var = stack[-1]
+            todo = [v for v in gates.get(var, ()) if v not in level]
+            if todo:
+                stack.extend(todo)
+                continue
+            level[var] = 1 + max(level[v] for v in gates[var]) if var in gates else 0
+            stack.pop()
+    return max((level[root >> 1] for root in roots), default=0)
+
+
+class Synthesis(Job):
+    """
+    Synthesis and STA of one unit, its QoR in (qor)
+    (defines) are given to sv2v, (env) to yosys and sta, (name) is the name
+    of the job and of its build directory (the unit by default)
+    """
+
+    def __init__(self, unit: str, source: str, pdk: str, period: float, defines: list = (),
+                 env: dict = None, name: str = None):
+        super().__init__(name or unit, ["yosys", f"yosys_{pdk}.tcl"], os.path.dirname(source),
+                         isolated=False, env=env)
+        self.unit = unit
+        self.source = source
+        self.pdk = pdk
+        self.period = period
+        self.defines = list(defines)
+        self.qor = None
+
+    def run(self, build_root: str, timeout: float = None):
+        start = time.perf_counter()
+        job_dir = self.build_dir = os.path.join(build_root, self.name)
+        os.makedirs(job_dir, exist_ok=True)
+        self.log = os.path.join(job_dir, "job.log")
+        tools = os.path.join(gitroot(), "Tools")
+        verilog = os.path.join(job_dir, f"{self.unit}.v")
+        netlist = os.path.join(job_dir, f"{self.unit}.synth.v")
+        stats = os.path.join(job_dir, "stat.json")
+        aiger = os.path.join(job_dir, f"{self.unit}.aag")
+        env = dict(os.environ, BATCH="1", TOPLEVEL=self.unit, VLOG_FILE_NAME=verilog,
+                   SYNTH_OUTPUT=netlist, SYNTH_STATS=stats, **self.env)
+        # (command, its log)
+        steps = [(["yosys", f"yosys_{self.pdk}.tcl"], os.path.join(job_dir, "yosys.log"))]
+        sta_log = os.path.join(job_dir, "sta.log")
+        if self.period is not None:
+            env["CLOCK_PERIOD"] = str(self.period)
+            steps.append((["sta", "-no_splash", "-exit", f"sta_{self.pdk}.tcl"], sta_log))
+        if self.pdk == "aig":
+            env["AIGER_FILE"] = aiger
+        self.status = "PASSED"
+        with open(self.log, "w") as log:
+            try:
+                sources = [self.source] + library(gitroot())
+                if cache.sv2v(cache.Cache(), ["--define=SYNTHESIS"] + self.defines + sources,
+                              verilog):
+                    self.status = "FAILED"
+                for command, output in steps:
+                    if self.status != "PASSED":
+                        break
+                    log.write(f">>> {' '.join(command)} > {output}\n")
+                    log.flush()
+                    with open(output, "w") as f:
+                        result = subprocess.run(command, cwd=tools, env=env, stdout=f,
+                                                stderr=subprocess.STDOUT, timeout=timeout)
+                    if result.returncode != 0:
+                        log.write(f"Error: {command[0]} returned {result.returncode}\n")
+                        self.status = "FAILED"
+                if self.status == "PASSED":
+                    with open(stats) as f:
+                        qor = parse_stats(f.read())
+                    qor.update(parse_sta(""), levels=None)
+                    if self.period is not None:
+                        with open(sta_log) as f:
+                            qor.update(parse_sta(f.read()))
+                    if self.pdk == "aig":
+                        with open(aiger) as f:
+                            qor["levels"] = aig_levels(f.read())
+                    self.qor = dict(unit=self.unit, pdk=self.pdk, period=self.period, **qor)
+                    with open(os.path.join(job_dir, "qor.json"), "w") as f:
+                        json.dump(self.qor, f, indent=2)
+            except subprocess.TimeoutExpired:
+                self.status = "TIMEOUT"
+            except (OSError, ValueError, KeyError) as e:
+                log.write(f"{e}\n")
+                self.status = "FAILED"
+        self.time = time.perf_counter() - start
+        return self
+
+
+def table(jobs: list) -> str:
+    """ One line per unit """
+    lines = [f"{'unit':<20} {'cells':>7} {'area':>10} {'slack':>8} {'arrival':>8} "
+             f"{'power':>10}  critical path"]
+    for job in jobs:
+        q = job.qor
+        if q is None:
+            lines.append(f"{job.name:<20} {job.status}, see {job.log}")
+            continue
+
+        def num(value, fmt):
+            return "-" if value is None else format(value, fmt)
+        if q["startpoint"]:
+            path = f"{q['startpoint']} -> {q['endpoint']}"
+        else:
+            path = "-" if q["levels"] is None else f"{q['levels']} AIG levels"
+        lines.append(f"{job.name:<20} {q['cells']:>7} {num(q['area'], '10.1f')} "
+                     f"{num(q['worst_slack'], '8.3f')} {num(q['arrival'], '8.3f')} "
+                     f"{num(q['power'], '10.3e')}  {path}")
+    return "\n".join(lines)
+
+
+def git_commit(root: str) -> str:
+    """ Commit of the working tree, with -dirty when tracked files were modified """
+    result = subprocess.run(["git", "rev-parse", "HEAD"], cwd=root, capture_output=True,
+                            text=True)
+    status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                            cwd=root, capture_output=True, text=True)
+    return result.stdout.strip() + ("-dirty" if status.stdout.strip() else "")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Synthesize and time every unit of Logic/Core "
+                                                 "in parallel, QoR written as JSON")
+    parser.add_argument("pdk", choices=sorted(PDKS))
+    parser.add_argument("-k", "--filter", default="", help="only the units containing this string")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count())
+    parser.add_argument("--period", type=float, help="clock period in ns (default: per PDK)")
+    parser.add_argument("--timeout", type=float, help="timeout of a unit in seconds")
+    parser.add_argument("-o", "--output", help="build directory (default: build/qor/<pdk>)")
+    parser.add_argument("--no-history", action="store_true",
+                        help="do not record the QoR in the history database")
+    args = parser.parse_args(argv)
+
+    variable, period = PDKS[args.pdk]
+    if variable and not os.path.isdir(os.environ.get(variable, "")):
+        print(f"Error: Please add {args.pdk} to your environment variable ${variable} "
+              f"(see Tools/synth_{args.pdk})")
+        return 1
+    root = gitroot()
+    build_root = args.output or os.path.join(root, "build", "qor", args.pdk)
+    if period is not None:
+        period = args.period or period
+    jobs = [Synthesis(unit, source, args.pdk, period)
+            for unit, source in discover_units(root).items() if args.filter in unit]
+    start = time.perf_counter()
+    run_jobs(jobs, build_root, args.jobs, args.timeout)
+    summary = {"pdk": args.pdk, "period": period, "commit": git_commit(root),
+               "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+               "wall_time": round(time.perf_counter() - start, 3),
+               "units": {job.unit: job.qor or {"status": job.status, "log": job.log}
+                         for job in jobs}}
+    with open(os.path.join(build_root, "qor.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    print(table(jobs))
+    print(f"QoR written to {os.path.join(build_root, 'qor.json')}")
+    if not args.no_history:
+        db = history.History()
+        db.record(summary)
+        print(f"QoR recorded in {db.path}")
+    return 0 if all(job.status == "PASSED" for job in jobs) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
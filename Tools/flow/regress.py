@@ -0,0 +1,217 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from . import gitroot, cache
+# Parallel regression scheduler
+#
+# Discovers the test.sh of HLModel/, FuncVerif/ and FormalVerif/ (like
+# check_before_commit.sh used to) and runs them concurrently, one simulator
+# process per core. Every job runs in its own copy of the test directory
+# under build/regress/ so the generated Makefile products (results.xml,
+# sim_build, *.v...) never collide. The copy keeps its place in the repository
+# (build/regress/<job>/<test dir>), the other entries of its parents being
+# symbolic links to the originals, so the relative paths of the tests
+# (../../../Logic/...) still resolve. Each job's output goes to its job.log and
+# the summary (status and wall-clock time per job) to build/regress/summary.json
+# A test.sh which cannot run here (missing tool...) exits with 77 (like the
+# automake tests): the job is SKIPPED, listed apart, and does not fail the run
+# The hits and misses of the build cache (see cache.py) are reported at the end
+
+TEST_ROOTS = ("HLModel", "FuncVerif", "FormalVerif")
+IGNORED_DIRS = ("systemc-2.3.3/objdir/examples",)
+# Generated files which are not copied into the build directories
+BUILD_PRODUCTS = ("sim_build", "results.xml", "__pycache__", "*.vcd", "*.log", "*.stim",
+                  "*.trace", "build", "objdir")
+# Entries of the repository which are not mirrored in the build directories
+UNMIRRORED = (".git", "build")
+SKIP_EXIT = 77  # Exit code of a skipped test
+LINT_RULES = "-packed-dimensions-range-ordering,-unpacked-dimensions-range-ordering"
+
+
+def mirror(directory: str, root: str, job_dir: str) -> str:
+    """
+    Copies (directory) to the same place under (job_dir) as it has under (root),
+    the other entries of its parents are symbolic links to the ones of (root).
+    A directory outside of (root) is copied to (job_dir). Returns the copy
+    """
+    path = os.path.relpath(os.path.realpath(directory), os.path.realpath(root))
+    if path == os.curdir or path.startswith(os.pardir):
+        shutil.copytree(directory, job_dir, ignore=shutil.ignore_patterns(*BUILD_PRODUCTS))
+        return job_dir
+    parent, src = job_dir, root
+    for part in path.split(os.sep):
+        os.makedirs(parent, exist_ok=True)
+        for entry in os.listdir(src):
+            if entry != part and not (src == root and entry in UNMIRRORED):
+                os.symlink(os.path.join(src, entry), os.path.join(parent, entry))
+        parent, src = os.path.join(parent, part), os.path.join(src, part)
+    shutil.copytree(directory, parent, ignore=shutil.ignore_patterns(*BUILD_PRODUCTS))
+    return parent
+
+
+class Job:
+    """
+    A command run in (directory), in a copy of it if (isolated) is set. The
+    copy is mirrored at its place in (root) (default: the repository)
+    """
+
+    def __init__(self, name: str, command: list, directory: str, isolated: bool = True,
+                 env: dict = None, root: str = None):
+        self.name = name
+        self.command = command
+        self.directory = directory
+        self.isolated = isolated
+        self.env = env or {}
+        self.root = root
+        self.status = "PENDING"
+        self.time = 0.0  # Wall-clock time (s)
+        self.log = None
+        self.build_dir = None  # Everything the job wrote
+        self.work_dir = None  # Where the command ran
+
+    def run(self, build_root: str, timeout: float = None):
+        start = time.perf_counter()
+        job_dir = os.path.join(build_root, self.name)
+        shutil.rmtree(job_dir, ignore_errors=True)
+        if self.isolated:
+            self.work_dir = mirror(self.directory, self.root or gitroot(), job_dir)
+        else:
+            os.makedirs(job_dir)
+            self.work_dir = self.directory
+        self.build_dir = job_dir
+        self.log = os.path.join(job_dir, "job.log")
+        with open(self.log, "w") as log:
+            try:
+                result = subprocess.run(self.command, cwd=self.work_dir, stdout=log,
+                                        stderr=subprocess.STDOUT, timeout=timeout,
+                                        env=dict(os.environ, **self.env))
+                self.status = {0: "PASSED", SKIP_EXIT: "SKIPPED"}.get(result.returncode, "FAILED")
+            except subprocess.TimeoutExpired:
+                self.status = "TIMEOUT"
+            except OSError as e:
+                log.write(f"{e}\n")
+                self.status = "FAILED"
+        self.time = time.perf_counter() - start
+        return self
+
+    def summary(self) -> dict:
+        return {"name": self.name, "status": self.status, "time": round(self.time, 3),
+                "command": self.command, "directory": self.directory, "log": self.log,
+                "env": self.env}
+
+
+def discover_tests(root: str, roots=TEST_ROOTS) -> list:
+    """ One Job per test.sh found under (roots) """
+    jobs = []
+    for test_root in roots:
+        for directory, dirs, files in os.walk(os.path.join(root, test_root)):
+            dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+            if any(ignored in directory for ignored in IGNORED_DIRS):
+                continue
+            if "test.sh" in files:
+                name = os.path.relpath(directory, root)
+                jobs.append(Job(name, ["bash", "./test.sh"], directory, root=root))
+    return jobs
+
+
+def discover_lint(root: str) -> list:
+    """ One verible lint Job per SystemVerilog file of the repository """
+    jobs = []
+    for directory, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if not d.startswith(".") and d != "build")
+        for f in sorted(files):
+            if f.endswith(".sv"):
+                path = os.path.join(directory, f)
+                jobs.append(Job("lint/" + os.path.relpath(path, root),
+                                ["verible-verilog-lint", f"--rules={LINT_RULES}", path],
+                                root, isolated=False))
+    return jobs
+
+
+def run_jobs(jobs: list, build_root: str, workers: int = None, timeout: float = None,
+             fail_fast: bool = False, verbose: bool = True) -> list:
+    """ Runs the jobs concurrently, returns them in the order they were given """
+    os.makedirs(build_root, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [pool.submit(job.run, build_root, timeout) for job in jobs]
+        for future in as_completed(futures):
+            job = future.result()
+            if verbose:
+                print(f">>> {job.status:<7} {job.time:8.1f}s  {job.name}", flush=True)
+            if fail_fast and job.status not in ("PASSED", "SKIPPED"):
+                print(f">>> Stopping the regression (so you cannot miss it ;) ), see {job.log}")
+                for f in futures:
+                    f.cancel()
+                break
+    return jobs
+
+
+def report(jobs: list, wall_time: float) -> str:
+    """ Summary of a regression """
+    lines = ["Regression summary:"]
+    for job in jobs:
+        lines.append(f"    - {job.name:<50} {job.status:<7} {job.time:8.1f}s")
+    failed = [job for job in jobs if job.status not in ("PASSED", "SKIPPED", "PENDING")]
+    skipped = [job for job in jobs if job.status == "SKIPPED"]
+    total = sum(job.time for job in jobs)
+    lines.append(f"{len(jobs) - len(failed) - len(skipped)}/{len(jobs)} passed"
+                 + (f", {len(skipped)} skipped" if skipped else "")
+                 + f", wall-clock {wall_time:.1f}s (serial time {total:.1f}s)")
+    for job in skipped + failed:
+        lines.append(f"    {job.status}: {job.name}, see {job.log}")
+    return "\n".join(lines)
+
+
+def save_summary(path: str, jobs: list, wall_time: float):
+    with open(path, "w") as f:
+        json.dump({"wall_time": round(wall_time, 3), "jobs": [job.summary() for job in jobs]},
+                  f, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the test.sh of every test directory "
+                                                 "in parallel")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="number of jobs running at the same time (default: cores)")
+    parser.add_argument("-k", "--filter", default="",
+                        help="only run the jobs whose name contains this string")
+    parser.add_argument("--lint", action="store_true", help="also lint every SystemVerilog file")
+    parser.add_argument("--timeout", type=float, help="timeout of a job in seconds")
+    parser.add_argument("--fail-fast", action="store_true", default=bool(os.environ.get("DEBUG")),
+                        help="stop on the first fail (default if DEBUG is set)")
+    parser.add_argument("--keep", action="store_true",
+                        help="keep the build directories of the jobs which passed")
+    parser.add_argument("--list", action="store_true", help="only list the jobs")
+    parser.add_argument("-o", "--output", help="build directory (default: build/regress)")
+    args = parser.parse_args(argv)
+
+    root = gitroot()
+    build_root = args.output or os.path.join(root, "build", "regress")
+    jobs = (discover_lint(root) if args.lint else []) + discover_tests(root)
+    jobs = [job for job in jobs if args.filter in job.name]
+    if args.list:
+        print("\n".join(job.name for job in jobs))
+        return 0
+
+    build_cache = cache.Cache()
+    since = build_cache.position()
+    start = time.perf_counter()
+    run_jobs(jobs, build_root, args.jobs, args.timeout, args.fail_fast)
+    wall_time = time.perf_counter() - start
+    if not args.keep:
+        for job in jobs:
+            if job.status == "PASSED" and job.isolated:
+                shutil.rmtree(job.build_dir, ignore_errors=True)
+    save_summary(os.path.join(build_root, "summary.json"), jobs, wall_time)
+    print(report(jobs, wall_time))
+    print(cache.report(build_cache.stats(since)))
+    return 0 if all(job.status in ("PASSED", "SKIPPED") for job in jobs) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,163 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import xml.etree.ElementTree as ET
+from . import gitroot, cache
+from .regress import Job, run_jobs, report
+# Seed-sharded random regressions
+#
+# Runs the cocotb testbench of one unit in N simulator processes at the same
+# time, every shard with its own seed and iteration budget (ITERATIONS, see
+# powerverif.utils.iterations), then merges the results: pass/fail of every
+# shard, failing tests and failing seeds. The seed and the test filter are
+# given to cocotb 1.x (RANDOM_SEED, TESTCASE) and 2.x (COCOTB_RANDOM_SEED,
+# COCOTB_TEST_FILTER); the seed of a shard is the one cocotb reports in its
+# results.xml.
+# A failing shard is rerun alone with: shard <test dir> --seeds <seed> -i <iterations>
+# The shards append their coverage to build/shard/<test dir>/coverage.pvcov
+# (COVERAGE_DB, see powerverif.covdb)
+
+
+def results(path: str) -> tuple:
+    """
+    (testcases, failing testcases, random seed) of a cocotb results.xml, None
+    if there is no result. The seed is a property of the testsuite (cocotb
+    1.x) or of every testcase (cocotb 2.x), None if there is none
+    """
+    if not os.path.exists(path):
+        return None
+    tests, failures, seed = [], [], None
+    root = ET.parse(path).getroot()
+    for prop in root.iter("property"):
+        if prop.get("name") == "random_seed":
+            seed = int(prop.get("value"))
+    for testcase in root.iter("testcase"):
+        name = testcase.get("name")
+        tests.append(name)
+        if testcase.find("failure") is not None or testcase.find("error") is not None:
+            failures.append(name)
+    return tests, failures, seed
+
+
+class Shard(Job):
+    """
+    Testbench run with its own seed, it passes if no test of results.xml
+    failed. (seed) is the seed cocotb used once the shard ran
+    """
+
+    def __init__(self, name: str, directory: str, seed: int, env: dict):
+        super().__init__(name, ["make"], directory,
+                         env=dict(env, RANDOM_SEED=str(seed), COCOTB_RANDOM_SEED=str(seed)))
+        self.assigned_seed = self.seed = seed
+        self.tests = []
+        self.failures = []
+
+    def run(self, build_root: str, timeout: float = None):
+        super().run(build_root, timeout)
+        result = results(os.path.join(self.work_dir, "results.xml"))
+        self.tests, self.failures, seed = result or ([], [], None)
+        if seed is not None:
+            self.seed = seed
+        if self.status == "PASSED" and (result is None or self.failures):
+            self.status = "FAILED"
+        return self
+
+    def summary(self) -> dict:
+        return dict(super().summary(), seed=self.seed, assigned_seed=self.assigned_seed,
+                    tests=self.tests, failures=self.failures)
+
+
+def shard_jobs(directory: str, name: str, seeds: list, iterations: int = None,
+               testcase: str = None, coverage_db: str = None) -> list:
+    """ One Shard running the testbench of (directory) per seed """
+    env = {}
+    if coverage_db:
+        env["COVERAGE_DB"] = coverage_db
+    if iterations is not None:
+        env["ITERATIONS"] = str(iterations)
+    if testcase:
+        env["TESTCASE"] = env["COCOTB_TEST_FILTER"] = testcase
+    return [Shard(f"{name}/seed_{seed}", directory, seed, env) for seed in seeds]
+
+
+def merge(shards: list) -> dict:
+    """ Failing seeds and the seeds every test failed with """
+    merged = {"shards": [shard.summary() for shard in shards], "failing_seeds": [],
+              "failures": {}}
+    for shard in shards:
+        if shard.status not in ("PASSED", "PENDING"):
+            merged["failing_seeds"].append(shard.seed)
+        for test in shard.failures:
+            merged["failures"].setdefault(test, []).append(shard.seed)
+    return merged
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a cocotb testbench in several processes, "
+                                                 "each with its own seed")
+    parser.add_argument("directory", help="test directory (with the cocotb Makefile)")
+    parser.add_argument("-n", "--shards", type=int, default=os.cpu_count(),
+                        help="number of shards (default: cores)")
+    parser.add_argument("-i", "--iterations", type=int,
+                        help="iteration budget of every shard (default: the testbench's)")
+    parser.add_argument("-s", "--seed", type=int,
+                        help="seed of the first shard, the next ones use seed+1... (default: random)")
+    parser.add_argument("--seeds", type=lambda s: [int(seed) for seed in s.split(",")],
+                        help="comma separated seeds (replaces -n and -s), to rerun failing shards")
+    parser.add_argument("-t", "--testcase", help="only run these tests (cocotb 1.x: comma "
+                                                 "separated names, 2.x: a regex)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="number of shards running at the same time (default: cores)")
+    parser.add_argument("--timeout", type=float, help="timeout of a shard in seconds")
+    parser.add_argument("--keep", action="store_true",
+                        help="keep the build directories of the shards which passed")
+    args = parser.parse_args(argv)
+
+    root = gitroot()
+    directory = os.path.realpath(args.directory)
+    name = os.path.relpath(directory, root)
+    build_root = os.path.join(root, "build", "shard")
+    if args.seeds:
+        seeds = args.seeds
+    else:
+        first = random.randrange(2**31) if args.seed is None else args.seed
+        seeds = [first + i for i in range(args.shards)]
+
+    coverage_db = os.path.join(build_root, name, "coverage.pvcov")
+    os.makedirs(os.path.dirname(coverage_db), exist_ok=True)
+    jobs = shard_jobs(directory, name, seeds, args.iterations, args.testcase, coverage_db)
+    build_cache = cache.Cache()
+    since = build_cache.position()
+    start = time.perf_counter()
+    run_jobs(jobs, build_root, args.jobs, args.timeout)
+    wall_time = time.perf_counter() - start
+    merged = merge(jobs)
+    merged.update(directory=name, iterations=args.iterations, wall_time=round(wall_time, 3))
+    if not args.keep:
+        for job in jobs:
+            if job.status == "PASSED":
+                shutil.rmtree(job.build_dir, ignore_errors=True)
+    with open(os.path.join(build_root, name, "summary.json"), "w") as f:
+        json.dump(merged, f, indent=2)
+
+    print(report(jobs, wall_time))
+    print(cache.report(build_cache.stats(since)))
+    if os.path.exists(coverage_db):
+        print(f"Merged coverage: PYTHONPATH=FuncVerif/Core/PythonUtils python3 -m powerverif.covdb "
+              f"report {os.path.relpath(coverage_db, root)}")
+    for test, failing in merged["failures"].items():
+        print(f"    {test} failed with the seeds: {', '.join(map(str, failing))}")
+    if merged["failing_seeds"]:
+        seeds = ",".join(map(str, merged["failing_seeds"]))
+        iterations = f" -i {args.iterations}" if args.iterations is not None else ""
+        print(f"Rerun the failing shards with: Tools/shard {name} --seeds {seeds}{iterations}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,104 @@
+import os
+import sys
+import json
+import time
+import argparse
+import xml.etree.ElementTree as ET
+from . import gitroot
+from .regress import Job, run_jobs
+# Simulator benchmark: cycles per second of every unit with icarus and Verilator
+#
+# Every (unit, simulator) pair runs the long random test of the unit with the
+# same seed and iteration budget. The simulation speed comes from the cocotb
+# results.xml: simulated time (one cycle per ns, every testbench uses a 1ns
+# clock) over the wall-clock time of the test, the build is not included.
+
+CLOCK_PERIOD_NS = 1
+# unit -> (test directory, random test)
+BENCHES = {
+    "BranchUnit": ("FuncVerif/Core/BranchUnit", "test_bf_64b_lockstep"),
+    "CondReg": ("FuncVerif/Core/CondReg", "test_condReg"),
+    "Identify": ("FuncVerif/Core/Identify", "test_identify_random"),
+    "LoadStoreUnit": ("FuncVerif/Core/FixedPoint/LoadStoreUnit", "test_loadstoreunit_replay"),
+}
+SIMULATORS = ("icarus", "verilator")
+
+
+def speed(path: str, test: str):
+    """ (cycles, seconds) of (test) in a cocotb results.xml, None if it did not pass """
+    if not os.path.exists(path):
+        return None
+    for testcase in ET.parse(path).getroot().iter("testcase"):
+        if testcase.get("name") == test and testcase.find("failure") is None:
+            return (float(testcase.get("sim_time_ns")) / CLOCK_PERIOD_NS,
+                    float(testcase.get("time")))
+    return None
+
+
+def bench_jobs(root: str, units: list, simulators: list, iterations: int, seed: int,
+               threads: int) -> list:
+    jobs = []
+    for unit in units:
+        directory, test = BENCHES[unit]
+        for sim in simulators:
+            # Seed and test of cocotb 1.x (the testbenches) and 2.x
+            env = {"SIM": sim, "ITERATIONS": str(iterations), "RANDOM_SEED": str(seed),
+                   "COCOTB_RANDOM_SEED": str(seed), "TESTCASE": test, "COCOTB_TEST_FILTER": test,
+                   "VERILATOR_THREADS": str(threads)}
+            job = Job(f"{unit}/{sim}", ["make"], os.path.join(root, directory), env=env)
+            job.unit, job.sim, job.test = unit, sim, test
+            jobs.append(job)
+    return jobs
+
+
+def table(results: list) -> str:
+    lines = [f"{'unit':<15}{'simulator':<11}{'cycles':>10}{'time (s)':>10}{'cycles/s':>12}"
+             f"{'total (s)':>11}"]
+    for r in results:
+        if r["cycles_per_s"] is None:
+            lines.append(f"{r['unit']:<15}{r['simulator']:<11}{'FAILED, see ' + r['log']}")
+        else:
+            lines.append(f"{r['unit']:<15}{r['simulator']:<11}{r['cycles']:>10.0f}"
+                         f"{r['time']:>10.2f}{r['cycles_per_s']:>12.0f}{r['total_time']:>11.1f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cycles per second of the cocotb testbenches "
+                                                 "with icarus and Verilator")
+    parser.add_argument("units", nargs="*", default=list(BENCHES), help="default: all")
+    parser.add_argument("--sim", action="append", choices=SIMULATORS,
+                        help="simulator to benchmark (can be repeated, default: all)")
+    parser.add_argument("-i", "--iterations", type=int, default=100000,
+                        help="cycles of the random test (default: 100000)")
+    parser.add_argument("-s", "--seed", type=int, default=1)
+    parser.add_argument("-t", "--threads", type=int, default=1,
+                        help="threads of the Verilator models (default: 1)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="benchmarks running at the same time (default: 1, for stable numbers)")
+    parser.add_argument("-o", "--output", help="JSON file for the results")
+    args = parser.parse_args(argv)
+
+    root = gitroot()
+    build_root = os.path.join(root, "build", "simbench")
+    jobs = bench_jobs(root, args.units, args.sim or list(SIMULATORS), args.iterations,
+                      args.seed, args.threads)
+    run_jobs(jobs, build_root, args.jobs)
+    results = []
+    for job in jobs:
+        measure = speed(os.path.join(job.work_dir, "results.xml"), job.test)
+        cycles, seconds = measure or (None, None)
+        results.append({"unit": job.unit, "simulator": job.sim, "cycles": cycles,
+                        "time": seconds, "total_time": round(job.time, 3), "log": job.log,
+                        "cycles_per_s": cycles / seconds if measure and seconds else None})
+    print(table(results))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"date": time.strftime("%Y-%m-%d %H:%M:%S"), "iterations": args.iterations,
+                       "seed": args.seed, "threads": args.threads, "results": results}, f,
+                      indent=2)
+    return 0 if all(r["cycles_per_s"] for r in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
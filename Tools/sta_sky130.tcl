@@ -1,7 +1,13 @@
 # Usage:
-# SYNTH_OUTPUT=... TOP_LEVEL=... sta sta_ng45.tcl
+# SYNTH_OUTPUT=... TOP_LEVEL=... sta sta_sky130.tcl
+# BATCH=1 runs headless: the design is constrained by a clock of CLOCK_PERIOD ns
+# (on i_clk, or virtual), the QoR reports are printed and sta exits, see Tools/qor
+# THROUGH_NET=nia also reports the worst path through the net nia (Tools/critpath)
 
 proc pause {{message "Hit Enter to continue ==> "}} {
+    if {[info exists ::env(BATCH)]} {
+        return
+    }
     puts -nonewline $message
     flush stdout
     gets stdin
@@ -17,3 +23,38 @@ pause;
 sta report_checks -unconstrained  -fields {slew trans net cap input_pin}
 puts "This delay estimate may not be accurate, physical design and parasitic extraction would be much more accurate"
 puts "You can type \"exit\" when you are done"
+
+if {[info exists ::env(BATCH)]} {
+    # Headless QoR reports, parsed by Tools/qor (sections start with "QOR ")
+    set clock_period 5.0
+    if {[info exists ::env(CLOCK_PERIOD)]} {
+        set clock_period $::env(CLOCK_PERIOD)
+    }
+    set clock_port [get_ports -quiet i_clk]
+    if {[llength $clock_port] > 0} {
+        create_clock -name clk -period $clock_period $clock_port
+    } else {
+        create_clock -name clk -period $clock_period
+    }
+    set_input_delay 0 -clock clk [all_inputs]
+    set_output_delay 0 -clock clk [all_outputs]
+    source sky130.sdc
+    puts "QOR report_checks"
+    report_checks -path_delay max -format full -fields {net} -digits 4
+    if {[info exists ::env(THROUGH_NET)]} {
+        # Worst path through a net kept by KEEP_NETS (all its bits), see Tools/critpath
+        set pattern $::env(THROUGH_NET)
+        append pattern {(\[[0-9]+\])?}
+        set through [get_nets -quiet -regexp $pattern]
+        if {[llength $through] > 0} {
+            puts "QOR report_checks_through"
+            report_checks -path_delay max -through $through -format full -fields {net} -digits 4
+        }
+    }
+    puts "QOR report_worst_slack"
+    report_worst_slack -max -digits 4
+    report_tns -digits 4
+    puts "QOR report_power"
+    report_power -digits 6
+    exit
+}
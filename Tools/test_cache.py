@@ -0,0 +1,73 @@
+import os
+import doctest
+import tempfile
+import unittest
+from flow import cache
+from flow.cache import Cache, inputs_key, include_closure
+
+
+class TestCache(unittest.TestCase):
+    """
+    The key of a command changes with every file it reads
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.cache = Cache(os.path.join(self.tmp.name, "cache"))
+        os.makedirs("Logic/Lib")
+        os.makedirs("FuncVerif/Lib/Adder")
+        self.write("Logic/Lib/Adder.sv", "module Adder; endmodule\n")
+        self.write("Logic/Lib/Carry.svh", "`define CARRY 1\n")
+        self.write("FuncVerif/Lib/Adder/test_Adder.sv", '`include "../../../Logic/Lib/Adder.sv"\n')
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    @staticmethod
+    def write(path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def key(self, *inputs):
+        os.chdir("FuncVerif/Lib/Adder")
+        try:
+            return inputs_key(self.cache, "iverilog", "Icarus Verilog 12.0", list(inputs))
+        finally:
+            os.chdir(self.tmp.name)
+
+    def test_include(self):
+        before = self.key("-g2012", "test_Adder.sv")
+        self.assertEqual(self.key("-g2012", "test_Adder.sv"), before)
+        self.write("Logic/Lib/Adder.sv", "module Adder(input a); endmodule\n")
+        self.assertNotEqual(self.key("-g2012", "test_Adder.sv"), before)
+
+    def test_nested_include(self):
+        self.write("Logic/Lib/Adder.sv", '`include "Carry.svh"\nmodule Adder; endmodule\n')
+        before = self.key("test_Adder.sv")
+        self.write("Logic/Lib/Carry.svh", "`define CARRY 0\n")
+        self.assertNotEqual(self.key("test_Adder.sv"), before)
+
+    def test_include_dir(self):
+        self.write("FuncVerif/Lib/Adder/test_Adder.sv", '`include "Carry.svh"\n')
+        self.assertIsNone(self.key("test_Adder.sv"))  # Not found: not cached
+        before = self.key("-I", "../../../Logic/Lib", "test_Adder.sv")
+        self.assertIsNotNone(before)
+        self.write("Logic/Lib/Carry.svh", "`define CARRY 0\n")
+        self.assertNotEqual(self.key("-I../../../Logic/Lib", "test_Adder.sv"), before)
+
+    def test_cycle(self):
+        self.write("Logic/Lib/Adder.sv", '`include "Adder.sv"\n')
+        self.assertEqual(include_closure(["FuncVerif/Lib/Adder/test_Adder.sv"]),
+                         ["FuncVerif/Lib/Adder/../../../Logic/Lib/Adder.sv"])
+
+
+def load_tests(loader, tests, ignore):
+    tests.addTests(doctest.DocTestSuite(cache))
+    return tests
+
+
+if __name__ == '__main__':
+    unittest.main()
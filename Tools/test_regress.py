@@ -0,0 +1,88 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from flow import gitroot
+from flow.regress import Job, discover_tests, run_jobs, report
+
+# Test directories which reach outside of themselves (relative `include and
+# [files] of symbiyosys) and the files with these paths
+RELATIVE_JOBS = {"FormalVerif/Core/CondReg": "CondReg.sby",
+                 "FormalVerif/Core/Identify": "Identify.sby",
+                 "FormalVerif/Core/FixedPoint/LoadStoreUnit": "LoadStoreUnit.sby",
+                 "FuncVerif/Core/Identify": "test_Identify.sv",
+                 "FuncVerif/Lib/Adder": "test_Adder.sv"}
+# Prints the relative paths of a .sby or .sv file which do not exist
+CHECK_PATHS = r"""
+import os, re, sys
+text = open(sys.argv[1]).read()
+paths = re.findall(r'^(\.\./\S+)$', text, re.M) + re.findall(r'`include "(\.\./[^"]+)"', text)
+missing = [path for path in paths if not os.path.exists(path)]
+print(f"{len(paths)} relative paths, missing: {missing}")
+sys.exit(1 if missing or not paths else 0)
+"""
+
+
+class TestRegress(unittest.TestCase):
+
+    def setUp(self):
+        self.root = gitroot()
+        self.build_root = tempfile.mkdtemp()
+        self.jobs = {job.name: job for job in discover_tests(self.root)}
+
+    def tearDown(self):
+        shutil.rmtree(self.build_root)
+
+    def test_relative_paths(self):
+        """ The relative paths of the tests resolve in the copies of build/regress """
+        jobs = [Job(name, [sys.executable, "-c", CHECK_PATHS, f], os.path.join(self.root, name))
+                for name, f in RELATIVE_JOBS.items()]
+        run_jobs(jobs, self.build_root, verbose=False)
+        for job in jobs:
+            with open(job.log) as log:
+                self.assertEqual(job.status, "PASSED", log.read())
+            self.assertEqual(job.work_dir, os.path.join(self.build_root, job.name, job.name))
+            self.assertFalse(os.path.islink(job.work_dir))
+
+    def test_unchanged_sources(self):
+        """ A job writes in its copy, never in the test directory """
+        job = self.jobs["FuncVerif/Lib/Adder"]
+        job.command = ["bash", "-c", "touch new.log && rm test_Adder.sv"]
+        run_jobs([job], self.build_root, verbose=False)
+        self.assertEqual(job.status, "PASSED")
+        self.assertTrue(os.path.exists(os.path.join(job.directory, "test_Adder.sv")))
+        self.assertFalse(os.path.exists(os.path.join(job.directory, "new.log")))
+        self.assertTrue(os.path.exists(os.path.join(job.work_dir, "new.log")))
+
+    def test_skipped(self):
+        """ A test which cannot run here is SKIPPED, not PASSED """
+        job = self.jobs["HLModel/Core/Pipeline"]
+        job.env = {"SYSTEMC_HOME": os.path.join(self.build_root, "no_systemc")}
+        failed = Job("failed", ["false"], self.build_root, isolated=False)
+        run_jobs([job, failed], self.build_root, verbose=False)
+        self.assertEqual((job.status, failed.status), ("SKIPPED", "FAILED"))
+        summary = report([job, failed], 1.0)
+        self.assertIn("0/2 passed, 1 skipped", summary)
+        self.assertIn("SKIPPED: HLModel/Core/Pipeline", summary)
+
+    @unittest.skipUnless(shutil.which("iverilog"), "iverilog is not installed")
+    def test_adder(self):
+        """ The adder library test, with its `include, passes under Tools/regress """
+        job = self.jobs["FuncVerif/Lib/Adder"]
+        run_jobs([job], self.build_root, verbose=False)
+        with open(job.log) as log:
+            self.assertEqual(job.status, "PASSED", log.read())
+
+    @unittest.skipUnless(shutil.which("sby") and shutil.which("yices-smt2"),
+                         "symbiyosys or yices is not installed")
+    def test_condreg_proof(self):
+        """ The CondReg proof, with its [files], passes under Tools/regress """
+        job = self.jobs["FormalVerif/Core/CondReg"]
+        run_jobs([job], self.build_root, verbose=False)
+        with open(job.log) as log:
+            self.assertEqual(job.status, "PASSED", log.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,25 +1,54 @@
 # Usage:
 # TOP_LEVEL=dut VLOG_FILE_NAME=.../dut.v yosys yosys_aig.tcl
+# With AIGER_FILE=.../dut.aag the AIG is also written as an ASCII AIGER file
+# (and the names of its ports in .../dut.map) for the gate-level simulation
+# of powerverif.aig, without stopping to show the intermediate netlists (like
+# BATCH=1). SYNTH_STATS=.../stat.json writes the cell count (yosys stat -json)
+# of the AIG, see Tools/qor
 
 proc pause {{message "Hit Enter to continue ==> "}} {
+    if {[info exists ::env(AIGER_FILE)] || [info exists ::env(BATCH)]} {
+        return
+    }
     puts -nonewline $message
     flush stdout
     gets stdin
 }
 
+proc show_top {} {
+    if {![info exists ::env(AIGER_FILE)] && ![info exists ::env(BATCH)]} {
+        yosys show $::env(TOPLEVEL)
+    }
+}
+
 yosys read_verilog $::env(VLOG_FILE_NAME)
 pause;
 yosys proc
 yosys memory
-yosys show $::env(TOPLEVEL)
+show_top
 pause;
 yosys synth -top $::env(TOPLEVEL)
 yosys flatten
-yosys show $::env(TOPLEVEL)
+show_top
 pause;
 # Synthetize again but the flat design all together
 yosys synth -top $::env(TOPLEVEL)
 yosys abc -g AND,NAND,OR,NOR,ANDNOT,ORNOT # AIG
 yosys clean
-yosys show $::env(TOPLEVEL)
+show_top
 pause;
+
+if {[info exists ::env(AIGER_FILE)]} {
+    # AIGER only has flip-flops on a global clock without reset or enable:
+    # asynchronous resets and enables become logic, then everything is AND/NOT
+    yosys async2sync
+    yosys dffunmap
+    yosys aigmap
+    yosys clean
+    # -no-startoffset: the bits of the map are offsets from the LSB, even for [0:N] ports
+    yosys write_aiger -ascii -no-startoffset -map [file rootname $::env(AIGER_FILE)].map \
+        $::env(AIGER_FILE)
+}
+if {[info exists ::env(SYNTH_STATS)]} {
+    yosys tee -q -o $::env(SYNTH_STATS) stat -json
+}
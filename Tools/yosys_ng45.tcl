@@ -1,11 +1,18 @@
 # Usage:
 # SYNTH_OUTPUT=... TOP_LEVEL=... VLOG_FILE_NAME=.../dut.v yosys yosys_ng45.tcl
+# BATCH=1 does not wait for the user, SYNTH_STATS=.../stat.json writes the
+# cell count and area (yosys stat -json), see Tools/qor
+# KEEP_NETS="nia branch_taken" keeps these nets through the optimizations, so
+# they appear on the timing paths, see Tools/critpath
 
 # compare to the previous version on a 64b adder
 # a[0] -> o[63] 2.2 data arrival time
 # a[0] -> o[63] 0.76 data arrival time
 
 proc pause {{message "Hit Enter to continue ==> "}} {
+    if {[info exists ::env(BATCH)]} {
+        return
+    }
     puts -nonewline $message
     flush stdout
     gets stdin
@@ -13,6 +20,11 @@ proc pause {{message "Hit Enter to continue ==> "}} {
 
 yosys read_verilog $::env(VLOG_FILE_NAME)
 yosys hierarchy -check
+if {[info exists ::env(KEEP_NETS)]} {
+    foreach net $::env(KEEP_NETS) {
+        yosys setattr -set keep 1 w:$net
+    }
+}
 pause;
 #yosys proc; yosys opt; yosys memory; yosys opt; yosys fsm; yosys opt
 yosys tribuf
@@ -33,4 +45,7 @@ yosys opt_clean -purge
 # insert buffer cells
 yosys insbuf -buf BUF_X2 A X
 yosys write_verilog -noattr -noexpr -nohex -nodec -defparam $::env(SYNTH_OUTPUT)
+if {[info exists ::env(SYNTH_STATS)]} {
+    yosys tee -q -o $::env(SYNTH_STATS) stat -json -liberty "$::env(NANGATE45)/lib/NangateOpenCellLibrary_typical.lib"
+}
 pause;
@@ -1,11 +1,18 @@
 # Usage:
-# SYNTH_OUTPUT=... TOP_LEVEL=... VLOG_FILE_NAME=.../dut.v yosys yosys_ng45.tcl
+# SYNTH_OUTPUT=... TOP_LEVEL=... VLOG_FILE_NAME=.../dut.v yosys yosys_sky130.tcl
+# BATCH=1 does not wait for the user, SYNTH_STATS=.../stat.json writes the
+# cell count and area (yosys stat -json), see Tools/qor
+# KEEP_NETS="nia branch_taken" keeps these nets through the optimizations, so
+# they appear on the timing paths, see Tools/critpath
 
 # compare to the previous version on a 64b adder
 # a[0] -> o[63] 9.39 data arrival time
 # a[0] -> o[63] 4.40 data arrival time (match OpenLane's results)
 
 proc pause {{message "Hit Enter to continue ==> "}} {
+    if {[info exists ::env(BATCH)]} {
+        return
+    }
     puts -nonewline $message
     flush stdout
     gets stdin
@@ -13,6 +20,11 @@ proc pause {{message "Hit Enter to continue ==> "}} {
 
 yosys read_verilog $::env(VLOG_FILE_NAME)
 yosys hierarchy -check
+if {[info exists ::env(KEEP_NETS)]} {
+    foreach net $::env(KEEP_NETS) {
+        yosys setattr -set keep 1 w:$net
+    }
+}
 pause;
 yosys tribuf
 yosys synth -top $::env(TOPLEVEL) -flatten
@@ -35,4 +47,7 @@ yosys splitnets
 yosys opt_clean -purge
 yosys insbuf -buf sky130_fd_sc_hd__buf_2 A X
 yosys write_verilog -noattr -noexpr -nohex -nodec -defparam $::env(SYNTH_OUTPUT)
+if {[info exists ::env(SYNTH_STATS)]} {
+    yosys tee -q -o $::env(SYNTH_STATS) stat -json -liberty "$::env(SKY130A)/libs.ref/sky130_fd_sc_hd/lib/sky130_fd_sc_hd__tt_025C_1v80.lib"
+}
 pause;
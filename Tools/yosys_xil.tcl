@@ -1,7 +1,12 @@
 # Usage:
 # SYNTH_OUTPUT=... TOP_LEVEL=... VLOG_FILE_NAME=.../dut.v yosys yosys_xil.tcl
+# BATCH=1 does not wait for the user (nor shows the netlist),
+# SYNTH_STATS=.../stat.json writes the cell count (yosys stat -json), see Tools/qor
 
 proc pause {{message "Hit Enter to continue ==> "}} {
+    if {[info exists ::env(BATCH)]} {
+        return
+    }
     puts -nonewline $message
     flush stdout
     gets stdin
@@ -17,6 +22,11 @@ yosys share -aggressive
 yosys opt
 yosys opt_clean -purge
 yosys stat
-yosys show
+if {![info exists ::env(BATCH)]} {
+    yosys show
+}
+if {[info exists ::env(SYNTH_STATS)]} {
+    yosys tee -q -o $::env(SYNTH_STATS) stat -json
+}
 #yosys write_verilog $::env(SYNTH_OUTPUT)
 pause;
@@ -4,7 +4,6 @@
 
 gitroot="`git rev-parse --show-toplevel`"
 cd $gitroot
-REPORT="" # Summary
 
 
 # Check file references in Documentation
@@ -28,16 +27,19 @@ then
     echo "Error: You do not have Python installed"
     exit 1
 fi
-all_py_files=`find $gitroot -name "*.py"`
-for file in $all_py_files
-do
-    echo ">>> Checking Python syntax on $file"
-    python3 -c "import ast; ast.parse(open(\"$file\").read())"
-    if [[ $? -ne 0 ]]
-    then echo "==> Error in you python file $file, fix it and try again."
-        exit 1
-    fi
-done
+echo ">>> Checking Python syntax"
+python3 - `find $gitroot -name "*.py"` <<'EOF_PY'
+import ast, sys
+for file in sys.argv[1:]:
+    try:
+        ast.parse(open(file).read())
+    except SyntaxError as e:
+        print(f"==> Error in you python file {file}, fix it and try again.\n{e}")
+        sys.exit(1)
+EOF_PY
+if [[ $? -ne 0 ]]
+then exit 1
+fi
 
 # Run formatter on all SystemVerilog files to ensure a consistence reading
 # experience to all contributors
@@ -48,14 +50,12 @@ then
     echo "Make sure it is in your PATH before trying again"
     exit 1
 fi
-for file in `find ./ -name "*.sv"`
-do echo ">>> Running formatter on $file"
-    verible-verilog-format --inplace $file
-    if [[ $? -ne 0 ]]
-    then echo "==> Error while formatting, please fix it and try again"
-        exit 1
-    fi
-done
+echo ">>> Running formatter on all SystemVerilog files"
+verible-verilog-format --inplace `find ./ -name "*.sv"`
+if [[ $? -ne 0 ]]
+then echo "==> Error while formatting, please fix it and try again"
+    exit 1
+fi
 
 # Run Linter on all SystemVerilog files
 if ! command -v verible-verilog-lint &> /dev/null
@@ -65,97 +65,12 @@ then
     echo "Make sure it is in your PATH before trying again"
     exit 1
 fi
-for file in `find ./ -name "*.sv"`
-do echo ">>> Running Linter on $file"
-    verible-verilog-lint --rules=-packed-dimensions-range-ordering,-unpacked-dimensions-range-ordering $file
-    if [[ $? -ne 0 ]]
-    then echo "==> Check failed, please fix it and try again"
-        exit 1
-    fi
-done
-
-REPORT="$REPORT \n High Level Model's tests:"
-cd $gitroot
-# Run all High Level Model tests by executing test.sh in every directories in HLModel/
-for test_file in `find $gitroot/HLModel/ -name "test.sh"`
-do  dir=`dirname $test_file`
-    # Ignore directory HLModel/Lib/systemc-2.3.3/objdir/examples
-    if [[ $dir == *"systemc-2.3.3/objdir/examples"* ]]; then
-        continue
-    fi
-
-    REPORT="$REPORT \n    - $dir   "
-    echo ">>> Running Unit tests on the High Level Model (HLModel) for $dir"
-    cd $dir
-    ./test.sh
-    if ! [ $? -eq 0 ]
-    then
-        REPORT="$REPORT FAILED"
-        echo ">>> Verification failed while testing $dir"
-        echo ">>> Please fix it and try again"
-        if ! [ -z $DEBUG ]; then
-            echo ">>> Stopping the simulation (so you cannot miss it ;) )"
-            exit 1
-        fi
-    fi
-    REPORT="$REPORT PASSED"
-    if [ -x ./clean.sh ]
-    then ./clean.sh
-    fi
-    cd $gitroot
-done
 
-REPORT="$REPORT \n Functional Verification tests:"
-cd $gitroot
-# Run all Functional tests by executing test.sh in every directories in FuncVerif/
-for test_file in `find $gitroot/FuncVerif/ -name "test.sh"`
-do  dir=`dirname $test_file`
-    REPORT="$REPORT \n    - $dir   "
-    echo ">>> Running Functional tests for $dir"
-    cd $dir
-    ./test.sh
-    if ! [ $? -eq 0 ]
-    then
-        REPORT="$REPORT FAILED"
-        echo ">>> Verification failed while testing $dir"
-        echo ">>> Please fix it and try again"
-        echo ">>> Stopping the simulation (so you cannot miss it ;) )"
-        if ! [ -z $DEBUG ]; then
-            echo ">>> Stopping the simulation (so you cannot miss it ;) )"
-            exit 1
-        fi
-    fi
-    REPORT="$REPORT PASSED"
-    if [ -x ./clean.sh ]
-    then ./clean.sh
-    fi
-    cd $gitroot
-done
-
-REPORT="$REPORT \n Formal Verification tests:"
-cd $gitroot
-# Run all Formal tests by executing test.sh in every directories in FormalVerif/
-for test_file in `find $gitroot/FormalVerif/ -name "test.sh"`
-do  dir=`dirname $test_file`
-    REPORT="$REPORT \n    - $dir   "
-    echo ">>> Running Formal tests for $dir"
-    cd $dir
-    ./test.sh
-    if ! [ $? -eq 0 ]
-    then
-        REPORT="$REPORT FAILED"
-        echo ">>> Verification failed while testing $dir"
-        echo ">>> Please fix it and try again"
-        if ! [ -z $DEBUG ]; then
-            echo ">>> Stopping the simulation (so you cannot miss it ;) )"
-            exit 1
-        fi
-    fi
-    REPORT="$REPORT PASSED"
-    if [ -x ./clean.sh ]
-    then ./clean.sh
-    fi
-    cd $gitroot
-done
-
-echo -e "$REPORT" # Print a Summary
+# Run the Linter on all SystemVerilog files and all the tests (High Level
+# Model, Functional and Formal Verification) in parallel, see Tools/regress
+# With DEBUG set, the regression stops on the first fail
+$gitroot/Tools/regress --lint
+if [[ $? -ne 0 ]]
+then echo ">>> Verification failed, please fix it and try again"
+    exit 1
+fi